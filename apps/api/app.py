@@ -209,6 +209,15 @@ def create_app(config_class=Config):
         from apps.api.models.token_blacklist import TokenBlacklist
         jti = jwt_payload['jti']
         return TokenBlacklist.is_token_revoked(jti)
+
+    # Warm the revoked-JTI cache so the first requests skip the blocklist query
+    with app.app_context():
+        try:
+            from apps.api.models.token_blacklist import TokenBlacklist
+            TokenBlacklist.warm_revocation_cache()
+        except Exception as exc:
+            db.session.rollback()
+            app.logger.debug("Token revocation cache not warmed: %s", exc)
     
     # Register blueprints
     from apps.api.routes import (
@@ -262,10 +271,12 @@ def create_app(config_class=Config):
             result.fetchone()
             db.session.rollback()  # Don't leave transaction open
             elapsed = time.time() - start
+            from apps.api.models.token_blacklist import TokenBlacklist
             return jsonify({
                 'status': 'healthy',
                 'database': 'connected',
                 'latency_ms': round(elapsed * 1000, 2),
+                'token_revocation_cache': TokenBlacklist.revocation_cache_stats(),
                 'service': 'MunLink Region III API'
             }), 200
         except Exception as e:
@@ -246,9 +246,100 @@ class Config:
     JWT_REFRESH_COOKIE_PATH = '/'
     # CSRF protection for cookie-based auth (recommended: True in production)
     JWT_COOKIE_CSRF_PROTECT = (os.getenv('JWT_COOKIE_CSRF_PROTECT', 'False') == 'True')
+    # Revoked-JTI cache (see models/token_blacklist.py). Sync interval bounds how long
+    # a logout on another worker can go unnoticed; 0 disables cached negatives.
+    TOKEN_REVOCATION_CACHE_SIZE = int(os.getenv('TOKEN_REVOCATION_CACHE_SIZE', 50000))
+    TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', 5))
     
     # Admin Security - ADMIN_SECRET_KEY is REQUIRED in production
     ADMIN_SECRET_KEY = _require_env('ADMIN_SECRET_KEY', 'admin-dev-secret-for-local-development-only')
+    # Seconds an admin's resolved role/scope is reused across requests (0 disables).
+    # Role/scope changes apply on commit in the process that made them; other
+    # worker processes may keep the old scope for up to this long
+    ADMIN_CONTEXT_CACHE_SECONDS = float(os.getenv('ADMIN_CONTEXT_CACHE_SECONDS', 30))
+    # Seconds dashboard/stat rollups are reused per municipality scope (0 disables),
+    # and how many scope/range entries are kept (least recently used dropped first)
+    ADMIN_STATS_CACHE_SECONDS = float(os.getenv('ADMIN_STATS_CACHE_SECONDS', 15))
+    ADMIN_STATS_CACHE_SIZE = int(os.getenv('ADMIN_STATS_CACHE_SIZE', 1024))
+    # Seconds list-endpoint totals are reused per filter set (0 counts every page),
+    # and how many filter sets are kept (least recently used dropped first)
+    PAGINATION_TOTAL_CACHE_SECONDS = float(os.getenv('PAGINATION_TOTAL_CACHE_SECONDS', 30))
+    PAGINATION_TOTAL_CACHE_SIZE = int(os.getenv('PAGINATION_TOTAL_CACHE_SIZE', 1024))
+    # Public reference data (locations, document types, issue categories):
+    # server-side reuse (0 disables), how often table fingerprints are re-read to
+    # catch out-of-process writes, and the Cache-Control max-age sent to clients
+    REFERENCE_CACHE_SECONDS = float(os.getenv('REFERENCE_CACHE_SECONDS', 300))
+    REFERENCE_CACHE_CHECK_SECONDS = float(os.getenv('REFERENCE_CACHE_CHECK_SECONDS', 30))
+    REFERENCE_CACHE_MAX_AGE = int(os.getenv('REFERENCE_CACHE_MAX_AGE', 300))
+    # Uploaded photos (profiles, marketplace, announcements, issues): EXIF stripped,
+    # longest side clamped to IMAGE_MAX_DIMENSION and re-encoded as IMAGE_FORMAT
+    # ('webp' or 'jpeg'); thumbnails use IMAGE_THUMBNAIL_QUALITY (False stores originals)
+    IMAGE_PIPELINE_ENABLED = os.getenv('IMAGE_PIPELINE_ENABLED', 'True') == 'True'
+    IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', 'webp')
+    IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 2048))
+    IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 82))
+    IMAGE_THUMBNAIL_QUALITY = int(os.getenv('IMAGE_THUMBNAIL_QUALITY', 75))
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+    # Supabase signed URLs: extra lifetime signed beyond the caller's expires_in,
+    # during which the URL is reused per (bucket, path) (0 signs every call)
+    SUPABASE_SIGNED_URL_CACHE_SECONDS = int(os.getenv('SUPABASE_SIGNED_URL_CACHE_SECONDS', 900))
+    SUPABASE_SIGNED_URL_CACHE_SIZE = int(os.getenv('SUPABASE_SIGNED_URL_CACHE_SIZE', 4096))
+    # Uploads larger than this use Supabase's resumable (TUS) endpoint
+    SUPABASE_RESUMABLE_THRESHOLD_MB = float(os.getenv('SUPABASE_RESUMABLE_THRESHOLD_MB', 6))
+    # Identity and supporting documents are stored once per SHA-256 under blobs/
+    # and reference-counted in stored_blobs (False stores every upload separately)
+    UPLOAD_DEDUP_ENABLED = os.getenv('UPLOAD_DEDUP_ENABLED', 'True') == 'True'
+    # Background exports: 'thread' (in-process), 'worker' (scripts/export_worker.py) or 'inline'
+    EXPORT_JOB_RUNNER = os.getenv('EXPORT_JOB_RUNNER', 'thread')
+    # Seconds an identical finished export is handed out instead of re-rendering
+    EXPORT_JOB_REUSE_SECONDS = int(os.getenv('EXPORT_JOB_REUSE_SECONDS', 600))
+    # Seconds a job may stay 'running' before it is presumed crashed and failed
+    EXPORT_JOB_TIMEOUT_SECONDS = int(os.getenv('EXPORT_JOB_TIMEOUT_SECONDS', 1800))
+    EXPORT_MAX_SIZE_MB = int(os.getenv('EXPORT_MAX_SIZE_MB', 200))
+    # Announcement/program fan-out: audiences up to INLINE_MAX are queued in the
+    # request; larger ones run in the background ('thread' or 'inline') in chunks
+    NOTIFICATION_FANOUT_INLINE_MAX = int(os.getenv('NOTIFICATION_FANOUT_INLINE_MAX', 500))
+    NOTIFICATION_FANOUT_CHUNK = int(os.getenv('NOTIFICATION_FANOUT_CHUNK', 5000))
+    NOTIFICATION_FANOUT_RUNNER = os.getenv('NOTIFICATION_FANOUT_RUNNER', 'thread')
+    # Seconds a fan-out may stay 'running' before the notification worker restarts it
+    NOTIFICATION_FANOUT_TIMEOUT_SECONDS = int(os.getenv('NOTIFICATION_FANOUT_TIMEOUT_SECONDS', 1800))
+    # Outbox delivery: provider calls in flight per batch (1 = sequential),
+    # capped per channel to stay within SendGrid/SMTP and PhilSMS limits
+    NOTIFICATION_DELIVERY_CONCURRENCY = int(os.getenv('NOTIFICATION_DELIVERY_CONCURRENCY', 4))
+    NOTIFICATION_EMAIL_CONCURRENCY = int(os.getenv('NOTIFICATION_EMAIL_CONCURRENCY', 8))
+    NOTIFICATION_SMS_CONCURRENCY = int(os.getenv('NOTIFICATION_SMS_CONCURRENCY', 4))
+    # Worker sharding: replica index and count (rows with id % SHARDS == SHARD; 1 = off)
+    NOTIFICATION_WORKER_SHARD = int(os.getenv('NOTIFICATION_WORKER_SHARD', 0))
+    NOTIFICATION_WORKER_SHARDS = int(os.getenv('NOTIFICATION_WORKER_SHARDS', 1))
+    # One JSON 'notification_batch' log line per delivered batch (stage timings, outcomes)
+    NOTIFICATION_METRICS_LOG = os.getenv('NOTIFICATION_METRICS_LOG', 'True') == 'True'
+    # Document-ready emails: attachments are loaded from storage at send time ('thread'
+    # delivers right after the admin action, 'worker' leaves them to notification_worker.py)
+    NOTIFICATION_ATTACHMENT_RUNNER = os.getenv('NOTIFICATION_ATTACHMENT_RUNNER', 'thread')
+    NOTIFICATION_ATTACHMENT_MAX_MB = float(os.getenv('NOTIFICATION_ATTACHMENT_MAX_MB', 20))
+    # Provider governor: messages/second per channel (0 = unlimited), and the circuit
+    # breaker that stops calling a provider after N consecutive failures
+    NOTIFICATION_RATE_EMAIL = float(os.getenv('NOTIFICATION_RATE_EMAIL', 0))
+    NOTIFICATION_RATE_SMS = float(os.getenv('NOTIFICATION_RATE_SMS', 0))
+    PROVIDER_BREAKER_THRESHOLD = int(os.getenv('PROVIDER_BREAKER_THRESHOLD', 5))
+    PROVIDER_BREAKER_RESET_SECONDS = float(os.getenv('PROVIDER_BREAKER_RESET_SECONDS', 60))
+    # Worker wakeup (notification_worker.py --listen): NOTIFY channel, and a direct or
+    # session-mode URL for the LISTEN connection when DATABASE_URL is a transaction pooler
+    NOTIFICATION_WAKEUP_CHANNEL = os.getenv('NOTIFICATION_WAKEUP_CHANNEL', 'notification_outbox')
+    NOTIFICATION_LISTEN_DATABASE_URL = os.getenv('NOTIFICATION_LISTEN_DATABASE_URL', '')
+    # Outbox retention (scripts/maintenance/archive_notification_outbox.py): terminal rows
+    # older than N days move to notification_outbox_archive; archive purge 0 = never
+    NOTIFICATION_OUTBOX_RETENTION_DAYS = int(os.getenv('NOTIFICATION_OUTBOX_RETENTION_DAYS', 30))
+    NOTIFICATION_OUTBOX_ARCHIVE_BATCH = int(os.getenv('NOTIFICATION_OUTBOX_ARCHIVE_BATCH', 1000))
+    NOTIFICATION_ARCHIVE_RETENTION_DAYS = int(os.getenv('NOTIFICATION_ARCHIVE_RETENTION_DAYS', 0))
+    # Outbound HTTP (SendGrid, PhilSMS, Supabase Storage): pooled keep-alive
+    # connections per host, default timeouts and retries on 429/5xx
+    HTTP_CLIENT_POOL_SIZE = int(os.getenv('HTTP_CLIENT_POOL_SIZE', 16))
+    HTTP_CLIENT_CONNECT_TIMEOUT = float(os.getenv('HTTP_CLIENT_CONNECT_TIMEOUT', 5))
+    HTTP_CLIENT_READ_TIMEOUT = float(os.getenv('HTTP_CLIENT_READ_TIMEOUT', 30))
+    HTTP_CLIENT_RETRIES = int(os.getenv('HTTP_CLIENT_RETRIES', 2))
+    HTTP_CLIENT_BACKOFF_SECONDS = float(os.getenv('HTTP_CLIENT_BACKOFF_SECONDS', 0.5))
+    HTTP_CLIENT_MAX_BACKOFF_SECONDS = float(os.getenv('HTTP_CLIENT_MAX_BACKOFF_SECONDS', 10))
     
     # Rate Limiting Configuration
     RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
@@ -281,6 +372,10 @@ class Config:
     SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
     SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'True') == 'True'
+    SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 30))
+    # Outbox batches reuse SMTP sessions; each is retired after this many messages
+    SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
     # Sender email address (used by both SendGrid and SMTP)
     FROM_EMAIL = os.getenv('FROM_EMAIL', '')
 
@@ -292,6 +387,10 @@ class Config:
     PHILSMS_API_KEY = os.getenv('PHILSMS_API_KEY', '')
     PHILSMS_SENDER_ID = os.getenv('PHILSMS_SENDER_ID', '')
     PHILSMS_BASE_URL = os.getenv('PHILSMS_BASE_URL', 'https://dashboard.philsms.com/api/v3')
+    # Recipients per PhilSMS send request. The v3 API documents a single recipient,
+    # so the default sends one request per number; raise it (comma-separated
+    # recipients) only once the account is verified to accept lists
+    PHILSMS_MAX_RECIPIENTS = int(os.getenv('PHILSMS_MAX_RECIPIENTS', 1))
     SMS_CAPABILITY_CACHE_SECONDS = int(os.getenv('SMS_CAPABILITY_CACHE_SECONDS', 90))
 
     # Manual QR Payment (global)
@@ -0,0 +1,59 @@
+"""Add export_jobs table for background admin exports.
+
+Revision ID: 20261016_export_jobs
+Revises: 20260205_office_payment_ver
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_export_jobs"
+down_revision = "20260205_office_payment_ver"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("export_jobs"):
+        return
+
+    op.create_table(
+        "export_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_id", sa.String(length=36), nullable=False),
+        sa.Column("requested_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("entity", sa.String(length=30), nullable=False),
+        sa.Column("fmt", sa.String(length=10), nullable=False),
+        sa.Column("range_param", sa.String(length=30), nullable=True),
+        sa.Column("scope_key", sa.String(length=100), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=True),
+        sa.Column("cache_key", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="queued"),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("processed_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("file_path", sa.String(length=500), nullable=True),
+        sa.Column("file_name", sa.String(length=255), nullable=True),
+        sa.Column("content_type", sa.String(length=100), nullable=True),
+        sa.Column("file_size", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("job_id", name="uq_export_jobs_job_id"),
+    )
+    op.create_index("ix_export_jobs_cache_key", "export_jobs", ["cache_key", "created_at"])
+    op.create_index("ix_export_jobs_status", "export_jobs", ["status", "created_at"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("export_jobs"):
+        return
+    op.drop_index("ix_export_jobs_status", table_name="export_jobs")
+    op.drop_index("ix_export_jobs_cache_key", table_name="export_jobs")
+    op.drop_table("export_jobs")
@@ -0,0 +1,47 @@
+"""Add notification_fanouts table for bulk notification progress.
+
+Revision ID: 20261017_notification_fanouts
+Revises: 20261016_export_jobs
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_notification_fanouts"
+down_revision = "20261016_export_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("notification_fanouts"):
+        return
+
+    op.create_table(
+        "notification_fanouts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_type", sa.String(length=100), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="queued"),
+        sa.Column("total_recipients", sa.Integer(), nullable=True),
+        sa.Column("processed_recipients", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("queued_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_notification_fanouts_entity", "notification_fanouts", ["event_type", "entity_id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("notification_fanouts"):
+        return
+    op.drop_index("ix_notification_fanouts_entity", table_name="notification_fanouts")
+    op.drop_table("notification_fanouts")
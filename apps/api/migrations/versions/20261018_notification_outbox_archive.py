@@ -0,0 +1,76 @@
+"""Add notification_outbox_archive and a partial index for active outbox rows.
+
+Revision ID: 20261018_outbox_archive
+Revises: 20261017_notification_fanouts
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_outbox_archive"
+down_revision = "20261017_notification_fanouts"
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_WHERE = sa.text("status IN ('pending', 'processing')")
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table("notification_outbox_archive"):
+        op.create_table(
+            "notification_outbox_archive",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("resident_id", sa.Integer(), nullable=False),
+            sa.Column("channel", sa.String(length=10), nullable=False),
+            sa.Column("event_type", sa.String(length=100), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=True),
+            sa.Column("payload", sa.JSON(), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("dedupe_key", sa.String(length=255), nullable=False, unique=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column("archived_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        )
+        op.create_index("ix_notification_outbox_archive_resident", "notification_outbox_archive", ["resident_id"])
+        op.create_index("ix_notification_outbox_archive_archived_at", "notification_outbox_archive", ["archived_at"])
+
+    if not inspector.has_table("notification_outbox"):
+        return
+    indexes = {ix["name"] for ix in inspector.get_indexes("notification_outbox")}
+    if "ix_notification_outbox_active" not in indexes:
+        op.create_index(
+            "ix_notification_outbox_active",
+            "notification_outbox",
+            ["status", "next_attempt_at"],
+            postgresql_where=ACTIVE_WHERE,
+            sqlite_where=ACTIVE_WHERE,
+        )
+    # The full (status, next_attempt_at) index is superseded by the partial one
+    if "ix_notification_outbox_status_next" in indexes:
+        op.drop_index("ix_notification_outbox_status_next", table_name="notification_outbox")
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if inspector.has_table("notification_outbox"):
+        indexes = {ix["name"] for ix in inspector.get_indexes("notification_outbox")}
+        if "ix_notification_outbox_status_next" not in indexes:
+            op.create_index("ix_notification_outbox_status_next", "notification_outbox", ["status", "next_attempt_at"])
+        if "ix_notification_outbox_active" in indexes:
+            op.drop_index("ix_notification_outbox_active", table_name="notification_outbox")
+
+    if inspector.has_table("notification_outbox_archive"):
+        op.drop_index("ix_notification_outbox_archive_archived_at", table_name="notification_outbox_archive")
+        op.drop_index("ix_notification_outbox_archive_resident", table_name="notification_outbox_archive")
+        op.drop_table("notification_outbox_archive")
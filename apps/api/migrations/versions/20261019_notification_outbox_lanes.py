@@ -0,0 +1,74 @@
+"""Add priority lanes to the notification outbox.
+
+Revision ID: 20261019_outbox_lanes
+Revises: 20261018_outbox_archive
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_outbox_lanes"
+down_revision = "20261018_outbox_archive"
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_WHERE = sa.text("status IN ('pending', 'processing')")
+
+
+def _columns(inspector, table):
+    return {col["name"] for col in inspector.get_columns(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table in ("notification_outbox", "notification_outbox_archive"):
+        if inspector.has_table(table) and "lane" not in _columns(inspector, table):
+            op.add_column(
+                table,
+                sa.Column("lane", sa.String(length=20), nullable=False, server_default="transactional"),
+            )
+
+    if not inspector.has_table("notification_outbox"):
+        return
+    # Existing announcement/program rows belong to the bulk lane
+    op.execute(sa.text(
+        "UPDATE notification_outbox SET lane = 'bulk' "
+        "WHERE event_type IN ('announcement_published', 'benefit_program_created') "
+        "AND status IN ('pending', 'processing')"
+    ))
+    indexes = {ix["name"] for ix in inspector.get_indexes("notification_outbox")}
+    if "ix_notification_outbox_active" in indexes:
+        op.drop_index("ix_notification_outbox_active", table_name="notification_outbox")
+    op.create_index(
+        "ix_notification_outbox_active",
+        "notification_outbox",
+        ["lane", "status", "next_attempt_at"],
+        postgresql_where=ACTIVE_WHERE,
+        sqlite_where=ACTIVE_WHERE,
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if inspector.has_table("notification_outbox"):
+        indexes = {ix["name"] for ix in inspector.get_indexes("notification_outbox")}
+        if "ix_notification_outbox_active" in indexes:
+            op.drop_index("ix_notification_outbox_active", table_name="notification_outbox")
+        op.create_index(
+            "ix_notification_outbox_active",
+            "notification_outbox",
+            ["status", "next_attempt_at"],
+            postgresql_where=ACTIVE_WHERE,
+            sqlite_where=ACTIVE_WHERE,
+        )
+
+    for table in ("notification_outbox", "notification_outbox_archive"):
+        if inspector.has_table(table) and "lane" in _columns(inspector, table):
+            op.drop_column(table, "lane")
@@ -0,0 +1,40 @@
+"""Store resized image variants for marketplace items and announcements.
+
+Revision ID: 20261020_image_variants
+Revises: 20261019_outbox_lanes
+Create Date: 2026-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261020_image_variants"
+down_revision = "20261019_outbox_lanes"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("items", "announcements")
+
+
+def _columns(inspector, table):
+    return {col["name"] for col in inspector.get_columns(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table in TABLES:
+        if inspector.has_table(table) and "image_variants" not in _columns(inspector, table):
+            op.add_column(table, sa.Column("image_variants", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table in TABLES:
+        if inspector.has_table(table) and "image_variants" in _columns(inspector, table):
+            op.drop_column(table, "image_variants")
@@ -0,0 +1,44 @@
+"""Add stored_blobs table for content-addressed uploads.
+
+Revision ID: 20261021_stored_blobs
+Revises: 20261020_image_variants
+Create Date: 2026-10-21
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261021_stored_blobs"
+down_revision = "20261020_image_variants"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("stored_blobs"):
+        return
+
+    op.create_table(
+        "stored_blobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("storage_path", sa.String(length=200), nullable=False, unique=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("content_type", sa.String(length=100), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("last_referenced_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.create_index("ix_stored_blobs_sha256", "stored_blobs", ["sha256"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("stored_blobs"):
+        return
+    op.drop_index("ix_stored_blobs_sha256", table_name="stored_blobs")
+    op.drop_table("stored_blobs")
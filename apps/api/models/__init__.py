@@ -18,11 +18,13 @@ from .benefit import BenefitProgram, BenefitApplication
 from .token_blacklist import TokenBlacklist
 from .audit import AuditLog
 from .refresh_token import RefreshTokenFamily, RefreshToken
-from .notification import NotificationOutbox
+from .notification import NotificationOutbox, NotificationOutboxArchive, NotificationFanout
 from .email_verification_code import EmailVerificationCode
 from .password_reset_token import PasswordResetToken
 from .admin_audit_log import AdminAuditLog, AuditAction
 from .special_status import UserSpecialStatus
+from .export_job import ExportJob
+from .stored_blob import StoredBlob
 
 __all__ = [
     'User',
@@ -42,9 +44,13 @@ __all__ = [
     'RefreshTokenFamily',
     'RefreshToken',
     'NotificationOutbox',
+    'NotificationOutboxArchive',
+    'NotificationFanout',
     'EmailVerificationCode',
     'PasswordResetToken',
     'AdminAuditLog',
     'AuditAction',
     'UserSpecialStatus',
+    'ExportJob',
+    'StoredBlob',
 ]
@@ -35,6 +35,8 @@ class Announcement(db.Model):
     created_by_staff_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     priority = db.Column(db.String(20), nullable=False, default='medium')  # high, medium, low
     images = db.Column(db.JSON, nullable=True)
+    # Resized copies per image path: {path: {'thumb': path, 'medium': path}}
+    image_variants = db.Column(db.JSON, nullable=True)
     external_url = db.Column(db.String(500), nullable=True)
     pinned = db.Column(db.Boolean, default=False, nullable=False)
     pinned_until = db.Column(db.DateTime, nullable=True)
@@ -69,6 +71,15 @@ class Announcement(db.Model):
     def __repr__(self):
         return f'<Announcement {self.title}>'
 
+    def set_image_variants(self, path, variants):
+        """Record resized copies of the image stored at ``path``."""
+        if variants:
+            self.image_variants = {**(self.image_variants or {}), path: dict(variants)}
+
+    def current_image_variants(self):
+        images = set(self.images or [])
+        return {path: v for path, v in (self.image_variants or {}).items() if path in images}
+
     def to_dict(self):
         """Convert announcement to dictionary with scoped metadata and safe UTC datetimes."""
         now = utc_now()
@@ -98,6 +109,7 @@ class Announcement(db.Model):
             'created_by_name': f"{self.creator.first_name} {self.creator.last_name}" if self.creator else None,
             'priority': self.priority,
             'images': self.images or [],
+            'image_variants': self.current_image_variants(),
             'external_url': self.external_url,
             'pinned': bool(self.pinned),
             'pinned_until': pinned_until.isoformat() if pinned_until else None,
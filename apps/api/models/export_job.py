@@ -0,0 +1,74 @@
+"""Background admin export jobs."""
+import uuid
+from apps.api.utils.time import utc_now
+try:
+    from apps.api import db
+except ImportError:
+    from apps.api import db
+
+
+class ExportJob(db.Model):
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+    # What to export
+    entity = db.Column(db.String(30), nullable=False)
+    fmt = db.Column(db.String(10), nullable=False)
+    range_param = db.Column(db.String(30), nullable=True)
+    scope_key = db.Column(db.String(100), nullable=False)  # municipality scope (or staff scope for announcements)
+    params = db.Column(db.JSON, nullable=True)
+    # Identical (entity, fmt, scope, range) requests share this key so recent artifacts can be reused
+    cache_key = db.Column(db.String(255), nullable=False)
+
+    # Progress
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    total_rows = db.Column(db.Integer, nullable=True)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+
+    # Result
+    file_path = db.Column(db.String(500), nullable=True)  # storage path (private bucket) or local relative path
+    file_name = db.Column(db.String(255), nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_export_jobs_cache_key', 'cache_key', 'created_at'),
+        db.Index('ix_export_jobs_status', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<ExportJob {self.job_id} {self.entity}.{self.fmt} {self.status}>'
+
+    def progress(self):
+        if self.status == 'completed':
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return round(min(1.0, (self.processed_rows or 0) / float(self.total_rows)), 4)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'entity': self.entity,
+            'format': self.fmt,
+            'range': self.range_param,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'progress': self.progress(),
+            'error': self.error,
+            'file_name': self.file_name,
+            'file_size': self.file_size,
+            'download_url': f'/api/admin/exports/jobs/{self.job_id}/download' if self.status == 'completed' else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+        }
@@ -39,6 +39,8 @@ class Item(db.Model):
     
     # Images (stored as JSON array of paths)
     images = db.Column(db.JSON, nullable=True)
+    # Resized copies per image path: {path: {'thumb': path, 'medium': path}}
+    image_variants = db.Column(db.JSON, nullable=True)
     
     # Status
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected, available, reserved, completed, cancelled
@@ -77,6 +79,15 @@ class Item(db.Model):
     def __repr__(self):
         return f'<Item {self.title}>'
     
+    def set_image_variants(self, path, variants):
+        """Record resized copies of the image stored at ``path``."""
+        if variants:
+            self.image_variants = {**(self.image_variants or {}), path: dict(variants)}
+
+    def current_image_variants(self):
+        images = set(self.images or [])
+        return {path: v for path, v in (self.image_variants or {}).items() if path in images}
+
     def to_dict(self, include_user=False):
         """Convert item to dictionary."""
         data = {
@@ -94,6 +105,7 @@ class Item(db.Model):
             'barangay_id': self.barangay_id,
             'pickup_location': self.pickup_location,
             'images': self.images,
+            'image_variants': self.current_image_variants(),
             'status': self.status,
             'is_active': self.is_active,
             'approved_by': self.approved_by,
@@ -16,6 +16,8 @@ class NotificationOutbox(db.Model):
     event_type = db.Column(db.String(100), nullable=False)
     entity_id = db.Column(db.Integer, nullable=True)
     payload = db.Column(db.JSON, nullable=True)
+    # Claim order: transactional (per-resident updates), attachment, bulk (fan-outs)
+    lane = db.Column(db.String(20), nullable=False, default='transactional', server_default='transactional')
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processing, sent, failed, skipped
     attempts = db.Column(db.Integer, nullable=False, default=0)
     next_attempt_at = db.Column(db.DateTime, default=utc_now, nullable=True)
@@ -25,7 +27,13 @@ class NotificationOutbox(db.Model):
     updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now, nullable=False)
 
     __table_args__ = (
-        db.Index('ix_notification_outbox_status_next', 'status', 'next_attempt_at'),
+        # Only rows still waiting for delivery are indexed for the claim query;
+        # terminal rows are moved to notification_outbox_archive over time.
+        db.Index(
+            'ix_notification_outbox_active', 'lane', 'status', 'next_attempt_at',
+            postgresql_where=db.text("status IN ('pending', 'processing')"),
+            sqlite_where=db.text("status IN ('pending', 'processing')"),
+        ),
         db.Index('ix_notification_outbox_event', 'event_type'),
         db.Index('ix_notification_outbox_resident', 'resident_id'),
     )
@@ -39,6 +47,7 @@ class NotificationOutbox(db.Model):
             'event_type': self.event_type,
             'entity_id': self.entity_id,
             'payload': self.payload,
+            'lane': self.lane,
             'status': self.status,
             'attempts': self.attempts,
             'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
@@ -47,3 +56,76 @@ class NotificationOutbox(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+class NotificationOutboxArchive(db.Model):
+    """Terminal outbox rows (sent/skipped/failed) moved out by utils/outbox_retention.py.
+
+    Keeps ``dedupe_key`` unique so archived notifications are never re-queued.
+    """
+    __tablename__ = 'notification_outbox_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    resident_id = db.Column(db.Integer, nullable=False)
+    channel = db.Column(db.String(10), nullable=False)
+    event_type = db.Column(db.String(100), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.JSON, nullable=True)
+    lane = db.Column(db.String(20), nullable=False, default='transactional', server_default='transactional')
+    status = db.Column(db.String(20), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    dedupe_key = db.Column(db.String(255), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_notification_outbox_archive_resident', 'resident_id'),
+        db.Index('ix_notification_outbox_archive_archived_at', 'archived_at'),
+    )
+
+
+class NotificationFanout(db.Model):
+    """Progress of a bulk notification fan-out (announcement, benefit program)."""
+    __tablename__ = 'notification_fanouts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    total_recipients = db.Column(db.Integer, nullable=True)
+    processed_recipients = db.Column(db.Integer, nullable=False, default=0)
+    queued_count = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_fanouts_entity', 'event_type', 'entity_id'),
+    )
+
+    def progress(self):
+        if self.status == 'completed':
+            return 1.0
+        if not self.total_recipients:
+            return 0.0
+        return round(min(1.0, (self.processed_recipients or 0) / float(self.total_recipients)), 4)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'entity_id': self.entity_id,
+            'status': self.status,
+            'total_recipients': self.total_recipients,
+            'processed_recipients': self.processed_recipients,
+            'queued': self.queued_count,
+            'progress': self.progress(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+        }
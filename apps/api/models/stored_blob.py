@@ -0,0 +1,27 @@
+"""Content-addressed upload blobs shared between records."""
+from apps.api.utils.time import utc_now
+from apps.api import db
+
+
+class StoredBlob(db.Model):
+    """One stored copy of an uploaded file, keyed by its SHA-256.
+
+    Records (user IDs, status documents, benefit and request attachments)
+    store ``storage_path`` directly; ``ref_count`` tracks how many of them do
+    so the object is only deleted when the last one lets go.
+    """
+    __tablename__ = 'stored_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    # blobs/<sha[:2]>/<sha><ext>; the extension is part of the key so content type stays stable
+    storage_path = db.Column(db.String(200), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+    last_referenced_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+
+    def __repr__(self):
+        return f'<StoredBlob {self.storage_path} refs={self.ref_count}>'
@@ -1,12 +1,157 @@
-"""Token blacklist for logout functionality."""
-from datetime import datetime
+"""Token blacklist for logout functionality.
+
+Revocation checks run on every authenticated request, so lookups go through a
+per-app in-process cache of revoked JTIs:
+
+- Positives (revoked) are cached until the token itself expires.
+- Negatives are answered from memory only while the cache holds the complete
+  set of unexpired revoked JTIs and has been re-synced from the table within
+  ``TOKEN_REVOCATION_SYNC_SECONDS``. Otherwise the DB is queried as before.
+- Re-syncs are incremental (rows revoked since the last watermark), so tokens
+  revoked by another worker become visible within one sync interval.
+"""
+from datetime import datetime, timedelta
+from collections import OrderedDict
+import threading
+import time
 from apps.api.utils.time import utc_now
 try:
     from apps.api import db
 except ImportError:
     from apps.api import db
+from flask import current_app
 from sqlalchemy import Index
 
+
+# Overlap applied to the incremental sync watermark to tolerate clock skew
+# between workers writing ``revoked_at``.
+_SYNC_SKEW = timedelta(seconds=30)
+
+
+class RevokedTokenCache:
+    """Bounded, TTL-evicting set of revoked JTIs with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 50000, sync_seconds: float = 5.0):
+        self.max_entries = max(1, int(max_entries))
+        self.sync_seconds = max(0.0, float(sync_seconds))
+        self._entries: 'OrderedDict[str, datetime]' = OrderedDict()
+        self._lock = threading.Lock()
+        # True while _entries mirrors every unexpired row (never truncated)
+        self._complete = False
+        self._synced_at = 0.0
+        self._watermark = None
+        self.hits = 0
+        self.misses = 0
+        self.syncs = 0
+
+    # --- mutation -----------------------------------------------------------------
+    def add(self, jti: str, expires_at: datetime | None) -> None:
+        """Record a revoked JTI until its token expiry."""
+        if not jti:
+            return
+        with self._lock:
+            self._add_locked(jti, expires_at)
+
+    def _add_locked(self, jti: str, expires_at: datetime | None) -> None:
+        self._entries[jti] = expires_at or (utc_now() + timedelta(days=30))
+        self._entries.move_to_end(jti)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            # A dropped positive means misses can no longer be trusted
+            self._complete = False
+
+    def evict_expired(self) -> int:
+        """Drop entries whose token has already expired."""
+        now = utc_now()
+        with self._lock:
+            expired = [jti for jti, exp in self._entries.items() if exp <= now]
+            for jti in expired:
+                self._entries.pop(jti, None)
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._complete = False
+            self._synced_at = 0.0
+            self._watermark = None
+
+    # --- lookup -------------------------------------------------------------------
+    def lookup(self, jti: str):
+        """Return True/False when the cache can answer, or None to fall through."""
+        now = utc_now()
+        with self._lock:
+            expires_at = self._entries.get(jti)
+            if expires_at is not None:
+                if expires_at > now:
+                    self.hits += 1
+                    return True
+                self._entries.pop(jti, None)
+            if self._complete and (time.monotonic() - self._synced_at) < self.sync_seconds:
+                self.hits += 1
+                return False
+            return None
+
+    def needs_sync(self) -> bool:
+        if self.sync_seconds <= 0:
+            return False
+        return (time.monotonic() - self._synced_at) >= self.sync_seconds
+
+    def sync(self, model) -> None:
+        """Load unexpired revoked rows (all on first run, then incrementally)."""
+        now = utc_now()
+        query = db.session.query(model.jti, model.expires_at, model.revoked_at).filter(model.expires_at > now)
+        watermark = self._watermark
+        if watermark is not None:
+            query = query.filter(model.revoked_at >= watermark - _SYNC_SKEW)
+        rows = query.limit(self.max_entries + 1).all()
+
+        with self._lock:
+            truncated = len(rows) > self.max_entries
+            latest = watermark
+            for jti, expires_at, revoked_at in rows[: self.max_entries]:
+                self._add_locked(jti, expires_at)
+                if revoked_at and (latest is None or revoked_at > latest):
+                    latest = revoked_at
+            if watermark is None:
+                self._complete = not truncated
+            elif truncated:
+                self._complete = False
+            self._watermark = latest or now
+            self._synced_at = time.monotonic()
+            self.syncs += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'complete': self._complete,
+                'hits': self.hits,
+                'misses': self.misses,
+                'syncs': self.syncs,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+            }
+
+
+def get_revocation_cache() -> RevokedTokenCache:
+    """Return the revocation cache bound to the current app."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('token_revocation_cache')
+    if cache is None:
+        cache = RevokedTokenCache(
+            max_entries=app.config.get('TOKEN_REVOCATION_CACHE_SIZE', 50000),
+            sync_seconds=app.config.get('TOKEN_REVOCATION_SYNC_SECONDS', 5),
+        )
+        app.extensions['token_revocation_cache'] = cache
+    return cache
+
+
 class TokenBlacklist(db.Model):
     __tablename__ = 'token_blacklist'
     
@@ -39,8 +184,24 @@ class TokenBlacklist(db.Model):
     
     @classmethod
     def is_token_revoked(cls, jti):
-        """Check if a token has been revoked."""
+        """Check if a token has been revoked (served from the in-process cache when possible)."""
+        cache = get_revocation_cache()
+        if cache.needs_sync():
+            try:
+                cache.sync(cls)
+            except Exception as exc:
+                # Table missing or DB hiccup: clear the aborted transaction and
+                # keep answering from the DB path below
+                db.session.rollback()
+                current_app.logger.debug("Token revocation cache sync failed: %s", exc)
+        cached = cache.lookup(jti)
+        if cached is not None:
+            return cached
+
+        cache.record_miss()
         token = cls.query.filter_by(jti=jti).first()
+        if token is not None:
+            cache.add(jti, token.expires_at)
         return token is not None
     
     @classmethod
@@ -54,10 +215,21 @@ class TokenBlacklist(db.Model):
         )
         db.session.add(blacklisted_token)
         db.session.commit()
+        get_revocation_cache().add(jti, expires_at)
     
     @classmethod
     def cleanup_expired_tokens(cls):
         """Remove expired tokens from the blacklist."""
         cls.query.filter(cls.expires_at < utc_now()).delete()
         db.session.commit()
+        get_revocation_cache().evict_expired()
 
+    @classmethod
+    def warm_revocation_cache(cls):
+        """Preload unexpired revoked JTIs so first requests skip the DB."""
+        get_revocation_cache().sync(cls)
+
+    @classmethod
+    def revocation_cache_stats(cls):
+        """Hit/miss counters for the revocation cache."""
+        return get_revocation_cache().stats()
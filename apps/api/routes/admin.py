@@ -4,17 +4,15 @@ Admin-specific operations with municipality scoping
 
 SCOPE: Zambales province only, excluding Olongapo City.
 """
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, request, jsonify, current_app, g, Response, stream_with_context
 from apps.api.utils.time import utc_now
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 from sqlalchemy import func, and_, or_, case
 from datetime import datetime, timedelta
 import json
 import os
-import mimetypes
 import jwt
 import requests
-from io import BytesIO
 from urllib.parse import urlparse
 from apps.api import db
 from apps.api.models.user import User
@@ -27,6 +25,7 @@ from apps.api.models.benefit import BenefitProgram
 from apps.api.models.benefit import BenefitApplication
 from apps.api.models.document import DocumentRequest, DocumentType
 from apps.api.models.announcement import Announcement
+from apps.api.models.notification import NotificationFanout
 from apps.api.models.transfer import TransferRequest
 from apps.api.utils.storage_handler import (
     save_announcement_image,
@@ -48,6 +47,8 @@ from apps.api.utils.notifications import (
     queue_benefit_program_notifications,
     queue_benefit_application_status_change,
     flush_pending_notifications,
+    queue_document_ready_email,
+    deliver_attachment_emails,
 )
 from apps.api.utils.qr_utils import (
     generate_pickup_code,
@@ -71,6 +72,21 @@ from apps.api.utils.zambales_scope import (
 )
 from apps.api.utils.fee_calculator import calculate_document_fee, are_requirements_submitted
 from apps.api.utils.supabase_storage import get_signed_url
+from apps.api.utils.staff_context import load_staff_scope
+from apps.api.utils import admin_stats
+from apps.api.utils.admin_stats import scope_condition as _scope_filter
+from apps.api.utils.export_pipeline import (
+    EXPORT_ENTITIES,
+    STREAMING_FORMATS,
+    RowCounter,
+    build_export,
+    iter_csv,
+    iter_ndjson,
+)
+from apps.api.utils.storage_stream import stream_stored_file
+from apps.api.utils import export_jobs
+from apps.api.utils.pagination import InvalidCursor, created_desc_spec, keyset_paginate, page_args
+from apps.api.models.export_job import ExportJob
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -172,12 +188,12 @@ def _manual_proof_url(storage_path: str) -> str | None:
             return None
 
 
-def _remote_content_allowed(url: str) -> bool:
-    allowed = current_app.config.get('ALLOWED_FILE_DOMAINS') or []
-    if not allowed:
-        return True
-    parsed = urlparse(url)
-    return parsed.netloc in allowed
+def _announcement_municipality_slug(announcement: Announcement) -> str:
+    if announcement.municipality_id:
+        municipality = db.session.get(Municipality, announcement.municipality_id)
+        if municipality:
+            return municipality.slug
+    return 'zambales'
 
 
 def _request_fee_due(request_obj: DocumentRequest) -> float:
@@ -202,57 +218,6 @@ def _is_request_payment_settled(request_obj: DocumentRequest) -> bool:
     return False
 
 
-def _stream_storage_file(file_ref: str, download_name: str = 'document') -> object:
-    """Stream a stored file by URL or local path."""
-    if not file_ref:
-        raise FileNotFoundError("Missing file reference")
-
-    normalized = str(file_ref).replace('\\', '/')
-    if normalized.startswith(('http://', 'https://')):
-        if not _remote_content_allowed(normalized):
-            raise PermissionError("Untrusted file domain")
-        resp = requests.get(normalized, timeout=15)
-        resp.raise_for_status()
-        content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-        return send_file(
-            BytesIO(resp.content),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    upload_root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER') or 'uploads')
-    full_path = os.path.abspath(os.path.join(upload_root, normalized))
-    if not full_path.startswith(upload_root + os.sep):
-        raise PermissionError("Invalid file path")
-    if os.path.exists(full_path):
-        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
-        return send_file(
-            full_path,
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    # Support DB values that store storage paths instead of absolute URLs.
-    try:
-        signed = get_signed_url(normalized, expires_in=300)
-        if signed and _remote_content_allowed(signed):
-            resp = requests.get(signed, timeout=15)
-            resp.raise_for_status()
-            content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-            return send_file(
-                BytesIO(resp.content),
-                mimetype=content_type,
-                as_attachment=False,
-                download_name=download_name,
-            )
-    except Exception:
-        pass
-
-    raise FileNotFoundError("File not found")
-
-
 @admin_bp.before_request
 def enforce_admin_role():
     """Middleware: require JWT and admin role for all /api/admin routes.
@@ -264,6 +229,9 @@ def enforce_admin_role():
     from flask_jwt_extended.exceptions import NoAuthorizationError, InvalidHeaderError
     from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
     
+    # g outlives the request when an app context is already pushed (tests, CLI)
+    g.pop('staff_context', None)
+
     # Skip JWT verification for OPTIONS requests (CORS preflight)
     if request.method == 'OPTIONS':
         return None
@@ -294,6 +262,14 @@ def enforce_admin_role():
         current_app.logger.error(f"Unexpected auth error in admin middleware: {type(e).__name__}: {e}")
         return jsonify({'error': 'Authentication failed', 'code': 'AUTH_ERROR'}), 401
 
+    # Resolve the caller's scope once; helpers below read it from flask.g
+    try:
+        _get_staff_context()
+    except Exception as e:
+        # Leave g unset so endpoint helpers retry and surface their own errors
+        db.session.rollback()
+        current_app.logger.warning(f"Failed to preload admin staff context: {e}")
+
 def get_admin_municipality_id():
     """Get the municipality ID for the current admin user.
 
@@ -302,32 +278,20 @@ def get_admin_municipality_id():
 
     For barangay_admin: Gets municipality from their assigned barangay if admin_municipality_id is not set.
     """
-    # get_jwt_identity returns whatever was used as identity when creating
-    # the token. We cast to int for DB lookup.
-    identity = get_jwt_identity()
-    try:
-        user_id = int(identity)
-    except (TypeError, ValueError):
-        current_app.logger.debug("Invalid JWT identity: %s", identity)
-        return None
-    user = db.session.get(User, user_id)
-
-    if not user or user.role not in ADMIN_ROLES:
+    ctx = _get_staff_context()
+    if not ctx or ctx['role'] not in ADMIN_ROLES:
         current_app.logger.debug(
-            "Admin user validation failed for identity %s (user=%s role=%s)",
-            user_id,
-            bool(user),
-            user.role if user else None,
+            "Admin user validation failed for identity %s (role=%s)",
+            get_jwt_identity(),
+            ctx['role'] if ctx else None,
         )
         return None
 
-    admin_muni_id = user.admin_municipality_id
+    admin_muni_id = ctx['admin_municipality_id']
 
     # For barangay_admin, get municipality from their barangay if not set directly
-    if not admin_muni_id and user.role == 'barangay_admin' and user.admin_barangay_id:
-        brgy = db.session.get(Barangay, user.admin_barangay_id)
-        if brgy:
-            admin_muni_id = brgy.municipality_id
+    if not admin_muni_id and ctx['role'] == 'barangay_admin' and ctx['barangay_municipality_id']:
+        admin_muni_id = ctx['barangay_municipality_id']
 
     # ZAMBALES SCOPE: Validate admin's municipality is in Zambales (excluding Olongapo)
     if admin_muni_id and not is_valid_zambales_municipality(admin_muni_id):
@@ -357,38 +321,43 @@ def require_admin_municipality():
     return municipality_id
 
 
-def _scope_filter(field, municipality_scope):
-    """Return a SQLAlchemy condition for the given municipality scope."""
-    if municipality_scope == 'ALL':
-        return field.in_(ZAMBALES_MUNICIPALITY_IDS)
-    return field == municipality_scope
-
-
 def _get_staff_context():
-    """Return the current admin user and scoped identifiers."""
+    """Return the current admin user and scoped identifiers.
+
+    Built once per request (normally by ``enforce_admin_role``) and memoized on
+    ``flask.g``; the underlying User/Barangay lookups are cached across requests
+    by ``load_staff_scope``.
+    """
+    if 'staff_context' in g:
+        return g.staff_context
     try:
         user_id = int(get_jwt_identity())
     except Exception:
         return None
-    user = db.session.get(User, user_id)
-    if not user:
+    scope = load_staff_scope(user_id)
+    if not scope:
+        g.staff_context = None
         return None
-    role_lower = (user.role or '').lower()
+    role_lower = scope['role_lower']
+    admin_muni_id = scope['admin_municipality_id']
     ctx = {
-        'user': user,
-        'role': user.role,
+        'user_id': scope['user_id'],
+        'role': scope['role'],
         'role_lower': role_lower,
         'is_super': role_lower == 'superadmin',
         'is_provincial': role_lower == 'provincial_admin',
-        'municipality_id': user.admin_municipality_id if user.admin_municipality_id and is_valid_zambales_municipality(user.admin_municipality_id) else None,
-        'barangay_id': user.admin_barangay_id,
+        'municipality_id': admin_muni_id if admin_muni_id and is_valid_zambales_municipality(admin_muni_id) else None,
+        'barangay_id': scope['admin_barangay_id'],
+        'admin_municipality_id': admin_muni_id,
+        'barangay_municipality_id': scope['barangay_municipality_id'],
     }
     if ctx['barangay_id']:
-        brgy = db.session.get(Barangay, ctx['barangay_id'])
-        if not brgy or not is_valid_zambales_municipality(brgy.municipality_id):
+        brgy_muni_id = scope['barangay_municipality_id']
+        if not brgy_muni_id or not is_valid_zambales_municipality(brgy_muni_id):
             ctx['barangay_id'] = None
-        elif ctx['municipality_id'] and brgy.municipality_id != ctx['municipality_id']:
+        elif ctx['municipality_id'] and brgy_muni_id != ctx['municipality_id']:
             ctx['barangay_id'] = None
+    g.staff_context = ctx
     return ctx
 
 
@@ -808,7 +777,6 @@ def get_resident_document(user_id, doc_type):
     Query params:
     - reason (required): Why the admin is viewing this document
     """
-    from flask import send_file
     from apps.api.utils.auth import permission_required
     from apps.api.utils.admin_audit import log_resident_id_viewed
     from apps.api.models.municipality import Municipality
@@ -882,77 +850,20 @@ def get_resident_document(user_id, doc_type):
             req=request
         )
 
-        # Serve file
-        # If Supabase URL, fetch it server-side and return bytes (no redirect to avoid CORS)
-        if file_path.startswith(('http://', 'https://')):
-            from urllib.parse import urlparse
-            import requests
-            from io import BytesIO
-
-            # Validate URL domain against allowed storage providers
-            parsed = urlparse(file_path)
-            allowed_domains = current_app.config.get('ALLOWED_FILE_DOMAINS', [])
-
-            if allowed_domains and parsed.netloc not in allowed_domains:
-                current_app.logger.warning(f"Blocked access to untrusted domain: {parsed.netloc}")
-                return jsonify({'error': 'Invalid file URL'}), 403
-
-            # Fetch image from Supabase server-side
-            try:
-                response = requests.get(file_path, timeout=10)
-                response.raise_for_status()
-
-                # Determine MIME type from response or file extension
-                content_type = response.headers.get('Content-Type', 'application/octet-stream')
-                if content_type == 'application/octet-stream':
-                    # Fallback to extension-based MIME type
-                    ext = file_path.split('.')[-1].lower().split('?')[0]  # Remove query params
-                    mime_types = {
-                        'jpg': 'image/jpeg',
-                        'jpeg': 'image/jpeg',
-                        'png': 'image/png',
-                        'gif': 'image/gif',
-                        'webp': 'image/webp'
-                    }
-                    content_type = mime_types.get(ext, 'application/octet-stream')
-
-                # Return image bytes directly
-                return send_file(
-                    BytesIO(response.content),
-                    mimetype=content_type,
-                    as_attachment=False,
-                    download_name=f"{doc_type}.{ext}" if 'ext' in locals() else f"{doc_type}.jpg"
-                )
-
-            except requests.RequestException as e:
-                current_app.logger.error(f"Failed to fetch image from Supabase: {str(e)}")
-                return jsonify({'error': 'Failed to fetch image from storage'}), 502
-
-        # If local file, serve it
-        upload_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-        upload_dir_abs = os.path.abspath(upload_dir)
-        full_path = os.path.abspath(os.path.join(upload_dir, file_path))
-
-        # Validate path is within upload directory (prevent path traversal)
-        if not full_path.startswith(upload_dir_abs + os.sep):
-            current_app.logger.warning(f"Path traversal attempt detected: {file_path}")
+        # Serve file server-side (no redirect to avoid CORS), streamed from storage
+        ext_source = urlparse(file_path).path if file_path.startswith(('http://', 'https://')) else file_path
+        ext = os.path.splitext(ext_source)[1].lower()
+        download_name = f"{doc_type}{ext if ext and len(ext) <= 10 else '.jpg'}"
+        try:
+            return stream_stored_file(file_path, download_name=download_name)
+        except PermissionError:
+            current_app.logger.warning(f"Blocked access to untrusted file reference: {file_path}")
             return jsonify({'error': 'Invalid file path'}), 403
-
-        if not os.path.exists(full_path):
+        except FileNotFoundError:
             return jsonify({'error': 'File not found on server'}), 404
-
-        # Determine MIME type
-        mime_types = {
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif',
-            'webp': 'image/webp'
-        }
-        ext = file_path.split('.')[-1].lower()
-        mime_type = mime_types.get(ext, 'application/octet-stream')
-
-        return send_file(full_path, mimetype=mime_type)
+        except requests.RequestException as e:
+            current_app.logger.error(f"Failed to fetch image from storage: {str(e)}")
+            return jsonify({'error': 'Failed to fetch image from storage'}), 502
 
     except Exception as e:
         # Log the full error for debugging
@@ -1015,48 +926,7 @@ def get_user_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count users by status
-        total_users = User.query.filter(
-            and_(
-                _scope_filter(User.municipality_id, municipality_id),
-                User.role == 'resident'
-            )
-        ).count()
-        
-        pending_users = User.query.filter(
-            and_(
-                _scope_filter(User.municipality_id, municipality_id),
-                User.role == 'resident',
-                User.admin_verified == False,
-                User.is_active == True
-            )
-        ).count()
-        
-        verified_users = User.query.filter(
-            and_(
-                _scope_filter(User.municipality_id, municipality_id),
-                User.role == 'resident',
-                User.admin_verified == True,
-                User.is_active == True
-            )
-        ).count()
-        
-        # Recent registrations (last 7 days)
-        week_ago = utc_now() - timedelta(days=7)
-        recent_registrations = User.query.filter(
-            and_(
-                _scope_filter(User.municipality_id, municipality_id),
-                User.role == 'resident',
-                User.created_at >= week_ago
-            )
-        ).count()
-        
-        return jsonify({
-            'total_users': total_users,
-            'pending_verifications': pending_users,
-            'verified_users': verified_users,
-            'recent_registrations': recent_registrations
-        }), 200
+        return jsonify(admin_stats.user_stats(municipality_id)), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get user statistics', 'details': str(e)}), 500
@@ -1321,36 +1191,7 @@ def get_issue_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count issues by status
-        total_issues = Issue.query.filter(_scope_filter(Issue.municipality_id, municipality_id)).count()
-        
-        pending_issues = Issue.query.filter(
-            and_(
-                _scope_filter(Issue.municipality_id, municipality_id),
-                Issue.status == 'pending'
-            )
-        ).count()
-        
-        active_issues = Issue.query.filter(
-            and_(
-                _scope_filter(Issue.municipality_id, municipality_id),
-                Issue.status == 'in_progress'
-            )
-        ).count()
-        
-        resolved_issues = Issue.query.filter(
-            and_(
-                _scope_filter(Issue.municipality_id, municipality_id),
-                Issue.status == 'resolved'
-            )
-        ).count()
-        
-        return jsonify({
-            'total_issues': total_issues,
-            'pending_issues': pending_issues,
-            'active_issues': active_issues,
-            'resolved_issues': resolved_issues
-        }), 200
+        return jsonify(admin_stats.issue_stats(municipality_id)), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get issue statistics', 'details': str(e)}), 500
@@ -1476,44 +1317,7 @@ def get_marketplace_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count marketplace items by status
-        total_items = MarketplaceItem.query.filter(
-            and_(
-                _scope_filter(MarketplaceItem.municipality_id, municipality_id),
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        pending_items = MarketplaceItem.query.filter(
-            and_(
-                _scope_filter(MarketplaceItem.municipality_id, municipality_id),
-                MarketplaceItem.status == 'pending',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        approved_items = MarketplaceItem.query.filter(
-            and_(
-                _scope_filter(MarketplaceItem.municipality_id, municipality_id),
-                MarketplaceItem.status == 'available',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        rejected_items = MarketplaceItem.query.filter(
-            and_(
-                _scope_filter(MarketplaceItem.municipality_id, municipality_id),
-                MarketplaceItem.status == 'rejected',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        return jsonify({
-            'total_items': total_items,
-            'pending_items': pending_items,
-            'approved_items': approved_items,
-            'rejected_items': rejected_items
-        }), 200
+        return jsonify(admin_stats.marketplace_stats(municipality_id)), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get marketplace statistics', 'details': str(e)}), 500
@@ -1630,8 +1434,8 @@ def create_announcement():
             scope=scope,
             municipality_id=municipality_id,
             barangay_id=barangay_id,
-            created_by=ctx['user'].id,
-            created_by_staff_id=ctx['user'].id,
+            created_by=ctx['user_id'],
+            created_by_staff_id=ctx['user_id'],
             priority=priority,
             images=[],
             external_url=external_url,
@@ -1652,11 +1456,13 @@ def create_announcement():
         if is_multipart and 'images' in request.files:
             image_files = request.files.getlist('images')
             saved_images = []
+            municipality_slug = _announcement_municipality_slug(announcement)
             for img_file in image_files:
                 if img_file and img_file.filename:
                     try:
-                        img_path = save_announcement_image(img_file)
-                        saved_images.append(img_path)
+                        saved = save_announcement_image(img_file, announcement.id, municipality_slug)
+                        saved_images.append(saved.path)
+                        announcement.set_image_variants(saved.path, saved.variants)
                     except Exception as img_err:
                         current_app.logger.warning(f"Failed to save announcement image: {img_err}")
             if saved_images:
@@ -1764,18 +1570,20 @@ def update_announcement(announcement_id):
         announcement.is_active = is_active_flag
         announcement.public_viewable = False
         announcement.shared_with_municipalities = None
-        announcement.created_by_staff_id = announcement.created_by_staff_id or ctx['user'].id
+        announcement.created_by_staff_id = announcement.created_by_staff_id or ctx['user_id']
         announcement.updated_at = utc_now()
 
         # Handle image uploads if present (FormData only)
         if is_multipart and 'images' in request.files:
             image_files = request.files.getlist('images')
             saved_images = list(announcement.images) if announcement.images else []
+            municipality_slug = _announcement_municipality_slug(announcement)
             for img_file in image_files:
                 if img_file and img_file.filename:
                     try:
-                        img_path = save_announcement_image(img_file)
-                        saved_images.append(img_path)
+                        saved = save_announcement_image(img_file, announcement.id, municipality_slug)
+                        saved_images.append(saved.path)
+                        announcement.set_image_variants(saved.path, saved.variants)
                     except Exception as img_err:
                         current_app.logger.warning(f"Failed to save announcement image: {img_err}")
             if saved_images:
@@ -1844,9 +1652,11 @@ def upload_announcement_image(announcement_id):
             municipality = db.session.get(Municipality, announcement.municipality_id)
             municipality_slug = municipality.slug if municipality else 'zambales'
 
-        rel_path = save_announcement_image(file, announcement_id, municipality_slug)
+        saved = save_announcement_image(file, announcement_id, municipality_slug)
+        rel_path = saved.path
         images.append(rel_path)
         announcement.images = images
+        announcement.set_image_variants(rel_path, saved.variants)
         db.session.commit()
 
         return jsonify({'message': 'Image uploaded', 'path': rel_path, 'announcement': announcement.to_dict()}), 200
@@ -1894,9 +1704,10 @@ def upload_announcement_images(announcement_id):
             for f in files:
                 if len(images) >= 5:
                     break
-                rel_path = save_announcement_image(f, announcement_id, municipality_slug)
-                images.append(rel_path)
-                saved_paths.append(rel_path)
+                saved = save_announcement_image(f, announcement_id, municipality_slug)
+                images.append(saved.path)
+                saved_paths.append(saved.path)
+                announcement.set_image_variants(saved.path, saved.variants)
             if len(images) >= 5:
                 break
 
@@ -1950,30 +1761,9 @@ def get_announcement_stats():
         if not ctx:
             return jsonify({'error': 'Admin access required'}), 403
 
-        now = utc_now()
-        q = _announcement_query_for_staff(ctx)
-        total_announcements = q.count()
-        published = q.filter(Announcement.status == 'PUBLISHED').count()
-        draft = q.filter(Announcement.status == 'DRAFT').count()
-        archived = q.filter(Announcement.status == 'ARCHIVED').count()
-        active_announcements = q.filter(
-            Announcement.status == 'PUBLISHED',
-            or_(Announcement.publish_at == None, Announcement.publish_at <= now),
-            or_(Announcement.expire_at == None, Announcement.expire_at > now),
-        ).count()
-        pinned_active = q.filter(
-            Announcement.pinned == True,
-            or_(Announcement.pinned_until == None, Announcement.pinned_until > now)
-        ).count()
-
-        return jsonify({
-            'total_announcements': total_announcements,
-            'published_announcements': published,
-            'active_announcements': active_announcements,
-            'draft_announcements': draft,
-            'archived_announcements': archived,
-            'pinned_active': pinned_active,
-        }), 200
+        scope_key = (ctx['role_lower'], ctx['municipality_id'], ctx['barangay_id'])
+        stats = admin_stats.announcement_stats(_announcement_query_for_staff(ctx), scope_key)
+        return jsonify(stats), 200
 
     except Exception as e:
         return jsonify({'error': 'Failed to get announcement statistics', 'details': str(e)}), 500
@@ -1987,7 +1777,6 @@ def get_dashboard_stats():
         municipality_id = require_admin_municipality()
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
-        now = utc_now()
         
         # Initialize stats with default values
         stats = {
@@ -1998,58 +1787,10 @@ def get_dashboard_stats():
         }
         
         try:
-            # User statistics
-            pending_verifications = User.query.filter(
-                and_(
-                    _scope_filter(User.municipality_id, municipality_id),
-                    User.role == 'resident',
-                    User.admin_verified == False,
-                    User.is_active == True
-                )
-            ).count()
-            stats['pending_verifications'] = pending_verifications
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Issue statistics
-            active_issues = Issue.query.filter(
-                and_(
-                    _scope_filter(Issue.municipality_id, municipality_id),
-                    Issue.status.in_(['pending', 'in_progress'])
-                )
-            ).count()
-            stats['active_issues'] = active_issues
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Marketplace statistics
-            marketplace_items = MarketplaceItem.query.filter(
-                and_(
-                    _scope_filter(MarketplaceItem.municipality_id, municipality_id),
-                    MarketplaceItem.status == 'pending',
-                    MarketplaceItem.is_active == True
-                )
-            ).count()
-            stats['marketplace_items'] = marketplace_items
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Announcements statistics
-            announcements = Announcement.query.filter(
-                or_(
-                    and_(Announcement.scope == 'MUNICIPALITY', _scope_filter(Announcement.municipality_id, municipality_id)),
-                    and_(Announcement.scope == 'BARANGAY', _scope_filter(Announcement.municipality_id, municipality_id)),
-                ),
-                Announcement.status == 'PUBLISHED',
-                or_(Announcement.publish_at == None, Announcement.publish_at <= now),
-                or_(Announcement.expire_at == None, Announcement.expire_at > now),
-            ).count()
-            stats['announcements'] = announcements
-        except Exception:
-            pass  # Keep default 0
+            stats.update(admin_stats.dashboard_stats(municipality_id))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Dashboard rollup failed, returning defaults: {e}")
         
         return jsonify(stats), 200
         
@@ -2208,7 +1949,7 @@ def admin_download_benefit_application_document(application_id: int, doc_index:
         ext = os.path.splitext(ext_source)[1]
         safe_ext = ext if ext and len(ext) <= 10 else ''
         filename = f"{app.application_number or app.id}-support-{doc_index + 1}{safe_ext}"
-        return _stream_storage_file(source, download_name=filename)
+        return stream_stored_file(source, download_name=filename)
     except FileNotFoundError:
         return jsonify({'error': 'Document file not found'}), 404
     except PermissionError:
@@ -2806,6 +2547,14 @@ def admin_complete_benefit_program(program_id: int):
 # Reports: Documents and Municipality Performance
 # ---------------------------------------------
 
+RANGE_NAMES = ('last_7_days', 'last_30_days', 'last_90_days', 'this_year')
+
+
+def _canonical_range(range_param: str) -> str:
+    """The range name ``_parse_range`` applies; unknown values mean last 30 days."""
+    return range_param if range_param in RANGE_NAMES else 'last_30_days'
+
+
 def _parse_range(range_param: str):
     now = utc_now()
     if range_param == 'last_7_days':
@@ -2915,8 +2664,7 @@ def get_document_requests():
         # Get filter parameters
         status = request.args.get('status')
         delivery = request.args.get('delivery')  # 'digital' | 'pickup'
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page, cursor = page_args(request.args)
         
         # Build query with joins
         query = db.session.query(DocumentRequest, User, DocumentType)\
@@ -2941,13 +2689,18 @@ def get_document_requests():
             elif norm == 'digital':
                 query = query.filter(DocumentRequest.delivery_method == 'digital')
         
-        # Order by creation date (newest first)
-        query = query.order_by(DocumentRequest.created_at.desc())
-        
-        # Apply pagination
-        requests_paginated = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Newest first, keyset-paginated with a cached total
+        try:
+            requests_paginated = keyset_paginate(
+                query,
+                created_desc_spec(DocumentRequest, entity_index=0),
+                per_page=per_page,
+                cursor=cursor,
+                page=page,
+                total_key=('admin', municipality_id, ctx.get('barangay_id') if ctx.get('role_lower') == 'barangay_admin' else None, status, delivery),
+            )
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
         # Format response data
         requests_data = []
@@ -2959,12 +2712,7 @@ def get_document_requests():
         
         return jsonify({
             'requests': requests_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': requests_paginated.total,
-                'pages': requests_paginated.pages
-            }
+            'pagination': requests_paginated.meta(),
         }), 200
         
     except Exception as e:
@@ -3156,23 +2904,22 @@ def generate_document_request_pdf(request_id: int):
             db.session.rollback()
             current_app.logger.warning("Failed to queue document ready notification: %s", notify_exc)
 
-        # Email the generated PDF to the resident (best-effort)
-        email_sent = False
-        if user and user.email and pdf_bytes:
+        # Email the generated PDF to the resident via the outbox (best-effort)
+        email_queued = False
+        if user and user.email and rel_path:
             try:
-                from apps.api.utils.email_sender import send_document_ready_email
-                resident_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or 'Resident'
                 doc_name = doc_type.name if hasattr(doc_type, 'name') else 'Document'
-                request_number = req.request_number if hasattr(req, 'request_number') else str(req.id)
-                send_document_ready_email(user.email, resident_name, doc_name, request_number, pdf_bytes)
-                email_sent = True
+                email_queued = queue_document_ready_email(user, req, doc_name, rel_path) == 'queued'
+                db.session.commit()
+                deliver_attachment_emails()
             except Exception as email_exc:
-                current_app.logger.warning("Failed to email document to resident %s: %s", user.email, email_exc)
+                db.session.rollback()
+                current_app.logger.warning("Failed to queue document email for resident %s: %s", user.email, email_exc)
 
         return jsonify({
             'message': 'Document generated',
             'download_endpoint': f"/api/admin/documents/requests/{req.id}/download",
-            'email_sent': email_sent,
+            'email_queued': email_queued,
             'request': req.to_dict()
         }), 200
     except Exception as e:
@@ -3216,7 +2963,7 @@ def download_document_request_pdf(request_id: int):
             return jsonify({'error': 'No generated document available'}), 404
 
         filename = f"{req.request_number or 'document'}.pdf"
-        return _stream_storage_file(req.document_file, download_name=filename)
+        return stream_stored_file(req.document_file, download_name=filename)
     except PermissionError:
         return jsonify({'error': 'File access denied'}), 403
     except FileNotFoundError:
@@ -3287,7 +3034,7 @@ def download_document_request_supporting_document(request_id: int, doc_index: in
         ext = os.path.splitext(source.split('?', 1)[0])[1] or ''
         filename = f"{req.request_number or req.id}-{safe_label}{ext}"
 
-        return _stream_storage_file(source, download_name=filename)
+        return stream_stored_file(source, download_name=filename)
     except PermissionError:
         return jsonify({'error': 'File access denied'}), 403
     except FileNotFoundError:
@@ -3428,16 +3175,16 @@ def regenerate_document_pdf(request_id: int):
         req.updated_at = utc_now()
         db.session.commit()
 
-        # Email the regenerated PDF to the resident (best-effort)
-        if user and user.email and pdf_bytes:
+        # Email the regenerated PDF to the resident via the outbox (best-effort)
+        if user and user.email and new_pdf_url:
             try:
-                from apps.api.utils.email_sender import send_document_ready_email
-                resident_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or 'Resident'
                 doc_name = doc_type.name if hasattr(doc_type, 'name') else 'Document'
-                request_number = req.request_number if hasattr(req, 'request_number') else str(req.id)
-                send_document_ready_email(user.email, resident_name, doc_name, request_number, pdf_bytes)
+                queue_document_ready_email(user, req, doc_name, new_pdf_url)
+                db.session.commit()
+                deliver_attachment_emails()
             except Exception as email_exc:
-                current_app.logger.warning("Failed to email regenerated document to %s: %s", user.email, email_exc)
+                db.session.rollback()
+                current_app.logger.warning("Failed to queue regenerated document email for %s: %s", user.email, email_exc)
 
         # Audit log
         try:
@@ -4226,7 +3973,7 @@ def admin_get_manual_payment_proof(request_id: int):
             source = signed or source
 
         filename = f"{req.request_number or req.id}-manual-proof"
-        return _stream_storage_file(source, download_name=filename)
+        return stream_stored_file(source, download_name=filename)
     except PermissionError:
         return jsonify({'error': 'File access denied'}), 403
     except FileNotFoundError:
@@ -4436,29 +4183,12 @@ def admin_municipality_performance():
         range_param = request.args.get('range', 'last_30_days')
         start, end = _parse_range(range_param)
 
-        def build_perf(m_id: int):
-            users = User.query.filter(and_(User.municipality_id == m_id, User.role == 'resident', User.admin_verified == True, User.is_active == True)).count()
-            listings = MarketplaceItem.query.filter(and_(MarketplaceItem.municipality_id == m_id, MarketplaceItem.created_at >= start, MarketplaceItem.created_at <= end)).count()
-            docs = DocumentRequest.query.filter(and_(DocumentRequest.municipality_id == m_id, DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)).count()
-            benefits_active = 0
-            disputes_opened = 0
-            try:
-                benefits_active = BenefitProgram.query.filter(and_(BenefitProgram.municipality_id == m_id, BenefitProgram.is_active == True)).count()
-            except Exception:
-                pass
-            try:
-                disputes_opened = MarketplaceTransaction.query.filter(and_(MarketplaceTransaction.status == 'disputed', MarketplaceTransaction.created_at >= start, MarketplaceTransaction.created_at <= end)).count()
-            except Exception:
-                pass
-            name = (db.session.get(Municipality, m_id).name if db.session.get(Municipality, m_id) else f"Municipality {m_id}")
-            return {'id': m_id, 'name': name, 'users': users, 'listings': listings, 'documents': docs, 'benefits_active': benefits_active, 'disputes': disputes_opened}
-
         if role == 'superadmin':
-            # Province-level: return top N municipalities by activity
-            ids = [m.id for m in Municipality.query.all()]
-            data = [build_perf(mid) for mid in ids]
+            # Province-level: every municipality, one grouped query per entity
+            ids = [mid for (mid,) in db.session.query(Municipality.id).order_by(Municipality.id).all()]
         else:
-            data = [build_perf(current_id)]
+            ids = [current_id]
+        data = admin_stats.municipality_performance(ids, start, end, cache_key=_canonical_range(range_param))
 
         return jsonify({'municipalities': data}), 200
     except Exception as e:
@@ -4474,8 +4204,7 @@ def admin_list_transactions():
         # Province-level admins can view all; municipal_admins scoped to municipality
         municipality_id = get_admin_municipality_id()
         status = (request.args.get('status') or '').strip() or None
-        page = request.args.get('page', type=int) or 1
-        per_page = min(request.args.get('per_page', type=int) or 20, 100)
+        page, per_page, cursor = page_args(request.args)
 
         q = MarketplaceTransaction.query
         if municipality_id:
@@ -4483,8 +4212,17 @@ def admin_list_transactions():
             q = q.join(MarketplaceItem, MarketplaceItem.id == MarketplaceTransaction.item_id).filter(_scope_filter(MarketplaceItem.municipality_id, municipality_id))
         if status:
             q = q.filter(MarketplaceTransaction.status == status)
-        q = q.order_by(MarketplaceTransaction.created_at.desc())
-        p = q.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            p = keyset_paginate(
+                q,
+                created_desc_spec(MarketplaceTransaction),
+                per_page=per_page,
+                cursor=cursor,
+                page=page,
+                total_key=('admin', municipality_id, status),
+            )
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
 
         rows = []
         for t in p.items:
@@ -4507,7 +4245,7 @@ def admin_list_transactions():
                 d['seller_name'] = str(t.seller_id)
             rows.append(d)
 
-        return jsonify({'transactions': rows, 'total': p.total, 'page': p.page, 'pages': p.pages, 'per_page': p.per_page}), 200
+        return jsonify({'transactions': rows, **p.meta()}), 200
     except Exception as e:
         return jsonify({'error': 'Failed to list transactions', 'details': str(e)}), 500
 
@@ -4548,10 +4286,19 @@ def admin_list_audit():
                 q = q.filter(AuditLog.created_at <= datetime.fromisoformat(to_date))
             except Exception:
                 pass
-        page = int(request.args.get('page', 1))
-        per_page = min(100, int(request.args.get('per_page', 20)))
-        p = q.order_by(AuditLog.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
-        return jsonify({'logs': [l.to_dict() for l in p.items], 'page': p.page, 'pages': p.pages, 'per_page': p.per_page, 'total': p.total}), 200
+        page, per_page, cursor = page_args(request.args)
+        try:
+            p = keyset_paginate(
+                q,
+                created_desc_spec(AuditLog),
+                per_page=per_page,
+                cursor=cursor,
+                page=page,
+                total_key=('admin', municipality_id, entity_type, entity_id, actor_role, action, from_date, to_date),
+            )
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        return jsonify({'logs': [l.to_dict() for l in p.items], **p.meta()}), 200
     except Exception as e:
         return jsonify({'error': 'Failed to list audit logs', 'details': str(e)}), 500
 
@@ -4595,98 +4342,213 @@ def admin_export_entity(entity: str, fmt: str):
         range_param = filters.get('range')
         start, end = _parse_range(range_param or 'last_30_days')
 
-        headers = []
-        rows = []
-
-        # Build dataset by entity
         et = entity.lower()
-        now = utc_now()
-        if et == 'users':
-            users = User.query.filter(and_(_scope_filter(User.municipality_id, municipality_id), User.role == 'resident')).all()
-            headers = ['ID','Name','Email','Phone','Verified','Joined']
-            for u in users:
-                name = f"{getattr(u,'first_name','') or ''} {getattr(u,'last_name','') or ''}".strip() or getattr(u,'username','')
-                rows.append([u.id, name, getattr(u,'email',''), getattr(u,'phone_number',''), 'Yes' if getattr(u,'admin_verified',False) else 'No', (u.created_at.isoformat()[:10] if getattr(u,'created_at',None) else '')])
-        elif et == 'benefits':
-            items = BenefitProgram.query.filter(_scope_filter(BenefitProgram.municipality_id, municipality_id)).all()
-            headers = ['ID','Name','Active','Created']
-            rows = [[b.id, getattr(b,'name',''), 'Yes' if getattr(b,'is_active',False) else 'No', (b.created_at.isoformat()[:10] if getattr(b,'created_at',None) else '')] for b in items]
-        elif et == 'requests':
-            items = DocumentRequest.query.filter(and_(_scope_filter(DocumentRequest.municipality_id, municipality_id), DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)).all()
-            headers = ['ID','Req No','User','Type','Status','Created']
-            for r in items:
-                user = db.session.get(User, r.user_id)
-                name = f"{getattr(user,'first_name','') or ''} {getattr(user,'last_name','') or ''}".strip() or getattr(user,'username','')
-                rows.append([r.id, r.request_number, name, getattr(r.document_type,'name',None) if hasattr(r,'document_type') else '', r.status, (r.created_at.isoformat()[:19].replace('T',' ') if r.created_at else '')])
-        elif et == 'issues':
-            items = Issue.query.filter(_scope_filter(Issue.municipality_id, municipality_id)).all()
-            headers = ['ID','Title','Status','Created']
-            rows = [[i.id, i.title, i.status, (i.created_at.isoformat()[:19].replace('T',' ') if i.created_at else '')] for i in items]
-        elif et == 'items':
-            items = MarketplaceItem.query.filter(_scope_filter(MarketplaceItem.municipality_id, municipality_id)).all()
-            headers = ['ID','Title','Status','Created']
-            rows = [[i.id, i.title, i.status, (i.created_at.isoformat()[:19].replace('T',' ') if i.created_at else '')] for i in items]
-        elif et == 'announcements':
-            items = _announcement_query_for_staff(ctx).all()
-            headers = ['ID','Title','Scope','Status','Active Now','Created','Publish At','Expire At']
-            for a in items:
-                is_active_now = (a.status or '').upper() == 'PUBLISHED' and (not a.publish_at or a.publish_at <= now) and (not a.expire_at or a.expire_at > now)
-                rows.append([
-                    a.id,
-                    a.title,
-                    a.scope,
-                    (a.status or '').upper(),
-                    'Yes' if is_active_now else 'No',
-                    (a.created_at.isoformat()[:10] if getattr(a,'created_at',None) else ''),
-                    (a.publish_at.isoformat()[:10] if getattr(a,'publish_at',None) else ''),
-                    (a.expire_at.isoformat()[:10] if getattr(a,'expire_at',None) else ''),
-                ])
-        elif et == 'audit':
-            items = AuditLog.query.filter(_scope_filter(AuditLog.municipality_id, municipality_id)).order_by(AuditLog.created_at.desc()).limit(1000).all()
-            headers = ['Time','Actor','Role','Entity','Entity ID','Action']
-            rows = [[(l.created_at.isoformat()[:19].replace('T',' ') if l.created_at else ''), l.user_id, l.actor_role, l.entity_type, l.entity_id, l.action] for l in items]
-        else:
+        fmt = fmt.lower()
+        if et not in EXPORT_ENTITIES:
             return jsonify({'error': 'Unknown export entity'}), 400
+        if fmt not in ('pdf', 'xlsx', 'excel') and fmt not in STREAMING_FORMATS:
+            return jsonify({'error': 'Unsupported format'}), 400
+
+        # Rows are produced lazily from a server-side cursor (see utils/export_pipeline.py)
+        headers, rows = build_export(
+            et,
+            municipality_scope=municipality_id,
+            start=start,
+            end=end,
+            now=utc_now(),
+            announcement_query=_announcement_query_for_staff(ctx) if et == 'announcements' else None,
+        )
+        filename_base = f"{et}-{utc_now().strftime('%Y%m%d-%H%M%S')}"
+
+        if fmt in STREAMING_FORMATS:
+            chunks = iter_csv(headers, rows) if fmt == 'csv' else iter_ndjson(headers, rows)
+            return Response(
+                stream_with_context(chunks),
+                mimetype=STREAMING_FORMATS[fmt],
+                headers={'Content-Disposition': f'attachment; filename="{muni_slug}-{filename_base}.{fmt}"'},
+            )
 
         from pathlib import Path
         base = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
         out_dir = base / 'exports' / str(muni_slug)
         out_dir.mkdir(parents=True, exist_ok=True)
-        filename_base = f"{et}-{utc_now().strftime('%Y%m%d-%H%M%S')}"
+        counted = RowCounter(rows)
 
-        if fmt.lower() == 'pdf':
+        if fmt == 'pdf':
             from apps.api.utils.pdf_table_report import generate_table_pdf
             out_path = out_dir / f"{filename_base}.pdf"
-            generate_table_pdf(out_path=out_path, title=f"{municipality_name} – {et.title()} Report", municipality_name=municipality_name, headers=headers, rows=rows)
+            generate_table_pdf(out_path=out_path, title=f"{municipality_name} – {et.title()} Report", municipality_name=municipality_name, headers=headers, rows=counted)
             rel = str(out_path.relative_to(base)).replace('\\','/')
-            return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
-        if fmt.lower() in ('xlsx','excel'):
-            from apps.api.utils.excel_generator import generate_workbook, save_workbook
-            out_path = out_dir / f"{filename_base}.xlsx"
-            gov_lines = [
-                'Republic of the Philippines',
-                'Province of Zambales',
-                f'Municipality of {municipality_name}',
-                'Office of the Municipal Mayor',
-            ]
-            wb = generate_workbook({
-                et.title(): {
-                    'headers': headers,
-                    'rows': rows,
-                    'municipality_name': municipality_name,
-                    'title': f'{municipality_name} – {et.title()} Report',
-                    'gov_lines': gov_lines,
-                }
-            })
-            save_workbook(wb, out_path)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
-            return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
-
-        return jsonify({'error': 'Unsupported format'}), 400
+            return jsonify({'url': rel, 'summary': {'rows': counted.count}}), 200
+
+        from apps.api.utils.excel_generator import write_table_workbook
+        out_path = out_dir / f"{filename_base}.xlsx"
+        gov_lines = [
+            'Republic of the Philippines',
+            'Province of Zambales',
+            f'Municipality of {municipality_name}',
+            'Office of the Municipal Mayor',
+        ]
+        row_count = write_table_workbook(
+            out_path,
+            sheet_name=et.title(),
+            headers=headers,
+            rows=counted,
+            municipality_name=municipality_name,
+            title=f'{municipality_name} – {et.title()} Report',
+            gov_lines=gov_lines,
+        )
+        rel = str(out_path.relative_to(base)).replace('\\','/')
+        return jsonify({'url': rel, 'summary': {'rows': row_count}}), 200
     except Exception as e:
         return jsonify({'error': 'Failed to export', 'details': str(e)}), 500
 
 
+# Background export jobs (see utils/export_jobs.py)
+def _export_job_for_staff(job_id: str):
+    """Return (job, None) if the caller's scope matches the job's, else (None, error response)."""
+    ctx = _get_staff_context()
+    if not ctx:
+        return None, (jsonify({'error': 'Admin access required'}), 403)
+    municipality_id = require_admin_municipality()
+    if isinstance(municipality_id, tuple):
+        return None, municipality_id
+    job = ExportJob.query.filter_by(job_id=job_id).first()
+    if not job or job.scope_key != export_jobs.staff_scope_key(job.entity, municipality_id, ctx):
+        return None, (jsonify({'error': 'Export job not found'}), 404)
+    return job, None
+
+
+@admin_bp.route('/exports/jobs/<string:entity>.<string:fmt>', methods=['POST'])
+@jwt_required()
+def admin_enqueue_export(entity: str, fmt: str):
+    try:
+        ctx = _get_staff_context()
+        if not ctx:
+            return jsonify({'error': 'Admin access required'}), 403
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+        et = entity.lower()
+        fmt = 'xlsx' if fmt.lower() == 'excel' else fmt.lower()
+        if et not in EXPORT_ENTITIES:
+            return jsonify({'error': 'Unknown export entity'}), 400
+        if fmt not in export_jobs.JOB_FORMATS:
+            return jsonify({'error': 'Unsupported format'}), 400
+
+        muni = db.session.get(Municipality, municipality_id) if municipality_id not in ('ALL', None) else None
+        filters = request.get_json(silent=True) or {}
+        job, reused = export_jobs.enqueue_export(
+            entity=et,
+            fmt=fmt,
+            range_param=filters.get('range') or 'last_30_days',
+            municipality_scope=municipality_id,
+            municipality_name=getattr(muni, 'name', 'Zambales (province-wide)' if municipality_id == 'ALL' else 'Municipality'),
+            municipality_slug=getattr(muni, 'slug', 'zambales' if municipality_id == 'ALL' else str(municipality_id)),
+            ctx=ctx,
+            requested_by=ctx['user_id'],
+        )
+        return jsonify({'job': job.to_dict(), 'reused': reused}), 200 if reused and job.status == 'completed' else 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to queue export', 'details': str(e)}), 500
+
+
+@admin_bp.route('/exports/jobs/<string:job_id>', methods=['GET'])
+@jwt_required()
+def admin_export_job_status(job_id: str):
+    try:
+        job, error = _export_job_for_staff(job_id)
+        if error:
+            return error
+        return jsonify({'job': job.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to load export job', 'details': str(e)}), 500
+
+
+@admin_bp.route('/exports/jobs/<string:job_id>/download', methods=['GET'])
+@jwt_required()
+def admin_export_job_download(job_id: str):
+    try:
+        job, error = _export_job_for_staff(job_id)
+        if error:
+            return error
+        if job.status != 'completed':
+            return jsonify({'error': 'Export is not ready', 'job': job.to_dict()}), 409
+        return export_jobs.export_download_response(job)
+    except FileNotFoundError:
+        return jsonify({'error': 'Export file not found'}), 404
+    except PermissionError:
+        return jsonify({'error': 'Access denied'}), 403
+    except requests.RequestException as e:
+        current_app.logger.error("Failed to fetch export %s from storage: %s", job_id, e)
+        return jsonify({'error': 'Failed to fetch export from storage'}), 502
+    except Exception as e:
+        return jsonify({'error': 'Failed to download export', 'details': str(e)}), 500
+
+
+def _fanout_query_for_staff(ctx):
+    """NotificationFanout query limited to fan-outs of announcements/programs the caller can see."""
+    if ctx.get('is_super'):
+        return NotificationFanout.query
+    announcement_ids = _announcement_query_for_staff(ctx).with_entities(Announcement.id)
+    visible = and_(
+        NotificationFanout.event_type == 'announcement_published',
+        NotificationFanout.entity_id.in_(announcement_ids),
+    )
+    # Benefit programs belong to municipal/barangay admins (see _get_benefit_scope)
+    role = ctx.get('role_lower')
+    if ctx.get('municipality_id') and (
+        role == 'municipal_admin' or (role == 'barangay_admin' and ctx.get('barangay_id'))
+    ):
+        program_ids = _benefit_program_query_for_scope({
+            'role': role,
+            'municipality_id': ctx['municipality_id'],
+            'barangay_id': ctx.get('barangay_id'),
+        }).with_entities(BenefitProgram.id)
+        visible = or_(visible, and_(
+            NotificationFanout.event_type == 'benefit_program_created',
+            NotificationFanout.entity_id.in_(program_ids),
+        ))
+    return NotificationFanout.query.filter(visible)
+
+
+@admin_bp.route('/notifications/fanouts', methods=['GET'])
+@jwt_required()
+def admin_notification_fanouts():
+    """Progress of background announcement/program notification fan-outs."""
+    try:
+        ctx = _get_staff_context()
+        if not ctx:
+            return jsonify({'error': 'Admin access required'}), 403
+        query = _fanout_query_for_staff(ctx)
+        event_type = (request.args.get('event_type') or '').strip()
+        if event_type:
+            query = query.filter(NotificationFanout.event_type == event_type)
+        entity_id = request.args.get('entity_id', type=int)
+        if entity_id:
+            query = query.filter(NotificationFanout.entity_id == entity_id)
+        fanouts = query.order_by(NotificationFanout.id.desc()).limit(50).all()
+        return jsonify({'fanouts': [f.to_dict() for f in fanouts]}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to load notification fan-outs', 'details': str(e)}), 500
+
+
+@admin_bp.route('/notifications/fanouts/<int:fanout_id>', methods=['GET'])
+@jwt_required()
+def admin_notification_fanout_status(fanout_id: int):
+    try:
+        ctx = _get_staff_context()
+        if not ctx:
+            return jsonify({'error': 'Admin access required'}), 403
+        fanout = _fanout_query_for_staff(ctx).filter(NotificationFanout.id == fanout_id).first()
+        if not fanout:
+            return jsonify({'error': 'Fan-out not found'}), 404
+        return jsonify({'fanout': fanout.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to load notification fan-out', 'details': str(e)}), 500
+
+
 @admin_bp.route('/cleanup', methods=['POST'])
 @jwt_required()
 def admin_cleanup():
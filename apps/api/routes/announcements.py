@@ -12,6 +12,7 @@ import sqlite3
 
 from apps.api.models.announcement import Announcement
 from apps.api import db
+from apps.api.utils.pagination import InvalidCursor, KeysetSpec, keyset_paginate, page_args
 from apps.api.utils.zambales_scope import (
     ZAMBALES_MUNICIPALITY_IDS,
     is_valid_zambales_municipality,
@@ -47,6 +48,18 @@ def _is_published_active(now, announcement: Announcement) -> bool:
     return True
 
 
+def _naive_utc(value):
+    if value is not None and value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _pinned_rank(now, announcement: Announcement) -> int:
+    """Python mirror of the pinned-first sort expression (0 = pinned and active)."""
+    pinned_until = _naive_utc(announcement.pinned_until)
+    return 0 if announcement.pinned and (pinned_until is None or pinned_until > now) else 1
+
+
 @announcements_bp.route('', methods=['GET'])
 def list_announcements():
     """Return announcements based on location scope filters.
@@ -59,12 +72,14 @@ def list_announcements():
       - Verified residents can browse other municipality/barangay scopes via header filters.
       - Guests can browse scoped announcements via header filters (municipality/barangay).
       - Pinned announcements (not expired) are sorted to the top, then newest published.
+
+    Paging: follow pagination.next_cursor (keyset over the pinned/published
+    order); page=N still works for page-number UIs.
     """
     from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 
     try:
-        page = max(1, request.args.get('page', 1, type=int) or 1)
-        per_page = max(1, request.args.get('per_page', 20, type=int) or 20)
+        page, per_page, cursor = page_args(request.args)
         browse = _parse_bool(request.args.get('browse'), default=False)
         requested_municipality_id = request.args.get('municipality_id', type=int)
         requested_barangay_id = request.args.get('barangay_id', type=int)
@@ -180,12 +195,32 @@ def list_announcements():
             selectinload(Announcement.barangay),
             selectinload(Announcement.creator),
         ).filter(and_(*filters))
-        query = query.order_by(
-            case((pinned_active, 0), else_=1),
-            publish_order.desc(),
-            Announcement.created_at.desc(),
+        order = KeysetSpec(
+            columns=(
+                (case((pinned_active, 0), else_=1), False),
+                (publish_order, True),
+                (Announcement.created_at, True),
+                (Announcement.id, True),
+            ),
+            row_key=lambda a: (
+                _pinned_rank(now, a),
+                a.publish_at or a.created_at,
+                a.created_at,
+                a.id,
+            ),
+            name='announcements:pinned',
         )
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            paginated = keyset_paginate(
+                query,
+                order,
+                per_page=per_page,
+                cursor=cursor,
+                page=page,
+                total_key=('public', effective_muni_id, effective_barangay_id),
+            )
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
 
         guest_message = None
         if not has_verified_resident:
@@ -199,12 +234,7 @@ def list_announcements():
         return jsonify({
             'announcements': [a.to_dict() for a in paginated.items],
             'count': len(paginated.items),
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': paginated.total,
-                'pages': paginated.pages,
-            },
+            'pagination': paginated.meta(),
             'message': guest_message
         }), 200
 
@@ -3,12 +3,10 @@
 SCOPE: Zambales province only, excluding Olongapo City.
 """
 import json
-from io import BytesIO
-from pathlib import Path
+import os
 from urllib.parse import urlparse
-import mimetypes
 import requests
-from flask import Blueprint, jsonify, request, current_app, send_file
+from flask import Blueprint, jsonify, request, current_app
 from apps.api.utils.time import utc_now, utc_today
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
@@ -24,7 +22,7 @@ from apps.api.utils import (
     fully_verified_required,
     save_benefit_document,
 )
-from apps.api.utils.supabase_storage import get_signed_url
+from apps.api.utils.storage_stream import stream_stored_file
 from apps.api.utils.zambales_scope import (
     ZAMBALES_MUNICIPALITY_IDS,
     is_valid_zambales_municipality,
@@ -54,65 +52,6 @@ def _as_list(value):
     return []
 
 
-def _remote_content_allowed(url: str) -> bool:
-    allowed = current_app.config.get('ALLOWED_FILE_DOMAINS') or []
-    if not allowed:
-        return True
-    parsed = urlparse(url)
-    return parsed.netloc in allowed
-
-
-def _stream_storage_file(file_ref: str, download_name: str = 'document') -> object:
-    """Stream a stored file by URL or local path."""
-    if not file_ref:
-        raise FileNotFoundError("Missing file reference")
-
-    normalized = str(file_ref).replace('\\', '/').lstrip('/')
-    if normalized.startswith(('http://', 'https://')):
-        if not _remote_content_allowed(normalized):
-            raise PermissionError("Untrusted file domain")
-        resp = requests.get(normalized, timeout=15)
-        resp.raise_for_status()
-        content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-        return send_file(
-            BytesIO(resp.content),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    upload_root = Path(current_app.config.get('UPLOAD_FOLDER') or 'uploads').resolve()
-    local_path = (upload_root / normalized).resolve()
-    if not str(local_path).startswith(str(upload_root)):
-        raise PermissionError("Invalid file path")
-
-    if local_path.exists():
-        content_type = mimetypes.guess_type(str(local_path))[0] or 'application/octet-stream'
-        return send_file(
-            str(local_path),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    try:
-        signed = get_signed_url(normalized, expires_in=300)
-        if signed and _remote_content_allowed(signed):
-            resp = requests.get(signed, timeout=15)
-            resp.raise_for_status()
-            content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-            return send_file(
-                BytesIO(resp.content),
-                mimetype=content_type,
-                as_attachment=False,
-                download_name=download_name,
-            )
-    except Exception:
-        pass
-
-    raise FileNotFoundError("File not found")
-
-
 @benefits_bp.route('/programs', methods=['GET'])
 def list_programs():
     """
@@ -461,7 +400,7 @@ def download_application_doc(application_id: int, doc_index: int):
         ext = os.path.splitext(ext_source)[1]
         safe_ext = ext if ext and len(ext) <= 10 else ''
         filename = f"{app.application_number or app.id}-support-{doc_index + 1}{safe_ext}"
-        return _stream_storage_file(source, download_name=filename)
+        return stream_stored_file(source, download_name=filename)
     except FileNotFoundError:
         return jsonify({'error': 'Document file not found'}), 404
     except PermissionError:
@@ -3,11 +3,8 @@
 SCOPE: Zambales province only, excluding Olongapo City.
 """
 import os
-import mimetypes
 import secrets
 from pathlib import Path
-from io import BytesIO
-from urllib.parse import urlparse
 from apps.api.utils.time import utc_now
 from datetime import datetime
 from flask import Blueprint, jsonify, request, current_app, send_file
@@ -51,12 +48,14 @@ from apps.api.utils.validators import (
     ValidationError,
 )
 from apps.api.utils.security import ALLOWED_DOCUMENT_MIMES, validate_file_mime_type
+from apps.api.utils.storage_stream import stream_stored_file
 from apps.api.utils.supabase_storage import (
     upload_file_to_path,
     get_signed_url,
     generate_unique_filename,
 )
 from apps.api.utils.storage_handler import get_file_url as get_storage_file_url
+from apps.api.utils.reference_cache import cached_reference
 from werkzeug.utils import secure_filename
 from apps.api import limiter
 
@@ -178,67 +177,8 @@ def _generate_request_number(user_id: int) -> str:
     raise RuntimeError("Unable to generate unique request number")
 
 
-def _remote_content_allowed(url: str) -> bool:
-    allowed = current_app.config.get('ALLOWED_FILE_DOMAINS') or []
-    if not allowed:
-        return True
-    parsed = urlparse(url)
-    return parsed.netloc in allowed
-
-
-def _stream_storage_file(file_ref: str, download_name: str = 'document') -> object:
-    """Stream a stored file by URL or local path."""
-    if not file_ref:
-        raise FileNotFoundError("Missing file reference")
-
-    normalized = str(file_ref).replace('\\', '/')
-    if normalized.startswith(('http://', 'https://')):
-        if not _remote_content_allowed(normalized):
-            raise PermissionError("Untrusted file domain")
-        resp = requests.get(normalized, timeout=15)
-        resp.raise_for_status()
-        content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-        return send_file(
-            BytesIO(resp.content),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    upload_root = Path(current_app.config.get('UPLOAD_FOLDER') or 'uploads').resolve()
-    local_path = (upload_root / normalized).resolve()
-    if not str(local_path).startswith(str(upload_root)):
-        raise PermissionError("Invalid file path")
-
-    if local_path.exists():
-        content_type = mimetypes.guess_type(str(local_path))[0] or 'application/octet-stream'
-        return send_file(
-            str(local_path),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    # Support DB values that store storage paths instead of absolute URLs.
-    try:
-        signed = get_signed_url(normalized, expires_in=300)
-        if signed and _remote_content_allowed(signed):
-            resp = requests.get(signed, timeout=15)
-            resp.raise_for_status()
-            content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-            return send_file(
-                BytesIO(resp.content),
-                mimetype=content_type,
-                as_attachment=False,
-                download_name=download_name,
-            )
-    except Exception:
-        pass
-
-    raise FileNotFoundError("File not found")
-
-
 @documents_bp.route('/types', methods=['GET'])
+@cached_reference('document_types')
 def list_document_types():
     """Public list of active document types."""
     try:
@@ -625,7 +565,7 @@ def download_my_document(request_id: int):
             return jsonify({'error': 'Document is not ready'}), 400
 
         filename = f"{r.request_number or 'document'}.pdf"
-        return _stream_storage_file(r.document_file, download_name=filename)
+        return stream_stored_file(r.document_file, download_name=filename)
     except PermissionError:
         return jsonify({'error': 'File access denied'}), 403
     except FileNotFoundError:
@@ -650,7 +590,7 @@ def get_claim_ticket_qr(request_id: int):
             return jsonify({'error': 'Claim QR is not available'}), 404
 
         filename = f"{r.request_number or 'claim'}-qr.png"
-        return _stream_storage_file(r.qr_code, download_name=filename)
+        return stream_stored_file(r.qr_code, download_name=filename)
     except PermissionError:
         return jsonify({'error': 'File access denied'}), 403
     except FileNotFoundError:
@@ -1246,7 +1186,7 @@ def get_manual_payment_proof(request_id: int):
         if not str(source).startswith(('http://', 'https://')):
             signed = _manual_proof_signed_url(source)
             source = signed or source
-        return _stream_storage_file(source, download_name=f"{r.request_number or 'proof'}-manual-proof")
+        return stream_stored_file(source, download_name=f"{r.request_number or 'proof'}-manual-proof")
     except PermissionError:
         return jsonify({'error': 'File access denied'}), 403
     except FileNotFoundError:
@@ -17,6 +17,8 @@ from apps.api.utils import (
     fully_verified_required,
     save_issue_attachment,
 )
+from apps.api.utils.pagination import InvalidCursor, created_desc_spec, keyset_paginate, page_args
+from apps.api.utils.reference_cache import cached_reference
 from apps.api.utils.zambales_scope import (
     ZAMBALES_MUNICIPALITY_IDS,
     is_valid_zambales_municipality,
@@ -27,6 +29,7 @@ issues_bp = Blueprint('issues', __name__, url_prefix='/api/issues')
 
 
 @issues_bp.route('/categories', methods=['GET'])
+@cached_reference('issue_categories')
 def list_categories():
     """Public list of active issue categories."""
     try:
@@ -47,8 +50,9 @@ def list_issues():
       - municipality_id: int (REQUIRED for guests; authenticated users auto-scoped)
       - status: string (optional filter)
       - category: int or string (optional filter)
+      - cursor: opaque token from pagination.next_cursor (preferred over page)
       - page: int (default 1)
-      - per_page: int (default 20)
+      - per_page: int (default 20, max 100)
     
     Municipality Scoping Rules:
       - Guest users: MUST provide municipality_id; returns empty if not provided
@@ -61,8 +65,7 @@ def list_issues():
         municipality_id = request.args.get('municipality_id', type=int)
         status = request.args.get('status')
         category = request.args.get('category')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page, cursor = page_args(request.args)
 
         # Check if user is authenticated
         is_authenticated = False
@@ -129,23 +132,21 @@ def list_issues():
                 if cat:
                     query = query.filter(Issue.category_id == cat.id)
 
-        # Manual pagination to avoid paginate() edge cases
-        total = query.count()
-        items = (
-            query.order_by(Issue.created_at.desc())
-                 .limit(per_page)
-                 .offset((page - 1) * per_page)
-                 .all()
-        )
-        pages = (total + per_page - 1) // per_page if per_page else 1
+        # Keyset pagination with a cached total (see utils/pagination.py)
+        try:
+            result = keyset_paginate(
+                query,
+                created_desc_spec(Issue),
+                per_page=per_page,
+                cursor=cursor,
+                page=page,
+                total_key=('public', effective_municipality_id, status, category),
+            )
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
         return jsonify({
-            'issues': [i.to_dict() for i in items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total,
-                'pages': pages,
-            }
+            'issues': [i.to_dict() for i in result.items],
+            'pagination': result.meta(),
         }), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get issues', 'details': str(e)}), 500
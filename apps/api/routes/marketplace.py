@@ -28,6 +28,8 @@ from apps.api.utils import (
     TransitionError,
 )
 from apps.api.utils.storage_handler import save_marketplace_image
+from apps.api.utils.marketplace_listing import serialize_items, with_listing_relations
+from apps.api.utils.pagination import InvalidCursor, created_desc_spec, keyset_paginate, page_args
 from apps.api.utils.zambales_scope import (
     ZAMBALES_MUNICIPALITY_IDS,
     is_valid_zambales_municipality,
@@ -56,8 +58,12 @@ def list_items():
       - category: string (optional filter; use "__other__" for non-standard categories)
       - transaction_type: string (optional filter)
       - status: string (default 'available')
-      - page: int (default 1)
-      - per_page: int (default 20)
+      - cursor: opaque token from a previous response's next_cursor
+      - page: int (default 1; legacy offset paging, ignored when cursor is given)
+      - per_page: int (default 20, max 100)
+    
+    Pages are keyset-paginated on (created_at, id); follow next_cursor until it
+    is null. No total count is computed.
     
     Municipality Scoping Rules:
       - Guest users: MUST provide municipality_id; returns empty if not provided
@@ -73,8 +79,7 @@ def list_items():
         category = (request.args.get('category') or '').strip()
         transaction_type = request.args.get('transaction_type')
         status = request.args.get('status', 'available')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page, cursor = page_args(request.args)
         
         # Check if user is authenticated
         is_authenticated = False
@@ -136,28 +141,19 @@ def list_items():
         if status:
             query = query.filter_by(status=status)
         
-        # Order by most recent
-        query = query.order_by(Item.created_at.desc())
-        
-        # Paginate
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Include municipality_name for each item
-        items_data = []
-        for item in paginated.items:
-            d = item.to_dict(include_user=True)
-            try:
-                d['municipality_name'] = item.municipality.name if item.municipality else None
-            except Exception:
-                d['municipality_name'] = None
-            items_data.append(d)
+        # Newest first, with seller/municipality loaded in batch (see utils/marketplace_listing.py)
+        query = with_listing_relations(query)
+        try:
+            result = keyset_paginate(query, created_desc_spec(Item), per_page=per_page, cursor=cursor, page=page)
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
 
         return jsonify({
-            'items': items_data,
-            'total': paginated.total,
+            'items': serialize_items(result.items),
             'page': page,
             'per_page': per_page,
-            'pages': paginated.pages
+            'next_cursor': result.next_cursor,
+            'has_more': result.has_more,
         }), 200
     
     except (sqlite3.OperationalError, SAOperationalError, SAProgrammingError):
@@ -424,9 +420,11 @@ def upload_item_image(item_id):
         municipality = db.session.get(Municipality, item.municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
-        rel_path = save_marketplace_image(file, item_id, municipality_slug)
+        saved = save_marketplace_image(file, item_id, municipality_slug)
+        rel_path = saved.path
         images.append(rel_path)
         item.images = images
+        item.set_image_variants(rel_path, saved.variants)
         db.session.commit()
 
         return jsonify({'message': 'Image uploaded', 'path': rel_path, 'item': item.to_dict()}), 200
@@ -8,6 +8,7 @@ from flask import Blueprint, jsonify, request
 from apps.api.models.municipality import Municipality, Barangay
 from apps.api.models.province import Province
 from apps.api import db
+from apps.api.utils.reference_cache import cached_reference
 from apps.api.utils.zambales_scope import (
     ZAMBALES_PROVINCE_ID,
     ZAMBALES_MUNICIPALITY_IDS,
@@ -19,6 +20,7 @@ municipalities_bp = Blueprint('municipalities', __name__, url_prefix='/api/munic
 
 
 @municipalities_bp.route('', methods=['GET'])
+@cached_reference('locations')
 def list_municipalities():
     """Get list of municipalities in Zambales province (excluding Olongapo).
     
@@ -48,6 +50,7 @@ def list_municipalities():
 
 
 @municipalities_bp.route('/<int:municipality_id>', methods=['GET'])
+@cached_reference('locations')
 def get_municipality(municipality_id):
     """Get details of a specific municipality.
     
@@ -73,6 +76,7 @@ def get_municipality(municipality_id):
 
 
 @municipalities_bp.route('/slug/<slug>', methods=['GET'])
+@cached_reference('locations')
 def get_municipality_by_slug(slug):
     """Get municipality by slug.
     
@@ -102,6 +106,7 @@ def get_municipality_by_slug(slug):
 
 
 @municipalities_bp.route('/<int:municipality_id>/barangays', methods=['GET'])
+@cached_reference('locations')
 def list_barangays(municipality_id):
     """Get list of barangays in a municipality.
     
@@ -133,6 +138,7 @@ def list_barangays(municipality_id):
 
 
 @municipalities_bp.route('/barangays/<int:barangay_id>', methods=['GET'])
+@cached_reference('locations')
 def get_barangay(barangay_id):
     """Get details of a specific barangay.
     
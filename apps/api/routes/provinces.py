@@ -8,6 +8,7 @@ from apps.api.models.province import Province
 from apps.api.models.municipality import Municipality
 from apps.api import db
 from apps.api.utils.db_retry import with_db_retry
+from apps.api.utils.reference_cache import cached_reference
 from apps.api.utils.zambales_scope import (
     ZAMBALES_PROVINCE_ID,
     ZAMBALES_PROVINCE_SLUG,
@@ -18,6 +19,7 @@ provinces_bp = Blueprint('provinces', __name__, url_prefix='/api/provinces')
 
 
 @provinces_bp.route('', methods=['GET'])
+@cached_reference('locations')
 @with_db_retry(max_retries=3, initial_delay=0.5)
 def list_provinces():
     """Get list of provinces - returns only Zambales.
@@ -59,6 +61,7 @@ def list_provinces():
 
 
 @provinces_bp.route('/<int:province_id>', methods=['GET'])
+@cached_reference('locations')
 def get_province(province_id):
     """Get details of a specific province.
     
@@ -94,6 +97,7 @@ def get_province(province_id):
 
 
 @provinces_bp.route('/slug/<slug>', methods=['GET'])
+@cached_reference('locations')
 def get_province_by_slug(slug):
     """Get province by slug.
     
@@ -129,6 +133,7 @@ def get_province_by_slug(slug):
 
 
 @provinces_bp.route('/<int:province_id>/municipalities', methods=['GET'])
+@cached_reference('locations')
 def list_province_municipalities(province_id):
     """Get list of municipalities in Zambales province.
     
@@ -7,14 +7,11 @@ Endpoints for managing special statuses (Student, PWD, Senior Citizen):
 
 SCOPE: Zambales province only
 """
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, request, jsonify, current_app
 from apps.api.utils.time import utc_now
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from io import BytesIO
-from pathlib import Path
 from urllib.parse import urlparse
-import mimetypes
 import os
 import requests
 
@@ -31,9 +28,11 @@ from apps.api.utils.special_status import (
     revoke_special_status,
 )
 from apps.api.utils.constants import SPECIAL_STATUS_TYPES
+from apps.api.utils.validators import ALLOWED_DOCUMENT_EXTENSIONS, ValidationError
 from apps.api.utils.zambales_scope import is_valid_zambales_municipality
 from apps.api.utils.admin_audit import log_admin_action
-from apps.api.utils.supabase_storage import get_signed_url
+from apps.api.utils.storage_handler import StorageError, save_blob
+from apps.api.utils.storage_stream import stream_stored_file
 
 special_status_bp = Blueprint('special_status', __name__, url_prefix='/api')
 
@@ -48,11 +47,14 @@ def _save_status_document(file, user_id: int, status_type: str, doc_name: str) -
         doc_name: Name of the document (student_id, cor, pwd_id, senior_id)
 
     Returns:
-        Relative path to the saved file
+        Reference to the saved file (a shared blob when UPLOAD_DEDUP_ENABLED)
     """
     if not file or not file.filename:
         return None
 
+    if current_app.config.get('UPLOAD_DEDUP_ENABLED', True):
+        return save_blob(file, allowed_extensions=ALLOWED_DOCUMENT_EXTENSIONS, max_size_mb=10, validate_mime=False)
+
     # Create directory structure
     upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
     status_dir = os.path.join(upload_folder, 'special_status', status_type, str(user_id))
@@ -71,66 +73,6 @@ def _save_status_document(file, user_id: int, status_type: str, doc_name: str) -
     return os.path.relpath(filepath, upload_folder)
 
 
-def _remote_content_allowed(url: str) -> bool:
-    allowed = current_app.config.get('ALLOWED_FILE_DOMAINS') or []
-    if not allowed:
-        return True
-    parsed = urlparse(url)
-    return parsed.netloc in allowed
-
-
-def _stream_storage_file(file_ref: str, download_name: str = 'document') -> object:
-    """Stream a stored file by URL or local path."""
-    if not file_ref:
-        raise FileNotFoundError("Missing file reference")
-
-    normalized = str(file_ref).replace('\\', '/').lstrip('/')
-    if normalized.startswith(('http://', 'https://')):
-        if not _remote_content_allowed(normalized):
-            raise PermissionError("Untrusted file domain")
-        resp = requests.get(normalized, timeout=15)
-        resp.raise_for_status()
-        content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-        return send_file(
-            BytesIO(resp.content),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    upload_root = Path(current_app.config.get('UPLOAD_FOLDER') or 'uploads').resolve()
-    local_path = (upload_root / normalized).resolve()
-    if not str(local_path).startswith(str(upload_root)):
-        raise PermissionError("Invalid file path")
-
-    if local_path.exists():
-        content_type = mimetypes.guess_type(str(local_path))[0] or 'application/octet-stream'
-        return send_file(
-            str(local_path),
-            mimetype=content_type,
-            as_attachment=False,
-            download_name=download_name,
-        )
-
-    # Support DB values that store storage paths instead of absolute URLs.
-    try:
-        signed = get_signed_url(normalized, expires_in=300)
-        if signed and _remote_content_allowed(signed):
-            resp = requests.get(signed, timeout=15)
-            resp.raise_for_status()
-            content_type = resp.headers.get('Content-Type') or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
-            return send_file(
-                BytesIO(resp.content),
-                mimetype=content_type,
-                as_attachment=False,
-                download_name=download_name,
-            )
-    except Exception:
-        pass
-
-    raise FileNotFoundError("File not found")
-
-
 def _parse_semester_dates():
     """Parse semester start/end dates from form data."""
     semester_start_raw = request.form.get('semester_start')
@@ -208,8 +150,12 @@ def apply_student_status():
         return jsonify({'error': 'Certificate of Registration (COR) is required'}), 400
 
     # Save documents
-    student_id_path = _save_status_document(student_id_file, user_id, 'student', 'student_id')
-    cor_path = _save_status_document(cor_file, user_id, 'student', 'cor')
+    try:
+        student_id_path = _save_status_document(student_id_file, user_id, 'student', 'student_id')
+        cor_path = _save_status_document(cor_file, user_id, 'student', 'cor')
+    except (StorageError, ValidationError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
 
     # Create status application
     status = UserSpecialStatus(
@@ -263,7 +209,11 @@ def apply_pwd_status():
         return jsonify({'error': 'PWD ID image is required'}), 400
 
     # Save document
-    pwd_id_path = _save_status_document(pwd_id_file, user_id, 'pwd', 'pwd_id')
+    try:
+        pwd_id_path = _save_status_document(pwd_id_file, user_id, 'pwd', 'pwd_id')
+    except (StorageError, ValidationError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
 
     # Create status application
     status = UserSpecialStatus(
@@ -312,7 +262,11 @@ def apply_senior_status():
         return jsonify({'error': 'Senior Citizen ID image is required'}), 400
 
     # Save document
-    senior_id_path = _save_status_document(senior_id_file, user_id, 'senior', 'senior_id')
+    try:
+        senior_id_path = _save_status_document(senior_id_file, user_id, 'senior', 'senior_id')
+    except (StorageError, ValidationError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
 
     # Create status application
     status = UserSpecialStatus(
@@ -380,11 +334,14 @@ def renew_student_status(status_id):
     status.semester_end = semester_end
 
     # Save new documents
-    cor_path = _save_status_document(cor_file, user_id, 'student', 'cor')
+    try:
+        cor_path = _save_status_document(cor_file, user_id, 'student', 'cor')
+        student_id_path = _save_status_document(student_id_file, user_id, 'student', 'student_id') if student_id_file else None
+    except (StorageError, ValidationError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     status.cor_path = cor_path
-
-    if student_id_file:
-        student_id_path = _save_status_document(student_id_file, user_id, 'student', 'student_id')
+    if student_id_path:
         status.student_id_path = student_id_path
 
     # Reset status to pending for admin review
@@ -620,7 +577,7 @@ def get_status_document(status_id, doc_type):
         ext = os.path.splitext(ext_source)[1]
         safe_ext = ext if ext and len(ext) <= 10 else ''
         download_name = f"special-status-{status.id}-{doc_type}{safe_ext}"
-        file_response = _stream_storage_file(source, download_name=download_name)
+        file_response = stream_stored_file(source, download_name=download_name)
 
         log_admin_action(
             admin_id=ctx['user_id'],
@@ -0,0 +1,174 @@
+"""Notification delivery throughput benchmark.
+
+Seeds N outbox rows (email and SMS) and drains them with
+apps.api.utils.notification_delivery.process_batch against mock providers
+that sleep for a fixed latency, then prints rows/second, time per stage and
+provider call latency from apps.api.utils.notification_metrics. Run it
+before and after a delivery change to measure the difference.
+
+Usage:
+    python apps/api/scripts/benchmark_notifications.py --rows 5000 --concurrency 1,4,8
+    python apps/api/scripts/benchmark_notifications.py --database-url postgresql://.../scratch
+
+Without --database-url a temporary SQLite file is used. A Postgres URL must
+point at a scratch database: the worker claims every pending row in it.
+Only rows the benchmark created (event_type 'benchmark', users 'bench-*')
+are deleted between runs.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+try:
+    from apps.api.app import create_app
+    from apps.api import db
+    from apps.api.config import Config
+    from apps.api.models.notification import NotificationOutbox
+    from apps.api.models.user import User
+    from apps.api.utils import notification_delivery
+    from apps.api.utils.notification_delivery import process_batch
+    from apps.api.utils.notification_metrics import get_metrics
+except ImportError:
+    import sys
+    from pathlib import Path
+    # Ensure parent directory (API root) is in path at the beginning
+    # This prevents 'import __init__' in app.py from picking up scripts/__init__.py
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    from app import create_app
+    from apps.api import db
+    from apps.api.config import Config
+    from apps.api.models.notification import NotificationOutbox
+    from apps.api.models.user import User
+    from apps.api.utils import notification_delivery
+    from apps.api.utils.notification_delivery import process_batch
+    from apps.api.utils.notification_metrics import get_metrics
+
+
+EVENT_TYPE = 'benchmark'
+
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    RATELIMIT_ENABLED = False
+    NOTIFICATION_METRICS_LOG = False
+
+
+def install_mock_providers(email_latency: float, sms_latency: float, failure_rate: float) -> None:
+    """Replace the email/SMS senders with sleeps; ``failure_rate`` of calls raise/fail."""
+
+    def send_email(to, subject, body):
+        time.sleep(email_latency)
+        if failure_rate and random.random() < failure_rate:
+            raise RuntimeError('mock email failure')
+
+    def send_sms(numbers, message):
+        time.sleep(sms_latency)
+        if failure_rate and random.random() < failure_rate:
+            return {'status': 'failed', 'error': 'mock sms failure'}
+        return {'status': 'sent'}
+
+    notification_delivery._send_email = send_email
+    notification_delivery.send_sms = send_sms
+
+
+def seed(rows: int, users: int, sms_share: float, identical_sms: bool) -> None:
+    """Replace previous benchmark rows with ``rows`` fresh pending ones."""
+    NotificationOutbox.query.filter_by(event_type=EVENT_TYPE).delete(synchronize_session=False)
+    existing = User.query.filter(User.username.like('bench-%')).count()
+    if existing < users:
+        db.session.execute(db.insert(User), [
+            {
+                'username': f'bench-{i}', 'email': f'bench-{i}@example.invalid', 'password_hash': 'x',
+                'first_name': 'Bench', 'last_name': str(i), 'role': 'resident',
+                'notify_email_enabled': True, 'notify_sms_enabled': True, 'mobile_number': f'0917{i:07d}',
+            }
+            for i in range(existing, users)
+        ])
+    user_ids = [uid for (uid,) in db.session.query(User.id).filter(User.username.like('bench-%')).order_by(User.id).limit(users)]
+    db.session.commit()
+
+    sms_every = round(1 / sms_share) if sms_share > 0 else 0
+    values = []
+    for i in range(rows):
+        resident_id = user_ids[i % len(user_ids)]
+        if sms_every and i % sms_every == 0:
+            message = 'Benchmark notice' if identical_sms else f'Benchmark notice {i}'
+            channel, payload = 'sms', {'message': message}
+        else:
+            channel, payload = 'email', {'subject': 'Benchmark', 'body': f'Benchmark body {i}'}
+        values.append({
+            'resident_id': resident_id, 'channel': channel, 'event_type': EVENT_TYPE, 'entity_id': i,
+            'payload': payload, 'status': 'pending', 'attempts': 0, 'dedupe_key': f'{EVENT_TYPE}:{i}:{channel}',
+        })
+    for start in range(0, len(values), 5000):
+        db.session.execute(db.insert(NotificationOutbox), values[start:start + 5000])
+    db.session.commit()
+
+
+def drain(batch_size: int, concurrency: int) -> float:
+    started = time.perf_counter()
+    while process_batch(max_items=batch_size, concurrency=concurrency):
+        pass
+    return time.perf_counter() - started
+
+
+def report(label: str, rows: int, elapsed: float, metrics) -> None:
+    snap = metrics.snapshot()
+    print(f"\n{label}: {rows} rows in {elapsed:.2f}s -> {rows / elapsed:.0f} rows/s ({snap['batches']} batches)")
+    busy = sum(snap['stage_seconds'].values()) or 1.0
+    stages = ', '.join(f"{stage} {secs:.2f}s ({secs / busy:.0%})" for stage, secs in snap['stage_seconds'].items())
+    print(f"  stages: {stages}")
+    for channel, hist in snap['send_latency'].items():
+        if hist['count']:
+            print(f"  {channel}: {hist['count']} provider calls, avg {hist['avg_ms']} ms")
+    print(f"  outcomes: {snap['outcomes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification delivery throughput benchmark")
+    parser.add_argument('--database-url', default=None, help='Scratch database (default: temporary SQLite file)')
+    parser.add_argument('--rows', type=int, default=2000, help='Outbox rows per run')
+    parser.add_argument('--users', type=int, default=500, help='Distinct recipients')
+    parser.add_argument('--sms-share', type=float, default=0.25, help='Fraction of rows sent as SMS')
+    parser.add_argument('--identical-sms', action='store_true', help='Give every SMS the same text (exercises coalescing)')
+    parser.add_argument('--batch-size', type=int, default=200, help='process_batch max_items')
+    parser.add_argument('--concurrency', default='1,4,8', help='Comma-separated concurrency levels to compare')
+    parser.add_argument('--email-latency-ms', type=float, default=50, help='Mock email provider latency')
+    parser.add_argument('--sms-latency-ms', type=float, default=150, help='Mock SMS provider latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of provider calls that fail')
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.mkdtemp(prefix='notify-bench-')
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    BenchmarkConfig.SQLALCHEMY_DATABASE_URI = url
+
+    app = create_app(BenchmarkConfig)
+    install_mock_providers(args.email_latency_ms / 1000, args.sms_latency_ms / 1000, args.failure_rate)
+    with app.app_context():
+        db.create_all()
+        print(f"Database: {db.engine.url.render_as_string(hide_password=True)}")
+        for level in [int(c) for c in args.concurrency.split(',') if c.strip()]:
+            seed(args.rows, args.users, args.sms_share, args.identical_sms)
+            app.extensions.pop('notification_metrics', None)
+            app.extensions.pop('provider_governors', None)
+            elapsed = drain(args.batch_size, level)
+            report(f"concurrency={level}", args.rows, elapsed, get_metrics())
+        NotificationOutbox.query.filter_by(event_type=EVENT_TYPE).delete(synchronize_session=False)
+        db.session.commit()
+        db.engine.dispose()
+    if tmpdir:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@ Cleanup script for resident verification images.
 Deletes ID/selfie images after verification + retention period.
 Respects ID_RETENTION_DAYS environment variable (default: 30 days).
 
+Uploads stored as shared blobs (see storage_handler.save_blob) are released
+rather than deleted: the file is only removed once no other record uses it.
+
 Usage:
     python apps/api/scripts/cleanup_verification_images.py [--dry-run]
 
@@ -25,7 +28,8 @@ sys.path.insert(0, str(project_root))
 from apps.api import create_app, db
 from apps.api.models.user import User
 from apps.api.models.admin_audit_log import AdminAuditLog
-from apps.api.utils.storage_handler import delete_file
+from apps.api.models.stored_blob import StoredBlob
+from apps.api.utils.storage_handler import blob_path, delete_file
 import click
 
 
@@ -55,6 +59,7 @@ def cleanup_verification_images(dry_run):
         ).all()
 
         deleted_count = 0
+        shared_count = 0
         error_count = 0
 
         for user in eligible_users:
@@ -68,14 +73,19 @@ def cleanup_verification_images(dry_run):
 
                 try:
                     if not dry_run:
-                        # Delete file
-                        delete_file(file_path)
+                        # Delete file, or drop this reference if the blob is shared
+                        if not delete_file(file_path) and blob_path(file_path):
+                            shared_count += 1
 
                         # Clear DB reference
                         setattr(user, field, None)
                         user_deleted += 1
                     else:
-                        print(f"  Would delete: {file_path}")
+                        blob = StoredBlob.query.filter_by(storage_path=blob_path(file_path)).first()
+                        if blob is not None and blob.ref_count > 1:
+                            print(f"  Would release: {file_path} ({blob.ref_count - 1} other references)")
+                        else:
+                            print(f"  Would delete: {file_path}")
                         user_deleted += 1
 
                 except Exception as e:
@@ -107,6 +117,8 @@ def cleanup_verification_images(dry_run):
             db.session.commit()
             print("-" * 60)
             print(f"✓ Cleanup complete: {deleted_count} files deleted")
+            if shared_count > 0:
+                print(f"  {shared_count} of them are shared blobs kept for other records")
             if error_count > 0:
                 print(f"⚠ Errors encountered: {error_count}")
         else:
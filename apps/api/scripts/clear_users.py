@@ -47,7 +47,7 @@ try:
     from apps.api.models.marketplace import Item, Transaction, TransactionAuditLog
     from apps.api.models.token_blacklist import TokenBlacklist
     from apps.api.models.refresh_token import RefreshTokenFamily, RefreshToken
-    from apps.api.models.notification import NotificationOutbox
+    from apps.api.models.notification import NotificationOutbox, NotificationOutboxArchive
     from apps.api.models.email_verification_code import EmailVerificationCode
     from apps.api.models.announcement import Announcement
     from apps.api.models.audit import AuditLog
@@ -61,6 +61,7 @@ except ImportError as exc:  # pragma: no cover
 
 DELETION_ORDER = [
     ("notification_outbox", NotificationOutbox),
+    ("notification_outbox_archive", NotificationOutboxArchive),
     ("email_verification_codes", EmailVerificationCode),
     ("token_blacklist", TokenBlacklist),
     ("refresh_tokens", RefreshToken),
@@ -0,0 +1,59 @@
+"""Admin export job worker.
+
+Renders queued background exports when the API runs with
+EXPORT_JOB_RUNNER=worker. Rendering logic lives in apps.api.utils.export_jobs
+so the in-process thread runner and this worker behave the same.
+"""
+from __future__ import annotations
+
+import time
+import argparse
+
+try:
+    from apps.api.app import create_app
+    from apps.api import db
+    from apps.api.utils.export_jobs import fail_stale_jobs, process_pending_exports
+except ImportError:
+    import sys
+    from pathlib import Path
+    # Ensure parent directory (API root) is in path at the beginning
+    # This prevents 'import __init__' in app.py from picking up scripts/__init__.py
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    from app import create_app
+    from apps.api import db
+    from apps.api.utils.export_jobs import fail_stale_jobs, process_pending_exports
+
+
+def run_loop(interval: int = 5, max_jobs: int = 5):
+    """Run worker continuously."""
+    while True:
+        try:
+            fail_stale_jobs()
+            processed = process_pending_exports(max_jobs=max_jobs)
+            if processed < max_jobs:
+                time.sleep(interval)
+        except Exception:
+            # Keep running even if a job fails unexpectedly
+            db.session.rollback()
+            time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admin export job worker")
+    parser.add_argument('--once', action='store_true', help='Process queued jobs once then exit')
+    parser.add_argument('--interval', type=int, default=5, help='Seconds to wait between polls (loop mode)')
+    parser.add_argument('--max-jobs', type=int, default=5, help='Max jobs per poll')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.once:
+            fail_stale_jobs()
+            process_pending_exports(max_jobs=args.max_jobs)
+        else:
+            run_loop(interval=args.interval, max_jobs=args.max_jobs)
+
+
+if __name__ == '__main__':
+    main()
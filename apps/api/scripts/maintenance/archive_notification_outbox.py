@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Move old sent/skipped/failed notification outbox rows to notification_outbox_archive.
+
+Pending and processing rows are never touched. Archived rows keep their
+dedupe keys, so archived notifications are not queued again.
+
+Usage:
+    python apps/api/scripts/maintenance/archive_notification_outbox.py --days 30
+
+Options:
+    --days N                Archive terminal rows last updated more than N days ago
+                            (default: NOTIFICATION_OUTBOX_RETENTION_DAYS).
+    --batch-size N          Rows moved per transaction (default: NOTIFICATION_OUTBOX_ARCHIVE_BATCH).
+    --max-batches N         Stop after N batches (default: until done).
+    --purge-archive-days N  Also delete archive rows archived more than N days ago.
+    --dry-run               Show counts only; move nothing.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Add project root to sys.path
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Load environment variables early
+env_path = PROJECT_ROOT / ".env"
+if env_path.exists():
+    load_dotenv(env_path)
+
+try:
+    from apps.api.app import create_app
+    from apps.api.config import ProductionConfig
+    from apps.api.utils.outbox_retention import archive_outbox, purge_archive
+except ImportError as exc:  # pragma: no cover
+    print(f"Import error: {exc}")
+    sys.exit(1)
+
+
+def build_app():
+    """Create the Flask app configured with DATABASE_URL."""
+    app = create_app(ProductionConfig)
+    db_url = os.getenv("DATABASE_URL")
+    if db_url:
+        app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old terminal notification outbox rows.")
+    parser.add_argument("--days", type=int, default=None, help="Retention window in days.")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows moved per transaction.")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches.")
+    parser.add_argument("--purge-archive-days", type=int, default=None, help="Delete archive rows older than this.")
+    parser.add_argument("--dry-run", action="store_true", help="Show counts only; do not move rows.")
+    args = parser.parse_args()
+
+    app = build_app()
+    if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+        print("DATABASE_URL is required. Set it in .env or the environment.")
+        sys.exit(1)
+
+    with app.app_context():
+        stats = archive_outbox(
+            older_than_days=args.days,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            dry_run=args.dry_run,
+        )
+        print(f"Outbox rows older than {stats['cutoff']}: {stats['candidates']}")
+        if args.dry_run:
+            print("Dry run only. Nothing was moved.")
+        else:
+            rate = stats['moved'] / stats['seconds'] if stats['seconds'] else 0
+            print(
+                f"Moved {stats['moved']} rows in {stats['batches']} batches "
+                f"({stats['seconds']:.2f}s, {rate:.0f} rows/s)"
+            )
+
+        purge = purge_archive(older_than_days=args.purge_archive_days, batch_size=args.batch_size, dry_run=args.dry_run)
+        if 'candidates' in purge:
+            print(f"Archive rows eligible for purge: {purge['candidates']}")
+        elif purge['purged']:
+            print(f"Purged {purge['purged']} archive rows ({purge['seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,41 @@
 Runs in a loop (or once with --once) to deliver queued email/SMS notifications.
 Delivery logic lives in apps.api.utils.notification_delivery so it can be
 shared with the inline flush that runs after admin actions.
+
+With --listen the worker sleeps on Postgres LISTEN (see
+apps.api.utils.notification_wakeup) and wakes as soon as a transaction that
+queued notifications commits; --interval then only paces the fallback poll
+for retries and scheduled rows. Without Postgres it polls as before.
+
+With --metrics-port the worker serves its delivery metrics (stage timings,
+send latency histograms, outcome counters; see
+apps.api.utils.notification_metrics) on 127.0.0.1 at /metrics (Prometheus
+text) and /metrics.json.
+
+Replicas can split the outbox with --shard/--shards (or
+NOTIFICATION_WORKER_SHARD/NOTIFICATION_WORKER_SHARDS): each claims only rows
+with id % shards == shard and takes other shards' rows when its own are
+drained (disable with --no-steal). --lane transactional runs a worker that
+never picks up bulk announcement/program fan-out rows.
+
+Each pass also restarts announcement/program fan-outs whose background thread
+died (see apps.api.utils.notification_fanout.recover_stale_fanouts).
 """
 from __future__ import annotations
 
+import json
 import time
 import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 try:
     from apps.api.app import create_app
     from apps.api import db
-    from apps.api.utils.notification_delivery import process_batch
+    from apps.api.utils.notification_delivery import LANES, process_batch
+    from apps.api.utils.notification_fanout import recover_stale_fanouts
+    from apps.api.utils.notification_metrics import get_metrics
+    from apps.api.utils.notification_wakeup import open_listener
 except ImportError:
     import sys
     from pathlib import Path
@@ -22,17 +47,58 @@ except ImportError:
 
     from app import create_app
     from apps.api import db
-    from apps.api.utils.notification_delivery import process_batch
+    from apps.api.utils.notification_delivery import LANES, process_batch
+    from apps.api.utils.notification_fanout import recover_stale_fanouts
+    from apps.api.utils.notification_metrics import get_metrics
+    from apps.api.utils.notification_wakeup import open_listener
 
 
 MAX_ATTEMPTS_DEFAULT = 5
 
 
-def run_loop(interval: int = 10, max_items: int = 200, max_attempts: int = MAX_ATTEMPTS_DEFAULT):
-    """Run worker continuously."""
+def start_metrics_server(metrics, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve ``metrics`` on a daemon thread (/metrics text, /metrics.json)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = metrics.prometheus().encode(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = json.dumps(metrics.snapshot()).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='notification-metrics', daemon=True).start()
+    return server
+
+
+def run_loop(
+    interval: int = 10,
+    max_items: int = 200,
+    max_attempts: int = MAX_ATTEMPTS_DEFAULT,
+    concurrency: int | None = None,
+    **claim_options,
+):
+    """Run worker continuously.
+
+    ``claim_options`` (lanes, shard, steal) are passed to process_batch.
+    """
     while True:
         try:
-            processed = process_batch(max_items=max_items, max_attempts=max_attempts)
+            recover_stale_fanouts()
+            processed = process_batch(
+                max_items=max_items, max_attempts=max_attempts, concurrency=concurrency, **claim_options,
+            )
             if processed < max_items:
                 time.sleep(interval)
         except Exception:
@@ -41,20 +107,105 @@ def run_loop(interval: int = 10, max_items: int = 200, max_attempts: int = MAX_A
             time.sleep(interval)
 
 
+def run_listen_loop(
+    interval: int = 30,
+    max_items: int = 200,
+    max_attempts: int = MAX_ATTEMPTS_DEFAULT,
+    concurrency: int | None = None,
+    **claim_options,
+):
+    """Run worker continuously, waking on NOTIFY instead of sleeping a fixed interval."""
+    listener = open_listener()
+    if listener is None:
+        run_loop(interval=interval, max_items=max_items, max_attempts=max_attempts, concurrency=concurrency, **claim_options)
+        return
+    try:
+        while True:
+            try:
+                recover_stale_fanouts()
+                processed = process_batch(
+                    max_items=max_items, max_attempts=max_attempts, concurrency=concurrency, **claim_options,
+                )
+                if processed < max_items:
+                    listener.wait(interval)
+            except Exception:
+                db.session.rollback()
+                time.sleep(1)
+                if listener.closed:
+                    # Dropped LISTEN connection: reconnect, or fall back to polling
+                    listener.close()
+                    listener = open_listener()
+                    if listener is None:
+                        run_loop(
+                            interval=interval, max_items=max_items, max_attempts=max_attempts,
+                            concurrency=concurrency, **claim_options,
+                        )
+                        return
+    finally:
+        if listener is not None:
+            listener.close()
+
+
+def claim_options_from(args, config) -> dict:
+    """process_batch lane/shard options from CLI args, falling back to config."""
+    shards = args.shards if args.shards is not None else int(config.get('NOTIFICATION_WORKER_SHARDS', 1) or 1)
+    index = args.shard if args.shard is not None else int(config.get('NOTIFICATION_WORKER_SHARD', 0) or 0)
+    if shards > 1 and not 0 <= index < shards:
+        raise SystemExit(f"--shard must be between 0 and {shards - 1}")
+    return {
+        'lanes': None if args.lane == 'all' else (args.lane,),
+        'shard': (index, shards) if shards > 1 else None,
+        'steal': not args.no_steal,
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description="Notification outbox worker")
     parser.add_argument('--once', action='store_true', help='Process a single batch then exit')
-    parser.add_argument('--interval', type=int, default=10, help='Seconds to wait between batches (loop mode)')
+    parser.add_argument('--interval', type=int, default=10, help='Seconds to wait between batches (loop mode; fallback poll with --listen)')
+    parser.add_argument('--listen', action='store_true', help='Wake on Postgres NOTIFY instead of polling (polls on SQLite)')
     parser.add_argument('--max-items', type=int, default=200, help='Max outbox rows per batch')
     parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS_DEFAULT, help='Max retry attempts before marking failed')
+    parser.add_argument(
+        '--concurrency', type=int, default=None,
+        help='Provider calls in flight per channel (default: NOTIFICATION_DELIVERY_CONCURRENCY; 1 = sequential)',
+    )
+    parser.add_argument(
+        '--lane', choices=['all', *LANES], default='all',
+        help='Only claim this lane (default: all, transactional before bulk)',
+    )
+    parser.add_argument('--shard', type=int, default=None, help='This replica\'s shard index (default: NOTIFICATION_WORKER_SHARD)')
+    parser.add_argument('--shards', type=int, default=None, help='Number of shards (default: NOTIFICATION_WORKER_SHARDS)')
+    parser.add_argument('--no-steal', action='store_true', help='Never claim rows from other shards')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Serve delivery metrics on 127.0.0.1:PORT')
     args = parser.parse_args()
 
     app = create_app()
     with app.app_context():
+        claim_options = claim_options_from(args, app.config)
+        if args.metrics_port:
+            start_metrics_server(get_metrics(), args.metrics_port)
         if args.once:
-            process_batch(max_items=args.max_items, max_attempts=args.max_attempts)
+            recover_stale_fanouts()
+            process_batch(
+                max_items=args.max_items, max_attempts=args.max_attempts, concurrency=args.concurrency, **claim_options,
+            )
+        elif args.listen:
+            run_listen_loop(
+                interval=args.interval,
+                max_items=args.max_items,
+                max_attempts=args.max_attempts,
+                concurrency=args.concurrency,
+                **claim_options,
+            )
         else:
-            run_loop(interval=args.interval, max_items=args.max_items, max_attempts=args.max_attempts)
+            run_loop(
+                interval=args.interval,
+                max_items=args.max_items,
+                max_attempts=args.max_attempts,
+                concurrency=args.concurrency,
+                **claim_options,
+            )
 
 
 if __name__ == '__main__':
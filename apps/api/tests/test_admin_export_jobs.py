@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from flask_jwt_extended import create_access_token
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.export_job import ExportJob
+from apps.api.models.municipality import Municipality
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils import export_jobs
+from apps.api.utils.time import utc_now
+
+
+class ExportJobConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    EXPORT_JOB_RUNNER = 'inline'
+
+
+def _setup(app):
+    with app.app_context():
+        db.create_all()
+        admin = User(
+            username='mun_admin',
+            email='mun_admin@example.com',
+            password_hash='test',
+            first_name='Mun',
+            last_name='Admin',
+            role='municipal_admin',
+            admin_municipality_id=112,
+        )
+        other = User(
+            username='other_admin',
+            email='other_admin@example.com',
+            password_hash='test',
+            first_name='Other',
+            last_name='Admin',
+            role='municipal_admin',
+            admin_municipality_id=108,
+        )
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+            Municipality(id=108, name='Botolan', slug='botolan', province_id=6, psgc_code='037108000'),
+            admin, other,
+        ])
+        db.session.add_all([
+            User(
+                username=f'res{i}',
+                email=f'res{i}@example.com',
+                password_hash='test',
+                first_name='Res',
+                last_name=str(i),
+                role='resident',
+                municipality_id=112,
+            )
+            for i in range(3)
+        ])
+        db.session.commit()
+        return (
+            create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'}),
+            create_access_token(identity=str(other.id), additional_claims={'role': 'municipal_admin'}),
+        )
+
+
+def test_export_job_completes_is_reused_and_supports_range(tmp_path):
+    app = create_app(ExportJobConfig)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    client = app.test_client()
+    token, other_token = _setup(app)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.post('/api/admin/exports/jobs/users.csv', headers=headers, json={})
+    assert resp.status_code == 202
+    job = resp.get_json()['job']
+    assert job['status'] == 'completed'
+    assert job['total_rows'] == 3
+    assert job['processed_rows'] == 3
+    assert job['progress'] == 1.0
+
+    again = client.post('/api/admin/exports/jobs/users.csv', headers=headers, json={})
+    assert again.status_code == 200
+    assert again.get_json()['reused'] is True
+    assert again.get_json()['job']['job_id'] == job['job_id']
+    with app.app_context():
+        assert ExportJob.query.count() == 1
+
+    full = client.get(job['download_url'], headers=headers)
+    assert full.status_code == 200
+    body = full.get_data()
+    assert body.startswith(b'ID,Name,Email')
+
+    partial = client.get(job['download_url'], headers={**headers, 'Range': 'bytes=3-'})
+    assert partial.status_code == 206
+    assert partial.get_data() == body[3:]
+
+    # Admins of another municipality cannot see or download the job
+    other = {'Authorization': f'Bearer {other_token}'}
+    assert client.get(f"/api/admin/exports/jobs/{job['job_id']}", headers=other).status_code == 404
+    assert client.get(job['download_url'], headers=other).status_code == 404
+
+
+def test_stale_running_job_is_failed_instead_of_reused(tmp_path):
+    app = create_app(ExportJobConfig)
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), EXPORT_JOB_TIMEOUT_SECONDS=60)
+    client = app.test_client()
+    token, _ = _setup(app)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.post('/api/admin/exports/jobs/users.csv', headers=headers, json={}).get_json()['job']
+    # Simulate a runner that crashed mid-render two minutes ago
+    with app.app_context():
+        job = ExportJob.query.filter_by(job_id=first['job_id']).one()
+        job.status = 'running'
+        job.started_at = utc_now() - timedelta(seconds=120)
+        job.completed_at = None
+        db.session.commit()
+
+    resp = client.post('/api/admin/exports/jobs/users.csv', headers=headers, json={})
+    assert resp.status_code == 202
+    assert resp.get_json()['job']['job_id'] != first['job_id']
+    assert resp.get_json()['job']['status'] == 'completed'
+    with app.app_context():
+        stale = ExportJob.query.filter_by(job_id=first['job_id']).one()
+        assert stale.status == 'failed'
+        assert 'did not finish within 60 seconds' in stale.error
+        assert stale.completed_at is not None
+
+        # The sweep does not commit the caller's session
+        stale.status = 'running'
+        stale.started_at = utc_now() - timedelta(seconds=120)
+        db.session.commit()
+        db.session.add(ExportJob(entity='users', fmt='csv', scope_key='x', cache_key='x'))
+        assert export_jobs.fail_stale_jobs() == 1
+        db.session.rollback()
+        assert ExportJob.query.filter_by(cache_key='x').count() == 0
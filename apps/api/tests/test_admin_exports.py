@@ -0,0 +1,98 @@
+import json
+
+from flask_jwt_extended import create_access_token
+from openpyxl import load_workbook
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.document import DocumentRequest, DocumentType
+from apps.api.models.municipality import Municipality
+from apps.api.models.province import Province
+from apps.api.models.user import User
+
+
+class ExportConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _setup(app):
+    with app.app_context():
+        db.create_all()
+        admin = User(
+            username='mun_admin',
+            email='mun_admin@example.com',
+            password_hash='test',
+            first_name='Mun',
+            last_name='Admin',
+            role='municipal_admin',
+            admin_municipality_id=112,
+        )
+        resident = User(
+            username='juan',
+            email='juan@example.com',
+            password_hash='test',
+            first_name='Juan',
+            last_name='Cruz',
+            role='resident',
+            municipality_id=112,
+            admin_verified=True,
+        )
+        doc_type = DocumentType(name='Barangay Clearance', code='BRGY_CLR', authority_level='barangay')
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+            admin, resident, doc_type,
+        ])
+        db.session.commit()
+        db.session.add(DocumentRequest(
+            request_number='REQ-1',
+            user_id=resident.id,
+            document_type_id=doc_type.id,
+            municipality_id=112,
+            delivery_method='digital',
+            purpose='Employment',
+            status='pending',
+        ))
+        db.session.commit()
+        return create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+
+
+def test_csv_and_ndjson_exports_stream_joined_rows():
+    app = create_app(ExportConfig)
+    client = app.test_client()
+    token = _setup(app)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.post('/api/admin/exports/requests.csv', headers=headers, json={})
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/csv'
+    lines = resp.get_data(as_text=True).strip().splitlines()
+    assert lines[0] == 'ID,Req No,User,Type,Status,Created'
+    assert 'REQ-1,Juan Cruz,Barangay Clearance,pending' in lines[1]
+
+    resp = client.post('/api/admin/exports/users.ndjson', headers=headers, json={})
+    assert resp.status_code == 200
+    records = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r['Name'] for r in records] == ['Juan Cruz']
+
+
+def test_xlsx_export_writes_streamed_workbook(tmp_path):
+    app = create_app(ExportConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path
+    client = app.test_client()
+    token = _setup(app)
+
+    resp = client.post('/api/admin/exports/users.xlsx', headers={'Authorization': f'Bearer {token}'}, json={})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['summary']['rows'] == 1
+
+    ws = load_workbook(tmp_path / body['url']).active
+    values = [row for row in ws.iter_rows(values_only=True) if any(v not in (None, '') for v in row)]
+    assert values[-2][0] == 'ID'
+    assert values[-1][1] == 'Juan Cruz'
@@ -0,0 +1,88 @@
+from sqlalchemy import event
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.municipality import Municipality, Barangay
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils.staff_context import get_staff_scope_cache, load_staff_scope
+
+
+class StaffContextConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def test_staff_scope_is_cached_and_invalidated_on_scope_change():
+    app = create_app(StaffContextConfig)
+    with app.app_context():
+        db.create_all()
+        province = Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000')
+        iba = Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000')
+        botolan = Municipality(id=108, name='Botolan', slug='botolan', province_id=6, psgc_code='037108000')
+        brgy = Barangay(id=5001, name='Zone 1', slug='zone-1', municipality_id=112, psgc_code='037112001')
+        admin = User(
+            username='brgy_admin',
+            email='brgy_admin@example.com',
+            password_hash='test',
+            first_name='Brgy',
+            last_name='Admin',
+            role='barangay_admin',
+            admin_barangay_id=5001,
+        )
+        db.session.add_all([province, iba, botolan, brgy, admin])
+        db.session.commit()
+        admin_id = admin.id
+
+        scope = load_staff_scope(admin_id)
+        assert scope['barangay_municipality_id'] == 112
+
+        statements = []
+
+        def _count(*_args, **_kwargs):
+            statements.append(1)
+
+        event.listen(db.engine, 'before_cursor_execute', _count)
+        try:
+            db.session.expire_all()
+            assert load_staff_scope(admin_id) is scope
+            assert statements == []
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _count)
+
+        admin = db.session.get(User, admin_id)
+        admin.role = 'municipal_admin'
+        admin.admin_municipality_id = 108
+        admin.admin_barangay_id = None
+        db.session.commit()
+
+        refreshed = load_staff_scope(admin_id)
+        assert refreshed['role'] == 'municipal_admin'
+        assert refreshed['admin_municipality_id'] == 108
+        assert refreshed['barangay_municipality_id'] is None
+
+
+def test_scope_recached_before_commit_is_dropped_on_commit():
+    app = create_app(StaffContextConfig)
+    with app.app_context():
+        db.create_all()
+        admin = User(
+            username='mun_admin', email='mun_admin@example.com', password_hash='test',
+            first_name='Mun', last_name='Admin', role='municipal_admin', admin_municipality_id=112,
+        )
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+        old = load_staff_scope(admin_id)
+
+        admin.admin_municipality_id = 108
+        db.session.flush()
+        # A concurrent request still reads the committed row and caches it
+        get_staff_scope_cache().set(admin_id, old)
+        db.session.commit()
+
+        assert load_staff_scope(admin_id)['admin_municipality_id'] == 108
@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+from flask_jwt_extended import create_access_token
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.issue import Issue, IssueCategory
+from apps.api.models.municipality import Municipality
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils.admin_stats import get_stats_cache, municipality_performance
+from apps.api.utils.time import utc_now
+
+
+class AdminStatsConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _resident(username, **kwargs):
+    return User(
+        username=username,
+        email=f'{username}@example.com',
+        password_hash='test',
+        first_name='Res',
+        last_name='Ident',
+        role='resident',
+        municipality_id=112,
+        is_active=True,
+        **kwargs,
+    )
+
+
+def test_stats_endpoints_aggregate_and_invalidate_on_write():
+    app = create_app(AdminStatsConfig)
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        province = Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000')
+        muni = Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000')
+        admin = User(
+            username='mun_admin',
+            email='mun_admin@example.com',
+            password_hash='test',
+            first_name='Mun',
+            last_name='Admin',
+            role='municipal_admin',
+            admin_municipality_id=112,
+        )
+        category = IssueCategory(name='Roads', slug='roads')
+        db.session.add_all([
+            province, muni, admin, category,
+            _resident('pending_one', admin_verified=False),
+            _resident('verified_one', admin_verified=True),
+        ])
+        db.session.commit()
+        reporter_id = User.query.filter_by(username='verified_one').first().id
+        db.session.add_all([
+            Issue(user_id=reporter_id, municipality_id=112, category_id=category.id,
+                  issue_number='ISS-1', title='Pothole', description='Deep pothole', status='pending'),
+            Issue(user_id=reporter_id, municipality_id=112, category_id=category.id,
+                  issue_number='ISS-2', title='Flood', description='Street flood', status='in_progress'),
+            Issue(user_id=reporter_id, municipality_id=112, category_id=category.id,
+                  issue_number='ISS-3', title='Lamp', description='Broken lamp', status='resolved'),
+        ])
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+
+    headers = {'Authorization': f'Bearer {token}'}
+
+    users = client.get('/api/admin/users/stats', headers=headers).get_json()
+    assert users == {
+        'total_users': 2,
+        'pending_verifications': 1,
+        'verified_users': 1,
+        'recent_registrations': 2,
+    }
+
+    issues = client.get('/api/admin/issues/stats', headers=headers).get_json()
+    assert issues['total_issues'] == 3
+    assert issues['pending_issues'] == 1
+    assert issues['active_issues'] == 1
+    assert issues['resolved_issues'] == 1
+
+    dashboard = client.get('/api/admin/dashboard/stats', headers=headers).get_json()
+    assert dashboard['pending_verifications'] == 1
+    assert dashboard['active_issues'] == 2
+
+    with app.app_context():
+        db.session.add(_resident('pending_two', admin_verified=False))
+        db.session.commit()
+
+    dashboard = client.get('/api/admin/dashboard/stats', headers=headers).get_json()
+    assert dashboard['pending_verifications'] == 2
+
+
+def test_municipality_performance_uses_grouped_rollup():
+    app = create_app(AdminStatsConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+            Municipality(id=108, name='Botolan', slug='botolan', province_id=6, psgc_code='037108000'),
+            _resident('verified_iba', admin_verified=True),
+            _resident('pending_iba', admin_verified=False),
+        ])
+        db.session.commit()
+
+        now = utc_now()
+        rows = municipality_performance([108, 112], now - timedelta(days=30), now)
+        by_id = {row['id']: row for row in rows}
+        assert by_id[112]['name'] == 'Iba'
+        assert by_id[112]['users'] == 1
+        assert by_id[108]['users'] == 0
+        assert by_id[108]['documents'] == 0
+
+
+def test_municipality_performance_caches_unknown_ranges_as_last_30_days():
+    app = create_app(AdminStatsConfig)
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        admin = User(
+            username='mun_admin', email='mun_admin@example.com', password_hash='test',
+            first_name='Mun', last_name='Admin', role='municipal_admin', admin_municipality_id=112,
+        )
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+            admin,
+        ])
+        db.session.commit()
+        headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})}"}
+
+    for range_param in ('last_30_days', 'bogus', 'x' * 40, ''):
+        resp = client.get(f'/api/admin/municipalities/performance?range={range_param}', headers=headers)
+        assert resp.status_code == 200
+    client.get('/api/admin/municipalities/performance?range=last_7_days', headers=headers)
+
+    with app.app_context():
+        assert len(get_stats_cache()) == 2
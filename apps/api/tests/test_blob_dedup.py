@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.stored_blob import StoredBlob
+from apps.api.utils.storage_handler import (
+    delete_file,
+    save_benefit_document,
+    save_document_request_file,
+    save_verification_document,
+)
+
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 64
+SHA = hashlib.sha256(PDF).hexdigest()
+
+
+class BlobTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    SUPABASE_URL = ''
+    SUPABASE_KEY = ''
+    SUPABASE_SERVICE_KEY = ''
+    SUPABASE_STORAGE_BUCKET = 'files'
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.delenv('FLASK_ENV', raising=False)
+    monkeypatch.delenv('FORCE_SUPABASE_STORAGE', raising=False)
+    app = create_app(BlobTestConfig)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _upload(data: bytes, filename: str = 'scan.pdf') -> FileStorage:
+    return FileStorage(stream=io.BytesIO(data), filename=filename, content_type='application/pdf')
+
+
+def _blob(path: str) -> StoredBlob:
+    return StoredBlob.query.filter_by(storage_path=path).one()
+
+
+def test_identical_uploads_share_one_blob(app, tmp_path):
+    first = save_benefit_document(_upload(PDF), 1, 'iba')
+    second = save_document_request_file(_upload(PDF, 'renamed.PDF'), 9, 'subic')
+    db.session.commit()
+
+    assert first == second == f'blobs/{SHA[:2]}/{SHA}.pdf'
+    assert (tmp_path / first).read_bytes() == PDF
+    assert [p.name for p in (tmp_path / 'blobs').rglob('*') if p.is_file()] == [f'{SHA}.pdf']
+    blob = _blob(first)
+    assert (blob.sha256, blob.size, blob.ref_count, blob.content_type) == (SHA, len(PDF), 2, 'application/pdf')
+
+    other = save_benefit_document(_upload(PDF + b'x'), 1, 'iba')
+    assert other != first
+    assert _blob(other).ref_count == 1
+
+
+def test_blob_is_deleted_with_its_last_reference(app, tmp_path):
+    path = save_benefit_document(_upload(PDF), 1, 'iba')
+    save_benefit_document(_upload(PDF), 2, 'iba')
+    db.session.commit()
+
+    assert delete_file(path) is False
+    db.session.commit()
+    assert (tmp_path / path).exists()
+    assert _blob(path).ref_count == 1
+
+    # A rolled-back release keeps the reference and the file
+    assert delete_file(path) is True
+    db.session.rollback()
+    assert (tmp_path / path).exists()
+    assert _blob(path).ref_count == 1
+
+    assert delete_file(path) is True
+    assert (tmp_path / path).exists()
+    db.session.commit()
+    assert not (tmp_path / path).exists()
+    assert StoredBlob.query.count() == 0
+
+    # A later upload of the same bytes stores it again
+    assert save_benefit_document(_upload(PDF), 3, 'iba') == path
+    assert (tmp_path / path).read_bytes() == PDF
+
+
+def test_blob_stored_again_before_the_deletion_runs_is_kept(app, tmp_path):
+    from apps.api.utils.table_cache import after_commit
+
+    path = save_benefit_document(_upload(PDF), 1, 'iba')
+    db.session.commit()
+
+    def concurrent_upload():
+        # Another request re-stored the same bytes once the release committed
+        with db.engine.begin() as conn:
+            conn.execute(StoredBlob.__table__.insert().values(
+                sha256=SHA, storage_path=path, size=len(PDF), content_type='application/pdf', ref_count=1,
+            ))
+
+    after_commit(db.session, concurrent_upload)
+    assert delete_file(path) is True
+    db.session.commit()
+
+    assert (tmp_path / path).read_bytes() == PDF
+    assert _blob(path).ref_count == 1
+
+
+def test_dedup_can_be_disabled(app, tmp_path):
+    app.config['UPLOAD_DEDUP_ENABLED'] = False
+    first = save_benefit_document(_upload(PDF), 1, 'iba')
+    second = save_benefit_document(_upload(PDF), 1, 'iba')
+
+    assert first != second
+    assert not first.startswith('blobs/')
+    assert StoredBlob.query.count() == 0
+
+
+@pytest.fixture
+def storage(app, monkeypatch):
+    """Fake Storage API recording object uploads and deletes."""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status):
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            calls.append(('POST', self.path, hashlib.sha256(body).hexdigest(), self.headers.get('x-upsert')))
+            self._reply(200)
+
+        def do_DELETE(self):
+            calls.append(('DELETE', self.path, None, None))
+            self._reply(200)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    app.config.update(SUPABASE_URL=url, SUPABASE_SERVICE_KEY='service-key')
+    monkeypatch.setenv('FORCE_SUPABASE_STORAGE', 'true')
+    yield url, calls
+    server.shutdown()
+    server.server_close()
+
+
+def test_supabase_duplicate_is_not_uploaded_again(storage):
+    url, calls = storage
+    photo = b'\xff\xd8\xff\xe0' + PDF
+
+    first = save_verification_document(_upload(photo, 'front.jpg'), 1, 'iba', 'valid_id_front')
+    second = save_verification_document(_upload(photo, 'id.jpg'), 2, 'iba', 'valid_id_back')
+    db.session.commit()
+
+    sha = hashlib.sha256(photo).hexdigest()
+    object_path = f'/storage/v1/object/files/blobs/{sha[:2]}/{sha}.jpg'
+    assert first == second == f'{url}/storage/v1/object/public/files/blobs/{sha[:2]}/{sha}.jpg'
+    assert calls == [('POST', object_path, sha, 'true')]
+
+    delete_file(first)
+    assert len(calls) == 1
+    delete_file(second)
+    db.session.commit()
+    assert calls[-1] == ('DELETE', object_path, None, None)
+
+
+def test_rejected_status_document_returns_400(app, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    from apps.api.models.special_status import UserSpecialStatus
+    from apps.api.routes import special_status
+    from apps.api.utils.storage_handler import StorageError
+
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {create_access_token(identity='1')}"}
+
+    script = client.post(
+        '/api/user/special-statuses/pwd', headers=headers,
+        data={'pwd_id': (io.BytesIO(b'#!/bin/sh\n'), 'id.sh')}, content_type='multipart/form-data',
+    )
+    assert script.status_code == 400
+    assert 'File type not allowed' in script.get_json()['error']
+
+    oversized = client.post(
+        '/api/user/special-statuses/pwd', headers=headers,
+        data={'pwd_id': (io.BytesIO(b'\xff' * (10 * 1024 * 1024 + 1)), 'id.jpg')}, content_type='multipart/form-data',
+    )
+    assert oversized.status_code == 400
+    assert '10MB' in oversized.get_json()['error']
+
+    def failing_upload(*args, **kwargs):
+        raise StorageError('Upload failed: storage unavailable')
+
+    monkeypatch.setattr(special_status, 'save_blob', failing_upload)
+    failed = client.post(
+        '/api/user/special-statuses/senior', headers=headers,
+        data={'senior_id': (io.BytesIO(PDF), 'id.pdf')}, content_type='multipart/form-data',
+    )
+    assert failed.status_code == 400
+    assert failed.get_json()['error'] == 'Upload failed: storage unavailable'
+    assert UserSpecialStatus.query.count() == 0
+    assert StoredBlob.query.count() == 0
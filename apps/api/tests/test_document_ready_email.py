@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.notification import NotificationOutbox
+from apps.api.models.user import User
+from apps.api.utils import notification_delivery
+from apps.api.utils.notifications import (
+    deliver_attachment_emails,
+    flush_pending_notifications,
+    queue_document_ready_email,
+)
+from apps.api.utils.provider_governor import get_governor
+
+
+class AttachmentTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    NOTIFICATION_ATTACHMENT_RUNNER = 'inline'
+
+
+def _build(tmp_path, monkeypatch):
+    app = create_app(AttachmentTestConfig)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    pdf = tmp_path / 'generated_docs' / 'iba' / '7.pdf'
+    pdf.parent.mkdir(parents=True)
+    pdf.write_bytes(b'%PDF-1.4 generated')
+
+    sent = []
+    monkeypatch.setattr(
+        notification_delivery, '_send_email',
+        lambda to, subject, body, data=None, name=None: sent.append((to, subject, data, name)),
+    )
+    with app.app_context():
+        db.create_all()
+        # Email notifications off: the document itself is still delivered
+        db.session.add(User(
+            username='resident', email='resident@example.com', password_hash='x',
+            first_name='Juan', last_name='Cruz', role='resident', notify_email_enabled=False,
+        ))
+        db.session.commit()
+    return app, sent
+
+
+def test_document_email_stores_a_reference_and_sends_the_file_off_the_flush(tmp_path, monkeypatch):
+    app, sent = _build(tmp_path, monkeypatch)
+    req = SimpleNamespace(id=7, request_number='REQ-7')
+    with app.app_context():
+        user = User.query.first()
+        assert queue_document_ready_email(user, req, 'Barangay Clearance', 'generated_docs/iba/7.pdf') == 'queued'
+        db.session.commit()
+
+        row = NotificationOutbox.query.one()
+        assert row.lane == 'attachment'
+        assert row.payload['attachment'] == {
+            'ref': 'generated_docs/iba/7.pdf', 'filename': 'REQ-7.pdf', 'content_type': 'application/pdf',
+        }
+
+        # The inline flush on the request path leaves it alone
+        flush_pending_notifications()
+        assert sent == []
+        assert db.session.get(NotificationOutbox, row.id).status == 'pending'
+
+        deliver_attachment_emails()
+        assert db.session.get(NotificationOutbox, row.id).status == 'sent'
+
+    [(to, subject, data, name)] = sent
+    assert to == 'resident@example.com'
+    assert 'Barangay Clearance' in subject
+    assert data == b'%PDF-1.4 generated'
+    assert name == 'REQ-7.pdf'
+
+
+def test_missing_file_fails_at_once_without_tripping_the_provider_breaker(tmp_path, monkeypatch):
+    app, sent = _build(tmp_path, monkeypatch)
+    app.config['PROVIDER_BREAKER_THRESHOLD'] = 1
+    with app.app_context():
+        user = User.query.first()
+        queue_document_ready_email(user, SimpleNamespace(id=8, request_number='REQ-8'), 'Cedula', 'generated_docs/iba/8.pdf')
+        db.session.commit()
+        deliver_attachment_emails()
+
+        row = NotificationOutbox.query.one()
+        assert row.status == 'failed'
+        assert row.attempts == 1
+        assert row.next_attempt_at is None
+        assert row.last_error.startswith('attachment_missing')
+        assert get_governor('email').breaker.state == 'closed'
+
+    assert sent == []
+
+
+def test_only_an_oversized_file_fails_at_once(tmp_path, monkeypatch):
+    from apps.api.utils.storage_handler import StorageError
+
+    app, sent = _build(tmp_path, monkeypatch)
+    app.config['NOTIFICATION_ATTACHMENT_MAX_MB'] = 0.00001
+    with app.app_context():
+        user = User.query.first()
+        queue_document_ready_email(user, SimpleNamespace(id=7, request_number='REQ-7'), 'Cedula', 'generated_docs/iba/7.pdf')
+        db.session.commit()
+        deliver_attachment_emails()
+
+        row = NotificationOutbox.query.one()
+        assert row.status == 'failed'
+        assert row.last_error.startswith('attachment_too_large')
+
+        # Any other storage error is retried
+        def storage_down(ref, max_bytes=None):
+            raise StorageError('storage unavailable')
+
+        monkeypatch.setattr(notification_delivery, 'read_file_bytes', storage_down)
+        row.status, row.attempts, row.last_error = 'pending', 0, None
+        db.session.commit()
+        deliver_attachment_emails()
+
+        row = NotificationOutbox.query.one()
+        assert row.status == 'pending'
+        assert row.next_attempt_at is not None
+        assert row.last_error == 'storage unavailable'
+
+    assert sent == []
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.utils import http_client
+
+
+class HttpClientTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    HTTP_CLIENT_BACKOFF_SECONDS = 0.01
+
+
+@pytest.fixture
+def upstream():
+    """Local HTTP/1.1 server that replays a queue of status codes and records client ports."""
+    state = {'statuses': [], 'ports': [], 'methods': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            state['ports'].append(self.client_address[1])
+            state['methods'].append(self.command)
+            status = state['statuses'].pop(0) if state['statuses'] else 200
+            body = b'ok'
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_DELETE = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state['url'] = f'http://127.0.0.1:{server.server_address[1]}'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused_and_latency_is_recorded(upstream):
+    app = create_app(HttpClientTestConfig)
+    with app.app_context():
+        for _ in range(3):
+            resp = http_client.get(f"{upstream['url']}/object/a.png?token=secret", upstream='supabase')
+            assert resp.status_code == 200
+            assert resp.content == b'ok'
+
+        stats = http_client.get_upstream_stats()['supabase']
+
+    # One TCP connection served all three requests
+    assert len(set(upstream['ports'])) == 1
+    assert stats['requests'] == 3
+    assert stats['errors'] == 0
+    assert stats['avg_ms'] is not None
+
+
+def test_idempotent_requests_retry_5xx_but_posts_only_retry_rejections(upstream):
+    app = create_app(HttpClientTestConfig)
+    with app.app_context():
+        upstream['statuses'] = [502, 200]
+        assert http_client.get(f"{upstream['url']}/file", upstream='supabase').status_code == 200
+
+        # A 500 on POST may have been processed upstream: no retry
+        upstream['statuses'] = [500, 200]
+        assert http_client.post(f"{upstream['url']}/send", upstream='sendgrid', json={}).status_code == 500
+
+        # 429 means the request was rejected, so it is safe to repeat
+        upstream['statuses'] = [429, 200]
+        assert http_client.post(f"{upstream['url']}/send", upstream='sendgrid', json={}).status_code == 200
+
+        # Retries are bounded
+        upstream['statuses'] = [503, 503, 503, 503]
+        assert http_client.get(f"{upstream['url']}/file", upstream='supabase').status_code == 503
+
+        stats = http_client.get_upstream_stats()
+
+    assert upstream['methods'].count('POST') == 3
+    assert stats['supabase']['requests'] == 5
+    assert stats['supabase']['retries'] == 3
+    assert stats['sendgrid']['retries'] == 1
+
+
+def test_connection_failures_raise_after_retries():
+    app = create_app(HttpClientTestConfig)
+    app.config['HTTP_CLIENT_CONNECT_TIMEOUT'] = 0.5
+    with app.app_context():
+        with pytest.raises(requests.exceptions.ConnectionError):
+            http_client.get('http://127.0.0.1:9/unreachable', upstream='dead')
+        stats = http_client.get_upstream_stats()['dead']
+
+    assert stats['requests'] == 3
+    assert stats['errors'] == 3
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import io
+import os
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.announcement import Announcement
+from apps.api.models.user import User
+from apps.api.utils.image_pipeline import process_upload
+from apps.api.utils.storage_handler import save_announcement_image, save_profile_picture
+
+
+class ImagePipelineTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    SUPABASE_URL = ''
+    SUPABASE_KEY = ''
+    SUPABASE_SERVICE_KEY = ''
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.delenv('FLASK_ENV', raising=False)
+    app = create_app(ImagePipelineTestConfig)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    with app.app_context():
+        yield app
+
+
+def _phone_photo(size=(3000, 1200), orientation=6) -> bytes:
+    """JPEG shaped like a phone photo: large, rotated via EXIF, with GPS-ish metadata."""
+    image = Image.new('RGB', size, (200, 40, 40))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = 'PhoneMaker'
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=95, exif=exif.tobytes())
+    return out.getvalue()
+
+
+def _upload(data: bytes, filename: str = 'photo.jpg') -> FileStorage:
+    return FileStorage(stream=io.BytesIO(data), filename=filename, content_type='image/jpeg')
+
+
+def test_photo_is_rotated_clamped_and_stripped(app):
+    main, variants = process_upload(io.BytesIO(_phone_photo()), ('thumb',))
+
+    stored = Image.open(io.BytesIO(main.data))
+    assert stored.format == 'WEBP'
+    # Orientation 6 turns the landscape pixels into a portrait photo
+    assert (stored.width, stored.height) == (main.width, main.height) == (819, 2048)
+    assert not stored.getexif()
+    assert max(Image.open(io.BytesIO(variants['thumb'].data)).size) == 320
+
+    app.config['IMAGE_FORMAT'] = 'jpeg'
+    transparent = Image.new('RGBA', (50, 50), (0, 0, 0, 0))
+    out = io.BytesIO()
+    transparent.save(out, 'PNG')
+    main, _ = process_upload(io.BytesIO(out.getvalue()))
+    assert main.content_type == 'image/jpeg'
+    assert Image.open(io.BytesIO(main.data)).getpixel((10, 10)) == (255, 255, 255)
+
+
+def test_announcement_images_store_variants_next_to_the_original(app, tmp_path):
+    db.create_all()
+    admin = User(username='admin', email='admin@example.com', password_hash='x',
+                 first_name='A', last_name='D', role='municipal_admin')
+    db.session.add(admin)
+    db.session.flush()
+    announcement = Announcement(title='Road works', content='Detour', created_by=admin.id, scope='PROVINCE')
+    db.session.add(announcement)
+    db.session.flush()
+
+    original = _phone_photo()
+    saved = save_announcement_image(_upload(original), announcement.id, 'iba')
+    announcement.images = [saved.path]
+    announcement.set_image_variants(saved.path, saved.variants)
+    db.session.commit()
+
+    assert saved.path.endswith('.webp')
+    assert set(saved.variants) == {'thumb', 'medium'}
+    stored = tmp_path / saved.path
+    assert stored.stat().st_size < len(original)
+    assert max(Image.open(tmp_path / saved.variants['thumb']).size) == 320
+    assert max(Image.open(tmp_path / saved.variants['medium']).size) == 960
+
+    data = db.session.get(Announcement, announcement.id).to_dict()
+    assert data['images'] == [saved.path]
+    assert data['image_variants'] == {saved.path: saved.variants}
+
+
+def test_pipeline_can_be_disabled(app, tmp_path):
+    app.config['IMAGE_PIPELINE_ENABLED'] = False
+    original = _phone_photo(size=(400, 300))
+
+    path = save_profile_picture(_upload(original), 7, 'iba')
+
+    assert path.endswith('.jpg')
+    with open(os.path.join(tmp_path, path), 'rb') as f:
+        assert f.read() == original
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from sqlalchemy import event
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.marketplace import Item
+from apps.api.models.municipality import Municipality
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils.time import utc_now
+
+
+class ListingConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _seed(app, count):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+        ])
+        now = utc_now()
+        for i in range(count):
+            seller = User(
+                username=f'seller{i}',
+                email=f'seller{i}@example.com',
+                password_hash='test',
+                first_name='Seller',
+                last_name=str(i),
+                role='resident',
+                municipality_id=112,
+            )
+            db.session.add(seller)
+            db.session.flush()
+            db.session.add(Item(
+                user_id=seller.id,
+                title=f'Item {i}',
+                description='Used item',
+                category='Furniture',
+                condition='good',
+                transaction_type='donate',
+                municipality_id=112,
+                status='available',
+                # Two items share each timestamp so the id tie-breaker is exercised
+                created_at=now - timedelta(minutes=i // 2),
+            ))
+        db.session.commit()
+
+
+def test_listing_uses_constant_queries_and_cursor_pages():
+    app = create_app(ListingConfig)
+    client = app.test_client()
+    _seed(app, 7)
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        resp = client.get('/api/marketplace/items?municipality_id=112&per_page=3')
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [i['title'] for i in body['items']] == ['Item 1', 'Item 0', 'Item 3']
+    assert all(i['municipality_name'] == 'Iba' and i['seller']['username'] for i in body['items'])
+    assert body['has_more'] is True
+    # One query for the page (with municipality joined) and one for the sellers
+    assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 2
+
+    seen = [i['title'] for i in body['items']]
+    cursor = body['next_cursor']
+    while cursor:
+        body = client.get(f'/api/marketplace/items?municipality_id=112&per_page=3&cursor={cursor}').get_json()
+        seen.extend(i['title'] for i in body['items'])
+        cursor = body['next_cursor']
+    assert sorted(seen) == sorted(f'Item {i}' for i in range(7))
+    assert len(seen) == 7
+
+    assert client.get('/api/marketplace/items?municipality_id=112&cursor=garbage').status_code == 400
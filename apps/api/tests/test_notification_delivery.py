@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import socketserver
+import threading
+import time
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.notification import NotificationOutbox
+from apps.api.models.user import User
+from apps.api.utils import notification_delivery
+from apps.api.utils.notification_delivery import process_batch
+
+
+class DeliveryTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    NOTIFICATION_EMAIL_CONCURRENCY = 4
+    NOTIFICATION_SMS_CONCURRENCY = 2
+
+
+def _build(emails: int = 8, sms: int = 4):
+    app = create_app(DeliveryTestConfig)
+    with app.app_context():
+        db.create_all()
+        for i in range(max(emails, sms)):
+            user = User(
+                username=f'resident{i}', email=f'resident{i}@example.com', password_hash='x',
+                first_name='Res', last_name=str(i), role='resident',
+                notify_sms_enabled=True, mobile_number=f'0917123456{i}',
+            )
+            db.session.add(user)
+            db.session.flush()
+            if i < emails:
+                db.session.add(NotificationOutbox(
+                    resident_id=user.id, channel='email', event_type='test', entity_id=1,
+                    payload={'subject': 'Hi', 'body': 'Body'}, status='pending', attempts=0,
+                    dedupe_key=f'test:1:{user.id}:email',
+                ))
+            if i < sms:
+                db.session.add(NotificationOutbox(
+                    resident_id=user.id, channel='sms', event_type='test', entity_id=1,
+                    payload={'message': 'Hello'}, status='pending', attempts=0,
+                    dedupe_key=f'test:1:{user.id}:sms',
+                ))
+        db.session.commit()
+    return app
+
+
+class _InFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = {'email': 0, 'sms': 0}
+        self.peak = {'email': 0, 'sms': 0}
+
+    def call(self, channel, result=None, fail_for=None, key=None):
+        with self.lock:
+            self.current[channel] += 1
+            self.peak[channel] = max(self.peak[channel], self.current[channel])
+        time.sleep(0.05)
+        with self.lock:
+            self.current[channel] -= 1
+        if fail_for is not None and key == fail_for:
+            raise RuntimeError('provider down')
+        return result
+
+
+def test_process_batch_sends_in_parallel_within_channel_caps(monkeypatch):
+    app = _build()
+    tracker = _InFlight()
+    monkeypatch.setattr(
+        notification_delivery, '_send_email',
+        lambda to, subject, body: tracker.call('email', fail_for='resident3@example.com', key=to),
+    )
+    monkeypatch.setattr(
+        notification_delivery, 'send_sms',
+        lambda numbers, message: tracker.call('sms', result={'status': 'sent'}),
+    )
+
+    with app.app_context():
+        started = time.monotonic()
+        assert process_batch(max_items=50, concurrency=16) == 12
+        elapsed = time.monotonic() - started
+
+        rows = NotificationOutbox.query.all()
+        by_status = {}
+        for row in rows:
+            by_status.setdefault(row.status, []).append(row)
+        assert len(by_status['sent']) == 11
+        [failed] = by_status['pending']
+        assert failed.channel == 'email'
+        assert failed.last_error == 'provider down'
+        assert failed.attempts == 1
+
+    assert tracker.peak == {'email': 4, 'sms': 2}
+    # 12 sequential sends would take ~0.6s
+    assert elapsed < 0.4
+
+
+def test_concurrency_one_sends_sequentially(monkeypatch):
+    app = _build(emails=3, sms=0)
+    tracker = _InFlight()
+    monkeypatch.setattr(notification_delivery, '_send_email', lambda to, subject, body: tracker.call('email'))
+
+    with app.app_context():
+        assert process_batch(max_items=50, concurrency=1) == 3
+        assert {r.status for r in NotificationOutbox.query.all()} == {'sent'}
+
+    assert tracker.peak['email'] == 1
+
+
+class _SmtpStandIn:
+    """Minimal SMTP server: EHLO/AUTH PLAIN/MAIL/RCPT/DATA/RSET/QUIT.
+
+    ``drop_after`` closes the connection after that many messages, like a
+    provider enforcing a per-session limit without telling the client.
+    """
+
+    def __init__(self, drop_after: int | None = None):
+        self.connections = 0
+        self.messages = []
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                stand_in.connections += 1
+                sent = 0
+                self.wfile.write(b'220 stand-in ESMTP\r\n')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    cmd = line.decode().strip().upper()
+                    if cmd.startswith('EHLO'):
+                        self.wfile.write(b'250-stand-in\r\n250 AUTH PLAIN\r\n')
+                    elif cmd.startswith('AUTH'):
+                        self.wfile.write(b'235 ok\r\n')
+                    elif cmd.startswith('DATA'):
+                        self.wfile.write(b'354 go\r\n')
+                        data = []
+                        while True:
+                            part = self.rfile.readline()
+                            if part in (b'.\r\n', b''):
+                                break
+                            data.append(part)
+                        stand_in.messages.append(b''.join(data))
+                        sent += 1
+                        self.wfile.write(b'250 queued\r\n')
+                        if drop_after and sent >= drop_after:
+                            return
+                    elif cmd.startswith('QUIT'):
+                        self.wfile.write(b'221 bye\r\n')
+                        return
+                    else:
+                        self.wfile.write(b'250 ok\r\n')
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _smtp_app(stand_in, emails, **config):
+    app = _build(emails=emails, sms=0)
+    app.config.update(
+        SENDGRID_API_KEY='',
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=stand_in.port,
+        SMTP_USERNAME='mailer',
+        SMTP_PASSWORD='secret',
+        SMTP_USE_TLS=False,
+        FROM_EMAIL='noreply@example.com',
+        **config,
+    )
+    return app
+
+
+def test_smtp_sessions_are_reused_within_a_batch_and_capped():
+    stand_in = _SmtpStandIn()
+    try:
+        app = _smtp_app(stand_in, emails=7, SMTP_MAX_MESSAGES_PER_CONNECTION=3)
+        with app.app_context():
+            assert process_batch(max_items=50, concurrency=1) == 7
+            assert {r.status for r in NotificationOutbox.query.all()} == {'sent'}
+            pool = app.extensions['smtp_pool']
+            assert pool.connections_opened == 3
+            assert pool.batches == 0
+    finally:
+        stand_in.close()
+
+    assert len(stand_in.messages) == 7
+    assert stand_in.connections == 3
+
+
+def test_smtp_pool_reconnects_when_the_server_drops_the_session():
+    stand_in = _SmtpStandIn(drop_after=2)
+    try:
+        app = _smtp_app(stand_in, emails=5)
+        with app.app_context():
+            assert process_batch(max_items=50, concurrency=1) == 5
+            assert {r.status for r in NotificationOutbox.query.all()} == {'sent'}
+    finally:
+        stand_in.close()
+
+    assert len(stand_in.messages) == 5
+    assert stand_in.connections == 3
+
+
+def test_identical_sms_texts_are_coalesced_and_results_map_per_number(monkeypatch):
+    app = _build(emails=0, sms=6)
+    with app.app_context():
+        rows = NotificationOutbox.query.order_by(NotificationOutbox.id).all()
+        rows[1].payload = {'message': '  Hello \n'}
+        rows[5].payload = {'message': 'Different text'}
+        db.session.commit()
+        failing = notification_delivery.normalize_sms_number(db.session.get(User, rows[2].resident_id).mobile_number)
+
+    calls = []
+
+    def fake_send(numbers, message):
+        calls.append((list(numbers), message))
+        if failing in numbers:
+            return {
+                'status': 'sent',
+                'recipients': {n: ({'status': 'failed', 'error': 'bad number'} if n == failing else {'status': 'sent'}) for n in numbers},
+            }
+        return {'status': 'sent'}
+
+    monkeypatch.setattr(notification_delivery, 'send_sms', fake_send)
+    with app.app_context():
+        assert process_batch(max_items=50, concurrency=1) == 6
+        statuses = {r.id: (r.status, r.last_error) for r in NotificationOutbox.query.all()}
+
+    assert sorted(len(numbers) for numbers, _ in calls) == [1, 5]
+    assert statuses[rows[2].id] == ('pending', 'bad number')
+    assert sum(1 for status, _ in statuses.values() if status == 'sent') == 5
+
+
+def test_philsms_sends_comma_separated_recipients_up_to_the_limit(monkeypatch):
+    from apps.api.utils import sms_provider
+
+    app = create_app(DeliveryTestConfig)
+    app.config.update(SMS_PROVIDER='philsms', PHILSMS_API_KEY='key', PHILSMS_MAX_RECIPIENTS=2)
+    sms_provider._capability_cache.update({'expires_at': 0, 'data': None})
+    posted = []
+
+    class _Resp:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.text = 'error'
+
+        def json(self):
+            return {'message': 'rejected'}
+
+    def fake_post(url, **kwargs):
+        posted.append(kwargs['json']['recipient'])
+        return _Resp(500 if '639170000003' in kwargs['json']['recipient'] else 200)
+
+    monkeypatch.setattr(sms_provider.http_client, 'post', fake_post)
+    with app.app_context():
+        result = sms_provider.send_sms(['639170000001', '639170000002', '639170000003'], 'Hello')
+    sms_provider._capability_cache.update({'expires_at': 0, 'data': None})
+
+    assert posted == ['639170000001,639170000002', '639170000003']
+    assert result['status'] == 'sent'
+    assert result['recipients']['639170000001'] == {'status': 'sent'}
+    assert result['recipients']['639170000003']['status'] == 'failed'
+
+
+def test_philsms_rejected_list_is_resent_per_number(monkeypatch):
+    from apps.api.utils import sms_provider
+
+    app = create_app(DeliveryTestConfig)
+    app.config.update(SMS_PROVIDER='philsms', PHILSMS_API_KEY='key', PHILSMS_MAX_RECIPIENTS=3)
+    sms_provider._capability_cache.update({'expires_at': 0, 'data': None})
+    posted = []
+
+    class _Resp:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.text = 'error'
+
+        def json(self):
+            return {'message': 'invalid recipient'}
+
+    def fake_post(url, **kwargs):
+        recipient = kwargs['json']['recipient']
+        posted.append(recipient)
+        return _Resp(422 if '639170000002' in recipient else 200)
+
+    monkeypatch.setattr(sms_provider.http_client, 'post', fake_post)
+    with app.app_context():
+        result = sms_provider.send_sms(['639170000001', '639170000002', '639170000003'], 'Hello')
+    sms_provider._capability_cache.update({'expires_at': 0, 'data': None})
+
+    assert posted == ['639170000001,639170000002,639170000003', '639170000001', '639170000002', '639170000003']
+    assert result['status'] == 'sent'
+    assert result['recipients']['639170000001'] == {'status': 'sent'}
+    assert result['recipients']['639170000002']['status'] == 'failed'
+    assert result['recipients']['639170000003'] == {'status': 'sent'}
+
+
+def test_repeated_number_is_not_sent_twice_in_one_call(monkeypatch):
+    app = _build(emails=0, sms=3)
+    with app.app_context():
+        first = NotificationOutbox.query.order_by(NotificationOutbox.id).first()
+        db.session.add(NotificationOutbox(
+            resident_id=first.resident_id, channel='sms', event_type='test', entity_id=2,
+            payload={'message': 'Hello'}, status='pending', attempts=0,
+            dedupe_key=f'test:2:{first.resident_id}:sms',
+        ))
+        db.session.commit()
+
+    calls = []
+
+    def fake_send(numbers, message):
+        calls.append(list(numbers))
+        return {'status': 'sent'}
+
+    monkeypatch.setattr(notification_delivery, 'send_sms', fake_send)
+    with app.app_context():
+        assert process_batch(max_items=50, concurrency=1) == 4
+        assert {r.status for r in NotificationOutbox.query.all()} == {'sent'}
+
+    assert sorted(len(numbers) for numbers in calls) == [1, 3]
+    assert all(len(set(numbers)) == len(numbers) for numbers in calls)
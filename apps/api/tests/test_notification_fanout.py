@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from flask_jwt_extended import create_access_token
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.announcement import Announcement
+from apps.api.models.municipality import Municipality
+from apps.api.models.notification import NotificationFanout, NotificationOutbox
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils.notification_fanout import recover_stale_fanouts
+from apps.api.utils.notifications import queue_announcement_notifications
+from apps.api.utils.time import utc_now
+
+
+class FanoutTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _build(residents: int = 6):
+    app = create_app(FanoutTestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+            Municipality(id=108, name='Botolan', slug='botolan', province_id=6, psgc_code='037108000'),
+        ])
+        admin = User(
+            username='mun_admin', email='mun_admin@example.com', password_hash='x',
+            first_name='Municipal', last_name='Admin', role='municipal_admin', admin_municipality_id=112,
+        )
+        db.session.add(admin)
+        for i in range(residents):
+            db.session.add(User(
+                username=f'resident{i}', email=f'resident{i}@example.com', password_hash='x',
+                first_name='Res', last_name=str(i), role='resident', admin_verified=True,
+                municipality_id=112,
+                # Every other resident opts into SMS; resident0 opts out of email
+                notify_sms_enabled=(i % 2 == 0),
+                notify_email_enabled=(i != 0),
+                mobile_number=f'0917000000{i}',
+            ))
+        # Out of scope: other municipality and unverified
+        db.session.add(User(
+            username='botolan', email='botolan@example.com', password_hash='x',
+            first_name='B', last_name='R', role='resident', admin_verified=True, municipality_id=108,
+        ))
+        db.session.add(User(
+            username='pending', email='pending@example.com', password_hash='x',
+            first_name='P', last_name='R', role='resident', admin_verified=False, municipality_id=112,
+        ))
+        db.session.flush()
+        announcement = Announcement(
+            title='Water interruption', content='Scheduled maintenance', scope='MUNICIPALITY',
+            municipality_id=112, created_by=admin.id, status='PUBLISHED',
+        )
+        db.session.add(announcement)
+        db.session.commit()
+        ids = {'admin': admin.id, 'announcement': announcement.id}
+    return app, ids
+
+
+def test_inline_fanout_respects_preferences_and_dedupes():
+    app, ids = _build()
+    with app.app_context():
+        announcement = db.session.get(Announcement, ids['announcement'])
+        result = queue_announcement_notifications(announcement)
+        db.session.commit()
+
+        rows = NotificationOutbox.query.filter_by(entity_id=announcement.id).all()
+        email = sorted(r.dedupe_key for r in rows if r.channel == 'email')
+        sms = [r for r in rows if r.channel == 'sms']
+        # 6 residents: 5 with email enabled, 3 opted into SMS
+        assert result['queued'] == 8
+        assert result['recipients'] == 6
+        assert len(email) == 5
+        assert len(sms) == 3
+        assert all(r.payload['batch_key'] == f"announcement:{announcement.id}" for r in sms)
+        assert all(r.status == 'pending' for r in rows)
+        assert email[0].startswith(f"announcement_published:{announcement.id}:")
+
+        again = queue_announcement_notifications(announcement)
+        db.session.commit()
+        assert again['queued'] == 0
+        assert NotificationOutbox.query.filter_by(entity_id=announcement.id).count() == 8
+
+
+def test_large_audience_runs_in_chunks_and_reports_progress():
+    app, ids = _build(residents=7)
+    app.config.update(
+        NOTIFICATION_FANOUT_INLINE_MAX=0,
+        NOTIFICATION_FANOUT_CHUNK=3,
+        NOTIFICATION_FANOUT_RUNNER='inline',
+    )
+    with app.app_context():
+        announcement = db.session.get(Announcement, ids['announcement'])
+        result = queue_announcement_notifications(announcement)
+        assert result['recipients'] == 7
+        fanout = db.session.get(NotificationFanout, result['fanout_id'])
+        assert fanout.status == 'completed'
+        assert fanout.processed_recipients == 7
+        assert fanout.progress() == 1.0
+        # 6 with email, 4 opted into SMS
+        assert fanout.queued_count == 10
+        assert NotificationOutbox.query.filter_by(entity_id=announcement.id).count() == 10
+
+        token = create_access_token(identity=str(ids['admin']), additional_claims={'role': 'municipal_admin'})
+
+    client = app.test_client()
+    resp = client.get(
+        f"/api/admin/notifications/fanouts?entity_id={ids['announcement']}",
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [f['id'] for f in body['fanouts']] == [result['fanout_id']]
+    assert body['fanouts'][0]['progress'] == 1.0
+
+
+def test_fanout_endpoints_are_scoped_to_the_admin():
+    app, ids = _build(residents=2)
+    app.config.update(NOTIFICATION_FANOUT_INLINE_MAX=0, NOTIFICATION_FANOUT_RUNNER='inline')
+    with app.app_context():
+        announcement = db.session.get(Announcement, ids['announcement'])
+        fanout_id = queue_announcement_notifications(announcement)['fanout_id']
+        outsider = User(
+            username='botolan_admin', email='botolan_admin@example.com', password_hash='x',
+            first_name='Botolan', last_name='Admin', role='municipal_admin', admin_municipality_id=108,
+        )
+        db.session.add(outsider)
+        db.session.commit()
+        own = create_access_token(identity=str(ids['admin']), additional_claims={'role': 'municipal_admin'})
+        other = create_access_token(identity=str(outsider.id), additional_claims={'role': 'municipal_admin'})
+
+    client = app.test_client()
+    own_headers = {'Authorization': f'Bearer {own}'}
+    other_headers = {'Authorization': f'Bearer {other}'}
+    assert [f['id'] for f in client.get('/api/admin/notifications/fanouts', headers=own_headers).get_json()['fanouts']] == [fanout_id]
+    assert client.get(f'/api/admin/notifications/fanouts/{fanout_id}', headers=own_headers).status_code == 200
+
+    assert client.get('/api/admin/notifications/fanouts', headers=other_headers).get_json()['fanouts'] == []
+    assert client.get(f'/api/admin/notifications/fanouts/{fanout_id}', headers=other_headers).status_code == 404
+
+
+def test_stale_running_fanout_is_restarted_without_duplicates():
+    app, ids = _build(residents=7)
+    app.config.update(
+        NOTIFICATION_FANOUT_INLINE_MAX=0,
+        NOTIFICATION_FANOUT_CHUNK=3,
+        NOTIFICATION_FANOUT_RUNNER='inline',
+        NOTIFICATION_FANOUT_TIMEOUT_SECONDS=60,
+    )
+    with app.app_context():
+        announcement = db.session.get(Announcement, ids['announcement'])
+        fanout_id = queue_announcement_notifications(announcement)['fanout_id']
+        # Simulate a thread that died after the first chunk
+        rows = NotificationOutbox.query.order_by(NotificationOutbox.id).all()
+        for row in rows[4:]:
+            db.session.delete(row)
+        fanout = db.session.get(NotificationFanout, fanout_id)
+        fanout.status = 'running'
+        fanout.started_at = utc_now() - timedelta(seconds=120)
+        fanout.processed_recipients = 3
+        fanout.queued_count = 4
+        fanout.completed_at = None
+        recent = NotificationFanout(
+            event_type='announcement_published', entity_id=announcement.id,
+            status='running', started_at=utc_now(), total_recipients=7,
+        )
+        db.session.add(recent)
+        db.session.commit()
+
+        assert recover_stale_fanouts() == 1
+        fanout = db.session.get(NotificationFanout, fanout_id)
+        assert fanout.status == 'completed'
+        assert fanout.processed_recipients == 7
+        assert fanout.queued_count == 10
+        assert NotificationOutbox.query.filter_by(entity_id=announcement.id).count() == 10
+        assert db.session.get(NotificationFanout, recent.id).status == 'running'
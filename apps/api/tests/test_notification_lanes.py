@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.announcement import Announcement
+from apps.api.models.municipality import Municipality
+from apps.api.models.notification import NotificationOutbox
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils import notification_delivery
+from apps.api.utils.notification_delivery import process_batch
+from apps.api.utils.notifications import queue_announcement_notifications, queue_notification_for_user
+from apps.api.utils.time import utc_now
+
+
+class LanesTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _build(monkeypatch, rows):
+    """``rows`` is a list of lanes; bulk rows are queued an hour earlier."""
+    app = create_app(LanesTestConfig)
+    monkeypatch.setattr(notification_delivery, '_send_email', lambda to, subject, body: None)
+    with app.app_context():
+        db.create_all()
+        user = User(
+            username='resident', email='resident@example.com', password_hash='x',
+            first_name='Res', last_name='Ident', role='resident',
+        )
+        db.session.add(user)
+        db.session.flush()
+        earlier = utc_now() - timedelta(hours=1)
+        for i, lane in enumerate(rows):
+            db.session.add(NotificationOutbox(
+                resident_id=user.id, channel='email', event_type='test', entity_id=i,
+                payload={'subject': 's', 'body': 'b'}, lane=lane, status='pending', attempts=0,
+                dedupe_key=f'test:{i}:{user.id}:email',
+                created_at=earlier if lane == 'bulk' else utc_now(),
+            ))
+        db.session.commit()
+    return app
+
+
+def _sent_ids():
+    return sorted(r.id for r in NotificationOutbox.query.filter_by(status='sent'))
+
+
+def test_transactional_lane_is_claimed_before_older_bulk_rows(monkeypatch):
+    app = _build(monkeypatch, ['bulk'] * 4 + ['transactional'] * 2)
+    with app.app_context():
+        assert process_batch(max_items=3, concurrency=1) == 3
+        sent = NotificationOutbox.query.filter_by(status='sent').all()
+        assert sorted(r.lane for r in sent) == ['bulk', 'transactional', 'transactional']
+
+        # A transactional-only worker leaves bulk rows alone
+        assert process_batch(max_items=10, concurrency=1, lanes=('transactional',)) == 0
+        assert process_batch(max_items=10, concurrency=1) == 3
+
+
+def test_shards_claim_disjoint_rows_and_steal_when_idle(monkeypatch):
+    app = _build(monkeypatch, ['transactional'] * 6)
+    with app.app_context():
+        assert process_batch(max_items=10, concurrency=1, shard=(0, 3), steal=False) == 2
+        assert all(i % 3 == 0 for i in _sent_ids())
+
+        assert process_batch(max_items=10, concurrency=1, shard=(0, 3), steal=False) == 0
+        assert process_batch(max_items=10, concurrency=1, shard=(1, 3), steal=False) == 2
+        assert len(_sent_ids()) == 4
+
+        # Shard 0 is drained, so it steals shard 2's rows
+        assert process_batch(max_items=10, concurrency=1, shard=(0, 3)) == 2
+        assert len(_sent_ids()) == 6
+
+
+def test_fanout_rows_go_to_the_bulk_lane(monkeypatch):
+    app = _build(monkeypatch, [])
+    with app.app_context():
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+        ])
+        user = User.query.first()
+        user.admin_verified = True
+        user.municipality_id = 112
+        announcement = Announcement(
+            title='Notice', content='Body', scope='MUNICIPALITY', municipality_id=112,
+            created_by=user.id, status='PUBLISHED',
+        )
+        db.session.add(announcement)
+        db.session.commit()
+
+        assert queue_announcement_notifications(announcement)['queued'] == 1
+        assert queue_notification_for_user(user, 'email', 'document_request_status', 9, {'subject': 's', 'body': 'b'}) == 'queued'
+        db.session.commit()
+        lanes = {r.event_type: r.lane for r in NotificationOutbox.query.all()}
+
+    assert lanes == {'announcement_published': 'bulk', 'document_request_status': 'transactional'}
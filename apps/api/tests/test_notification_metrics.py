@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.notification import NotificationOutbox
+from apps.api.models.user import User
+from apps.api.utils import notification_delivery
+from apps.api.utils.notification_delivery import process_batch
+from apps.api.utils.notification_metrics import STAGES, get_metrics
+
+
+class MetricsTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _build():
+    app = create_app(MetricsTestConfig)
+    with app.app_context():
+        db.create_all()
+        for i in range(4):
+            user = User(
+                username=f'resident{i}', email=f'resident{i}@example.com', password_hash='x',
+                first_name='Res', last_name=str(i), role='resident',
+                notify_sms_enabled=True, mobile_number=f'0917123456{i}',
+            )
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(NotificationOutbox(
+                resident_id=user.id, channel='email', event_type='test', entity_id=1,
+                payload={'subject': 'Hi', 'body': 'Body', 'to_email': 'down@example.com' if i == 0 else None},
+                status='pending', attempts=0, dedupe_key=f'test:1:{user.id}:email',
+            ))
+            if i < 2:
+                db.session.add(NotificationOutbox(
+                    resident_id=user.id, channel='sms', event_type='test', entity_id=1,
+                    payload={'message': 'Hello'}, status='pending', attempts=0,
+                    dedupe_key=f'test:1:{user.id}:sms',
+                ))
+        db.session.commit()
+    return app
+
+
+def test_process_batch_records_stages_latency_and_outcomes(monkeypatch, caplog):
+    app = _build()
+
+    def fake_email(to, subject, body):
+        if to == 'down@example.com':
+            raise RuntimeError('provider down')
+
+    monkeypatch.setattr(notification_delivery, '_send_email', fake_email)
+    monkeypatch.setattr(notification_delivery, 'send_sms', lambda numbers, message: {'status': 'sent'})
+
+    with app.app_context(), caplog.at_level(logging.INFO):
+        assert process_batch(max_items=50, concurrency=1) == 6
+        assert process_batch(max_items=50) == 0
+        snap = get_metrics().snapshot()
+        text = get_metrics().prometheus()
+
+    assert snap['batches'] == 1
+    assert snap['rows'] == 6
+    assert set(snap['stage_seconds']) == set(STAGES)
+    assert snap['rows_per_second'] > 0
+    assert snap['send_latency']['email']['count'] == 4
+    # Identical SMS texts go out as one call
+    assert snap['send_latency']['sms']['count'] == 1
+    assert snap['send_errors'] == {'email': 1}
+    assert snap['outcomes'] == {'email.retry': 1, 'email.sent': 3, 'sms.sent': 2}
+    assert snap['reasons'] == {'retry.provider down': 1}
+
+    assert 'notification_send_seconds_count{channel="email"} 4' in text
+    assert 'notification_outcomes_total{channel="email",outcome="retry"} 1' in text
+
+    [line] = [r.getMessage() for r in caplog.records if r.getMessage().startswith('notification_batch ')]
+    logged = json.loads(line.split(' ', 1)[1])
+    assert logged['rows'] == 6
+    assert set(logged['stages_ms']) == set(STAGES)
+
+
+def test_metrics_are_per_app():
+    first, second = create_app(MetricsTestConfig), create_app(MetricsTestConfig)
+    with first.app_context():
+        get_metrics().observe_send('email', 0.2)
+    with second.app_context():
+        assert get_metrics().snapshot()['send_latency']['email']['count'] == 0
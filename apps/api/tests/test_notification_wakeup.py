@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.announcement import Announcement
+from apps.api.models.municipality import Municipality
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils import notification_wakeup
+from apps.api.utils.notifications import queue_announcement_notifications, queue_notification_for_user
+
+
+class WakeupTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _build():
+    app = create_app(WakeupTestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+        ])
+        for i in range(2):
+            db.session.add(User(
+                username=f'resident{i}', email=f'resident{i}@example.com', password_hash='x',
+                first_name='Res', last_name=str(i), role='resident', admin_verified=True, municipality_id=112,
+            ))
+        db.session.commit()
+    return app
+
+
+def _record_notifies(monkeypatch):
+    sent = []
+    monkeypatch.setattr(notification_wakeup, '_is_postgres', lambda session: True)
+    monkeypatch.setattr(notification_wakeup, '_send_notify', lambda session, channel: sent.append(channel))
+    return sent
+
+
+def test_queued_rows_notify_once_per_transaction(monkeypatch):
+    app = _build()
+    sent = _record_notifies(monkeypatch)
+    with app.app_context():
+        users = User.query.order_by(User.id).all()
+        for user in users:
+            queue_notification_for_user(user, 'email', 'test', 1, {'subject': 's', 'body': 'b'})
+        db.session.flush()
+        queue_notification_for_user(users[0], 'email', 'test', 2, {'subject': 's', 'body': 'b'})
+        db.session.commit()
+        assert sent == ['notification_outbox']
+
+        # Rolled-back work does not count against the next transaction
+        queue_notification_for_user(users[0], 'email', 'test', 3, {'subject': 's', 'body': 'b'})
+        db.session.flush()
+        db.session.rollback()
+        queue_notification_for_user(users[1], 'email', 'test', 4, {'subject': 's', 'body': 'b'})
+        db.session.commit()
+        assert len(sent) == 3
+
+        # Unrelated writes stay quiet
+        users[0].first_name = 'Renamed'
+        db.session.commit()
+        assert len(sent) == 3
+
+
+def test_bulk_fanout_notifies_and_sqlite_workers_poll(monkeypatch):
+    app = _build()
+    sent = _record_notifies(monkeypatch)
+    with app.app_context():
+        announcement = Announcement(
+            title='Notice', content='Body', scope='MUNICIPALITY', municipality_id=112,
+            created_by=User.query.first().id, status='PUBLISHED',
+        )
+        db.session.add(announcement)
+        db.session.commit()
+        assert sent == []
+
+        assert queue_announcement_notifications(announcement)['queued'] == 2
+        db.session.commit()
+        assert sent == ['notification_outbox']
+
+        assert notification_wakeup.open_listener() is None
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.announcement import Announcement
+from apps.api.models.municipality import Municipality
+from apps.api.models.notification import NotificationOutbox, NotificationOutboxArchive
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils.notifications import queue_announcement_notifications, queue_notification_for_user
+from apps.api.utils.outbox_retention import archive_outbox, purge_archive
+from apps.api.utils.time import utc_now
+
+
+class RetentionTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _build():
+    app = create_app(RetentionTestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+        ])
+        user = User(
+            username='resident', email='resident@example.com', password_hash='x',
+            first_name='Res', last_name='Ident', role='resident', admin_verified=True, municipality_id=112,
+        )
+        db.session.add(user)
+        db.session.flush()
+        old = utc_now() - timedelta(days=45)
+        statuses = ['sent'] * 5 + ['skipped', 'failed', 'pending', 'processing']
+        for i, status in enumerate(statuses):
+            db.session.add(NotificationOutbox(
+                resident_id=user.id, channel='email', event_type='test', entity_id=i,
+                payload={'subject': 's', 'body': 'b'}, status=status, attempts=1,
+                dedupe_key=f'test:{i}:{user.id}:email', created_at=old, updated_at=old,
+            ))
+        # Recently sent: inside the retention window
+        db.session.add(NotificationOutbox(
+            resident_id=user.id, channel='email', event_type='test', entity_id=99,
+            payload={'subject': 's', 'body': 'b'}, status='sent', attempts=1,
+            dedupe_key=f'test:99:{user.id}:email',
+        ))
+        db.session.commit()
+    return app
+
+
+def test_terminal_rows_move_in_batches_and_active_rows_stay():
+    app = _build()
+    with app.app_context():
+        dry = archive_outbox(older_than_days=30, batch_size=3, dry_run=True)
+        assert dry['candidates'] == 7
+        assert dry['moved'] == 0
+        assert NotificationOutbox.query.count() == 10
+
+        stats = archive_outbox(older_than_days=30, batch_size=3)
+        assert stats['moved'] == 7
+        assert stats['batches'] == 3
+        assert stats['seconds'] >= 0
+
+        remaining = {(r.status, r.entity_id) for r in NotificationOutbox.query.all()}
+        assert remaining == {('pending', 7), ('processing', 8), ('sent', 99)}
+        archived = NotificationOutboxArchive.query.order_by(NotificationOutboxArchive.id).all()
+        assert [r.entity_id for r in archived] == list(range(7))
+        assert archived[0].payload == {'subject': 's', 'body': 'b'}
+        assert all(r.archived_at is not None for r in archived)
+
+        assert archive_outbox(older_than_days=30)['moved'] == 0
+
+
+def test_archived_dedupe_keys_still_block_requeue():
+    app = _build()
+    with app.app_context():
+        user = User.query.first()
+        announcement = Announcement(
+            title='Notice', content='Body', scope='MUNICIPALITY', municipality_id=112,
+            created_by=user.id, status='PUBLISHED',
+        )
+        db.session.add(announcement)
+        db.session.commit()
+        assert queue_announcement_notifications(announcement)['queued'] == 1
+        NotificationOutbox.query.filter_by(event_type='announcement_published').update(
+            {'status': 'sent', 'updated_at': utc_now() - timedelta(days=40)}, synchronize_session=False,
+        )
+        db.session.commit()
+
+        archive_outbox(older_than_days=30)
+        assert NotificationOutbox.query.filter_by(event_type='announcement_published').count() == 0
+
+        assert queue_notification_for_user(user, 'email', 'test', 0, {'subject': 's', 'body': 'b'}) == 'duplicate'
+        assert queue_announcement_notifications(announcement)['queued'] == 0
+        assert NotificationOutbox.query.filter_by(event_type='announcement_published').count() == 0
+
+
+def test_purge_is_off_by_default():
+    app = _build()
+    with app.app_context():
+        archive_outbox(older_than_days=30)
+        assert purge_archive()['purged'] == 0
+        NotificationOutboxArchive.query.update({'archived_at': utc_now() - timedelta(days=400)})
+        db.session.commit()
+        assert purge_archive(older_than_days=365, batch_size=2)['purged'] == 7
+        assert NotificationOutboxArchive.query.count() == 0
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.announcement import Announcement
+from apps.api.models.province import Province
+from apps.api.models.user import User
+from apps.api.utils.time import utc_now
+
+
+class PaginationConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _announcement(title, author_id, published, **kwargs):
+    return Announcement(
+        title=title,
+        content=f'{title} body',
+        scope='PROVINCE',
+        created_by=author_id,
+        priority='medium',
+        status='PUBLISHED',
+        publish_at=published,
+        created_at=published,
+        is_active=True,
+        **kwargs,
+    )
+
+
+def test_announcement_cursor_pages_keep_pinned_first_and_cache_total():
+    app = create_app(PaginationConfig)
+    client = app.test_client()
+    now = utc_now()
+    with app.app_context():
+        db.create_all()
+        author = User(
+            username='author',
+            email='author@example.com',
+            password_hash='test',
+            first_name='Pro',
+            last_name='Admin',
+            role='provincial_admin',
+        )
+        db.session.add_all([Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'), author])
+        db.session.flush()
+        db.session.add_all([
+            _announcement('Pinned old', author.id, now - timedelta(days=9), pinned=True, pinned_until=now + timedelta(days=1)),
+            _announcement('Expired pin', author.id, now - timedelta(days=1), pinned=True, pinned_until=now - timedelta(hours=1)),
+            _announcement('Newest', author.id, now - timedelta(hours=1)),
+            _announcement('Tie A', author.id, now - timedelta(days=2)),
+            _announcement('Tie B', author.id, now - timedelta(days=2)),
+        ])
+        db.session.commit()
+        author_id = author.id
+
+    titles = []
+    resp = client.get('/api/announcements?per_page=2').get_json()
+    assert resp['pagination']['total'] == 5
+    assert resp['pagination']['pages'] == 3
+    titles.extend(a['title'] for a in resp['announcements'])
+    while resp['pagination']['next_cursor']:
+        cursor = resp['pagination']['next_cursor']
+        resp = client.get(f'/api/announcements?per_page=2&cursor={cursor}').get_json()
+        titles.extend(a['title'] for a in resp['announcements'])
+
+    assert titles == ['Pinned old', 'Newest', 'Expired pin', 'Tie B', 'Tie A']
+
+    # Legacy page numbers still work
+    page_two = client.get('/api/announcements?per_page=2&page=2').get_json()
+    assert [a['title'] for a in page_two['announcements']] == ['Expired pin', 'Tie B']
+
+    # A committed insert drops the cached total
+    with app.app_context():
+        db.session.add(_announcement('Fresh', author_id, utc_now()))
+        db.session.commit()
+    assert client.get('/api/announcements?per_page=2').get_json()['pagination']['total'] == 6
+
+    assert client.get('/api/announcements?cursor=bm9wZQ').status_code == 400
+
+
+def test_totals_cache_is_bounded_for_arbitrary_filters():
+    app = create_app(PaginationConfig)
+    app.config['PAGINATION_TOTAL_CACHE_SIZE'] = 8
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+
+    for i in range(30):
+        assert client.get(f'/api/issues?municipality_id=112&status=s{i}&category={i}').status_code == 200
+
+    assert len(app.extensions['pagination_totals_cache']) == 8
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import time
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.notification import NotificationOutbox
+from apps.api.models.user import User
+from apps.api.utils import notification_delivery
+from apps.api.utils.notification_delivery import process_batch
+from apps.api.utils.provider_governor import CircuitBreaker, TokenBucket, governor_status
+from apps.api.utils.sms_provider import get_provider_status
+
+
+class GovernorTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    SMS_PROVIDER = 'console'
+    PROVIDER_BREAKER_THRESHOLD = 2
+    PROVIDER_BREAKER_RESET_SECONDS = 300
+
+
+def _build(rows: int = 5):
+    app = create_app(GovernorTestConfig)
+    with app.app_context():
+        db.create_all()
+        for i in range(rows):
+            user = User(
+                username=f'resident{i}', email=f'resident{i}@example.com', password_hash='x',
+                first_name='Res', last_name=str(i), role='resident',
+            )
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(NotificationOutbox(
+                resident_id=user.id, channel='email', event_type='test', entity_id=1,
+                payload={'subject': 'Hi', 'body': 'Body'}, status='pending', attempts=0,
+                dedupe_key=f'test:1:{user.id}:email',
+            ))
+        db.session.commit()
+    return app
+
+
+def test_open_circuit_returns_rows_to_pending_without_spending_attempts(monkeypatch):
+    app = _build()
+    calls = []
+
+    def failing_send(to, subject, body):
+        calls.append(to)
+        raise RuntimeError('SendGrid API error: 503')
+
+    monkeypatch.setattr(notification_delivery, '_send_email', failing_send)
+    with app.app_context():
+        assert process_batch(max_items=50, concurrency=1) == 5
+        rows = NotificationOutbox.query.order_by(NotificationOutbox.id).all()
+
+        failed = [r for r in rows if r.last_error != 'provider_circuit_open']
+        deferred = [r for r in rows if r.last_error == 'provider_circuit_open']
+        assert len(calls) == 2
+        assert [r.attempts for r in failed] == [1, 1]
+        assert len(deferred) == 3
+        assert all(r.status == 'pending' and r.attempts == 0 for r in deferred)
+        assert all(r.next_attempt_at is not None for r in deferred)
+
+        status = governor_status()['email']
+        assert status['state'] == 'open'
+        assert status['short_circuited'] == 3
+        assert get_provider_status()['circuit']['state'] == 'closed'
+
+
+def test_half_open_probe_closes_or_reopens_the_breaker():
+    breaker = CircuitBreaker(threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # One probe at a time once the reset window has passed
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() is True
+
+
+def test_token_bucket_paces_sends():
+    bucket = TokenBucket(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+    assert TokenBucket(rate=0).acquire() == 0.0
+
+
+def test_lease_outlasts_a_rate_limited_batch(monkeypatch):
+    app = _build()
+    app.config.update(NOTIFICATION_RATE_EMAIL=0.01, SMTP_TIMEOUT=30, HTTP_CLIENT_RETRIES=0,
+                      HTTP_CLIENT_CONNECT_TIMEOUT=5, HTTP_CLIENT_READ_TIMEOUT=30)
+    leases = []
+
+    def send(to, subject, body):
+        row = NotificationOutbox.query.filter_by(status='processing').first()
+        leases.append((row.next_attempt_at - row.created_at).total_seconds())
+
+    monkeypatch.setattr(notification_delivery, '_send_email', send)
+    with app.app_context():
+        assert process_batch(max_items=1, concurrency=1, lease_seconds=60) == 1
+
+    # 1 row: 100s of token-bucket wait + one 35s call timeout + 60s slack
+    assert leases and leases[0] >= 195
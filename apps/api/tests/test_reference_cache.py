@@ -0,0 +1,84 @@
+from sqlalchemy import event, text
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.municipality import Municipality
+from apps.api.models.province import Province
+
+
+class ReferenceCacheConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def _build():
+    app = create_app(ReferenceCacheConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Province(id=6, name='Zambales', slug='zambales', psgc_code='037100000'),
+            Municipality(id=112, name='Iba', slug='iba', province_id=6, psgc_code='037112000'),
+        ])
+        db.session.commit()
+    return app
+
+
+def test_reference_responses_use_etags_and_skip_the_database():
+    app = _build()
+    client = app.test_client()
+
+    first = client.get('/api/municipalities')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'public, max-age=300'
+    etag = first.headers['ETag']
+    assert [m['name'] for m in first.get_json()['municipalities']] == ['Iba']
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        again = client.get('/api/municipalities')
+        not_modified = client.get('/api/municipalities', headers={'If-None-Match': etag})
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+
+    assert again.get_data() == first.get_data()
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert statements == []
+
+    # Writes through the ORM drop the cached payload immediately
+    with app.app_context():
+        db.session.get(Municipality, 112).name = 'Iba (Capital)'
+        db.session.commit()
+    updated = client.get('/api/municipalities', headers={'If-None-Match': etag})
+    assert updated.status_code == 200
+    assert updated.headers['ETag'] != etag
+    assert updated.get_json()['municipalities'][0]['name'] == 'Iba (Capital)'
+
+
+def test_out_of_process_writes_are_detected_by_fingerprint():
+    app = _build()
+    app.config['REFERENCE_CACHE_CHECK_SECONDS'] = 0
+    client = app.test_client()
+
+    assert client.get('/api/municipalities').get_json()['count'] == 1
+
+    # Simulate a seed script writing without going through this process's session
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO municipalities (id, name, slug, province_id, psgc_code, is_active) "
+                "VALUES (108, 'Botolan', 'botolan', 6, '037108000', 1)"
+            ))
+
+    assert client.get('/api/municipalities').get_json()['count'] == 2
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import current_app
+
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.utils.supabase_storage import delete_file, get_signed_url, get_signed_urls
+
+
+class SignedUrlTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    SUPABASE_SERVICE_KEY = 'service-key'
+    SUPABASE_STORAGE_BUCKET = 'files'
+    SUPABASE_SIGNED_URL_CACHE_SECONDS = 900
+
+
+@pytest.fixture
+def supabase():
+    """Fake Storage API: single and multi-path sign endpoints, recording each call."""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            calls.append((self.path, payload))
+            prefix = '/storage/v1/object/sign/files'
+            if self.path == prefix:
+                self._send(200, [
+                    {'path': p, 'error': 'Object not found', 'signedURL': None} if p.endswith('missing.jpg')
+                    else {'path': p, 'error': None, 'signedURL': f'/object/sign/files/{p}?token={len(calls)}'}
+                    for p in payload['paths']
+                ])
+            else:
+                path = self.path[len(prefix) + 1:]
+                self._send(200, {'signedURL': f'/object/sign/files/{path}?token={len(calls)}'})
+
+        def do_DELETE(self):
+            calls.append((self.path, None))
+            self._send(200, {})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    app = create_app(SignedUrlTestConfig)
+    app.config['SUPABASE_URL'] = url
+    with app.app_context():
+        yield url, calls
+    server.shutdown()
+    server.server_close()
+
+
+def test_signed_url_is_reused_until_it_no_longer_covers_the_request(supabase):
+    url, calls = supabase
+
+    first = get_signed_url('proofs/a.jpg', expires_in=300)
+    assert first == f'{url}/storage/v1/object/sign/files/proofs/a.jpg?token=1'
+    assert calls[0][1] == {'expiresIn': 1200}
+
+    # Same object, also given as a public URL: no new round-trip
+    assert get_signed_url(f'{url}/storage/v1/object/public/files/proofs/a.jpg', expires_in=300) == first
+    assert len(calls) == 1
+
+    # Asking for more lifetime than the cached URL has left re-signs it
+    second = get_signed_url('proofs/a.jpg', expires_in=3600)
+    assert second != first
+    assert calls[1][1] == {'expiresIn': 4500}
+    assert get_signed_url('proofs/a.jpg', expires_in=300) == second
+    assert len(calls) == 2
+
+    delete_file('proofs/a.jpg')
+    get_signed_url('proofs/a.jpg', expires_in=300)
+    assert len(calls) == 4
+
+
+def test_batch_signing_only_sends_misses(supabase):
+    url, calls = supabase
+    cached = get_signed_url('proofs/a.jpg')
+
+    urls = get_signed_urls(['proofs/a.jpg', 'proofs/b.jpg', 'proofs/c.jpg', 'proofs/missing.jpg', 'proofs/b.jpg'])
+    assert urls['proofs/a.jpg'] == cached
+    assert urls['proofs/b.jpg'].startswith(f'{url}/storage/v1/object/sign/files/proofs/b.jpg?token=')
+    assert urls['proofs/missing.jpg'] is None
+    assert calls[-1] == ('/storage/v1/object/sign/files', {
+        'expiresIn': 4500, 'paths': ['proofs/b.jpg', 'proofs/c.jpg', 'proofs/missing.jpg'],
+    })
+
+    # Batch-signed URLs serve later single views
+    assert get_signed_url('proofs/c.jpg') == urls['proofs/c.jpg']
+    assert len(calls) == 2
+
+
+def test_cache_can_be_disabled(supabase):
+    _, calls = supabase
+    current_app.config['SUPABASE_SIGNED_URL_CACHE_SECONDS'] = 0
+    current_app.extensions.pop('signed_url_cache', None)
+    get_signed_url('proofs/a.jpg', expires_in=300)
+    get_signed_url('proofs/a.jpg', expires_in=300)
+    assert [payload for _, payload in calls] == [{'expiresIn': 300}, {'expiresIn': 300}]
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from flask import jsonify, request
+
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.utils.storage_stream import stream_stored_file
+
+
+BODY = bytes(range(256)) * 4096  # 1 MiB
+ETAG = '"%s"' % hashlib.md5(BODY).hexdigest()
+
+
+class StorageStreamTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+@pytest.fixture
+def storage():
+    """Local storage server that honours Range and If-None-Match like Supabase does."""
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            seen.append(dict(self.headers))
+            if self.path == '/missing.pdf':
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+                self.send_header('ETag', ETAG)
+                self.end_headers()
+                return
+            body, status = BODY, 200
+            byte_range = self.headers.get('Range')
+            if byte_range:
+                start, end = (int(v) for v in byte_range.split('=', 1)[1].split('-'))
+                body, status = BODY[start:end + 1], 206
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', ETAG)
+            self.send_header('Accept-Ranges', 'bytes')
+            if status == 206:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(BODY)}')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', seen
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app(StorageStreamTestConfig)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+    @app.route('/test-stream')
+    def stream():
+        try:
+            return stream_stored_file(request.args['ref'], download_name='scan.pdf')
+        except PermissionError:
+            return jsonify({'error': 'denied'}), 403
+        except FileNotFoundError:
+            return jsonify({'error': 'missing'}), 404
+        except requests.RequestException:
+            return jsonify({'error': 'upstream'}), 502
+
+    return app.test_client()
+
+
+def test_remote_file_is_relayed_in_chunks_with_upstream_headers(client, storage):
+    url, seen = storage
+    resp = client.get('/test-stream', query_string={'ref': f'{url}/scan.pdf'})
+
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.data == BODY
+    assert resp.headers['Content-Length'] == str(len(BODY))
+    assert resp.headers['ETag'] == ETAG
+    assert resp.headers['Content-Type'] == 'application/pdf'
+    assert resp.headers['Content-Disposition'] == 'inline; filename=scan.pdf'
+    assert seen[-1]['Accept-Encoding'] == 'identity'
+
+
+def test_client_range_and_revalidation_are_forwarded(client, storage):
+    url, seen = storage
+    ref = {'ref': f'{url}/scan.pdf'}
+
+    partial = client.get('/test-stream', query_string=ref, headers={'Range': 'bytes=100-199'})
+    assert partial.status_code == 206
+    assert partial.data == BODY[100:200]
+    assert partial.headers['Content-Range'] == f'bytes 100-199/{len(BODY)}'
+    assert partial.headers['Content-Length'] == '100'
+    assert seen[-1]['Range'] == 'bytes=100-199'
+
+    cached = client.get('/test-stream', query_string=ref, headers={'If-None-Match': ETAG})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+
+def test_remote_errors_and_untrusted_domains(client, storage):
+    url, _ = storage
+    client.application.config['ALLOWED_FILE_DOMAINS'] = ['storage.example.com']
+    assert client.get('/test-stream', query_string={'ref': f'{url}/scan.pdf'}).status_code == 403
+
+    client.application.config['ALLOWED_FILE_DOMAINS'] = []
+    assert client.get('/test-stream', query_string={'ref': f'{url}/missing.pdf'}).status_code == 502
+
+
+def test_local_files_support_range_and_stay_inside_upload_folder(client, tmp_path):
+    (tmp_path / 'docs').mkdir()
+    (tmp_path / 'docs' / 'scan.pdf').write_bytes(BODY)
+    (tmp_path.parent / 'secret.pdf').write_bytes(b'secret')
+
+    full = client.get('/test-stream', query_string={'ref': '/docs/scan.pdf'})
+    assert full.status_code == 200
+    assert full.data == BODY
+    etag = full.headers['ETag']
+
+    partial = client.get('/test-stream', query_string={'ref': 'docs\\scan.pdf'}, headers={'Range': 'bytes=0-9'})
+    assert partial.status_code == 206
+    assert partial.data == BODY[:10]
+
+    assert client.get('/test-stream', query_string={'ref': 'docs/scan.pdf'}, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/test-stream', query_string={'ref': '../secret.pdf'}).status_code == 403
+    assert client.get('/test-stream', query_string={'ref': 'docs/other.pdf'}).status_code == 404
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.utils import supabase_storage
+from apps.api.utils.supabase_storage import upload_file_to_path, upload_stream
+
+
+BODY = bytes(range(256)) * 40  # 10 KiB
+
+
+class UploadTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    SUPABASE_SERVICE_KEY = 'service-key'
+    SUPABASE_STORAGE_BUCKET = 'files'
+
+
+class RecordingFile(io.BytesIO):
+    """BytesIO that remembers the largest single read."""
+
+    largest_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.largest_read = max(self.largest_read, len(data))
+        return data
+
+
+@pytest.fixture
+def storage():
+    """Fake Storage API with the plain object endpoint and a TUS endpoint that can drop a chunk."""
+    state = {'objects': {}, 'uploads': {}, 'requests': [], 'fail_patch': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def _body(self):
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        def do_POST(self):
+            body = self._body()
+            state['requests'].append(('POST', self.path, dict(self.headers)))
+            if self.path == '/storage/v1/upload/resumable':
+                meta = dict(item.split(' ') for item in self.headers['Upload-Metadata'].split(','))
+                name = base64.b64decode(meta['objectName']).decode()
+                upload_id = f'upload-{len(state["uploads"]) + 1}'
+                state['uploads'][upload_id] = {'name': name, 'length': int(self.headers['Upload-Length']), 'data': b''}
+                self._reply(201, {'Location': f'/storage/v1/upload/resumable/{upload_id}'})
+                return
+            state['objects'][self.path.split('/files/', 1)[1]] = body
+            self._reply(200)
+
+        def do_PATCH(self):
+            body = self._body()
+            name = self.path.rsplit('/', 1)[1]
+            upload = state['uploads'][name]
+            state['requests'].append(('PATCH', int(self.headers['Upload-Offset']), len(body)))
+            assert int(self.headers['Upload-Offset']) == len(upload['data'])
+            if state['fail_patch'] and len(upload['data']) > 0:
+                # Keep part of the chunk, then fail like a dropped connection would
+                state['fail_patch'] -= 1
+                upload['data'] += body[:1000]
+                self._reply(500)
+                return
+            upload['data'] += body
+            self._reply(204, {'Upload-Offset': str(len(upload['data']))})
+
+        def do_HEAD(self):
+            name = self.path.rsplit('/', 1)[1]
+            state['requests'].append(('HEAD', name, None))
+            self._reply(200, {'Upload-Offset': str(len(state['uploads'][name]['data']))})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app = create_app(UploadTestConfig)
+    app.config['SUPABASE_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    with app.app_context():
+        yield app, state
+    server.shutdown()
+    server.server_close()
+
+
+def test_small_upload_is_streamed_from_the_file(storage):
+    _, state = storage
+    body = BODY * 50  # 500 KiB
+    file = RecordingFile(body)
+
+    assert upload_file_to_path(file, 'docs/a.pdf') == 'docs/a.pdf'
+    assert state['objects']['docs/a.pdf'] == body
+    _, _, headers = state['requests'][0]
+    assert headers['Content-Length'] == str(len(body))
+    assert headers['Content-Type'] == 'application/pdf'
+    assert file.largest_read <= 64 * 1024
+    assert file.tell() == 0
+
+
+def test_large_upload_uses_tus_and_resumes_a_dropped_chunk(storage, monkeypatch):
+    app, state = storage
+    app.config['SUPABASE_RESUMABLE_THRESHOLD_MB'] = 0.001
+    monkeypatch.setattr(supabase_storage, 'TUS_CHUNK_SIZE', 4096)
+    monkeypatch.setattr(supabase_storage.time, 'sleep', lambda seconds: None)
+    state['fail_patch'] = 1
+
+    result = upload_stream(RecordingFile(BODY), 'docs/big.pdf', content_type='application/pdf', upsert=True)
+
+    assert state['uploads']['upload-1']['name'] == 'docs/big.pdf'
+    assert state['uploads']['upload-1']['data'] == BODY
+    assert result.size == len(BODY)
+    assert result.sha256 == hashlib.sha256(BODY).hexdigest()
+    create = state['requests'][0]
+    assert create[2]['Upload-Length'] == str(len(BODY))
+    assert create[2]['x-upsert'] == 'true'
+    patches = [r for r in state['requests'] if r[0] == 'PATCH']
+    # Second chunk dropped after 1000 bytes, then resumed from the offset HEAD reported
+    assert [(offset, size) for _, offset, size in patches] == [
+        (0, 4096), (4096, 4096), (5096, 4096), (9192, len(BODY) - 9192),
+    ]
+    assert any(r[0] == 'HEAD' for r in state['requests'])
+
+
+def test_oversized_upload_is_rejected_before_sending(storage):
+    _, state = storage
+    with pytest.raises(supabase_storage.SupabaseStorageError):
+        upload_stream(io.BytesIO(BODY), 'docs/a.pdf', max_size_mb=0.001)
+    assert state['requests'] == []
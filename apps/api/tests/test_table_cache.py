@@ -0,0 +1,98 @@
+import time
+
+from sqlalchemy import insert, literal, select, update
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.issue import IssueCategory
+from apps.api.models.user import User
+from apps.api.utils import table_cache
+from apps.api.utils.table_cache import BoundedCache
+
+
+class TableCacheConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+
+
+def test_bounded_cache_evicts_least_recently_used():
+    cache = BoundedCache(ttl_seconds=30, max_entries=2)
+    cache.put('issues', 'a', 1)
+    cache.put('issues', 'b', 2)
+    assert cache.get('issues', 'a') == 1
+
+    cache.put('issues', 'c', 3)
+
+    assert cache.get('issues', 'b') is None
+    assert (cache.get('issues', 'a'), cache.get('issues', 'c')) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_bounded_cache_drops_expired_entries_before_evicting(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = BoundedCache(ttl_seconds=10, max_entries=3)
+    cache.put('users', 'old', 1)
+    now[0] += 5
+    cache.put('users', 'fresh', 2)
+    cache.put('issues', 'fresh', 3)
+    now[0] += 6
+
+    cache.put('issues', 'new', 4)
+
+    # Only the expired entry made room; nothing live was evicted
+    assert len(cache) == 3
+    assert cache.get('users', 'fresh') == 2
+
+    calls = []
+    assert cache.get_or_compute('issues', 'x', lambda: calls.append(1) or 5) == 5
+    assert cache.get_or_compute('issues', 'x', lambda: calls.append(1) or 6) == 5
+    assert len(calls) == 1
+
+    cache.invalidate('issues')
+    assert cache.get('issues', 'x') is None
+    assert cache.get('users', 'fresh') == 2
+
+
+def test_bounded_cache_honours_per_entry_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = BoundedCache(ttl_seconds=10)
+    cache.put('files', 'a.jpg', 'url', expires_at=1100.0)
+
+    assert cache.get('files', 'a.jpg', min_remaining=60) == 'url'
+    now[0] += 50
+    assert cache.get('files', 'a.jpg', min_remaining=60) is None
+
+    cache.put('files', 'b.jpg', 'url')
+    cache.discard('files', 'b.jpg')
+    assert len(cache) == 0
+
+
+def test_bulk_and_core_statements_report_their_tables(monkeypatch):
+    committed = []
+    monkeypatch.setattr(table_cache, '_table_listeners', [committed.append])
+    app = create_app(TableCacheConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(IssueCategory(name='Roads', slug='roads'))
+        db.session.commit()
+        committed.clear()
+
+        db.session.execute(update(User).where(User.id == -1).values(is_active=False))
+        IssueCategory.query.filter(IssueCategory.slug == 'none').delete()
+        db.session.execute(insert(IssueCategory).from_select(
+            ['name', 'slug'],
+            select(literal('Lights'), literal('lights')).where(literal(False)),
+        ))
+        db.session.commit()
+        assert committed == [{'users', 'issue_categories'}]
+
+        db.session.execute(update(User).values(is_active=True))
+        db.session.rollback()
+        db.session.commit()
+        assert len(committed) == 1
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import bcrypt
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api.models.token_blacklist import TokenBlacklist, get_revocation_cache
+from apps.api.models.user import User
+from apps.api.utils.time import utc_now
+
+
+class RevocationCacheConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret'
+    RATELIMIT_ENABLED = False
+    TOKEN_REVOCATION_SYNC_SECONDS = 300
+
+
+def _make_user():
+    user = User(
+        username='cache_user',
+        email='cache_user@example.com',
+        password_hash=bcrypt.hashpw(b'StrongPass123!', bcrypt.gensalt()).decode('utf-8'),
+        first_name='Cache',
+        last_name='User',
+        role='resident',
+        email_verified=True,
+        is_active=True,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_revocation_lookups_skip_db_after_warm():
+    app = create_app(RevocationCacheConfig)
+    with app.app_context():
+        db.create_all()
+        user = _make_user()
+        db.session.add(TokenBlacklist(
+            jti='warm-jti', token_type='access', user_id=user.id,
+            expires_at=utc_now() + timedelta(hours=1),
+        ))
+        db.session.add(TokenBlacklist(
+            jti='expired-jti', token_type='access', user_id=user.id,
+            expires_at=utc_now() - timedelta(hours=1),
+        ))
+        db.session.commit()
+
+        cache = get_revocation_cache()
+        cache.clear()
+        TokenBlacklist.warm_revocation_cache()
+
+        assert TokenBlacklist.is_token_revoked('warm-jti') is True
+        assert TokenBlacklist.is_token_revoked('unknown-jti') is False
+        assert TokenBlacklist.is_token_revoked('expired-jti') is False
+
+        TokenBlacklist.add_token_to_blacklist('new-jti', 'access', user.id, utc_now() + timedelta(hours=1))
+        assert TokenBlacklist.is_token_revoked('new-jti') is True
+
+        stats = TokenBlacklist.revocation_cache_stats()
+        assert stats['misses'] == 0
+        assert stats['hits'] == 4
+
+
+def test_truncated_cache_falls_back_to_db_for_negatives():
+    app = create_app(RevocationCacheConfig)
+    app.config['TOKEN_REVOCATION_CACHE_SIZE'] = 1
+    with app.app_context():
+        db.create_all()
+        user = _make_user()
+        for jti in ('a-jti', 'b-jti'):
+            db.session.add(TokenBlacklist(
+                jti=jti, token_type='access', user_id=user.id,
+                expires_at=utc_now() + timedelta(hours=1),
+            ))
+        db.session.commit()
+
+        app.extensions.pop('token_revocation_cache', None)
+        TokenBlacklist.warm_revocation_cache()
+        assert get_revocation_cache().stats()['complete'] is False
+
+        assert TokenBlacklist.is_token_revoked('a-jti') is True
+        assert TokenBlacklist.is_token_revoked('b-jti') is True
+        assert TokenBlacklist.is_token_revoked('other-jti') is False
+        assert TokenBlacklist.revocation_cache_stats()['misses'] >= 1
+
+
+def test_failed_sync_rolls_back_before_the_db_fallback(monkeypatch):
+    app = create_app(RevocationCacheConfig)
+    with app.app_context():
+        db.create_all()
+        cache = get_revocation_cache()
+        cache.clear()
+        rollbacks = []
+
+        def broken_sync(model):
+            raise RuntimeError('current transaction is aborted')
+
+        original_rollback = db.session.rollback
+        monkeypatch.setattr(cache, 'sync', broken_sync)
+        monkeypatch.setattr(db.session, 'rollback', lambda: rollbacks.append(1) or original_rollback())
+
+        assert TokenBlacklist.is_token_revoked('any-jti') is False
+        assert rollbacks == [1]
@@ -34,6 +34,9 @@ from .auth import (
 # Storage handler - uses Supabase Storage in production, filesystem in development
 from .storage_handler import (
     save_file as save_uploaded_file,
+    save_image,
+    SavedImage,
+    save_blob,
     save_profile_picture,
     save_verification_document,
     save_marketplace_image,
@@ -140,6 +143,9 @@ __all__ = [
     'verify_token_type',
     # Storage Handler (Supabase in production, filesystem in dev)
     'save_uploaded_file',
+    'save_image',
+    'SavedImage',
+    'save_blob',
     'save_profile_picture',
     'save_verification_document',
     'save_marketplace_image',
@@ -0,0 +1,306 @@
+"""Consolidated admin dashboard statistics.
+
+Each entity's counters are computed with conditional aggregation
+(``SUM(CASE WHEN ...)``) in a single round-trip per table, then cached per
+municipality scope for ``ADMIN_STATS_CACHE_SECONDS`` (at most
+``ADMIN_STATS_CACHE_SIZE`` entries). Committed writes to the
+underlying tables drop the cached rollups for that entity, so admins see their
+own changes immediately; the TTL only bounds staleness from other workers and
+time-based filters (publish/expire windows).
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, case, func, or_
+
+from apps.api import db
+from apps.api.models.announcement import Announcement
+from apps.api.models.benefit import BenefitProgram
+from apps.api.models.document import DocumentRequest
+from apps.api.models.issue import Issue
+from apps.api.models.marketplace import Item as MarketplaceItem
+from apps.api.models.marketplace import Transaction as MarketplaceTransaction
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+from apps.api.utils.table_cache import BoundedCache, on_tables_committed
+from apps.api.utils.time import utc_now
+from apps.api.utils.zambales_scope import ZAMBALES_MUNICIPALITY_IDS
+
+
+# Model -> stats kinds invalidated when rows of that model are written
+_TRACKED_MODELS = {
+    User: ('users', 'performance'),
+    Issue: ('issues',),
+    MarketplaceItem: ('marketplace', 'performance'),
+    Announcement: ('announcements',),
+    DocumentRequest: ('performance',),
+    BenefitProgram: ('performance',),
+    MarketplaceTransaction: ('performance',),
+    Municipality: ('performance',),
+}
+
+
+def scope_condition(field, municipality_scope):
+    """Return a SQLAlchemy condition for the given municipality scope ('ALL' or an id)."""
+    if municipality_scope == 'ALL':
+        return field.in_(ZAMBALES_MUNICIPALITY_IDS)
+    return field == municipality_scope
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+class StatsCache(BoundedCache):
+    """Bounded TTL cache of computed rollups keyed by (kind, scope key)."""
+
+    def get_or_compute(self, kind: str, key: Hashable, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(super().get_or_compute(kind, key, compute))
+
+
+def get_stats_cache() -> StatsCache:
+    """Return the stats cache bound to the current app."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('admin_stats_cache')
+    if cache is None:
+        cache = StatsCache(
+            ttl_seconds=app.config.get('ADMIN_STATS_CACHE_SECONDS', 15),
+            max_entries=app.config.get('ADMIN_STATS_CACHE_SIZE', 1024),
+        )
+        app.extensions['admin_stats_cache'] = cache
+    return cache
+
+
+def invalidate_stats(*kinds: str) -> None:
+    """Drop cached rollups for the given kinds (all kinds when none given)."""
+    if has_app_context():
+        get_stats_cache().invalidate(*kinds)
+
+
+# ---------------------------------------------------------------------------
+# Per-table rollups
+# ---------------------------------------------------------------------------
+
+def user_stats(municipality_scope) -> Dict[str, int]:
+    """Resident counters for a municipality scope."""
+    def compute():
+        week_ago = utc_now() - timedelta(days=7)
+        active_unverified = and_(User.admin_verified == False, User.is_active == True)  # noqa: E712
+        active_verified = and_(User.admin_verified == True, User.is_active == True)  # noqa: E712
+        row = User.query.with_entities(
+            func.count(User.id),
+            _count_if(active_unverified),
+            _count_if(active_verified),
+            _count_if(User.created_at >= week_ago),
+        ).filter(
+            scope_condition(User.municipality_id, municipality_scope),
+            User.role == 'resident',
+        ).one()
+        return {
+            'total_users': int(row[0] or 0),
+            'pending_verifications': int(row[1] or 0),
+            'verified_users': int(row[2] or 0),
+            'recent_registrations': int(row[3] or 0),
+        }
+    return get_stats_cache().get_or_compute('users', municipality_scope, compute)
+
+
+def issue_stats(municipality_scope) -> Dict[str, int]:
+    """Issue counters by status for a municipality scope."""
+    def compute():
+        row = Issue.query.with_entities(
+            func.count(Issue.id),
+            _count_if(Issue.status == 'pending'),
+            _count_if(Issue.status == 'in_progress'),
+            _count_if(Issue.status == 'resolved'),
+        ).filter(scope_condition(Issue.municipality_id, municipality_scope)).one()
+        return {
+            'total_issues': int(row[0] or 0),
+            'pending_issues': int(row[1] or 0),
+            'active_issues': int(row[2] or 0),
+            'resolved_issues': int(row[3] or 0),
+        }
+    return get_stats_cache().get_or_compute('issues', municipality_scope, compute)
+
+
+def marketplace_stats(municipality_scope) -> Dict[str, int]:
+    """Active marketplace item counters by moderation status."""
+    def compute():
+        row = MarketplaceItem.query.with_entities(
+            func.count(MarketplaceItem.id),
+            _count_if(MarketplaceItem.status == 'pending'),
+            _count_if(MarketplaceItem.status == 'available'),
+            _count_if(MarketplaceItem.status == 'rejected'),
+        ).filter(
+            scope_condition(MarketplaceItem.municipality_id, municipality_scope),
+            MarketplaceItem.is_active == True,  # noqa: E712
+        ).one()
+        return {
+            'total_items': int(row[0] or 0),
+            'pending_items': int(row[1] or 0),
+            'approved_items': int(row[2] or 0),
+            'rejected_items': int(row[3] or 0),
+        }
+    return get_stats_cache().get_or_compute('marketplace', municipality_scope, compute)
+
+
+def _announcement_live(now):
+    return and_(
+        Announcement.status == 'PUBLISHED',
+        or_(Announcement.publish_at == None, Announcement.publish_at <= now),  # noqa: E711
+        or_(Announcement.expire_at == None, Announcement.expire_at > now),  # noqa: E711
+    )
+
+
+def announcement_stats(base_query, scope_key: Hashable) -> Dict[str, int]:
+    """Announcement counters over a staff-visible base query.
+
+    ``scope_key`` must uniquely identify the visibility rules baked into
+    ``base_query`` (e.g. role plus municipality/barangay ids).
+    """
+    def compute():
+        now = utc_now()
+        pinned_active = and_(
+            Announcement.pinned == True,  # noqa: E712
+            or_(Announcement.pinned_until == None, Announcement.pinned_until > now),  # noqa: E711
+        )
+        row = base_query.with_entities(
+            func.count(Announcement.id),
+            _count_if(Announcement.status == 'PUBLISHED'),
+            _count_if(_announcement_live(now)),
+            _count_if(Announcement.status == 'DRAFT'),
+            _count_if(Announcement.status == 'ARCHIVED'),
+            _count_if(pinned_active),
+        ).one()
+        return {
+            'total_announcements': int(row[0] or 0),
+            'published_announcements': int(row[1] or 0),
+            'active_announcements': int(row[2] or 0),
+            'draft_announcements': int(row[3] or 0),
+            'archived_announcements': int(row[4] or 0),
+            'pinned_active': int(row[5] or 0),
+        }
+    return get_stats_cache().get_or_compute('announcements', ('staff', scope_key), compute)
+
+
+def live_local_announcement_count(municipality_scope) -> int:
+    """Published, in-window municipality/barangay announcements for a scope."""
+    def compute():
+        count = Announcement.query.filter(
+            Announcement.scope.in_(('MUNICIPALITY', 'BARANGAY')),
+            scope_condition(Announcement.municipality_id, municipality_scope),
+            _announcement_live(utc_now()),
+        ).with_entities(func.count(Announcement.id)).scalar()
+        return {'announcements': int(count or 0)}
+    return get_stats_cache().get_or_compute('announcements', ('local', municipality_scope), compute)['announcements']
+
+
+def dashboard_stats(municipality_scope) -> Dict[str, int]:
+    """Headline dashboard counters, reusing the per-table rollups."""
+    issues = issue_stats(municipality_scope)
+    return {
+        'pending_verifications': user_stats(municipality_scope)['pending_verifications'],
+        'active_issues': issues['pending_issues'] + issues['active_issues'],
+        'marketplace_items': marketplace_stats(municipality_scope)['pending_items'],
+        'announcements': live_local_announcement_count(municipality_scope),
+    }
+
+
+def _grouped_counts(model, *conditions) -> Dict[int, int]:
+    """Return {municipality_id: count} for rows matching conditions, in one GROUP BY."""
+    rows = db.session.query(model.municipality_id, func.count(model.id)).filter(
+        *conditions
+    ).group_by(model.municipality_id).all()
+    return {mid: int(count or 0) for mid, count in rows}
+
+
+def municipality_performance(municipality_ids: Iterable[int], start, end, cache_key: Hashable = None) -> List[Dict[str, Any]]:
+    """Activity rollup for many municipalities with one grouped query per entity.
+
+    ``cache_key`` should identify the date range (e.g. the range parameter) so
+    results can be reused; pass None to always recompute.
+    """
+    ids = [int(mid) for mid in municipality_ids]
+
+    def compute():
+        if not ids:
+            return {'rows': []}
+        names = dict(
+            db.session.query(Municipality.id, Municipality.name).filter(Municipality.id.in_(ids)).all()
+        )
+        users = _grouped_counts(
+            User,
+            User.municipality_id.in_(ids),
+            User.role == 'resident',
+            User.admin_verified == True,  # noqa: E712
+            User.is_active == True,  # noqa: E712
+        )
+        listings = _grouped_counts(
+            MarketplaceItem,
+            MarketplaceItem.municipality_id.in_(ids),
+            MarketplaceItem.created_at >= start,
+            MarketplaceItem.created_at <= end,
+        )
+        documents = _grouped_counts(
+            DocumentRequest,
+            DocumentRequest.municipality_id.in_(ids),
+            DocumentRequest.created_at >= start,
+            DocumentRequest.created_at <= end,
+        )
+        try:
+            benefits = _grouped_counts(
+                BenefitProgram,
+                BenefitProgram.municipality_id.in_(ids),
+                BenefitProgram.is_active == True,  # noqa: E712
+            )
+        except Exception:
+            db.session.rollback()
+            benefits = {}
+        # Disputes are not attributed to a municipality; the same total is reported for each row
+        try:
+            disputes = MarketplaceTransaction.query.filter(
+                MarketplaceTransaction.status == 'disputed',
+                MarketplaceTransaction.created_at >= start,
+                MarketplaceTransaction.created_at <= end,
+            ).with_entities(func.count(MarketplaceTransaction.id)).scalar() or 0
+        except Exception:
+            db.session.rollback()
+            disputes = 0
+
+        return {'rows': [
+            {
+                'id': mid,
+                'name': names.get(mid) or f"Municipality {mid}",
+                'users': users.get(mid, 0),
+                'listings': listings.get(mid, 0),
+                'documents': documents.get(mid, 0),
+                'benefits_active': benefits.get(mid, 0),
+                'disputes': int(disputes),
+            }
+            for mid in ids
+        ]}
+
+    if cache_key is None:
+        return compute()['rows']
+    return get_stats_cache().get_or_compute('performance', (tuple(ids), cache_key), compute)['rows']
+
+
+# ---------------------------------------------------------------------------
+# Write invalidation
+# ---------------------------------------------------------------------------
+
+_KINDS_BY_TABLE: Dict[str, set] = {}
+for _model, _kinds in _TRACKED_MODELS.items():
+    _KINDS_BY_TABLE.setdefault(_model.__tablename__, set()).update(_kinds)
+
+
+@on_tables_committed
+def _invalidate_written_kinds(tables):
+    kinds = set()
+    for table in tables:
+        kinds.update(_KINDS_BY_TABLE.get(table, ()))
+    if kinds:
+        invalidate_stats(*kinds)
@@ -7,14 +7,179 @@ Supports both:
 The system automatically chooses:
 - SendGrid if SENDGRID_API_KEY is configured
 - SMTP if SMTP_SERVER is configured (fallback for development)
+
+Outbox batches wrap delivery in ``smtp_batch()`` so SMTP emails share pooled,
+already-authenticated connections instead of logging in once per message.
 """
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import requests
 import json
 from flask import current_app
 
+from apps.api.utils import http_client
+
+
+class _SmtpConnection:
+    __slots__ = ('server', 'sent')
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+
+
+class SmtpConnectionPool:
+    """Logged-in SMTP sessions shared by the emails of an outbox batch.
+
+    Opening a session costs a TCP connect, STARTTLS and AUTH; during
+    ``smtp_batch()`` connections are checked out per message and returned,
+    so consecutive messages go over the same session. A connection is retired
+    after ``max_messages`` messages, and a session the server dropped
+    (``SMTPServerDisconnected`` or a 421 reply) is replaced transparently.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        use_tls: bool = True,
+        max_messages: int = 100,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages = max(1, int(max_messages))
+        self.timeout = timeout
+        self.batches = 0
+        self.connections_opened = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> '_SmtpConnection':
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.username, self.password)
+        except Exception:
+            _quit_quietly(server)
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return _SmtpConnection(server)
+
+    def _checkout(self) -> '_SmtpConnection':
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _checkin(self, conn: '_SmtpConnection') -> None:
+        if conn.sent >= self.max_messages:
+            _quit_quietly(conn.server)
+            return
+        with self._lock:
+            if self.batches > 0:
+                self._idle.append(conn)
+                return
+        _quit_quietly(conn.server)
+
+    def send(self, from_email: str, to_email: str, message: str) -> None:
+        conn = self._checkout()
+        for attempt in range(2):
+            try:
+                conn.server.sendmail(from_email, to_email, message)
+                break
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as exc:
+                if getattr(exc, 'smtp_code', None) != 421:
+                    # Message-level rejection: the session itself is still usable
+                    try:
+                        conn.server.rset()
+                        self._checkin(conn)
+                    except smtplib.SMTPException:
+                        _quit_quietly(conn.server)
+                    raise
+                _quit_quietly(conn.server)
+                if attempt:
+                    raise
+                conn = self._connect()
+            except smtplib.SMTPServerDisconnected:
+                _quit_quietly(conn.server)
+                if attempt:
+                    raise
+                conn = self._connect()
+            except Exception:
+                _quit_quietly(conn.server)
+                raise
+        conn.sent += 1
+        self._checkin(conn)
+
+    def close_idle(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _quit_quietly(conn.server)
+
+
+def _quit_quietly(server) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+_smtp_pool_lock = threading.Lock()
+
+
+@contextmanager
+def smtp_batch():
+    """Reuse SMTP connections for every email sent inside the block, from any thread.
+
+    Outside a batch each SMTP email still opens and closes its own session.
+    """
+    app = current_app._get_current_object()
+    if not app.config.get('SMTP_SERVER'):
+        yield None
+        return
+    with _smtp_pool_lock:
+        pool = app.extensions.get('smtp_pool')
+        if pool is None:
+            pool = SmtpConnectionPool(
+                host=app.config.get('SMTP_SERVER'),
+                port=app.config.get('SMTP_PORT', 587),
+                username=app.config.get('SMTP_USERNAME'),
+                password=app.config.get('SMTP_PASSWORD'),
+                use_tls=app.config.get('SMTP_USE_TLS', True),
+                max_messages=app.config.get('SMTP_MAX_MESSAGES_PER_CONNECTION', 100),
+                timeout=app.config.get('SMTP_TIMEOUT', 30),
+            )
+            app.extensions['smtp_pool'] = pool
+        pool.batches += 1
+    try:
+        yield pool
+    finally:
+        with _smtp_pool_lock:
+            pool.batches -= 1
+            done = pool.batches == 0
+        if done:
+            pool.close_idle()
+
+
+def _active_smtp_pool():
+    pool = current_app.extensions.get('smtp_pool')
+    return pool if pool is not None and pool.batches > 0 else None
+
 
 def _send_via_smtp(
     to_email: str,
@@ -24,7 +189,10 @@ def _send_via_smtp(
     attachment_name: str = None,
     html_content: str = None,
 ) -> None:
-    """Send email via SMTP (for development with Gmail) with optional HTML and PDF attachment."""
+    """Send email via SMTP (for development with Gmail) with optional HTML and PDF attachment.
+
+    Inside ``smtp_batch()`` the message goes over a pooled session.
+    """
     app = current_app
     smtp_server = app.config.get('SMTP_SERVER')
     smtp_port = app.config.get('SMTP_PORT', 587)
@@ -65,11 +233,16 @@ def _send_via_smtp(
             pdf_part.add_header('Content-Disposition', 'attachment', filename=attachment_name)
             msg.attach(pdf_part)
 
-        # Connect and send
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.sendmail(from_email, to_email, msg.as_string())
+        pool = _active_smtp_pool()
+        if pool is not None:
+            pool.send(from_email, to_email, msg.as_string())
+        else:
+            # Connect and send
+            with smtplib.SMTP(smtp_server, smtp_port, timeout=app.config.get('SMTP_TIMEOUT', 30)) as server:
+                if app.config.get('SMTP_USE_TLS', True):
+                    server.starttls()
+                server.login(smtp_username, smtp_password)
+                server.sendmail(from_email, to_email, msg.as_string())
 
         current_app.logger.info(f"Email sent successfully to {to_email} via SMTP")
     except smtplib.SMTPAuthenticationError as e:
@@ -140,7 +313,7 @@ def _send_via_sendgrid(
     current_app.logger.info(f"Attempting to send email to {to_email} via SendGrid API")
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = http_client.post(url, upstream='sendgrid', headers=headers, json=payload)
         # SendGrid returns 202 Accepted on success
         if response.status_code not in [200, 201, 202]:
             error_msg = f"SendGrid API error: {response.status_code}"
@@ -346,19 +519,9 @@ def send_document_request_status_email(to_email: str, doc_name: str, requested_a
     send_generic_email(to_email, subject, body)
 
 
-def send_document_ready_email(to_email: str, resident_name: str, doc_name: str, request_number: str, pdf_data: bytes) -> None:
-    """Send generated document PDF to resident's email.
-
-    Args:
-        to_email: Resident's email address
-        resident_name: Resident's full name
-        doc_name: Name of the document (e.g. "Barangay Clearance")
-        request_number: The document request tracking number
-        pdf_data: Raw PDF bytes to attach
-    """
-    app = current_app
-    app_name = app.config.get('APP_NAME', 'MunLink Zambales')
-
+def document_ready_email_content(resident_name: str, doc_name: str, request_number: str) -> tuple[str, str, str]:
+    """Return (subject, body, attachment filename) for the document-ready email."""
+    app_name = current_app.config.get('APP_NAME', 'MunLink Zambales')
     subject = f"{app_name}: Your {doc_name} is Ready"
     body = (
         f"Dear {resident_name},\n\n"
@@ -368,8 +531,23 @@ def send_document_ready_email(to_email: str, resident_name: str, doc_name: str,
         f"You may also download it from your MunLink account.\n\n"
         f"Thank you,\n{app_name} Team"
     )
+    return subject, body, f"{request_number}.pdf"
+
+
+def send_document_ready_email(to_email: str, resident_name: str, doc_name: str, request_number: str, pdf_data: bytes) -> None:
+    """Send generated document PDF to resident's email.
+
+    Admin endpoints queue this email through the notification outbox instead
+    (``queue_document_ready_email``) so the upload happens off the request.
 
-    attachment_name = f"{request_number}.pdf"
+    Args:
+        to_email: Resident's email address
+        resident_name: Resident's full name
+        doc_name: Name of the document (e.g. "Barangay Clearance")
+        request_number: The document request tracking number
+        pdf_data: Raw PDF bytes to attach
+    """
+    subject, body, attachment_name = document_ready_email_content(resident_name, doc_name, request_number)
 
     try:
         _send_email(to_email, subject, body, pdf_data, attachment_name)
@@ -1,10 +1,12 @@
 """Excel (XLSX) report utilities using openpyxl."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable
+from itertools import chain, islice
 from pathlib import Path
 
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 
 
@@ -135,3 +137,80 @@ def save_workbook(wb: Workbook, out_path: Path) -> Path:
     return out_path
 
 
+def _xlsx_value(v: Any) -> Any:
+    return "" if v is None else (v if isinstance(v, (int, float)) else str(v))
+
+
+def write_table_workbook(
+    out_path: Path,
+    *,
+    sheet_name: str,
+    headers: List[str],
+    rows: Iterable[List[Any]],
+    municipality_name: Optional[str] = None,
+    title: Optional[str] = None,
+    gov_lines: Optional[List[str]] = None,
+) -> int:
+    """Stream a single-sheet table report to disk using openpyxl write-only mode.
+
+    Rows are consumed lazily and flushed as they are appended, so memory stays
+    flat for large exports. Column widths are sized from the first 50 rows
+    because write-only sheets cannot be autosized after the fact. Returns the
+    number of data rows written.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name[:31])
+
+    rows = iter(rows)
+    sample = [[_xlsx_value(v) for v in r] for r in islice(rows, 50)]
+    headers = [str(h) for h in (headers or [])]
+    for idx, h in enumerate(headers, start=1):
+        width = max([10, len(h)] + [len(str(r[idx - 1])) for r in sample if idx - 1 < len(r)])
+        ws.column_dimensions[get_column_letter(idx)].width = min(48, width + 2)
+    ws.freeze_panes = 'A2'
+
+    header_fill = PatternFill(start_color='FFEEF7FF', end_color='FFEEF7FF', fill_type='solid')
+    zebra_fill = PatternFill(start_color='FFF8FAFC', end_color='FFF8FAFC', fill_type='solid')
+
+    def styled(value, **style):
+        cell = WriteOnlyCell(ws, value=value)
+        for key, val in style.items():
+            setattr(cell, key, val)
+        return cell
+
+    # Write-only sheets cannot merge cells; the preheader sits in the first column
+    if municipality_name:
+        ws.append([styled(municipality_name, font=Font(bold=True, size=16))])
+    if title:
+        ws.append([styled(title, font=Font(bold=True, size=12))])
+    if gov_lines:
+        ws.append([])
+        for line in gov_lines:
+            ws.append([styled(line, font=Font(size=10))])
+    if municipality_name or title or gov_lines:
+        ws.append([])
+
+    if headers:
+        ws.append([
+            styled(h, font=Font(bold=True), fill=header_fill, alignment=Alignment(horizontal='center', vertical='center'))
+            for h in headers
+        ])
+
+    id_col = headers.index('ID') if 'ID' in headers else None
+    count = 0
+    for r in chain(sample, ([_xlsx_value(v) for v in r] for r in rows)):
+        cells = []
+        for ci, v in enumerate(r):
+            cell = WriteOnlyCell(ws, value=v)
+            if count % 2 == 1:
+                cell.fill = zebra_fill
+            if ci == id_col:
+                cell.alignment = Alignment(horizontal='left')
+                cell.number_format = '@'
+            cells.append(cell)
+        ws.append(cells)
+        count += 1
+
+    wb.save(out_path)
+    return count
@@ -0,0 +1,394 @@
+"""Background admin export jobs.
+
+Large exports are rendered outside the request: ``enqueue_export`` records an
+``ExportJob`` row and hands it to a runner (an in-process thread by default,
+``scripts/export_worker.py`` when ``EXPORT_JOB_RUNNER=worker``). The runner
+streams rows from ``utils/export_pipeline.py`` into a file, reporting progress
+as it goes, and stores the artifact in the private bucket (or under
+``UPLOAD_FOLDER`` in filesystem mode). Identical requests - same entity,
+format, scope and range - reuse a job that is still running or finished within
+``EXPORT_JOB_REUSE_SECONDS`` instead of rendering again. A job still
+``running`` after ``EXPORT_JOB_TIMEOUT_SECONDS`` is presumed orphaned by a
+crashed runner and marked failed, so it is neither reused nor left pending.
+
+Downloads honour HTTP ``Range`` so interrupted transfers of large files can
+resume: local files go through ``send_file(conditional=True)`` and remote
+artifacts are proxied from a short-lived signed URL with the Range header
+forwarded.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import Response, current_app, request, send_file, stream_with_context
+
+from apps.api import db
+from apps.api.models.export_job import ExportJob
+from apps.api.utils import http_client
+from apps.api.utils.export_pipeline import (
+    STREAMING_FORMATS,
+    build_export,
+    count_export,
+    iter_csv,
+    iter_ndjson,
+)
+from apps.api.utils.time import utc_now
+
+
+JOB_FORMATS = ('csv', 'ndjson', 'xlsx', 'pdf')
+PROGRESS_EVERY = 500
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+_PASSTHROUGH_HEADERS = ('Content-Length', 'Content-Range', 'Accept-Ranges', 'ETag', 'Last-Modified')
+
+
+def export_cache_key(entity: str, fmt: str, scope_key: str, range_param: Optional[str]) -> str:
+    return f"{entity}:{fmt}:{scope_key}:{range_param or 'last_30_days'}"
+
+
+def staff_scope_key(entity: str, municipality_scope, ctx: Dict[str, Any]) -> str:
+    """Key identifying who may share an export's rows.
+
+    Announcement visibility depends on the admin's role and barangay, so those
+    exports are keyed by the staff scope; everything else only by municipality.
+    """
+    if entity == 'announcements':
+        return f"staff:{ctx.get('role_lower')}:{ctx.get('municipality_id')}:{ctx.get('barangay_id')}"
+    return f"municipality:{municipality_scope}"
+
+
+def fail_stale_jobs() -> int:
+    """Fail jobs left ``running`` past EXPORT_JOB_TIMEOUT_SECONDS by a crashed runner.
+
+    Returns the number of jobs marked failed.
+    """
+    timeout = int(current_app.config.get('EXPORT_JOB_TIMEOUT_SECONDS', 1800))
+    now = utc_now()
+    jobs = ExportJob.__table__
+    # Separate connection: callers such as enqueue_export must not have their session committed
+    with db.engine.begin() as conn:
+        stale = conn.execute(
+            jobs.update()
+            .where(jobs.c.status == 'running', jobs.c.started_at < now - timedelta(seconds=max(0, timeout)))
+            .values(status='failed', error=f'Export did not finish within {timeout} seconds', completed_at=now)
+        ).rowcount
+    if stale:
+        current_app.logger.warning("Marked %s stale export job(s) as failed", stale)
+    return stale
+
+
+def _reusable_job(cache_key: str) -> Optional[ExportJob]:
+    fail_stale_jobs()
+    reuse_seconds = int(current_app.config.get('EXPORT_JOB_REUSE_SECONDS', 600))
+    candidates = ExportJob.query.filter(
+        ExportJob.cache_key == cache_key,
+        ExportJob.status.in_(('queued', 'running', 'completed')),
+        ExportJob.created_at >= utc_now() - timedelta(seconds=max(0, reuse_seconds)),
+    ).order_by(ExportJob.created_at.desc()).limit(5).execution_options(populate_existing=True).all()
+    for job in candidates:
+        if job.status != 'completed':
+            return job
+        if (job.params or {}).get('storage') == 'supabase' or os.path.exists(_local_path(job.file_path)):
+            return job
+    return None
+
+
+def enqueue_export(
+    *,
+    entity: str,
+    fmt: str,
+    range_param: Optional[str],
+    municipality_scope,
+    municipality_name: str,
+    municipality_slug: str,
+    ctx: Dict[str, Any],
+    requested_by: Optional[int] = None,
+) -> Tuple[ExportJob, bool]:
+    """Create (or reuse) an export job. Returns ``(job, reused)``."""
+    scope_key = staff_scope_key(entity, municipality_scope, ctx)
+    cache_key = export_cache_key(entity, fmt, scope_key, range_param)
+    existing = _reusable_job(cache_key)
+    if existing is not None:
+        return existing, True
+
+    job = ExportJob(
+        requested_by=requested_by,
+        entity=entity,
+        fmt=fmt,
+        range_param=range_param,
+        scope_key=scope_key,
+        cache_key=cache_key,
+        status='queued',
+        params={
+            'municipality_scope': municipality_scope,
+            'municipality_name': municipality_name,
+            'municipality_slug': municipality_slug,
+            'staff': {k: ctx.get(k) for k in ('is_super', 'is_provincial', 'role_lower', 'municipality_id', 'barangay_id')},
+        },
+    )
+    db.session.add(job)
+    db.session.commit()
+    _dispatch(job.job_id)
+    return job, False
+
+
+def _dispatch(job_id: str) -> None:
+    runner = (current_app.config.get('EXPORT_JOB_RUNNER') or 'thread').lower()
+    if runner == 'inline':
+        run_export_job(job_id)
+    elif runner == 'thread':
+        app = current_app._get_current_object()
+        threading.Thread(target=_run_in_thread, args=(app, job_id), name=f'export-{job_id[:8]}', daemon=True).start()
+    # 'worker': left queued for scripts/export_worker.py
+
+
+def _run_in_thread(app, job_id: str) -> None:
+    with app.app_context():
+        try:
+            run_export_job(job_id)
+        finally:
+            db.session.remove()
+
+
+def _claim(job_id: str) -> bool:
+    """Atomically move a queued job to running so only one runner renders it."""
+    claimed = ExportJob.query.filter(
+        ExportJob.job_id == job_id,
+        ExportJob.status == 'queued',
+    ).update({'status': 'running', 'started_at': utc_now()}, synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def _report_progress(job_id: str, processed: int) -> None:
+    # Separate connection: committing the session would invalidate the export cursor
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                ExportJob.__table__.update()
+                .where(ExportJob.__table__.c.job_id == job_id)
+                .values(processed_rows=processed)
+            )
+    except Exception as exc:
+        current_app.logger.warning("Failed to record export progress for %s: %s", job_id, exc)
+
+
+class _ProgressRows:
+    """Row iterator that periodically records how many rows were consumed."""
+
+    def __init__(self, rows: Iterable[List[Any]], job_id: str):
+        self._rows = iter(rows)
+        self._job_id = job_id
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        self.count += 1
+        if self.count % PROGRESS_EVERY == 0:
+            _report_progress(self._job_id, self.count)
+        return row
+
+
+def _staff_announcement_query(staff: Dict[str, Any]):
+    from apps.api.routes.admin import _announcement_query_for_staff
+    return _announcement_query_for_staff(staff)
+
+
+def _render(job: ExportJob, headers: List[str], rows: Iterable[List[Any]], out_path: str) -> None:
+    params = job.params or {}
+    municipality_name = params.get('municipality_name') or 'Municipality'
+    title = f"{municipality_name} – {job.entity.title()} Report"
+    if job.fmt in STREAMING_FORMATS:
+        chunks = iter_csv(headers, rows) if job.fmt == 'csv' else iter_ndjson(headers, rows)
+        with open(out_path, 'w', encoding='utf-8', newline='') as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+    elif job.fmt == 'pdf':
+        from pathlib import Path
+        from apps.api.utils.pdf_table_report import generate_table_pdf
+        generate_table_pdf(out_path=Path(out_path), title=title, municipality_name=municipality_name, headers=headers, rows=rows)
+    else:
+        from pathlib import Path
+        from apps.api.utils.excel_generator import write_table_workbook
+        write_table_workbook(
+            Path(out_path),
+            sheet_name=job.entity.title(),
+            headers=headers,
+            rows=rows,
+            municipality_name=municipality_name,
+            title=title,
+            gov_lines=[
+                'Republic of the Philippines',
+                'Province of Zambales',
+                f'Municipality of {municipality_name}',
+                'Office of the Municipal Mayor',
+            ],
+        )
+
+
+def _content_type(fmt: str) -> str:
+    if fmt in STREAMING_FORMATS:
+        return STREAMING_FORMATS[fmt]
+    if fmt == 'pdf':
+        return 'application/pdf'
+    return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _local_path(rel_path: Optional[str]) -> str:
+    upload_root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER') or 'uploads')
+    return os.path.abspath(os.path.join(upload_root, str(rel_path or '')))
+
+
+def run_export_job(job_id: str) -> Optional[ExportJob]:
+    """Render a queued export job to storage. Returns the job, or None if not claimable."""
+    if not _claim(job_id):
+        return None
+    job = ExportJob.query.filter_by(job_id=job_id).first()
+    params = job.params or {}
+    slug = params.get('municipality_slug') or 'zambales'
+    file_name = f"{slug}-{job.entity}-{utc_now().strftime('%Y%m%d-%H%M%S')}.{job.fmt}"
+    tmp_path = None
+    try:
+        from apps.api.routes.admin import _parse_range
+        from apps.api.utils.storage_handler import _use_supabase_storage
+        from apps.api.utils.supabase_storage import build_storage_path, generate_unique_filename, upload_stream
+
+        start, end = _parse_range(job.range_param or 'last_30_days')
+        spec = dict(
+            municipality_scope=params.get('municipality_scope'),
+            start=start,
+            end=end,
+            now=utc_now(),
+            announcement_query=_staff_announcement_query(params.get('staff') or {}) if job.entity == 'announcements' else None,
+        )
+        job.total_rows = count_export(job.entity, **spec)
+        db.session.commit()
+
+        headers, rows = build_export(job.entity, **spec)
+        counted = _ProgressRows(rows, job.job_id)
+        content_type = _content_type(job.fmt)
+
+        if _use_supabase_storage():
+            fd, tmp_path = tempfile.mkstemp(suffix=f'.{job.fmt}')
+            os.close(fd)
+            _render(job, headers, counted, tmp_path)
+            storage_path = build_storage_path(
+                category='exports',
+                municipality_slug=slug,
+                filename=generate_unique_filename(file_name),
+                user_type='admins',
+            )
+            # Streamed from the temp file (TUS for large artifacts), never read into memory
+            with open(tmp_path, 'rb') as fh:
+                result = upload_stream(
+                    fh,
+                    storage_path,
+                    content_type=content_type,
+                    max_size_mb=int(current_app.config.get('EXPORT_MAX_SIZE_MB', 200)),
+                    bucket=current_app.config.get('SUPABASE_PRIVATE_BUCKET'),
+                )
+            stored = result.storage_path
+            file_size = result.size
+            storage = 'supabase'
+        else:
+            from apps.api.utils.file_handler import ensure_directory_exists, get_file_path
+            directory = get_file_path('exports', slug, user_type='admins')
+            ensure_directory_exists(directory)
+            out_path = os.path.join(directory, f"{job.job_id}-{file_name}")
+            _render(job, headers, counted, out_path)
+            upload_root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER') or 'uploads')
+            stored = os.path.relpath(os.path.abspath(out_path), upload_root).replace('\\', '/')
+            file_size = os.path.getsize(out_path)
+            storage = 'local'
+
+        job.status = 'completed'
+        job.processed_rows = counted.count
+        job.total_rows = max(job.total_rows or 0, counted.count)
+        job.file_path = stored
+        job.file_name = file_name
+        job.content_type = content_type
+        job.file_size = file_size
+        job.params = {**params, 'storage': storage}
+        job.completed_at = utc_now()
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.error("Export job %s failed: %s", job_id, exc)
+        job = ExportJob.query.filter_by(job_id=job_id).first()
+        job.status = 'failed'
+        job.error = str(exc)[:1000]
+        job.completed_at = utc_now()
+        db.session.commit()
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return job
+
+
+def process_pending_exports(max_jobs: int = 5) -> int:
+    """Run up to ``max_jobs`` queued jobs, oldest first. Used by the export worker."""
+    job_ids = [
+        row.job_id for row in ExportJob.query.with_entities(ExportJob.job_id)
+        .filter(ExportJob.status == 'queued')
+        .order_by(ExportJob.created_at)
+        .limit(max_jobs)
+        .all()
+    ]
+    processed = 0
+    for job_id in job_ids:
+        if run_export_job(job_id) is not None:
+            processed += 1
+    return processed
+
+
+def _iter_upstream(resp) -> Iterator[bytes]:
+    try:
+        for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if chunk:
+                yield chunk
+    finally:
+        resp.close()
+
+
+def export_download_response(job: ExportJob):
+    """Serve a completed export, honouring Range/If-Range for resumable downloads."""
+    if job.status != 'completed' or not job.file_path:
+        raise FileNotFoundError('Export is not ready')
+
+    if (job.params or {}).get('storage') == 'supabase':
+        from apps.api.utils.supabase_storage import get_signed_url
+        signed = get_signed_url(job.file_path, expires_in=300, bucket=current_app.config.get('SUPABASE_PRIVATE_BUCKET'))
+        forward = {h: request.headers[h] for h in ('Range', 'If-Range') if request.headers.get(h)}
+        resp = http_client.get(signed, upstream='supabase', headers=forward, stream=True)
+        if resp.status_code >= 400 and resp.status_code != 416:
+            resp.close()
+            resp.raise_for_status()
+        headers = {h: resp.headers[h] for h in _PASSTHROUGH_HEADERS if h in resp.headers}
+        headers['Content-Disposition'] = f'attachment; filename="{job.file_name}"'
+        return Response(
+            stream_with_context(_iter_upstream(resp)),
+            status=resp.status_code,
+            headers=headers,
+            mimetype=job.content_type or 'application/octet-stream',
+        )
+
+    full_path = _local_path(job.file_path)
+    upload_root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER') or 'uploads')
+    if not full_path.startswith(upload_root + os.sep):
+        raise PermissionError('Invalid file path')
+    if not os.path.exists(full_path):
+        raise FileNotFoundError('Export file missing')
+    return send_file(
+        full_path,
+        mimetype=job.content_type or mimetypes.guess_type(full_path)[0] or 'application/octet-stream',
+        as_attachment=True,
+        download_name=job.file_name,
+        conditional=True,
+    )
@@ -0,0 +1,229 @@
+"""Shared outbound HTTP client for third-party APIs.
+
+SendGrid, PhilSMS and Supabase Storage used to be called through module-level
+``requests.post/get/delete``, which opens a fresh TCP+TLS connection per call
+(and several storage calls had no timeout). Calls now go through one
+``requests.Session`` per upstream host, held per app in
+``app.extensions['http_client']``:
+
+  - ``HTTPAdapter`` pools sized by ``HTTP_CLIENT_POOL_SIZE`` keep connections
+    alive between calls and across threads (notification delivery pools);
+  - every request gets ``(HTTP_CLIENT_CONNECT_TIMEOUT, HTTP_CLIENT_READ_TIMEOUT)``
+    unless the caller passes its own ``timeout``;
+  - 429/5xx answers and connection failures are retried up to
+    ``HTTP_CLIENT_RETRIES`` times with exponential backoff and full jitter,
+    honouring ``Retry-After``. Non-idempotent requests (POST) are only retried
+    when the upstream cannot have acted on them (429/503, connect timeouts)
+    unless the caller says the call is ``idempotent``;
+  - latency, error and retry counts are recorded per upstream name
+    (``get_upstream_stats()``).
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Statuses that guarantee a non-idempotent request was not processed
+REJECTED_STATUSES = frozenset({429, 503})
+
+
+@dataclass
+class UpstreamStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_status: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_ms': round(self.total_seconds * 1000 / self.requests, 1) if self.requests else None,
+            'max_ms': round(self.max_seconds * 1000, 1),
+            'last_status': self.last_status,
+        }
+
+
+class HttpClient:
+    """Per-host pooled sessions plus per-upstream latency counters."""
+
+    def __init__(
+        self,
+        pool_size: int = 16,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        retries: int = 2,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 10.0,
+    ):
+        self.pool_size = max(1, int(pool_size))
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.retries = max(0, int(retries))
+        self.backoff_seconds = max(0.0, float(backoff_seconds))
+        self.max_backoff_seconds = max(0.0, float(max_backoff_seconds))
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self._stats: Dict[str, UpstreamStats] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[key] = session
+            return session
+
+    def _record(self, upstream: str, elapsed: float, status: Optional[int], error: bool, retried: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(upstream, UpstreamStats())
+            stats.requests += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            stats.last_status = status
+            if error:
+                stats.errors += 1
+            if retried:
+                stats.retries += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: s.to_dict() for name, s in self._stats.items()}
+
+    def _backoff(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        retry_after = _retry_after_seconds(resp) if resp is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff_seconds)
+        ceiling = min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        upstream: Optional[str] = None,
+        idempotent: Optional[bool] = None,
+        retries: Optional[int] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        method = method.upper()
+        upstream = upstream or urlsplit(url).netloc or 'unknown'
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        max_retries = self.retries if retries is None else max(0, int(retries))
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session_for(url)
+        # Signed URLs carry their token in the query string; keep it out of logs
+        log_url = urlsplit(url)._replace(query='', fragment='').geturl()
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                resp = session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as exc:
+                elapsed = time.perf_counter() - started
+                retryable = isinstance(exc, requests.exceptions.ConnectTimeout) or (
+                    idempotent and isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                )
+                will_retry = retryable and attempt < max_retries
+                self._record(upstream, elapsed, None, True, will_retry)
+                current_app.logger.debug("[http] %s %s %s failed after %.0fms: %s", upstream, method, log_url, elapsed * 1000, exc)
+                if not will_retry:
+                    raise
+                time.sleep(self._backoff(attempt, None))
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - started
+            status = resp.status_code
+            retryable = status in (RETRY_STATUSES if idempotent else REJECTED_STATUSES)
+            will_retry = retryable and attempt < max_retries
+            self._record(upstream, elapsed, status, status >= 500, will_retry)
+            current_app.logger.debug("[http] %s %s %s -> %s in %.0fms", upstream, method, log_url, status, elapsed * 1000)
+            if not will_retry:
+                return resp
+            wait = self._backoff(attempt, resp)
+            resp.close()
+            time.sleep(wait)
+            attempt += 1
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+def get_http_client() -> HttpClient:
+    """Return the outbound HTTP client bound to the current app."""
+    app = current_app._get_current_object()
+    client = app.extensions.get('http_client')
+    if client is None:
+        config = app.config
+        client = HttpClient(
+            pool_size=config.get('HTTP_CLIENT_POOL_SIZE', 16),
+            connect_timeout=config.get('HTTP_CLIENT_CONNECT_TIMEOUT', 5),
+            read_timeout=config.get('HTTP_CLIENT_READ_TIMEOUT', 30),
+            retries=config.get('HTTP_CLIENT_RETRIES', 2),
+            backoff_seconds=config.get('HTTP_CLIENT_BACKOFF_SECONDS', 0.5),
+            max_backoff_seconds=config.get('HTTP_CLIENT_MAX_BACKOFF_SECONDS', 10),
+        )
+        app.extensions['http_client'] = client
+    return client
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    return get_http_client().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def delete(url: str, **kwargs: Any) -> requests.Response:
+    return request('DELETE', url, **kwargs)
+
+
+def get_upstream_stats() -> Dict[str, Dict[str, Any]]:
+    """Latency/error/retry counters per upstream for this app."""
+    return get_http_client().stats()
@@ -0,0 +1,120 @@
+"""Resize, recompress and thumbnail uploaded images.
+
+Phone photos arrive as multi-megabyte JPEGs with EXIF (including GPS) and
+list pages used to download them full size. ``process_upload`` turns an
+upload into:
+
+  - the stored image: orientation applied, EXIF and other metadata dropped,
+    longest side clamped to ``IMAGE_MAX_DIMENSION`` and re-encoded as
+    ``IMAGE_FORMAT`` ('webp' or 'jpeg') at ``IMAGE_QUALITY``;
+  - the requested ``IMAGE_VARIANTS`` (fixed longest-side sizes) at
+    ``IMAGE_THUMBNAIL_QUALITY``.
+
+Animated GIFs and formats Pillow cannot decode (HEIC without a plugin) are
+returned as ``None`` so the caller stores the original unchanged.
+``storage_handler.save_image`` stores the results.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Variant name -> longest side in pixels
+IMAGE_VARIANTS = {
+    'thumb': 320,
+    'medium': 960,
+}
+
+_FORMATS = {
+    'webp': ('WEBP', '.webp', 'image/webp'),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+}
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    data: bytes
+    extension: str
+    content_type: str
+    width: int
+    height: int
+
+
+def _open(file: BinaryIO) -> Optional[Image.Image]:
+    max_pixels = int(current_app.config.get('IMAGE_MAX_PIXELS', 40_000_000))
+    file.seek(0)
+    try:
+        image = Image.open(file)
+        if image.width * image.height > max_pixels:
+            raise ValueError(f"Image is larger than {max_pixels} pixels")
+        if getattr(image, 'is_animated', False):
+            return None
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        return None
+    finally:
+        file.seek(0)
+    # Apply the camera's rotation before the EXIF that carries it is dropped
+    return ImageOps.exif_transpose(image)
+
+
+def encode(image: Image.Image, max_dimension: int, quality: int, fmt: str) -> EncodedImage:
+    """Shrink ``image`` to fit ``max_dimension`` and encode it without metadata."""
+    pil_format, extension, content_type = _FORMATS.get(fmt, _FORMATS['webp'])
+    image = image.copy()
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if pil_format == 'JPEG':
+        if has_alpha:
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        save_args = {'quality': quality, 'optimize': True, 'progressive': True}
+    else:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        save_args = {'quality': quality, 'method': 4}
+
+    out = BytesIO()
+    image.save(out, pil_format, **save_args)
+    return EncodedImage(
+        data=out.getvalue(),
+        extension=extension,
+        content_type=content_type,
+        width=image.width,
+        height=image.height,
+    )
+
+
+def process_upload(
+    file: BinaryIO,
+    variants: Iterable[str] = (),
+) -> Optional[Tuple[EncodedImage, Dict[str, EncodedImage]]]:
+    """Return (stored image, {variant: image}), or None to keep the upload as-is."""
+    config = current_app.config
+    if not config.get('IMAGE_PIPELINE_ENABLED', True):
+        return None
+    image = _open(file)
+    if image is None:
+        return None
+
+    fmt = str(config.get('IMAGE_FORMAT', 'webp')).lower()
+    main = encode(
+        image,
+        int(config.get('IMAGE_MAX_DIMENSION', 2048)),
+        int(config.get('IMAGE_QUALITY', 82)),
+        fmt,
+    )
+    thumb_quality = int(config.get('IMAGE_THUMBNAIL_QUALITY', 75))
+    encoded = {
+        name: encode(image, IMAGE_VARIANTS[name], thumb_quality, fmt)
+        for name in variants
+    }
+    return main, encoded
@@ -0,0 +1,44 @@
+"""Batched loading for public marketplace listings.
+
+Listing pages load the seller and municipality for every item up front
+(``selectinload`` for sellers, a joined load for the municipality name), with
+only the columns the payload uses, so a page costs a fixed number of queries
+regardless of its size. Paging itself is keyset-based (see utils/pagination.py).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from apps.api.models.marketplace import Item
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+
+
+# Columns read by User.to_dict() (non-sensitive) and the seller summary
+SELLER_COLUMNS = (
+    User.id, User.username, User.email, User.first_name, User.middle_name, User.last_name, User.suffix,
+    User.municipality_id, User.barangay_id, User.admin_municipality_id, User.admin_barangay_id,
+    User.phone_number, User.mobile_number, User.date_of_birth, User.role, User.email_verified,
+    User.admin_verified, User.is_active, User.profile_picture, User.created_at, User.last_login,
+    User.notify_email_enabled, User.notify_sms_enabled,
+)
+
+
+def with_listing_relations(query):
+    """Eager-load the seller and municipality name needed by ``serialize_items``."""
+    return query.options(
+        selectinload(Item.user).load_only(*SELLER_COLUMNS),
+        joinedload(Item.municipality).load_only(Municipality.id, Municipality.name),
+    )
+
+
+def serialize_items(items: List[Item]) -> List[Dict[str, Any]]:
+    """Serialize listing items with seller and municipality name (relations must be preloaded)."""
+    data = []
+    for item in items:
+        d = item.to_dict(include_user=True)
+        d['municipality_name'] = item.municipality.name if item.municipality else None
+        data.append(d)
+    return data
@@ -3,24 +3,52 @@
 Shared by both the inline flush (called after admin actions) and the
 background notification_worker.py.  Row-level locking (FOR UPDATE SKIP
 LOCKED on Postgres) ensures that concurrent callers never double-deliver.
+
+Provider calls are network-bound, so a claimed batch is delivered in three
+stages: rows are validated and turned into plain ``_Delivery`` jobs on the
+calling thread, the jobs are sent in parallel on per-channel thread pools
+(at most ``NOTIFICATION_EMAIL_CONCURRENCY`` / ``NOTIFICATION_SMS_CONCURRENCY``
+in flight), and the outcomes are applied to the rows and committed once.
+Worker threads never touch the ORM session. Every provider call passes
+through its channel's rate limiter and circuit breaker
+(utils/provider_governor.py); rows refused by an open breaker go back to
+``pending`` without spending an attempt. Stage timings, send latency and row
+outcomes are recorded in utils/notification_metrics.py.
+
+Rows are claimed by lane, ``transactional`` before ``attachment`` before
+``bulk``, so a large announcement fan-out never delays a document status
+update; replicas can also split the table into shards (see ``_claim_rows``).
+Attachment emails carry a storage reference and the file is loaded at send
+time.
 """
 from __future__ import annotations
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import timedelta
-from typing import Dict, Any, List
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+from flask import current_app
 from sqlalchemy import or_
 
 from apps.api import db
 from apps.api.models.notification import NotificationOutbox
 from apps.api.models.user import User
-from apps.api.utils.email_sender import _send_email
-from apps.api.utils.sms_provider import normalize_sms_number, send_sms
+from apps.api.utils.email_sender import _send_email, smtp_batch
+from apps.api.utils.notification_metrics import RowOutcome, get_metrics, log_batch
+from apps.api.utils.provider_governor import ProviderUnavailable, get_governor
+from apps.api.utils.sms_provider import normalize_sms_number, send_sms, sms_recipient_limit
+from apps.api.utils.storage_handler import FileTooLargeError, read_file_bytes
 from apps.api.utils.time import utc_now
 
 
 MAX_ATTEMPTS_DEFAULT = 5
 
+# Claim order: per-resident updates (document status, OTP), then emails that
+# carry a stored file, then fan-outs
+LANES = ('transactional', 'attachment', 'bulk')
+
 
 def _sms_target_number(user: User) -> str | None:
     return getattr(user, 'mobile_number', None) or getattr(user, 'phone_number', None)
@@ -44,6 +72,13 @@ def _mark_skipped(item: NotificationOutbox, reason: str | None = None):
     item.next_attempt_at = None
 
 
+def _mark_deferred(item: NotificationOutbox, retry_in: float):
+    """Provider circuit open: back to pending without spending an attempt."""
+    item.status = 'pending'
+    item.last_error = 'provider_circuit_open'
+    item.next_attempt_at = utc_now() + timedelta(seconds=max(1.0, retry_in))
+
+
 def _mark_failed(item: NotificationOutbox, reason: str, max_attempts: int):
     item.attempts = (item.attempts or 0) + 1
     item.last_error = reason[:240] if reason else None
@@ -55,27 +90,170 @@ def _mark_failed(item: NotificationOutbox, reason: str, max_attempts: int):
         item.next_attempt_at = utc_now() + timedelta(minutes=_backoff_minutes(item.attempts))
 
 
+def _mark_undeliverable(item: NotificationOutbox, reason: str):
+    """Failed for good: retrying cannot help, so no further attempts are scheduled."""
+    item.status = 'failed'
+    item.attempts = (item.attempts or 0) + 1
+    item.last_error = reason[:240]
+    item.next_attempt_at = None
+
+
+# -- Concurrent send stage ----------------------------------------------------
+
+@dataclass
+class _Delivery:
+    """One provider call: ``send`` runs on a pool thread, ``finish`` on the caller."""
+
+    channel: str
+    send: Callable[[], Any]
+    finish: Callable[[Any, Optional[Exception]], None]
+
+
+def _channel_limits(concurrency: int) -> Dict[str, int]:
+    """Per-channel in-flight caps: ``concurrency`` bounded by each provider's limit."""
+    config = current_app.config
+    return {
+        'email': max(1, min(concurrency, int(config.get('NOTIFICATION_EMAIL_CONCURRENCY', 8) or 1))),
+        'sms': max(1, min(concurrency, int(config.get('NOTIFICATION_SMS_CONCURRENCY', 4) or 1))),
+    }
+
+
+def _call(send: Callable[[], Any]) -> Tuple[Any, Optional[Exception], float]:
+    started = time.perf_counter()
+    try:
+        return send(), None, time.perf_counter() - started
+    except Exception as exc:
+        return None, exc, time.perf_counter() - started
+
+
+def _call_in_app(app, send: Callable[[], Any]) -> Tuple[Any, Optional[Exception], float]:
+    # Providers read current_app.config/logger, so each pool thread needs a context
+    with app.app_context():
+        return _call(send)
+
+
+def _run_deliveries(deliveries: List[_Delivery], concurrency: int) -> None:
+    """Send every delivery (in parallel when ``concurrency`` > 1), then finish them in order."""
+    if not deliveries:
+        return
+    if concurrency <= 1 or len(deliveries) == 1:
+        outcomes = [_call(d.send) for d in deliveries]
+    else:
+        app = current_app._get_current_object()
+        limits = _channel_limits(concurrency)
+        pools: Dict[str, ThreadPoolExecutor] = {}
+        try:
+            futures = []
+            for d in deliveries:
+                pool = pools.get(d.channel)
+                if pool is None:
+                    pool = pools[d.channel] = ThreadPoolExecutor(
+                        max_workers=limits.get(d.channel, 1),
+                        thread_name_prefix=f'notify-{d.channel}',
+                    )
+                futures.append(pool.submit(_call_in_app, app, d.send))
+            outcomes = [f.result() for f in futures]
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+    metrics = get_metrics()
+    for d, (result, error, seconds) in zip(deliveries, outcomes):
+        if not isinstance(error, ProviderUnavailable):
+            metrics.observe_send(d.channel, seconds, error)
+        d.finish(result, error)
+
+
+def _call_timeout_seconds() -> float:
+    """Longest a single provider or storage call can block, retries included."""
+    config = current_app.config
+    http = (
+        float(config.get('HTTP_CLIENT_CONNECT_TIMEOUT', 5)) + float(config.get('HTTP_CLIENT_READ_TIMEOUT', 30))
+    ) * (int(config.get('HTTP_CLIENT_RETRIES', 2)) + 1)
+    return max(http, float(config.get('SMTP_TIMEOUT', 30)))
+
+
+def _worst_case_send_seconds(rows: List[NotificationOutbox], concurrency: int) -> float:
+    """Upper bound for the send stage: token-bucket waits plus a timeout on every call.
+
+    Channels are summed rather than overlapped and SMS batching is ignored,
+    so the bound only errs long.
+    """
+    config = current_app.config
+    limits = _channel_limits(concurrency)
+    timeout = _call_timeout_seconds()
+    calls: Dict[str, int] = {}
+    for r in rows:
+        # Attachment emails read the stored file before calling the provider
+        weight = 2 if (r.payload or {}).get('attachment') else 1
+        calls[r.channel] = calls.get(r.channel, 0) + weight
+    total = 0.0
+    for channel, count in calls.items():
+        rate = float(config.get(f'NOTIFICATION_RATE_{channel.upper()}', 0) or 0)
+        if rate > 0:
+            total += count / rate
+        in_flight = limits.get(channel, 1) if concurrency > 1 else 1
+        total += -(-count // in_flight) * timeout
+    return total
+
+
 # -- Email delivery ----------------------------------------------------------
 
-def _process_email_item(item: NotificationOutbox, user: User | None, max_attempts: int):
+class _AttachmentUnavailable(Exception):
+    """The stored file is missing, off-limits or too large; a retry would fail the same way."""
+
+
+def _attachment_max_bytes() -> int:
+    return int(float(current_app.config.get('NOTIFICATION_ATTACHMENT_MAX_MB', 20)) * 1024 * 1024)
+
+
+def _load_attachment(ref: str) -> bytes:
+    try:
+        return read_file_bytes(ref, max_bytes=_attachment_max_bytes())
+    except FileNotFoundError as exc:
+        raise _AttachmentUnavailable(f'attachment_missing: {exc}')
+    except PermissionError as exc:
+        raise _AttachmentUnavailable(f'attachment_forbidden: {exc}')
+    except FileTooLargeError as exc:
+        raise _AttachmentUnavailable(f'attachment_too_large: {exc}')
+
+
+def _email_delivery(item: NotificationOutbox, user: User | None, max_attempts: int) -> _Delivery | None:
+    """Validate an email row; returns its delivery job, or None when the row was skipped."""
     if not user:
         _mark_skipped(item, 'user_missing')
-        return
+        return None
     if not getattr(user, 'email', None):
         _mark_skipped(item, 'missing_email')
-        return
-    if getattr(user, 'notify_email_enabled', True) is False:
-        _mark_skipped(item, 'email_disabled')
-        return
+        return None
     payload = item.payload or {}
+    attachment = payload.get('attachment')
+    # Attachment rows deliver a requested document, not a notification
+    if not attachment and getattr(user, 'notify_email_enabled', True) is False:
+        _mark_skipped(item, 'email_disabled')
+        return None
     subject = payload.get('subject') or f"MunLink notification ({item.event_type})"
     body = payload.get('body') or payload.get('message') or 'You have a new notification in MunLink.'
     to_email = payload.get('to_email') or user.email
-    try:
-        _send_email(to_email, subject, body)
-        _mark_sent(item)
-    except Exception as exc:
-        _mark_failed(item, str(exc), max_attempts)
+
+    def send():
+        if not attachment:
+            return get_governor('email').call(lambda: _send_email(to_email, subject, body))
+        # Loaded on the pool thread at send time; storage errors are not provider failures
+        data = _load_attachment(attachment['ref'])
+        filename = attachment.get('filename') or 'document.pdf'
+        return get_governor('email').call(lambda: _send_email(to_email, subject, body, data, filename))
+
+    def finish(_result, error):
+        if error is None:
+            _mark_sent(item)
+        elif isinstance(error, ProviderUnavailable):
+            _mark_deferred(item, error.retry_in)
+        elif isinstance(error, _AttachmentUnavailable):
+            _mark_undeliverable(item, str(error))
+        else:
+            _mark_failed(item, str(error), max_attempts)
+
+    return _Delivery('email', send, finish)
 
 
 # -- SMS delivery -------------------------------------------------------------
@@ -128,11 +306,13 @@ def _apply_sms_result(
     result: Dict[str, Any],
     max_attempts: int,
 ):
+    per_number = result.get('recipients') or {}
     for entry in entry_items:
         item = entry['item']
-        status = result.get('status')
-        reason = result.get('reason')
-        error = result.get('error')
+        outcome = per_number.get(entry['number']) or result
+        status = outcome.get('status')
+        reason = outcome.get('reason')
+        error = outcome.get('error')
         if status == 'sent':
             _mark_sent(item)
         elif status == 'skipped':
@@ -141,26 +321,152 @@ def _apply_sms_result(
             _mark_failed(item, error or reason or 'sms_failed', max_attempts)
 
 
-def _process_sms_items(
+def _sms_call_failed(result: Dict[str, Any]) -> Optional[bool]:
+    status = (result or {}).get('status')
+    if status == 'skipped':
+        return None
+    return status != 'sent'
+
+
+def _message_key(message: str) -> str:
+    return ' '.join((message or '').split())
+
+
+def _coalesce_sms(
+    singles: List[Dict[str, Any]],
+    batches: Dict[str, List[Dict[str, Any]]],
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Group entries that deliver the same text (ignoring whitespace), batch_key or not."""
+    groups: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+    for batch_entries in batches.values():
+        message = batch_entries[0]['message']
+        groups.setdefault(_message_key(message), (message, []))[1].extend(batch_entries)
+    for entry in singles:
+        groups.setdefault(_message_key(entry['message']), (entry['message'], []))[1].append(entry)
+    return list(groups.values())
+
+
+def _sms_chunks(entries: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    """Split entries into chunks of at most ``size`` with no number repeated in a chunk.
+
+    Results are mapped back per number, so a resident queued twice for the
+    same text gets a separate call for each row.
+    """
+    chunks: List[List[Dict[str, Any]]] = []
+    remaining = entries
+    while remaining:
+        chunk: List[Dict[str, Any]] = []
+        numbers = set()
+        deferred: List[Dict[str, Any]] = []
+        for entry in remaining:
+            if len(chunk) < size and entry['number'] not in numbers:
+                chunk.append(entry)
+                numbers.add(entry['number'])
+            else:
+                deferred.append(entry)
+        chunks.append(chunk)
+        remaining = deferred
+    return chunks
+
+
+def _sms_deliveries(
     items: List[NotificationOutbox],
     user_map: Dict[int, User],
     max_attempts: int,
-):
+    slice_size: int = 1000,
+) -> List[_Delivery]:
+    """Validate SMS rows and turn them into send jobs.
+
+    Rows carrying the same text are coalesced into multi-recipient calls of
+    at most the provider's recipient limit, further sliced to ``slice_size``
+    numbers so a large group is spread across the SMS pool. Per-number
+    results from the provider are mapped back to each row.
+    """
     if not items:
-        return
+        return []
     singles, batches = _prepare_sms_items(items, user_map, max_attempts)
+    chunk_size = max(1, min(sms_recipient_limit(), slice_size))
 
-    for batch_entries in batches.values():
-        message = batch_entries[0]['message']
-        for idx in range(0, len(batch_entries), 1000):
-            chunk = batch_entries[idx:idx + 1000]
-            numbers = [e['number'] for e in chunk]
-            result = send_sms(numbers, message)
-            _apply_sms_result(chunk, result, max_attempts)
+    def job(entries: List[Dict[str, Any]], numbers: List[str], message: str) -> _Delivery:
+        def send():
+            return get_governor('sms').call(lambda: send_sms(numbers, message), failed=_sms_call_failed)
 
-    for entry in singles:
-        result = send_sms([entry['number']], entry['message'])
-        _apply_sms_result([entry], result, max_attempts)
+        def finish(result, error):
+            if isinstance(error, ProviderUnavailable):
+                for entry in entries:
+                    _mark_deferred(entry['item'], error.retry_in)
+                return
+            if error is not None:
+                result = {'status': 'failed', 'error': str(error)}
+            _apply_sms_result(entries, result or {}, max_attempts)
+        return _Delivery('sms', send, finish)
+
+    deliveries: List[_Delivery] = []
+    for message, entries in _coalesce_sms(singles, batches):
+        for chunk in _sms_chunks(entries, chunk_size):
+            deliveries.append(job(chunk, [e['number'] for e in chunk], message))
+    return deliveries
+
+
+# -- Claiming -----------------------------------------------------------------
+
+def _claim_query(now, newest_first: bool, lane: str, shard: Optional[Tuple[int, int]]):
+    q = NotificationOutbox.query.filter(
+        NotificationOutbox.lane == lane,
+        NotificationOutbox.status == 'pending',
+        or_(
+            NotificationOutbox.next_attempt_at == None,
+            NotificationOutbox.next_attempt_at <= now,
+        ),
+    )
+    if shard is not None:
+        index, count = shard
+        q = q.filter(NotificationOutbox.id % count == index)
+    q = q.order_by(
+        NotificationOutbox.attempts.asc(),
+        NotificationOutbox.created_at.desc() if newest_first else NotificationOutbox.created_at.asc(),
+    )
+
+    # Postgres: FOR UPDATE SKIP LOCKED prevents concurrent callers
+    # from grabbing the same rows.  SQLite (dev) has no support for
+    # this but single-process is fine there.
+    try:
+        dialect = db.engine.dialect.name
+    except Exception:
+        dialect = ''
+    if dialect == 'postgresql':
+        q = q.with_for_update(skip_locked=True)
+    return q
+
+
+def _claim_rows(
+    now,
+    max_items: int,
+    newest_first: bool,
+    lanes: Sequence[str],
+    shard: Optional[Tuple[int, int]],
+    steal: bool,
+) -> List[NotificationOutbox]:
+    """Select up to ``max_items`` due rows, filling from each lane in order.
+
+    With a ``(index, count)`` shard only rows with ``id % count == index``
+    are taken, so replicas scan disjoint parts of the index instead of all
+    fighting over its head. When the shard has nothing due in a lane and
+    ``steal`` is set, the lane is claimed without the shard filter so idle
+    replicas help drain a backlog.
+    """
+    if shard is not None and shard[1] <= 1:
+        shard = None
+    rows: List[NotificationOutbox] = []
+    for lane in lanes:
+        remaining = max_items - len(rows)
+        if remaining <= 0:
+            break
+        found = _claim_query(now, newest_first, lane, shard).limit(remaining).all()
+        if not found and shard is not None and steal:
+            found = _claim_query(now, newest_first, lane, None).limit(remaining).all()
+        rows.extend(found)
+    return rows
 
 
 # -- Main entry point ---------------------------------------------------------
@@ -170,6 +476,10 @@ def process_batch(
     lease_seconds: int = 300,
     max_attempts: int = MAX_ATTEMPTS_DEFAULT,
     newest_first: bool = False,
+    concurrency: int | None = None,
+    lanes: Sequence[str] | None = None,
+    shard: Tuple[int, int] | None = None,
+    steal: bool = True,
 ) -> int:
     """Claim and deliver pending notification rows.
 
@@ -180,15 +490,34 @@ def process_batch(
         newest_first: When True, prioritize recently created rows so
             that an inline flush delivers just-queued notifications
             even when older pending rows exist in the backlog.
+        concurrency: Max provider calls in flight per channel (further
+            capped per channel by config). Defaults to
+            ``NOTIFICATION_DELIVERY_CONCURRENCY``; 1 sends sequentially.
+        lanes: Lanes to claim from, in priority order (default: all,
+            ``transactional`` before ``bulk``).
+        shard: ``(index, count)`` to claim only this worker's rows; see
+            ``_claim_rows``. ``steal`` lets it take other shards' rows when
+            its own are drained.
+        lease_seconds: Slack added to the worst-case send time (token-bucket
+            waits plus a timeout per call) when leasing claimed rows.
 
     Flow:
       1. Recover abandoned claims (stale 'processing' rows past lease).
       2. Claim rows with FOR UPDATE SKIP LOCKED (Postgres) to prevent
-         concurrent callers from grabbing the same rows.
-      3. Deliver emails and SMS for claimed rows.
-      4. Finalize each row -> sent / failed / pending-retry.
+         concurrent callers from grabbing the same rows, transactional
+         lane first, optionally restricted to a shard.
+      3. Deliver emails and SMS for claimed rows concurrently.
+      4. Finalize each row -> sent / failed / pending-retry in one commit.
     """
     now = utc_now()
+    timings: Dict[str, float] = {}
+    mark = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal mark
+        current = time.perf_counter()
+        timings[stage] = current - mark
+        mark = current
 
     # Step 1: Recover abandoned claims
     NotificationOutbox.query.filter(
@@ -196,56 +525,53 @@ def process_batch(
         NotificationOutbox.next_attempt_at <= now,
     ).update({'status': 'pending'}, synchronize_session=False)
     db.session.commit()
+    lap('recover')
 
-    # Step 2: Claim rows with row-level locking
-    q = NotificationOutbox.query.filter(
-        NotificationOutbox.status == 'pending',
-        or_(
-            NotificationOutbox.next_attempt_at == None,
-            NotificationOutbox.next_attempt_at <= now,
-        ),
-    ).order_by(
-        NotificationOutbox.attempts.asc(),
-        NotificationOutbox.created_at.desc() if newest_first else NotificationOutbox.created_at.asc(),
-    )
-
-    # Postgres: FOR UPDATE SKIP LOCKED prevents concurrent callers
-    # from grabbing the same rows.  SQLite (dev) has no support for
-    # this but single-process is fine there.
-    try:
-        dialect = db.engine.dialect.name
-    except Exception:
-        dialect = ''
-    if dialect == 'postgresql':
-        q = q.with_for_update(skip_locked=True)
-
-    rows = q.limit(max_items).all()
+    # Step 2: Claim rows with row-level locking, transactional lane first
+    rows = _claim_rows(now, max_items, newest_first, lanes or LANES, shard, steal)
     if not rows:
         return 0
 
-    # Mark claimed rows as 'processing' with a lease timeout
-    lease_until = now + timedelta(seconds=lease_seconds)
+    if concurrency is None:
+        concurrency = int(current_app.config.get('NOTIFICATION_DELIVERY_CONCURRENCY', 4) or 1)
+
+    # Mark claimed rows as 'processing' with a lease that outlasts the slowest
+    # possible send stage, so step 1 elsewhere cannot re-deliver them mid-batch
+    lease_until = now + timedelta(seconds=lease_seconds + _worst_case_send_seconds(rows, concurrency))
     for r in rows:
         r.status = 'processing'
         r.next_attempt_at = lease_until
     db.session.commit()
+    lap('claim')
 
     # Step 3: Deliver
     user_ids = {r.resident_id for r in rows}
     users = User.query.filter(User.id.in_(user_ids)).all() if user_ids else []
     user_map = {u.id: u for u in users}
+    lap('load_users')
 
+    deliveries: List[_Delivery] = []
     sms_items: List[NotificationOutbox] = []
     for item in rows:
         if item.channel == 'email':
-            _process_email_item(item, user_map.get(item.resident_id), max_attempts)
+            delivery = _email_delivery(item, user_map.get(item.resident_id), max_attempts)
+            if delivery:
+                deliveries.append(delivery)
         elif item.channel == 'sms':
             sms_items.append(item)
         else:
             _mark_skipped(item, 'unknown_channel')
 
-    _process_sms_items(sms_items, user_map, max_attempts)
+    sms_slice = -(-len(sms_items) // _channel_limits(concurrency)['sms']) if sms_items else 1
+    deliveries.extend(_sms_deliveries(sms_items, user_map, max_attempts, slice_size=sms_slice))
+    with smtp_batch():
+        _run_deliveries(deliveries, concurrency)
+    lap('send')
 
     # Step 4: Finalize
+    # Outcomes are read before the commit expires the rows
+    outcome_rows = [RowOutcome(r.channel, r.status, r.last_error) for r in rows]
     db.session.commit()
+    lap('commit')
+    log_batch(get_metrics().record_batch(timings, outcome_rows))
     return len(rows)
@@ -0,0 +1,258 @@
+"""Set-based notification fan-out.
+
+Announcements and benefit programs can target every verified resident in the
+province. Rather than loading each ``User`` and adding one ``NotificationOutbox``
+object per user per channel, the outbox rows are written with
+``INSERT ... SELECT`` straight from the recipient filters, one statement per
+channel per chunk of recipients, with ``ON CONFLICT (dedupe_key) DO NOTHING``
+(plus a ``NOT EXISTS`` guard on other dialects, and one against
+``notification_outbox_archive``) so re-publishing never duplicates rows.
+
+Small audiences (up to ``NOTIFICATION_FANOUT_INLINE_MAX`` recipients) are
+written inside the caller's transaction. Larger ones are recorded as a
+``NotificationFanout`` and processed by a background thread in chunks of
+``NOTIFICATION_FANOUT_CHUNK`` recipients, committing and updating progress
+after each chunk so the admin request returns immediately. Fan-out rows go to
+the ``bulk`` lane so workers deliver per-resident updates ahead of them.
+
+A fan-out whose thread died stays ``running``; the notification worker calls
+``recover_stale_fanouts`` each pass to re-queue and restart those older than
+``NOTIFICATION_FANOUT_TIMEOUT_SECONDS``. Restarting from the first recipient is
+safe because the inserts skip rows that were already queued.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import Integer, String, cast, exists, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from apps.api import db
+from apps.api.models.notification import NotificationFanout, NotificationOutbox, NotificationOutboxArchive
+from apps.api.models.user import User
+from apps.api.utils.notification_wakeup import notify_outbox_pending
+from apps.api.utils.time import utc_now
+
+
+@dataclass
+class FanoutSpec:
+    """What to send and to whom for one fan-out event."""
+
+    event_type: str
+    entity_id: int
+    recipient_filters: List[Any]
+    email_payload: Optional[Dict[str, Any]]
+    sms_payload: Optional[Dict[str, Any]]
+    schedule_at: datetime
+
+
+def _channel_filters(channel: str) -> List[Any]:
+    """SQL mirror of _prefers_email/_prefers_sms plus a usable address."""
+    if channel == 'email':
+        return [
+            func.coalesce(User.notify_email_enabled, True) == True,  # noqa: E712
+            User.email.isnot(None),
+            User.email != '',
+        ]
+    return [
+        func.coalesce(User.notify_sms_enabled, False) == True,  # noqa: E712
+        User.mobile_number.isnot(None),
+        User.mobile_number != '',
+    ]
+
+
+def _insert_channel(spec: FanoutSpec, channel: str, payload: Dict[str, Any], id_window: List[Any]) -> int:
+    """Insert outbox rows for one channel and id window; returns rows inserted."""
+    outbox = NotificationOutbox.__table__
+    now = utc_now()
+    dedupe = (
+        literal(f"{spec.event_type}:{spec.entity_id}:")
+        + cast(User.id, String)
+        + literal(f":{channel}")
+    )
+    already_queued = exists().where(outbox.c.dedupe_key == dedupe)
+    already_archived = exists().where(NotificationOutboxArchive.__table__.c.dedupe_key == dedupe)
+    source = select(
+        User.id,
+        literal(channel),
+        literal(spec.event_type),
+        literal(spec.entity_id, Integer),
+        literal(payload, outbox.c.payload.type),
+        literal('bulk'),
+        literal('pending'),
+        literal(0, Integer),
+        literal(spec.schedule_at, outbox.c.next_attempt_at.type),
+        dedupe,
+        literal(now, outbox.c.created_at.type),
+        literal(now, outbox.c.updated_at.type),
+    ).where(
+        *spec.recipient_filters,
+        *_channel_filters(channel),
+        *id_window,
+        ~already_queued,
+        ~already_archived,
+    )
+    columns = [
+        'resident_id', 'channel', 'event_type', 'entity_id', 'payload', 'lane', 'status',
+        'attempts', 'next_attempt_at', 'dedupe_key', 'created_at', 'updated_at',
+    ]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(outbox).from_select(columns, source).on_conflict_do_nothing(index_elements=['dedupe_key'])
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(outbox).from_select(columns, source).on_conflict_do_nothing(index_elements=['dedupe_key'])
+    else:
+        stmt = insert(outbox).from_select(columns, source)
+    result = db.session.execute(stmt)
+    return max(0, int(result.rowcount or 0))
+
+
+def _insert_window(spec: FanoutSpec, id_window: List[Any]) -> int:
+    queued = 0
+    if spec.email_payload is not None:
+        queued += _insert_channel(spec, 'email', spec.email_payload, id_window)
+    if spec.sms_payload is not None:
+        queued += _insert_channel(spec, 'sms', spec.sms_payload, id_window)
+    if queued:
+        # Bulk inserts bypass the ORM flush hook, so wake the worker explicitly
+        notify_outbox_pending(db.session)
+    return queued
+
+
+def count_recipients(spec: FanoutSpec) -> int:
+    return int(db.session.query(func.count(User.id)).filter(*spec.recipient_filters).scalar() or 0)
+
+
+def _chunk_upper_bound(spec: FanoutSpec, after_id: int, chunk: int) -> Optional[int]:
+    """Id of the ``chunk``-th recipient after ``after_id`` (None when fewer remain)."""
+    return db.session.query(User.id).filter(
+        *spec.recipient_filters, User.id > after_id,
+    ).order_by(User.id).offset(chunk - 1).limit(1).scalar()
+
+
+def fanout(spec: FanoutSpec) -> Dict[str, Any]:
+    """Queue outbox rows for ``spec`` inline or in the background.
+
+    Returns ``{'queued', 'skipped', 'recipients'}`` for inline runs, plus
+    ``fanout_id``/``status`` when the work was handed to a background task.
+    """
+    total = count_recipients(spec)
+    channels = int(spec.email_payload is not None) + int(spec.sms_payload is not None)
+    if total == 0:
+        return {'queued': 0, 'skipped': 0, 'recipients': 0}
+
+    inline_max = int(current_app.config.get('NOTIFICATION_FANOUT_INLINE_MAX', 500))
+    if total <= inline_max:
+        queued = _insert_window(spec, [])
+        return {'queued': queued, 'skipped': total * channels - queued, 'recipients': total}
+
+    job = NotificationFanout(
+        event_type=spec.event_type,
+        entity_id=spec.entity_id,
+        status='queued',
+        total_recipients=total,
+    )
+    db.session.add(job)
+    db.session.commit()
+    _dispatch(job.id)
+    return {'queued': 0, 'skipped': 0, 'recipients': total, 'fanout_id': job.id, 'status': job.status}
+
+
+def _dispatch(fanout_id: int) -> None:
+    runner = (current_app.config.get('NOTIFICATION_FANOUT_RUNNER') or 'thread').lower()
+    if runner == 'inline':
+        run_fanout(fanout_id)
+        return
+    app = current_app._get_current_object()
+    threading.Thread(target=_run_in_thread, args=(app, fanout_id), name=f'fanout-{fanout_id}', daemon=True).start()
+
+
+def _run_in_thread(app, fanout_id: int) -> None:
+    with app.app_context():
+        try:
+            run_fanout(fanout_id)
+            from apps.api.utils.notifications import flush_pending_notifications
+            flush_pending_notifications()
+        finally:
+            db.session.remove()
+
+
+def run_fanout(fanout_id: int) -> Optional[NotificationFanout]:
+    """Process a queued fan-out chunk by chunk, committing progress as it goes."""
+    claimed = NotificationFanout.query.filter(
+        NotificationFanout.id == fanout_id,
+        NotificationFanout.status == 'queued',
+    ).update({'status': 'running', 'started_at': utc_now()}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return None
+
+    job = db.session.get(NotificationFanout, fanout_id)
+    try:
+        from apps.api.utils.notifications import build_fanout_spec
+        spec = build_fanout_spec(job.event_type, job.entity_id)
+        if spec is None:
+            job.status = 'completed'
+            job.completed_at = utc_now()
+            db.session.commit()
+            return job
+
+        chunk = max(1, int(current_app.config.get('NOTIFICATION_FANOUT_CHUNK', 5000)))
+        last_id = 0
+        while True:
+            upper = _chunk_upper_bound(spec, last_id, chunk)
+            window = [User.id > last_id] + ([User.id <= upper] if upper is not None else [])
+            job.queued_count = (job.queued_count or 0) + _insert_window(spec, window)
+            job.processed_recipients = min(
+                job.total_recipients or 0,
+                (job.processed_recipients or 0) + chunk,
+            ) if upper is not None else (job.total_recipients or 0)
+            db.session.commit()
+            if upper is None:
+                break
+            last_id = upper
+
+        job.status = 'completed'
+        job.completed_at = utc_now()
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.error("Notification fan-out %s failed: %s", fanout_id, exc)
+        job = db.session.get(NotificationFanout, fanout_id)
+        job.status = 'failed'
+        job.error = str(exc)[:1000]
+        job.completed_at = utc_now()
+        db.session.commit()
+    return job
+
+
+def recover_stale_fanouts() -> int:
+    """Restart fan-outs left ``running`` past NOTIFICATION_FANOUT_TIMEOUT_SECONDS.
+
+    Returns the number of fan-outs restarted.
+    """
+    timeout = int(current_app.config.get('NOTIFICATION_FANOUT_TIMEOUT_SECONDS', 1800))
+    cutoff = utc_now() - timedelta(seconds=max(0, timeout))
+    stale_ids = [
+        row.id for row in NotificationFanout.query.with_entities(NotificationFanout.id)
+        .filter(NotificationFanout.status == 'running', NotificationFanout.started_at < cutoff)
+        .all()
+    ]
+    restarted = 0
+    for fanout_id in stale_ids:
+        # Guarded on the stale state so concurrent workers restart each fan-out once
+        requeued = NotificationFanout.query.filter(
+            NotificationFanout.id == fanout_id,
+            NotificationFanout.status == 'running',
+            NotificationFanout.started_at < cutoff,
+        ).update({'status': 'queued', 'started_at': None, 'processed_recipients': 0}, synchronize_session=False)
+        db.session.commit()
+        if requeued:
+            current_app.logger.warning("Restarting stale notification fan-out %s", fanout_id)
+            _dispatch(fanout_id)
+            restarted += 1
+    return restarted
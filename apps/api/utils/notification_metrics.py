@@ -0,0 +1,202 @@
+"""Delivery metrics for the notification outbox.
+
+``process_batch`` (utils/notification_delivery.py) reports every batch here:
+
+  - wall time per stage: ``recover`` (stale lease reset), ``claim`` (locking
+    select + lease commit), ``load_users``, ``send`` (row validation and
+    provider I/O, including rate limiting) and ``commit`` (final status write);
+  - rows per second for the batch and across the process lifetime;
+  - per-channel provider call latency histograms;
+  - row outcomes per channel (sent / skipped / retry / failed / deferred) and
+    the skip/retry/failure reasons behind them.
+
+Each batch is also written as one ``notification_batch {...}`` JSON log line
+when ``NOTIFICATION_METRICS_LOG`` is on. ``scripts/notification_worker.py
+--metrics-port`` serves ``DeliveryMetrics.prometheus()`` on localhost.
+State is per process and per app (``app.extensions['notification_metrics']``).
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+
+
+STAGES = ('recover', 'claim', 'load_users', 'send', 'commit')
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_REASONS = 50
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram in seconds (Prometheus layout)."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        for idx, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[idx] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {str(bound): n for bound, n in zip(self.buckets, self.counts)}
+        buckets['+Inf'] = self.count
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.total, 4),
+            'avg_ms': round(self.total / self.count * 1000, 1) if self.count else None,
+            'buckets': buckets,
+        }
+
+
+@dataclass(frozen=True)
+class RowOutcome:
+    """Final state of one outbox row in a batch."""
+
+    channel: str
+    status: str
+    last_error: Optional[str] = None
+
+
+def row_outcome(item) -> tuple:
+    """(outcome, reason) for a row after delivery."""
+    if item.status == 'sent':
+        return 'sent', None
+    if item.status == 'skipped':
+        return 'skipped', item.last_error or 'unspecified'
+    if item.status == 'failed':
+        return 'failed', item.last_error or 'unspecified'
+    if item.last_error == 'provider_circuit_open':
+        return 'deferred', item.last_error
+    return 'retry', item.last_error or 'unspecified'
+
+
+class DeliveryMetrics:
+    """Thread-safe counters for outbox delivery in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.busy_seconds = 0.0
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.latency = {'email': LatencyHistogram(), 'sms': LatencyHistogram()}
+        self.send_errors: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        self.reasons: Counter = Counter()
+        self.last_batch: Optional[Dict[str, Any]] = None
+
+    def observe_send(self, channel: str, seconds: float, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self.latency.setdefault(channel, LatencyHistogram()).observe(seconds)
+            if error is not None:
+                self.send_errors[channel] += 1
+
+    def record_batch(self, timings: Dict[str, float], rows: List[RowOutcome]) -> Dict[str, Any]:
+        """Fold one batch into the totals; returns the batch summary."""
+        outcomes: Counter = Counter()
+        reasons: Counter = Counter()
+        for item in rows:
+            outcome, reason = row_outcome(item)
+            outcomes[(item.channel, outcome)] += 1
+            if reason:
+                reasons[(outcome, reason[:80])] += 1
+        elapsed = sum(timings.values())
+        summary = {
+            'rows': len(rows),
+            'seconds': round(elapsed, 4),
+            'rows_per_second': round(len(rows) / elapsed, 1) if elapsed and rows else None,
+            'stages_ms': {stage: round(timings.get(stage, 0.0) * 1000, 1) for stage in STAGES},
+            'outcomes': {f'{channel}.{outcome}': n for (channel, outcome), n in sorted(outcomes.items())},
+        }
+        with self._lock:
+            self.batches += 1
+            self.rows += len(rows)
+            self.busy_seconds += elapsed
+            for stage in STAGES:
+                self.stage_seconds[stage] += timings.get(stage, 0.0)
+            self.outcomes.update(outcomes)
+            for key, n in reasons.items():
+                if key in self.reasons or len(self.reasons) < MAX_REASONS:
+                    self.reasons[key] += n
+                else:
+                    self.reasons[(key[0], 'other')] += n
+            self.last_batch = summary
+        return summary
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'rows': self.rows,
+                'busy_seconds': round(self.busy_seconds, 3),
+                'rows_per_second': round(self.rows / self.busy_seconds, 1) if self.busy_seconds else None,
+                'stage_seconds': {stage: round(s, 4) for stage, s in self.stage_seconds.items()},
+                'send_latency': {channel: h.snapshot() for channel, h in self.latency.items()},
+                'send_errors': dict(self.send_errors),
+                'outcomes': {f'{channel}.{outcome}': n for (channel, outcome), n in sorted(self.outcomes.items())},
+                'reasons': {f'{outcome}.{reason}': n for (outcome, reason), n in sorted(self.reasons.items())},
+                'last_batch': self.last_batch,
+            }
+
+    def prometheus(self) -> str:
+        """Text exposition format for a local scrape."""
+        def label(value: str) -> str:
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+        with self._lock:
+            lines = [
+                '# TYPE notification_batches_total counter',
+                f'notification_batches_total {self.batches}',
+                '# TYPE notification_rows_total counter',
+                f'notification_rows_total {self.rows}',
+                '# TYPE notification_stage_seconds_total counter',
+            ]
+            lines += [f'notification_stage_seconds_total{{stage="{s}"}} {v:.6f}' for s, v in self.stage_seconds.items()]
+            lines.append('# TYPE notification_send_seconds histogram')
+            for channel, h in self.latency.items():
+                for bound, n in zip(h.buckets, h.counts):
+                    lines.append(f'notification_send_seconds_bucket{{channel="{channel}",le="{bound}"}} {n}')
+                lines.append(f'notification_send_seconds_bucket{{channel="{channel}",le="+Inf"}} {h.count}')
+                lines.append(f'notification_send_seconds_sum{{channel="{channel}"}} {h.total:.6f}')
+                lines.append(f'notification_send_seconds_count{{channel="{channel}"}} {h.count}')
+            lines.append('# TYPE notification_send_errors_total counter')
+            lines += [f'notification_send_errors_total{{channel="{c}"}} {n}' for c, n in sorted(self.send_errors.items())]
+            lines.append('# TYPE notification_outcomes_total counter')
+            lines += [
+                f'notification_outcomes_total{{channel="{c}",outcome="{o}"}} {n}'
+                for (c, o), n in sorted(self.outcomes.items())
+            ]
+            lines.append('# TYPE notification_reasons_total counter')
+            lines += [
+                f'notification_reasons_total{{outcome="{o}",reason="{label(r)}"}} {n}'
+                for (o, r), n in sorted(self.reasons.items())
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> DeliveryMetrics:
+    """Return the delivery metrics bound to the current app."""
+    app = current_app._get_current_object()
+    with _metrics_lock:
+        metrics = app.extensions.get('notification_metrics')
+        if metrics is None:
+            metrics = app.extensions['notification_metrics'] = DeliveryMetrics()
+        return metrics
+
+
+def log_batch(summary: Dict[str, Any]) -> None:
+    if current_app.config.get('NOTIFICATION_METRICS_LOG', True):
+        current_app.logger.info('notification_batch %s', json.dumps(summary, sort_keys=True))
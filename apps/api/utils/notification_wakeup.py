@@ -0,0 +1,130 @@
+"""Event-driven wakeup for the notification worker (Postgres LISTEN/NOTIFY).
+
+Any transaction that queues ``NotificationOutbox`` rows also issues
+``pg_notify(NOTIFICATION_WAKEUP_CHANNEL)``. Postgres only delivers the
+notification if the transaction commits, and collapses repeats within one
+transaction, so the worker is woken exactly when there is committed work:
+
+  - ORM inserts (``queue_notification_for_user`` and friends) are picked up by
+    an ``after_flush`` hook;
+  - set-based inserts (utils/notification_fanout.py) call
+    ``notify_outbox_pending`` themselves.
+
+``scripts/notification_worker.py --listen`` waits on ``OutboxListener``
+between batches instead of sleeping, falling back to a plain poll every
+``--interval`` seconds for retries and scheduled rows. On SQLite, or when the
+only database URL is a transaction-mode pooler (which cannot hold a LISTEN),
+everything here is a no-op and the worker keeps polling.
+"""
+from __future__ import annotations
+
+import select
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from apps.api.models.notification import NotificationOutbox
+
+
+DEFAULT_CHANNEL = 'notification_outbox'
+
+
+def wakeup_channel() -> str:
+    if has_app_context():
+        return current_app.config.get('NOTIFICATION_WAKEUP_CHANNEL') or DEFAULT_CHANNEL
+    return DEFAULT_CHANNEL
+
+
+def _is_postgres(session) -> bool:
+    try:
+        return session.get_bind().dialect.name == 'postgresql'
+    except Exception:
+        return False
+
+
+def _send_notify(session, channel: str) -> None:
+    session.connection().execute(text("SELECT pg_notify(:channel, 'pending')"), {'channel': channel})
+
+
+def notify_outbox_pending(session) -> None:
+    """Wake listening workers when the current transaction commits (once per transaction)."""
+    if session.info.get('outbox_notified') or not _is_postgres(session):
+        return
+    session.info['outbox_notified'] = True
+    _send_notify(session, wakeup_channel())
+
+
+@event.listens_for(Session, 'after_flush')
+def _notify_new_outbox_rows(session, flush_context):
+    if any(isinstance(obj, NotificationOutbox) for obj in session.new):
+        notify_outbox_pending(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _reset_after_commit(session):
+    session.info.pop('outbox_notified', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_after_rollback(session):
+    session.info.pop('outbox_notified', None)
+
+
+class OutboxListener:
+    """A dedicated autocommit connection LISTENing on the wakeup channel."""
+
+    def __init__(self, url: str, channel: str):
+        self._engine = create_engine(url, poolclass=NullPool)
+        self._raw = self._engine.raw_connection()
+        self._conn = self._raw.driver_connection
+        self._conn.autocommit = True
+        with self._conn.cursor() as cur:
+            cur.execute(f'LISTEN "{channel}"')
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to ``timeout`` seconds; True when a notification arrived."""
+        if self._conn.notifies:
+            self._conn.notifies.clear()
+            return True
+        ready, _, _ = select.select([self._conn], [], [], max(0.0, timeout))
+        if not ready:
+            return False
+        self._conn.poll()
+        woke = bool(self._conn.notifies)
+        self._conn.notifies.clear()
+        return woke
+
+    @property
+    def closed(self) -> bool:
+        return bool(getattr(self._conn, 'closed', False))
+
+    def close(self) -> None:
+        try:
+            self._raw.close()
+        finally:
+            self._engine.dispose()
+
+
+def open_listener() -> Optional[OutboxListener]:
+    """Open a listener for the current app, or None when LISTEN is unavailable."""
+    url = current_app.config.get('NOTIFICATION_LISTEN_DATABASE_URL') or ''
+    if not url:
+        url = current_app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        if ':6543' in url:
+            current_app.logger.warning(
+                "Notification worker: transaction pooler URLs cannot LISTEN; "
+                "set NOTIFICATION_LISTEN_DATABASE_URL to a direct/session connection. Polling instead."
+            )
+            return None
+    if not url.startswith(('postgresql', 'postgres')):
+        return None
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    try:
+        return OutboxListener(url, wakeup_channel())
+    except Exception as exc:
+        current_app.logger.warning("Notification worker: LISTEN unavailable (%s); polling instead.", exc)
+        return None
@@ -1,14 +1,18 @@
 """Notification helpers for queuing announcements and request updates."""
 from __future__ import annotations
+import threading
 from apps.api.utils.time import utc_now
 from datetime import datetime
-from typing import Dict, Any, List, Tuple, Set
+from typing import Dict, Any, List, Tuple
 from flask import current_app
 from sqlalchemy import or_
 
 from apps.api import db
-from apps.api.models.notification import NotificationOutbox
+from apps.api.models.notification import NotificationOutbox, NotificationOutboxArchive
 from apps.api.models.user import User
+from apps.api.utils.email_sender import document_ready_email_content
+from apps.api.utils.notification_fanout import FanoutSpec, fanout
+from apps.api.utils import notification_wakeup  # noqa: F401  registers the outbox NOTIFY hook
 from apps.api.utils.zambales_scope import (
     ZAMBALES_MUNICIPALITY_IDS,
     is_valid_zambales_municipality,
@@ -52,13 +56,15 @@ def queue_notification_for_user(
     payload: Dict[str, Any],
     dedupe_extra: str | None = None,
     schedule_at: datetime | None = None,
+    lane: str = 'transactional',
+    respect_preferences: bool = True,
 ) -> str:
     """Queue a single notification respecting user preferences."""
     if not user:
         return 'skipped_no_user'
 
     if channel == 'email':
-        if not _prefers_email(user):
+        if respect_preferences and not _prefers_email(user):
             return 'skipped_email_disabled'
         if not (payload.get('to_email') or getattr(user, 'email', None)):
             return 'skipped_no_email'
@@ -72,7 +78,7 @@ def queue_notification_for_user(
 
     dedupe_key = _build_dedupe_key(event_type, entity_id, user.id, channel, dedupe_extra)
     existing = NotificationOutbox.query.filter_by(dedupe_key=dedupe_key).first()
-    if existing:
+    if existing or NotificationOutboxArchive.query.filter_by(dedupe_key=dedupe_key).first():
         return 'duplicate'
 
     entry = NotificationOutbox(
@@ -81,6 +87,7 @@ def queue_notification_for_user(
         event_type=event_type,
         entity_id=entity_id,
         payload=payload,
+        lane=lane,
         status='pending',
         attempts=0,
         next_attempt_at=schedule_at or utc_now(),
@@ -185,18 +192,18 @@ def queue_document_status_change(user: User, req, doc_name: str, new_status: str
     return results
 
 
-def _announcement_recipients(announcement) -> List[User]:
-    """Return verified residents eligible for this announcement scope."""
+def _announcement_recipient_filters(announcement) -> List[Any] | None:
+    """Filters selecting verified residents eligible for this announcement scope (None if nobody)."""
     scope = (getattr(announcement, 'scope', 'MUNICIPALITY') or 'MUNICIPALITY').upper()
-    query = User.query.filter(
+    filters = [
         User.role == 'resident',
         User.admin_verified == True,
         or_(User.is_active == True, User.is_active.is_(None)),
         User.municipality_id.isnot(None),
-    )
+    ]
 
     if scope == 'PROVINCE':
-        query = query.filter(User.municipality_id.in_(ZAMBALES_MUNICIPALITY_IDS))
+        filters.append(User.municipality_id.in_(ZAMBALES_MUNICIPALITY_IDS))
     elif scope == 'MUNICIPALITY':
         muni_ids = []
         if announcement.municipality_id and is_valid_zambales_municipality(announcement.municipality_id):
@@ -210,35 +217,33 @@ def _announcement_recipients(announcement) -> List[User]:
             except Exception:
                 continue
         if not muni_ids:
-            return []
-        query = query.filter(User.municipality_id.in_(muni_ids))
+            return None
+        filters.append(User.municipality_id.in_(muni_ids))
     elif scope == 'BARANGAY':
         if not getattr(announcement, 'barangay_id', None):
-            return []
-        query = query.filter(User.barangay_id == announcement.barangay_id)
+            return None
+        filters.append(User.barangay_id == announcement.barangay_id)
     else:
-        return []
+        return None
 
-    return query.all()
+    return filters
 
 
-def queue_announcement_notifications(announcement) -> Dict[str, int]:
-    """Queue notifications for a published announcement."""
-    results = {'queued': 0, 'skipped': 0}
+def _announcement_fanout_spec(announcement) -> FanoutSpec | None:
+    """Describe the notifications for a published, unexpired announcement."""
     status = (getattr(announcement, 'status', '') or '').upper()
     now = utc_now()
 
     publish_at = getattr(announcement, 'publish_at', None)
     expire_at = getattr(announcement, 'expire_at', None)
     if status != 'PUBLISHED':
-        return results
+        return None
     if expire_at and expire_at <= now:
-        return results
+        return None
 
-    schedule_at = publish_at if publish_at and publish_at > now else now
-    recipients = _announcement_recipients(announcement)
-    if not recipients:
-        return results
+    filters = _announcement_recipient_filters(announcement)
+    if filters is None:
+        return None
 
     web_url = (current_app.config.get('WEB_URL') or '').rstrip('/') or 'http://localhost:5173'
     link = f"{web_url}/announcements/{announcement.id}"
@@ -249,84 +254,45 @@ def queue_announcement_notifications(announcement) -> Dict[str, int]:
         f"View details: {link}"
     )
     sms_message = f"Announcement: {announcement.title}. See details in MunLink."
-    batch_key = f"announcement:{announcement.id}"
-
-    # Bulk dedupe check for performance
-    keys: Set[str] = set()
-    for user in recipients:
-        if _prefers_email(user):
-            keys.add(_build_dedupe_key('announcement_published', announcement.id, user.id, 'email'))
-        if _prefers_sms(user) and getattr(user, 'mobile_number', None):
-            keys.add(_build_dedupe_key('announcement_published', announcement.id, user.id, 'sms'))
-    if keys:
-        existing = db.session.query(NotificationOutbox.dedupe_key).filter(NotificationOutbox.dedupe_key.in_(list(keys))).all()
-        existing_keys = {row[0] for row in existing}
-    else:
-        existing_keys = set()
-
-    for user in recipients:
-        # Email
-        if _prefers_email(user):
-            dedupe_key = _build_dedupe_key('announcement_published', announcement.id, user.id, 'email')
-            if dedupe_key not in existing_keys:
-                db.session.add(NotificationOutbox(
-                    resident_id=user.id,
-                    channel='email',
-                    event_type='announcement_published',
-                    entity_id=announcement.id,
-                    payload={'subject': subject, 'body': body},
-                    status='pending',
-                    attempts=0,
-                    next_attempt_at=schedule_at,
-                    dedupe_key=dedupe_key,
-                ))
-                results['queued'] += 1
-            else:
-                results['skipped'] += 1
-        else:
-            results['skipped'] += 1
-
-        # SMS
-        if _prefers_sms(user) and getattr(user, 'mobile_number', None):
-            dedupe_key = _build_dedupe_key('announcement_published', announcement.id, user.id, 'sms')
-            if dedupe_key not in existing_keys:
-                db.session.add(NotificationOutbox(
-                    resident_id=user.id,
-                    channel='sms',
-                    event_type='announcement_published',
-                    entity_id=announcement.id,
-                    payload={'message': sms_message, 'batch_key': batch_key},
-                    status='pending',
-                    attempts=0,
-                    next_attempt_at=schedule_at,
-                    dedupe_key=dedupe_key,
-                ))
-                results['queued'] += 1
-            else:
-                results['skipped'] += 1
-        else:
-            results['skipped'] += 1
+    return FanoutSpec(
+        event_type='announcement_published',
+        entity_id=announcement.id,
+        recipient_filters=filters,
+        email_payload={'subject': subject, 'body': body},
+        sms_payload={'message': sms_message, 'batch_key': f"announcement:{announcement.id}"},
+        schedule_at=publish_at if publish_at and publish_at > now else now,
+    )
 
-    return results
+
+def queue_announcement_notifications(announcement) -> Dict[str, int]:
+    """Queue notifications for a published announcement.
+
+    Outbox rows are written set-based (see utils/notification_fanout.py); large
+    audiences are handed to a background fan-out and return its ``fanout_id``.
+    """
+    spec = _announcement_fanout_spec(announcement)
+    if spec is None:
+        return {'queued': 0, 'skipped': 0}
+    return fanout(spec)
 
 
-def _benefit_program_recipients(program) -> List[User]:
-    """Return verified residents in the program's municipality/barangay scope."""
+def _benefit_program_recipient_filters(program) -> List[Any] | None:
+    """Filters selecting verified residents in the program's municipality/barangay scope."""
     if not getattr(program, 'municipality_id', None):
-        return []
+        return None
 
     if not is_valid_zambales_municipality(program.municipality_id):
-        return []
+        return None
 
-    query = User.query.filter(
+    filters = [
         User.role == 'resident',
         User.admin_verified == True,
         or_(User.is_active == True, User.is_active.is_(None)),
         User.municipality_id == program.municipality_id,
-    )
+    ]
     if getattr(program, 'barangay_id', None):
-        query = query.filter(User.barangay_id == program.barangay_id)
-    return query.all()
+        filters.append(User.barangay_id == program.barangay_id)
+    return filters
 
 
 def _benefit_application_status_templates(program_name: str, app_number: str, new_status: str, reason: str | None = None) -> Tuple[str, str, str]:
@@ -397,19 +363,17 @@ def queue_benefit_application_status_change(user: User, app, program, new_status
     return results
 
 
-def queue_benefit_program_notifications(program) -> Dict[str, int]:
-    """Queue notifications when a benefit program is created or becomes active."""
-    results = {'queued': 0, 'skipped': 0}
-
+def _benefit_program_fanout_spec(program) -> FanoutSpec | None:
+    """Describe the notifications for an active program accepting applications."""
     is_active = getattr(program, 'is_active', False)
     is_accepting = getattr(program, 'is_accepting_applications', False)
 
     if not is_active or not is_accepting:
-        return results
+        return None
 
-    recipients = _benefit_program_recipients(program)
-    if not recipients:
-        return results
+    filters = _benefit_program_recipient_filters(program)
+    if filters is None:
+        return None
 
     program_name = getattr(program, 'name', 'Benefit Program')
     web_url = (current_app.config.get('WEB_URL') or '').rstrip('/') or 'http://localhost:5173'
@@ -422,67 +386,35 @@ def queue_benefit_program_notifications(program) -> Dict[str, int]:
         f"Apply now: {link}"
     )
     sms_message = f"New benefit program available: {program_name}. Check MunLink to apply."
-    batch_key = f"benefit_program:{program.id}"
-    schedule_at = utc_now()
+    return FanoutSpec(
+        event_type='benefit_program_created',
+        entity_id=program.id,
+        recipient_filters=filters,
+        email_payload={'subject': subject, 'body': body},
+        sms_payload={'message': sms_message, 'batch_key': f"benefit_program:{program.id}"},
+        schedule_at=utc_now(),
+    )
 
-    # Bulk dedupe check
-    keys: Set[str] = set()
-    for user in recipients:
-        if _prefers_email(user):
-            keys.add(_build_dedupe_key('benefit_program_created', program.id, user.id, 'email'))
-        if _prefers_sms(user) and getattr(user, 'mobile_number', None):
-            keys.add(_build_dedupe_key('benefit_program_created', program.id, user.id, 'sms'))
-
-    if keys:
-        existing = db.session.query(NotificationOutbox.dedupe_key).filter(NotificationOutbox.dedupe_key.in_(list(keys))).all()
-        existing_keys = {row[0] for row in existing}
-    else:
-        existing_keys = set()
-
-    for user in recipients:
-        # Email
-        if _prefers_email(user):
-            dedupe_key = _build_dedupe_key('benefit_program_created', program.id, user.id, 'email')
-            if dedupe_key not in existing_keys:
-                db.session.add(NotificationOutbox(
-                    resident_id=user.id,
-                    channel='email',
-                    event_type='benefit_program_created',
-                    entity_id=program.id,
-                    payload={'subject': subject, 'body': body},
-                    status='pending',
-                    attempts=0,
-                    next_attempt_at=schedule_at,
-                    dedupe_key=dedupe_key,
-                ))
-                results['queued'] += 1
-            else:
-                results['skipped'] += 1
-        else:
-            results['skipped'] += 1
-
-        # SMS
-        if _prefers_sms(user) and getattr(user, 'mobile_number', None):
-            dedupe_key = _build_dedupe_key('benefit_program_created', program.id, user.id, 'sms')
-            if dedupe_key not in existing_keys:
-                db.session.add(NotificationOutbox(
-                    resident_id=user.id,
-                    channel='sms',
-                    event_type='benefit_program_created',
-                    entity_id=program.id,
-                    payload={'message': sms_message, 'batch_key': batch_key},
-                    status='pending',
-                    attempts=0,
-                    next_attempt_at=schedule_at,
-                    dedupe_key=dedupe_key,
-                ))
-                results['queued'] += 1
-            else:
-                results['skipped'] += 1
-        else:
-            results['skipped'] += 1
 
-    return results
+def queue_benefit_program_notifications(program) -> Dict[str, int]:
+    """Queue notifications when a benefit program is created or becomes active."""
+    spec = _benefit_program_fanout_spec(program)
+    if spec is None:
+        return {'queued': 0, 'skipped': 0}
+    return fanout(spec)
+
+
+def build_fanout_spec(event_type: str, entity_id: int) -> FanoutSpec | None:
+    """Rebuild a fan-out spec from its event (used by background fan-outs)."""
+    if event_type == 'announcement_published':
+        from apps.api.models.announcement import Announcement
+        announcement = db.session.get(Announcement, entity_id)
+        return _announcement_fanout_spec(announcement) if announcement else None
+    if event_type == 'benefit_program_created':
+        from apps.api.models.benefit import BenefitProgram
+        program = db.session.get(BenefitProgram, entity_id)
+        return _benefit_program_fanout_spec(program) if program else None
+    return None
 
 
 def flush_pending_notifications(max_items: int = 50):
@@ -495,9 +427,74 @@ def flush_pending_notifications(max_items: int = 50):
     """
     try:
         from apps.api.utils.notification_delivery import process_batch
-        process_batch(max_items=max_items, newest_first=True)
+        # Attachment emails are never sent on the request path
+        process_batch(max_items=max_items, newest_first=True, lanes=('transactional', 'bulk'))
     except Exception:
         try:
             db.session.rollback()
         except Exception:
             pass
+
+
+def queue_document_ready_email(user: User, req, doc_name: str, file_ref: str) -> str:
+    """Queue the generated document as an email attachment.
+
+    Only the storage reference goes into the outbox; the delivery worker
+    loads the file when it sends. This is the requested document itself, not
+    a notification, so email preferences do not apply. Call
+    ``deliver_attachment_emails`` after committing.
+    """
+    resident_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or 'Resident'
+    request_number = getattr(req, 'request_number', None) or str(getattr(req, 'id', ''))
+    subject, body, filename = document_ready_email_content(resident_name, doc_name, request_number)
+    return queue_notification_for_user(
+        user,
+        'email',
+        'document_ready_attachment',
+        getattr(req, 'id', None),
+        {
+            'subject': subject,
+            'body': body,
+            'attachment': {'ref': file_ref, 'filename': filename, 'content_type': 'application/pdf'},
+        },
+        # Every generation/regeneration is emailed
+        dedupe_extra=utc_now().strftime('%Y%m%d%H%M%S%f'),
+        lane='attachment',
+        respect_preferences=False,
+    )
+
+
+def deliver_attachment_emails(max_items: int = 10) -> None:
+    """Send queued attachment emails without blocking the caller.
+
+    ``NOTIFICATION_ATTACHMENT_RUNNER``: 'thread' (default) delivers on a
+    background thread, 'worker' leaves them to notification_worker.py,
+    'inline' sends before returning (tests).
+    """
+    runner = (current_app.config.get('NOTIFICATION_ATTACHMENT_RUNNER') or 'thread').lower()
+    if runner == 'worker':
+        return
+    if runner == 'inline':
+        _deliver_attachments(max_items)
+        return
+    app = current_app._get_current_object()
+    threading.Thread(
+        target=_deliver_attachments_in_thread, args=(app, max_items), name='notify-attachments', daemon=True,
+    ).start()
+
+
+def _deliver_attachments(max_items: int) -> None:
+    try:
+        from apps.api.utils.notification_delivery import process_batch
+        process_batch(max_items=max_items, lanes=('attachment',))
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.warning("Attachment email delivery failed; the worker will retry: %s", exc)
+
+
+def _deliver_attachments_in_thread(app, max_items: int) -> None:
+    with app.app_context():
+        try:
+            _deliver_attachments(max_items)
+        finally:
+            db.session.remove()
@@ -0,0 +1,177 @@
+"""Retention for the notification outbox.
+
+Delivered, skipped and permanently failed rows are only needed for their
+``dedupe_key`` once they are a few days old, but left in place they bloat
+``notification_outbox`` and every index the worker's claim query and the
+dedupe lookups touch. ``archive_outbox`` moves terminal rows whose last
+update is older than ``NOTIFICATION_OUTBOX_RETENTION_DAYS`` into
+``notification_outbox_archive`` in batches of
+``NOTIFICATION_OUTBOX_ARCHIVE_BATCH``: each batch is one transaction of
+``INSERT ... SELECT`` + ``DELETE`` by id, so a crash never loses or doubles a
+row and the worker is only ever blocked for one batch (Postgres claims the
+batch with ``FOR UPDATE SKIP LOCKED``).
+
+The archive keeps ``dedupe_key`` unique and the queueing code checks it, so
+archived notifications are never sent again. ``purge_archive`` drops archive
+rows after ``NOTIFICATION_ARCHIVE_RETENTION_DAYS`` (0 = keep forever); once
+purged, a re-published event could notify those residents again.
+
+Run it with ``scripts/maintenance/archive_notification_outbox.py``.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from apps.api import db
+from apps.api.models.notification import NotificationOutbox, NotificationOutboxArchive
+from apps.api.utils.time import utc_now
+
+
+TERMINAL_STATUSES = ('sent', 'skipped', 'failed')
+
+_COLUMNS = [
+    'id', 'resident_id', 'channel', 'event_type', 'entity_id', 'payload', 'lane', 'status', 'attempts',
+    'next_attempt_at', 'last_error', 'dedupe_key', 'created_at', 'updated_at',
+]
+
+
+def _dialect() -> str:
+    try:
+        return db.session.get_bind().dialect.name
+    except Exception:
+        return ''
+
+
+def _archivable(cutoff: datetime) -> List[Any]:
+    outbox = NotificationOutbox.__table__
+    return [outbox.c.status.in_(TERMINAL_STATUSES), outbox.c.updated_at < cutoff]
+
+
+def count_archivable(cutoff: datetime) -> int:
+    outbox = NotificationOutbox.__table__
+    return int(db.session.execute(
+        select(func.count()).select_from(outbox).where(*_archivable(cutoff))
+    ).scalar() or 0)
+
+
+def _archive_batch(cutoff: datetime, after_id: int, batch_size: int) -> List[int]:
+    """Move one batch of archivable rows with id > ``after_id``; returns their ids."""
+    outbox = NotificationOutbox.__table__
+    archive = NotificationOutboxArchive.__table__
+    dialect = _dialect()
+
+    q = select(outbox.c.id).where(*_archivable(cutoff), outbox.c.id > after_id).order_by(outbox.c.id).limit(batch_size)
+    if dialect == 'postgresql':
+        q = q.with_for_update(skip_locked=True)
+    ids = list(db.session.execute(q).scalars())
+    if not ids:
+        db.session.rollback()
+        return []
+
+    source = select(
+        *[outbox.c[name] for name in _COLUMNS],
+        literal(utc_now(), archive.c.archived_at.type),
+    ).where(outbox.c.id.in_(ids))
+    columns = _COLUMNS + ['archived_at']
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(archive).from_select(columns, source).on_conflict_do_nothing()
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(archive).from_select(columns, source).on_conflict_do_nothing()
+    else:
+        stmt = insert(archive).from_select(columns, source)
+    db.session.execute(stmt)
+    db.session.execute(delete(outbox).where(outbox.c.id.in_(ids)))
+    db.session.commit()
+    return ids
+
+
+def archive_outbox(
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Move terminal outbox rows older than ``older_than_days`` to the archive.
+
+    Returns ``{'cutoff', 'candidates', 'moved', 'batches', 'seconds'}``;
+    ``dry_run`` only counts candidates. ``max_batches`` bounds one run so it
+    can be scheduled frequently on a large backlog.
+    """
+    config = current_app.config
+    if older_than_days is None:
+        older_than_days = int(config.get('NOTIFICATION_OUTBOX_RETENTION_DAYS', 30))
+    if batch_size is None:
+        batch_size = int(config.get('NOTIFICATION_OUTBOX_ARCHIVE_BATCH', 1000))
+    batch_size = max(1, batch_size)
+    cutoff = utc_now() - timedelta(days=max(0, older_than_days))
+
+    started = time.monotonic()
+    stats: Dict[str, Any] = {
+        'cutoff': cutoff.isoformat(),
+        'candidates': count_archivable(cutoff),
+        'moved': 0,
+        'batches': 0,
+    }
+    if not dry_run:
+        last_id = 0
+        while max_batches is None or stats['batches'] < max_batches:
+            ids = _archive_batch(cutoff, last_id, batch_size)
+            if not ids:
+                break
+            stats['moved'] += len(ids)
+            stats['batches'] += 1
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    if stats['moved']:
+        current_app.logger.info(
+            "Archived %s notification outbox rows in %s batches (%.2fs)",
+            stats['moved'], stats['batches'], stats['seconds'],
+        )
+    return stats
+
+
+def purge_archive(
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Delete archive rows archived more than ``older_than_days`` ago (0 = never)."""
+    config = current_app.config
+    if older_than_days is None:
+        older_than_days = int(config.get('NOTIFICATION_ARCHIVE_RETENTION_DAYS', 0))
+    if batch_size is None:
+        batch_size = int(config.get('NOTIFICATION_OUTBOX_ARCHIVE_BATCH', 1000))
+    batch_size = max(1, batch_size)
+
+    started = time.monotonic()
+    stats: Dict[str, Any] = {'purged': 0}
+    if older_than_days and older_than_days > 0:
+        archive = NotificationOutboxArchive.__table__
+        cutoff = utc_now() - timedelta(days=older_than_days)
+        if dry_run:
+            stats['candidates'] = int(db.session.execute(
+                select(func.count()).select_from(archive).where(archive.c.archived_at < cutoff)
+            ).scalar() or 0)
+        else:
+            while True:
+                ids = list(db.session.execute(
+                    select(archive.c.id).where(archive.c.archived_at < cutoff).order_by(archive.c.id).limit(batch_size)
+                ).scalars())
+                if not ids:
+                    break
+                db.session.execute(delete(archive).where(archive.c.id.in_(ids)))
+                db.session.commit()
+                stats['purged'] += len(ids)
+                if len(ids) < batch_size:
+                    break
+    db.session.rollback()
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    return stats
@@ -0,0 +1,239 @@
+"""Keyset (cursor) pagination shared by list endpoints.
+
+``paginate()`` on Flask-SQLAlchemy issues ``COUNT(*)`` for every page and
+``OFFSET`` pages get slower the deeper a client goes. ``keyset_paginate``
+instead orders by a ``KeysetSpec`` (ending in a unique column such as ``id``)
+and continues strictly after the last row of the previous page, encoded as an
+opaque ``next_cursor`` token, so every page costs the same single indexed query.
+
+Totals are optional: ``cached_total`` counts once per query shape and reuses
+the number for ``PAGINATION_TOTAL_CACHE_SECONDS`` (at most
+``PAGINATION_TOTAL_CACHE_SIZE`` filter sets are kept). Commits that insert, update
+or delete rows of the counted table drop its cached totals, so the figure is
+only stale with respect to writes from other workers.
+
+Legacy ``page=N`` requests without a cursor still work through OFFSET so
+existing page-number UIs keep functioning; clients that follow ``next_cursor``
+get constant-cost pages.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from apps.api.utils.table_cache import BoundedCache, on_tables_committed
+
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a malformed or mismatched pagination cursor."""
+
+
+@dataclass(frozen=True)
+class KeysetSpec:
+    """Sort order for keyset pagination.
+
+    ``columns`` is a sequence of ``(expression, descending)`` pairs; the last
+    one must be unique (normally the primary key) and none may be NULL.
+    ``row_key`` returns the same values from a result row in Python, used to
+    build the cursor for the next page.
+    """
+
+    columns: Sequence[Tuple[Any, bool]]
+    row_key: Callable[[Any], Sequence[Any]]
+    name: str = 'default'
+
+    def order_by(self) -> List[Any]:
+        return [expr.desc() if descending else expr.asc() for expr, descending in self.columns]
+
+    def after(self, values: Sequence[Any]):
+        """Condition selecting rows strictly after ``values`` in this order."""
+        clauses = []
+        for i, (expr, descending) in enumerate(self.columns):
+            equal_prefix = [self.columns[j][0] == values[j] for j in range(i)]
+            step = expr < values[i] if descending else expr > values[i]
+            clauses.append(and_(*equal_prefix, step))
+        return or_(*clauses)
+
+
+def created_desc_spec(model, created_attr: str = 'created_at', entity_index: Optional[int] = None) -> KeysetSpec:
+    """Newest-first order on ``(created_at, id)``, the common list ordering.
+
+    ``entity_index`` selects the model from tuple rows of multi-entity queries.
+    """
+    created = getattr(model, created_attr)
+
+    def row_key(row):
+        obj = row[entity_index] if entity_index is not None else row
+        return getattr(obj, created_attr), obj.id
+
+    return KeysetSpec(
+        columns=((created, True), (model.id, True)),
+        row_key=row_key,
+        name=f'{model.__tablename__}:{created_attr}',
+    )
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise ValueError('unknown cursor value')
+    return value
+
+
+def encode_cursor(spec: KeysetSpec, values: Sequence[Any]) -> str:
+    payload = json.dumps({'k': spec.name, 'v': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(spec: KeysetSpec, token: str) -> List[Any]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in payload['v']]
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+    if payload.get('k') != spec.name or len(values) != len(spec.columns) or any(v is None for v in values):
+        raise InvalidCursor('Cursor does not match this listing')
+    return values
+
+
+@dataclass
+class KeysetPage:
+    items: List[Any]
+    next_cursor: Optional[str]
+    page: int
+    per_page: int
+    total: Optional[int] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def pages(self) -> Optional[int]:
+        if self.total is None:
+            return None
+        return (self.total + self.per_page - 1) // self.per_page if self.per_page else 1
+
+    def meta(self) -> Dict[str, Any]:
+        """Pagination block in the shape existing endpoints return, plus cursor fields."""
+        return {
+            'page': self.page,
+            'per_page': self.per_page,
+            'total': self.total,
+            'pages': self.pages,
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more,
+        }
+
+
+def page_args(args, default_per_page: int = DEFAULT_PER_PAGE, max_per_page: int = MAX_PER_PAGE) -> Tuple[int, int, Optional[str]]:
+    """Parse ``page``, ``per_page`` and ``cursor`` from request args."""
+    try:
+        page = int(args.get('page') or 1)
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        per_page = int(args.get('per_page') or default_per_page)
+    except (TypeError, ValueError):
+        per_page = default_per_page
+    return max(1, page), min(max(1, per_page), max_per_page), (args.get('cursor') or None)
+
+
+def keyset_paginate(
+    query,
+    spec: KeysetSpec,
+    *,
+    per_page: int,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    total_key: Optional[Hashable] = None,
+) -> KeysetPage:
+    """Fetch one page of ``query`` in ``spec`` order.
+
+    ``total_key`` enables a cached total: it must identify every filter
+    applied to ``query`` (scope, status, ...). Pass None to skip counting.
+    """
+    total = None
+    if total_key is not None:
+        total = cached_total(query, total_key)
+
+    ordered = query.order_by(*spec.order_by())
+    if cursor:
+        ordered = ordered.filter(spec.after(decode_cursor(spec, cursor)))
+    elif page > 1:
+        ordered = ordered.offset((page - 1) * per_page)
+    rows = ordered.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page and items:
+        next_cursor = encode_cursor(spec, spec.row_key(items[-1]))
+    return KeysetPage(items=items, next_cursor=next_cursor, page=page, per_page=per_page, total=total)
+
+
+# ---------------------------------------------------------------------------
+# Cached totals
+# ---------------------------------------------------------------------------
+
+class TotalsCache(BoundedCache):
+    """Bounded TTL cache of list totals keyed by (table name, caller key)."""
+
+    def get_or_count(self, table: str, key: Hashable, count: Callable[[], int]) -> int:
+        return self.get_or_compute(table, key, count)
+
+
+def get_totals_cache() -> TotalsCache:
+    """Return the totals cache bound to the current app."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('pagination_totals_cache')
+    if cache is None:
+        cache = TotalsCache(
+            ttl_seconds=app.config.get('PAGINATION_TOTAL_CACHE_SECONDS', 30),
+            max_entries=app.config.get('PAGINATION_TOTAL_CACHE_SIZE', 1024),
+        )
+        app.extensions['pagination_totals_cache'] = cache
+    return cache
+
+
+def _primary_table(query) -> str:
+    try:
+        return query.column_descriptions[0]['entity'].__tablename__
+    except Exception:
+        return '*'
+
+
+def cached_total(query, key: Hashable) -> int:
+    """Count ``query`` once per ``key`` and reuse the result until it expires or the table changes."""
+    return get_totals_cache().get_or_count(
+        _primary_table(query),
+        key,
+        lambda: int(query.order_by(None).count()),
+    )
+
+
+@on_tables_committed
+def _invalidate_written_totals(tables):
+    cache = current_app.extensions.get('pagination_totals_cache')
+    if cache is not None:
+        cache.invalidate(*tables, '*')
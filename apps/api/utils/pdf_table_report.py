@@ -4,8 +4,9 @@ Generates simple, branded PDF reports with header/footer and zebra table.
 """
 
 from apps.api.utils.time import utc_now
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
 import os
 
@@ -89,9 +90,18 @@ def generate_table_pdf(
     title: str,
     municipality_name: str,
     headers: List[str],
-    rows: List[List[Any]],
+    rows: Iterable[List[Any]],
 ) -> Path:
+    """Render a table report to ``out_path``.
+
+    ``rows`` may be any iterable (including a lazy DB cursor); only the first
+    50 rows are buffered to size columns and each page is flushed to the
+    canvas as soon as it fills, so input rows are never held all at once.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    rows = iter(rows)
+    sample_rows = list(islice(rows, 50))
+    rows = chain(sample_rows, rows)
     page_w, page_h = A4
     c = canvas.Canvas(str(out_path), pagesize=A4)
 
@@ -127,7 +137,7 @@ def generate_table_pdf(
     y = page_h - 72*mm
     table_width = (page_w - 40*mm)
     # Compute adaptive column widths
-    col_widths = _compute_col_widths(c, headers, rows, table_width)
+    col_widths = _compute_col_widths(c, headers, sample_rows, table_width)
     row_h = 8*mm
 
     # Header row
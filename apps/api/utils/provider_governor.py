@@ -0,0 +1,197 @@
+"""Rate limiting and circuit breaking in front of the notification providers.
+
+Each delivery channel ('email' -> SendGrid/SMTP, 'sms' -> PhilSMS) gets a
+``ProviderGovernor`` per app (``app.extensions['provider_governors']``):
+
+  - a token bucket of ``NOTIFICATION_RATE_<CHANNEL>`` messages per second
+    (0 = unlimited) with a burst of one second's worth, shared by every
+    delivery thread in the process;
+  - a circuit breaker that opens after ``PROVIDER_BREAKER_THRESHOLD``
+    consecutive failures. While open, sends are refused immediately with
+    ``ProviderUnavailable`` so the outbox row can go back to ``pending`` without
+    spending an attempt or waiting for a timeout. After
+    ``PROVIDER_BREAKER_RESET_SECONDS`` one probe is let through (half-open):
+    success closes the breaker, failure re-opens it.
+
+State is per process; ``governor_status()`` reports it for this one.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+
+CHANNELS = ('email', 'sms')
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, channel: str, retry_in: float):
+        super().__init__(f"{channel} provider circuit open")
+        self.channel = channel
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``rate`` <= 0 disables limiting."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = max(0.0, float(rate))
+        self.capacity = max(1.0, float(burst if burst is not None else self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, threshold: int = 5, reset_seconds: float = 60.0):
+        self.threshold = max(1, int(threshold))
+        self.reset_seconds = max(0.0, float(reset_seconds))
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.retry_in() <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """End a probe that proved nothing (e.g. the message was skipped)."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'retry_in_seconds': round(self.retry_in(), 1) if self.state != self.CLOSED else None,
+            }
+
+
+class ProviderGovernor:
+    def __init__(self, channel: str, rate: float, threshold: int, reset_seconds: float):
+        self.channel = channel
+        self.bucket = TokenBucket(rate)
+        self.breaker = CircuitBreaker(threshold, reset_seconds)
+        self.throttled_seconds = 0.0
+        self.short_circuited = 0
+        self._lock = threading.Lock()
+
+    def call(self, send: Callable[[], Any], failed: Callable[[Any], Optional[bool]] = lambda result: False) -> Any:
+        """Run ``send`` under the rate limit and breaker.
+
+        ``failed(result)`` classifies returned values: True counts as a
+        provider failure, False as success, None as neither (e.g. skipped).
+        Raised exceptions always count as failures.
+        """
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise ProviderUnavailable(self.channel, self.breaker.retry_in())
+        waited = self.bucket.acquire()
+        if waited:
+            with self._lock:
+                self.throttled_seconds += waited
+        try:
+            result = send()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        verdict = failed(result)
+        if verdict is None:
+            self.breaker.release()
+        elif verdict:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        data = self.breaker.snapshot()
+        data.update({
+            'rate_per_second': self.bucket.rate or None,
+            'throttled_seconds': round(self.throttled_seconds, 2),
+            'short_circuited': self.short_circuited,
+        })
+        return data
+
+
+_governors_lock = threading.Lock()
+
+
+def get_governor(channel: str) -> ProviderGovernor:
+    """Return the governor for ``channel`` bound to the current app."""
+    app = current_app._get_current_object()
+    with _governors_lock:
+        governors = app.extensions.setdefault('provider_governors', {})
+        governor = governors.get(channel)
+        if governor is None:
+            config = app.config
+            governor = ProviderGovernor(
+                channel,
+                rate=config.get(f'NOTIFICATION_RATE_{channel.upper()}', 0) or 0,
+                threshold=config.get('PROVIDER_BREAKER_THRESHOLD', 5),
+                reset_seconds=config.get('PROVIDER_BREAKER_RESET_SECONDS', 60),
+            )
+            governors[channel] = governor
+        return governor
+
+
+def governor_status() -> Dict[str, Dict[str, Any]]:
+    """Breaker/rate state per channel for this process."""
+    return {channel: get_governor(channel).status() for channel in CHANNELS}
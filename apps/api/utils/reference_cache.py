@@ -0,0 +1,174 @@
+"""HTTP response cache for public reference data.
+
+Provinces, municipalities, barangays, document types and issue categories
+change rarely but are fetched on every landing page. ``cached_reference``
+stores the serialized JSON body of a 200 response together with a strong
+ETag (SHA-256 of the bytes), answers ``If-None-Match`` with 304, and sets
+``Cache-Control`` so browsers and CDNs can reuse the payload.
+
+Entries are dropped when:
+  - a commit in this process inserts/updates/deletes a row of the group's
+    tables (admin edits through the API);
+  - the group's table fingerprint (row count plus latest ``updated_at``/id)
+    changes. The fingerprint is re-read at most every
+    ``REFERENCE_CACHE_CHECK_SECONDS``, which picks up seed and admin scripts
+    that write from another process;
+  - ``REFERENCE_CACHE_SECONDS`` elapse.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Dict, Hashable, Tuple
+
+from flask import Response, current_app, has_app_context, make_response, request
+from sqlalchemy import func
+
+from apps.api import db
+from apps.api.models.document import DocumentType
+from apps.api.models.issue import IssueCategory
+from apps.api.models.municipality import Barangay, Municipality
+from apps.api.models.province import Province
+from apps.api.utils.table_cache import BoundedCache, on_tables_committed
+
+
+# Cache group -> models whose rows feed its responses
+REFERENCE_GROUPS = {
+    'locations': (Province, Municipality, Barangay),
+    'document_types': (DocumentType, Barangay),
+    'issue_categories': (IssueCategory,),
+}
+
+MAX_ENTRIES = 512
+
+
+@dataclass
+class _Entry:
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class ReferenceCache(BoundedCache):
+    """Serialized responses per (group, path + args), with per-group fingerprints."""
+
+    def __init__(self, ttl_seconds: float = 300.0, check_seconds: float = 30.0):
+        super().__init__(ttl_seconds, max_entries=MAX_ENTRIES)
+        self.check_seconds = max(0.0, float(check_seconds))
+        self._fingerprints: Dict[str, Tuple[Any, float]] = {}
+
+    def put(self, group: str, key: Hashable, body: bytes, mimetype: str) -> _Entry:
+        entry = _Entry(body=body, etag=hashlib.sha256(body).hexdigest(), mimetype=mimetype)
+        return super().put(group, key, entry)
+
+    def invalidate(self, *groups: str) -> None:
+        super().invalidate(*groups)
+        with self._lock:
+            if not groups:
+                self._fingerprints.clear()
+            for group in groups:
+                self._fingerprints.pop(group, None)
+
+    def check_fingerprint(self, group: str) -> None:
+        """Re-read the group's table fingerprint if due; drop its entries when it changed."""
+        now = time.monotonic()
+        with self._lock:
+            known = self._fingerprints.get(group)
+            if known and known[1] > now:
+                return
+        current = _fingerprint(group)
+        with self._lock:
+            known = self._fingerprints.get(group)
+            changed = known is not None and known[0] != current
+            self._fingerprints[group] = (current, now + self.check_seconds)
+        if changed:
+            super().invalidate(group)
+
+
+def _fingerprint(group: str) -> tuple:
+    parts = []
+    for model in REFERENCE_GROUPS[group]:
+        marker = model.updated_at if hasattr(model, 'updated_at') else model.id
+        count, latest = db.session.query(func.count(model.id), func.max(marker)).one()
+        parts.append((model.__tablename__, int(count or 0), str(latest)))
+    return tuple(parts)
+
+
+def get_reference_cache() -> ReferenceCache:
+    """Return the reference response cache bound to the current app."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('reference_cache')
+    if cache is None:
+        cache = ReferenceCache(
+            ttl_seconds=app.config.get('REFERENCE_CACHE_SECONDS', 300),
+            check_seconds=app.config.get('REFERENCE_CACHE_CHECK_SECONDS', 30),
+        )
+        app.extensions['reference_cache'] = cache
+    return cache
+
+
+def invalidate_reference_cache(*groups: str) -> None:
+    """Drop cached reference responses (all groups when none given)."""
+    if has_app_context():
+        cache = current_app.extensions.get('reference_cache')
+        if cache is not None:
+            cache.invalidate(*groups)
+
+
+def _conditional_response(entry: _Entry, max_age: int) -> Response:
+    resp = Response(entry.body, status=200, mimetype=entry.mimetype)
+    resp.set_etag(entry.etag)
+    resp.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return resp.make_conditional(request)
+
+
+def cached_reference(group: str):
+    """Cache a GET view's 200 JSON response under ``group`` with ETag/304 support."""
+    if group not in REFERENCE_GROUPS:
+        raise ValueError(f'Unknown reference cache group: {group}')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_app.config.get('REFERENCE_CACHE_SECONDS', 300) <= 0:
+                return view(*args, **kwargs)
+            cache = get_reference_cache()
+            max_age = int(current_app.config.get('REFERENCE_CACHE_MAX_AGE', 300))
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            try:
+                cache.check_fingerprint(group)
+            except Exception as exc:
+                db.session.rollback()
+                current_app.logger.warning("Reference cache fingerprint failed for %s: %s", group, exc)
+                return view(*args, **kwargs)
+
+            entry = cache.get(group, key)
+            if entry is None:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.direct_passthrough:
+                    return resp
+                entry = cache.put(group, key, resp.get_data(), resp.mimetype)
+            return _conditional_response(entry, max_age)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Write invalidation
+# ---------------------------------------------------------------------------
+
+_GROUPS_BY_TABLE: Dict[str, set] = {}
+for _group, _models in REFERENCE_GROUPS.items():
+    for _model in _models:
+        _GROUPS_BY_TABLE.setdefault(_model.__tablename__, set()).add(_group)
+
+
+@on_tables_committed
+def _invalidate_written_groups(tables):
+    groups = set()
+    for table in tables:
+        groups.update(_GROUPS_BY_TABLE.get(table, ()))
+    if groups:
+        invalidate_reference_cache(*groups)
@@ -11,11 +11,13 @@ To enable Smart/TNT delivery:
 from __future__ import annotations
 from apps.api.utils.time import utc_now
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 import requests
 from flask import current_app
 
+from apps.api.utils import http_client
+
 
 _capability_cache: Dict[str, Any] = {
     'expires_at': 0,
@@ -119,8 +121,20 @@ def get_philsms_capability(force: bool = False, ttl_seconds: int | None = None)
     return data
 
 
+def sms_recipient_limit() -> int:
+    """Max recipients the configured provider accepts in one send call."""
+    provider = (current_app.config.get('SMS_PROVIDER') or 'disabled').lower()
+    if provider == 'philsms':
+        return max(1, int(current_app.config.get('PHILSMS_MAX_RECIPIENTS', 1) or 1))
+    return 1000
+
+
 def send_sms(numbers: List[str], message: str) -> Dict[str, Any]:
-    """Send SMS using configured provider. Returns dict with status and optional reason/error."""
+    """Send SMS using configured provider. Returns dict with status and optional reason/error.
+
+    When some recipients fail, ``recipients`` maps each number to its own
+    ``{'status', 'error'}`` so callers can settle rows individually.
+    """
     provider = (current_app.config.get('SMS_PROVIDER') or 'disabled').lower()
     payload_numbers = [n for n in numbers if n]
     if not payload_numbers:
@@ -157,50 +171,84 @@ def send_sms(numbers: List[str], message: str) -> Dict[str, Any]:
         'Content-Type': 'application/json',
     }
 
-    # PhilSMS API v3 accepts single recipient per request
-    # Send to each number individually
-    failed_count = 0
+    # PhilSMS API v3 accepts single recipient per request, so by default each
+    # number is sent individually; PHILSMS_MAX_RECIPIENTS > 1 opts into
+    # comma-separated recipient lists for accounts verified to accept them
+    limit = sms_recipient_limit()
+    failed: Dict[str, Any] = {}
     last_error = None
 
-    for recipient in payload_numbers:
+    def post(chunk: List[str]) -> Tuple[int | None, Any]:
+        """Send one request; returns (HTTP status or None, error detail or None)."""
         payload: Dict[str, Any] = {
-            'recipient': recipient,
+            'recipient': ','.join(chunk),
             'message': sanitized_message,
         }
         if sender_id:
             payload['sender_id'] = sender_id
 
+        masked = ','.join(mask_number(n) for n in chunk)
         try:
-            resp = requests.post(f"{base_url}/sms/send", json=payload, headers=headers, timeout=15)
-            if resp.status_code not in (200, 201, 202):
-                failed_count += 1
-                detail = None
-                try:
-                    detail = resp.json()
-                except Exception:
-                    detail = resp.text[:200]
-                last_error = detail
-                current_app.logger.error(f"[PhilSMS] Send failed to {mask_number(recipient)}: status={resp.status_code} detail={detail}")
+            resp = http_client.post(f"{base_url}/sms/send", upstream='philsms', json=payload, headers=headers)
         except requests.exceptions.RequestException as exc:
-            failed_count += 1
-            last_error = str(exc)[:200]
-            current_app.logger.error(f"[PhilSMS] Network error to {mask_number(recipient)}: {exc}")
-
-    # Return success if at least one message was sent
-    if failed_count == len(payload_numbers):
-        return {'status': 'failed', 'reason': 'all_failed', 'error': last_error}
-    elif failed_count > 0:
-        return {'status': 'sent', 'warning': f'{failed_count} of {len(payload_numbers)} failed'}
-    return {'status': 'sent'}
+            current_app.logger.error(f"[PhilSMS] Network error to {masked}: {exc}")
+            return None, str(exc)[:200]
+        if resp.status_code in (200, 201, 202):
+            return resp.status_code, None
+        try:
+            detail = resp.json()
+        except Exception:
+            detail = resp.text[:200]
+        current_app.logger.error(f"[PhilSMS] Send failed to {masked}: status={resp.status_code} detail={detail}")
+        return resp.status_code, detail
+
+    for idx in range(0, len(payload_numbers), limit):
+        chunk = payload_numbers[idx:idx + limit]
+        status, detail = post(chunk)
+        if detail is None:
+            continue
+        if len(chunk) > 1 and status is not None and 400 <= status < 500 and status != 429:
+            # A single invalid number rejects the whole list; resend each
+            # number alone so only the bad one fails
+            for number in chunk:
+                _, detail = post([number])
+                if detail is not None:
+                    last_error = detail
+                    failed[number] = detail
+            continue
+        last_error = detail
+        failed.update({n: detail for n in chunk})
+
+    if not failed:
+        return {'status': 'sent'}
+    recipients = {
+        n: {'status': 'failed', 'error': str(failed[n])} if n in failed else {'status': 'sent'}
+        for n in payload_numbers
+    }
+    if len(failed) == len(set(payload_numbers)):
+        return {'status': 'failed', 'reason': 'all_failed', 'error': last_error, 'recipients': recipients}
+    return {
+        'status': 'sent',
+        'warning': f'{len(failed)} of {len(set(payload_numbers))} failed',
+        'recipients': recipients,
+    }
 
 
 def get_provider_status() -> Dict[str, Any]:
-    """Lightweight capability snapshot for APIs/UI."""
+    """Lightweight capability snapshot for APIs/UI, including this process's circuit state."""
+    from apps.api.utils.provider_governor import get_governor
+
     data = get_philsms_capability()
+    governor = get_governor('sms').status()
+    available = data.get('available')
+    reason = data.get('reason')
+    if available and governor['state'] == 'open':
+        available, reason = False, 'circuit_open'
     return {
         'provider': data.get('provider'),
-        'available': data.get('available'),
-        'reason': data.get('reason'),
+        'available': available,
+        'reason': reason,
         'credit_balance': data.get('credit_balance'),
         'status': data.get('status'),
+        'circuit': governor,
     }
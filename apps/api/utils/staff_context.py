@@ -0,0 +1,124 @@
+"""Cached admin/staff scope lookups.
+
+Admin endpoints need the caller's role and municipality/barangay scope on
+every request. ``load_staff_scope`` resolves it with at most two primary-key
+lookups (User, then Barangay) and keeps the resulting scalars in a short-TTL
+per-app cache keyed by user id. Committing an update or delete of the user
+drops its entry, so role or scope changes apply immediately in this process.
+Other worker processes are not notified and keep serving their cached scope
+for up to ``ADMIN_CONTEXT_CACHE_SECONDS``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from apps.api import db
+from apps.api.models.municipality import Barangay
+from apps.api.models.user import User
+from apps.api.utils.table_cache import after_commit
+
+
+class StaffScopeCache:
+    """Small TTL map of user id -> resolved staff scope."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 2000):
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.max_entries = max(1, int(max_entries))
+        self._entries: Dict[int, tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry:
+                return None
+            expires_at, scope = entry
+            if expires_at <= time.monotonic():
+                self._entries.pop(user_id, None)
+                return None
+            return scope
+
+    def set(self, user_id: int, scope: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, scope)
+
+    def invalidate(self, user_id: int | None = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+def get_staff_scope_cache() -> StaffScopeCache:
+    """Return the staff scope cache bound to the current app."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('staff_scope_cache')
+    if cache is None:
+        cache = StaffScopeCache(ttl_seconds=app.config.get('ADMIN_CONTEXT_CACHE_SECONDS', 30))
+        app.extensions['staff_scope_cache'] = cache
+    return cache
+
+
+def load_staff_scope(user_id: int) -> Optional[Dict[str, Any]]:
+    """Return role and raw scope ids for a user, or None if the user does not exist."""
+    cache = get_staff_scope_cache()
+    scope = cache.get(user_id)
+    if scope is not None:
+        return scope
+
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+    barangay_municipality_id = None
+    if user.admin_barangay_id:
+        brgy = db.session.get(Barangay, user.admin_barangay_id)
+        if brgy:
+            barangay_municipality_id = brgy.municipality_id
+
+    scope = {
+        'user_id': user.id,
+        'role': user.role,
+        'role_lower': (user.role or '').lower(),
+        'admin_municipality_id': user.admin_municipality_id,
+        'admin_barangay_id': user.admin_barangay_id,
+        'barangay_municipality_id': barangay_municipality_id,
+    }
+    cache.set(user_id, scope)
+    return scope
+
+
+def invalidate_staff_scope(user_id: int | None = None) -> None:
+    """Drop cached scope for one user (or everyone)."""
+    if has_app_context():
+        get_staff_scope_cache().invalidate(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_on_user_change(mapper, connection, target):
+    # Dropped once the change commits; invalidating at flush would let a
+    # concurrent request re-cache the old committed scope
+    session = object_session(target)
+    if session is None or not has_app_context():
+        return
+    user_id = getattr(target, 'id', None)
+    app = current_app._get_current_object()
+
+    def invalidate():
+        with app.app_context():
+            invalidate_staff_scope(user_id)
+
+    after_commit(session, invalidate)
@@ -5,6 +5,7 @@ This module provides a single interface for file storage operations that:
 - Uses Supabase Storage in production (persistent, cloud-based)
 - Falls back to local filesystem in development (when Supabase not configured)
 - Handles legacy path detection and URL resolution
+- Stores identity and supporting documents once per SHA-256 (save_blob)
 - Maintains backward compatibility with existing code
 
 This replaces direct usage of file_handler.py for production deployments.
@@ -21,14 +22,24 @@ Usage:
 from __future__ import annotations
 
 import os
+import re
+import shutil
+import hashlib
 import logging
-from typing import Optional, Tuple, BinaryIO, Union
+import mimetypes
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, BinaryIO, Union
 from io import BytesIO
 from pathlib import Path
+from urllib.parse import urlparse
 
 from flask import current_app
+from sqlalchemy import delete as sa_delete, select, update
 from werkzeug.datastructures import FileStorage
 
+from apps.api.utils.time import utc_now
+
 logger = logging.getLogger(__name__)
 
 # Import validators
@@ -45,6 +56,19 @@ class StorageError(Exception):
     pass
 
 
+class FileTooLargeError(StorageError):
+    """Stored file is larger than the caller's read limit."""
+    pass
+
+
+@dataclass(frozen=True)
+class SavedImage:
+    """Stored image plus its resized variants (variant name -> path/URL)."""
+
+    path: str
+    variants: Dict[str, str] = field(default_factory=dict)
+
+
 def _is_supabase_configured() -> bool:
     """Check if Supabase Storage is configured."""
     supabase_url = current_app.config.get('SUPABASE_URL') or os.getenv('SUPABASE_URL')
@@ -81,40 +105,15 @@ def _use_supabase_storage() -> bool:
     return False
 
 
-def save_file(
+def _validate_upload(
     file: Union[FileStorage, BinaryIO],
-    category: str,
-    municipality_slug: str,
-    subcategory: Optional[str] = None,
-    allowed_extensions: Optional[set] = None,
-    max_size_mb: int = 10,
-    user_type: str = 'residents',
-    validate_mime: bool = True
+    allowed_extensions: Optional[set],
+    max_size_mb: int,
+    validate_mime: bool,
 ) -> str:
-    """
-    Save an uploaded file to storage.
-    
-    In production: Uploads to Supabase Storage.
-    In development: Falls back to local filesystem if Supabase not configured.
-    
-    Args:
-        file: FileStorage or file-like object
-        category: Category of upload (profiles, marketplace, etc.)
-        municipality_slug: Municipality slug for organization
-        subcategory: Optional subcategory
-        allowed_extensions: Set of allowed file extensions
-        max_size_mb: Maximum file size in MB
-        user_type: Type of user (residents, admins)
-        validate_mime: Whether to validate MIME type
-    
-    Returns:
-        File URL (Supabase public URL or local path)
-    
-    Raises:
-        StorageError: If upload fails
-    """
+    """Check name, extension, size and content type of an upload; returns the secured filename."""
     from werkzeug.utils import secure_filename
-    
+
     if not file:
         raise StorageError('No file provided')
     
@@ -156,7 +155,44 @@ def save_file(
             logger.warning("MIME validation skipped - security module not available")
         except Exception as e:
             raise StorageError(f'File content validation failed: {e}')
+
+    return safe_filename
+
+
+def save_file(
+    file: Union[FileStorage, BinaryIO],
+    category: str,
+    municipality_slug: str,
+    subcategory: Optional[str] = None,
+    allowed_extensions: Optional[set] = None,
+    max_size_mb: int = 10,
+    user_type: str = 'residents',
+    validate_mime: bool = True
+) -> str:
+    """
+    Save an uploaded file to storage.
+    
+    In production: Uploads to Supabase Storage.
+    In development: Falls back to local filesystem if Supabase not configured.
+    
+    Args:
+        file: FileStorage or file-like object
+        category: Category of upload (profiles, marketplace, etc.)
+        municipality_slug: Municipality slug for organization
+        subcategory: Optional subcategory
+        allowed_extensions: Set of allowed file extensions
+        max_size_mb: Maximum file size in MB
+        user_type: Type of user (residents, admins)
+        validate_mime: Whether to validate MIME type
+    
+    Returns:
+        File URL (Supabase public URL or local path)
     
+    Raises:
+        StorageError: If upload fails
+    """
+    safe_filename = _validate_upload(file, allowed_extensions, max_size_mb, validate_mime)
+
     # Decide storage backend
     if _use_supabase_storage():
         return _save_to_supabase(
@@ -179,6 +215,62 @@ def save_file(
         )
 
 
+def save_image(
+    file: Union[FileStorage, BinaryIO],
+    category: str,
+    municipality_slug: str,
+    subcategory: Optional[str] = None,
+    allowed_extensions: Optional[set] = None,
+    max_size_mb: int = 5,
+    user_type: str = 'residents',
+    variants: Tuple[str, ...] = (),
+) -> SavedImage:
+    """
+    Save an uploaded image after stripping metadata, clamping and recompressing it.
+
+    Files that are not decodable images (PDF attachments, HEIC, animated GIF)
+    are stored unchanged and get no variants. See utils/image_pipeline.py.
+
+    Args:
+        variants: Names from image_pipeline.IMAGE_VARIANTS to store alongside
+
+    Raises:
+        StorageError: If validation, processing or the upload fails
+    """
+    from apps.api.utils.image_pipeline import process_upload
+
+    safe_filename = _validate_upload(file, allowed_extensions or ALLOWED_IMAGE_EXTENSIONS, max_size_mb, True)
+    try:
+        processed = process_upload(file, variants)
+    except Exception as e:
+        raise StorageError(f'Image processing failed: {e}')
+    if processed is None:
+        path = save_file(
+            file, category, municipality_slug, subcategory,
+            allowed_extensions=None, max_size_mb=max_size_mb, user_type=user_type, validate_mime=False,
+        )
+        return SavedImage(path=path)
+
+    stem = os.path.splitext(safe_filename)[0] or 'image'
+
+    def store(encoded, suffix: str = '') -> str:
+        upload = FileStorage(
+            stream=BytesIO(encoded.data),
+            filename=f"{stem}{suffix}{encoded.extension}",
+            content_type=encoded.content_type,
+        )
+        return save_file(
+            upload, category, municipality_slug, subcategory,
+            allowed_extensions=None, max_size_mb=max_size_mb, user_type=user_type, validate_mime=False,
+        )
+
+    main, encoded_variants = processed
+    return SavedImage(
+        path=store(main),
+        variants={name: store(encoded, f'_{name}') for name, encoded in encoded_variants.items()},
+    )
+
+
 def _save_to_supabase(
     file: BinaryIO,
     category: str,
@@ -264,7 +356,10 @@ def save_bytes(
     filename: str,
     subcategory: Optional[str] = None,
     user_type: str = 'residents',
-    content_type: str = 'application/octet-stream'
+    content_type: str = 'application/octet-stream',
+    bucket: Optional[str] = None,
+    public: bool = True,
+    max_size_mb: int = 10,
 ) -> str:
     """
     Save raw bytes to storage.
@@ -277,6 +372,9 @@ def save_bytes(
         subcategory: Optional subcategory
         user_type: Type of user
         content_type: MIME type
+        bucket: Optional Supabase bucket override (e.g. the private bucket)
+        public: When False, return the storage path instead of a public URL
+        max_size_mb: Maximum upload size for Supabase
     
     Returns:
         File URL or path
@@ -292,11 +390,14 @@ def save_bytes(
                 filename=filename,
                 subcategory=subcategory,
                 user_type=user_type,
-                content_type=content_type
+                content_type=content_type,
+                bucket=bucket,
+                public=public,
+                max_size_mb=max_size_mb,
             )
             
             logger.info(f"Bytes saved to Supabase: {storage_path}")
-            return public_url
+            return public_url if public else storage_path
             
         except Exception as e:
             logger.error(f"Supabase bytes upload failed: {e}")
@@ -325,6 +426,225 @@ def save_bytes(
         return relative_path
 
 
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+_BLOB_PATH = re.compile(r'(?:^|/)(blobs/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]+)?)$')
+
+
+def _hash_upload(file: BinaryIO) -> Tuple[str, int]:
+    """SHA-256 and size of a seekable upload, read in HASH_CHUNK_SIZE pieces."""
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_path(file_ref: Optional[str]) -> Optional[str]:
+    """The ``blobs/...`` path a stored reference points to, or None for a per-record file."""
+    if not file_ref:
+        return None
+    path = str(file_ref)
+    if path.startswith(('http://', 'https://')):
+        path = urlparse(path).path
+    match = _BLOB_PATH.search(path.replace('\\', '/'))
+    return match.group(1) if match else None
+
+
+def _retain_blob(storage_path: str) -> bool:
+    """Add a reference to an existing blob; False when no row exists yet."""
+    from apps.api import db
+    from apps.api.models.stored_blob import StoredBlob
+
+    result = db.session.execute(
+        update(StoredBlob)
+        .where(StoredBlob.storage_path == storage_path)
+        .values(ref_count=StoredBlob.ref_count + 1, last_referenced_at=utc_now())
+    )
+    return result.rowcount > 0
+
+
+def _blob_row_exists(storage_path: str) -> bool:
+    """Whether a committed ``stored_blobs`` row exists, read outside the caller's session."""
+    from apps.api import db
+    from apps.api.models.stored_blob import StoredBlob
+
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(StoredBlob.id).where(StoredBlob.storage_path == storage_path).limit(1)
+        ).first() is not None
+
+
+def _write_local_blob(file: BinaryIO, storage_path: str) -> None:
+    target = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), *storage_path.split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Concurrent writers of the same content each rename a complete file into place
+    partial = f"{target}.{uuid.uuid4().hex}.part"
+    file.seek(0)
+    try:
+        with open(partial, 'wb') as out:
+            shutil.copyfileobj(file, out, HASH_CHUNK_SIZE)
+        os.replace(partial, target)
+    finally:
+        file.seek(0)
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def save_blob(
+    file: Union[FileStorage, BinaryIO],
+    allowed_extensions: Optional[set] = None,
+    max_size_mb: int = 10,
+    validate_mime: bool = True,
+) -> str:
+    """
+    Save an upload once per content hash and return a reference to the shared copy.
+
+    The file is stored as ``blobs/<sha[:2]>/<sha256><ext>`` and counted in
+    ``stored_blobs``; an upload whose bytes are already stored only adds a
+    reference and sends nothing. The row is written in the caller's session,
+    so the caller commits it with the record that holds the reference.
+    Release references with ``delete_file``.
+
+    Returns:
+        File URL (Supabase public URL or local path), like ``save_file``
+
+    Raises:
+        StorageError: If validation or the upload fails
+    """
+    from sqlalchemy.exc import IntegrityError
+    from apps.api import db
+    from apps.api.models.stored_blob import StoredBlob
+
+    safe_filename = _validate_upload(file, allowed_extensions, max_size_mb, validate_mime)
+    ext = os.path.splitext(safe_filename)[1].lower()
+    sha256, size = _hash_upload(file)
+    storage_path = f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{ext}"
+    content_type = mimetypes.guess_type(safe_filename)[0]
+    use_supabase = _use_supabase_storage()
+
+    if _retain_blob(storage_path):
+        if not use_supabase and is_file_missing(storage_path):
+            _write_local_blob(file, storage_path)
+        logger.info(f"Upload matched stored blob: {storage_path}")
+    else:
+        try:
+            if use_supabase:
+                from apps.api.utils.supabase_storage import upload_stream
+
+                # upsert: a blob whose row was rolled back may already be in the bucket
+                result = upload_stream(
+                    file, storage_path, content_type=content_type, max_size_mb=max_size_mb, upsert=True,
+                )
+                if result.sha256 != sha256:
+                    raise StorageError('Upload changed while it was being stored')
+            else:
+                _write_local_blob(file, storage_path)
+        except StorageError:
+            raise
+        except Exception as e:
+            logger.error(f"Blob upload failed: {e}")
+            raise StorageError(f"Failed to upload file: {e}")
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredBlob(
+                    sha256=sha256,
+                    storage_path=storage_path,
+                    size=size,
+                    content_type=content_type,
+                    ref_count=1,
+                ))
+        except IntegrityError:
+            # The same content was stored concurrently; share its row
+            _retain_blob(storage_path)
+        logger.info(f"Blob stored: {storage_path} ({size} bytes)")
+
+    if use_supabase:
+        from apps.api.utils.supabase_storage import get_public_url
+
+        return get_public_url(storage_path)
+    return storage_path
+
+
+def _delete_object(file_ref: str) -> bool:
+    from apps.api.utils.storage_stream import local_upload_path, normalize_file_ref, remote_content_allowed
+
+    if file_ref.startswith(('http://', 'https://')):
+        if not (_is_supabase_configured() and remote_content_allowed(file_ref)):
+            return False
+        from apps.api.utils.supabase_storage import delete_file as supabase_delete
+
+        return supabase_delete(file_ref)
+
+    try:
+        full_path = local_upload_path(normalize_file_ref(file_ref))
+    except PermissionError:
+        return False
+    if os.path.isfile(full_path):
+        os.remove(full_path)
+        return True
+    if _use_supabase_storage():
+        from apps.api.utils.supabase_storage import delete_file as supabase_delete
+
+        return supabase_delete(file_ref)
+    return False
+
+
+def delete_file(file_ref: str) -> bool:
+    """
+    Delete a stored file, or drop one reference to a shared blob.
+
+    A blob is only removed from storage when its last reference is released.
+    The object itself is deleted after the caller commits, so a rollback
+    leaves both the ``stored_blobs`` row and the file in place. A concurrent
+    upload of the same bytes may store the blob again in between; the
+    deletion is skipped when a ``stored_blobs`` row for the path exists by
+    then.
+
+    Returns:
+        True if the stored object will be removed on commit
+    """
+    from apps.api import db
+    from apps.api.utils.table_cache import after_commit
+
+    if not file_ref:
+        return False
+
+    storage_path = blob_path(file_ref)
+    if storage_path:
+        from apps.api.models.stored_blob import StoredBlob
+
+        released = db.session.execute(
+            update(StoredBlob)
+            .where(StoredBlob.storage_path == storage_path)
+            .values(ref_count=StoredBlob.ref_count - 1)
+        ).rowcount
+        if released:
+            # Only the release that takes the count to zero removes the row and object
+            removed = db.session.execute(
+                sa_delete(StoredBlob)
+                .where(StoredBlob.storage_path == storage_path, StoredBlob.ref_count <= 0)
+            ).rowcount
+            if not removed:
+                return False
+
+    app = current_app._get_current_object()
+
+    def remove():
+        with app.app_context():
+            if storage_path and _blob_row_exists(storage_path):
+                logger.info(f"Blob re-stored before its deletion ran, keeping: {storage_path}")
+                return
+            _delete_object(str(file_ref))
+
+    after_commit(db.session, remove)
+    return True
+
+
 def get_file_url(file_path: str, base_url: Optional[str] = None) -> str:
     """
     Get the public URL for a file.
@@ -427,6 +747,62 @@ def is_file_missing(path: str) -> bool:
     return not os.path.exists(full_path)
 
 
+def _read_response(resp, max_bytes: Optional[int]) -> bytes:
+    """Read a streamed response body, stopping at ``max_bytes``."""
+    try:
+        resp.raise_for_status()
+        buffer = BytesIO()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            buffer.write(chunk)
+            if max_bytes is not None and buffer.tell() > max_bytes:
+                raise FileTooLargeError(f"File exceeds {max_bytes} bytes")
+        return buffer.getvalue()
+    finally:
+        resp.close()
+
+
+def read_file_bytes(file_ref: str, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Load a stored file by URL, local upload path or storage path.
+
+    Resolves references the same way the download endpoints do. Remote
+    files are streamed and abandoned once they pass ``max_bytes``.
+
+    Raises:
+        FileNotFoundError: Nothing stored under ``file_ref``
+        PermissionError: URL outside ALLOWED_FILE_DOMAINS or path outside UPLOAD_FOLDER
+        FileTooLargeError: File larger than ``max_bytes``
+    """
+    from apps.api.utils import http_client
+    from apps.api.utils.storage_stream import local_upload_path, normalize_file_ref, remote_content_allowed
+
+    if not file_ref:
+        raise FileNotFoundError("Missing file reference")
+
+    normalized = normalize_file_ref(file_ref)
+    if normalized.startswith(('http://', 'https://')):
+        if not remote_content_allowed(normalized):
+            raise PermissionError("Untrusted file domain")
+        return _read_response(http_client.get(normalized, stream=True), max_bytes)
+
+    full_path = local_upload_path(normalized)
+    if os.path.exists(full_path):
+        if max_bytes is not None and os.path.getsize(full_path) > max_bytes:
+            raise FileTooLargeError(f"File exceeds {max_bytes} bytes")
+        with open(full_path, 'rb') as f:
+            return f.read()
+
+    # DB values may store storage paths instead of absolute URLs
+    if _is_supabase_configured():
+        from apps.api.utils.supabase_storage import get_signed_url
+
+        signed = get_signed_url(normalized, expires_in=300)
+        if signed and remote_content_allowed(signed):
+            return _read_response(http_client.get(signed, upstream='supabase', stream=True), max_bytes)
+
+    raise FileNotFoundError("File not found")
+
+
 # Convenience wrappers for specific file types
 
 def save_profile_picture(
@@ -435,8 +811,8 @@ def save_profile_picture(
     municipality_slug: str,
     user_type: str = 'residents'
 ) -> str:
-    """Save user profile picture."""
-    return save_file(
+    """Save user profile picture (recompressed, metadata stripped)."""
+    return save_image(
         file=file,
         category='profiles',
         municipality_slug=municipality_slug,
@@ -444,7 +820,7 @@ def save_profile_picture(
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
         max_size_mb=5,
         user_type=user_type
-    )
+    ).path
 
 
 def save_verification_document(
@@ -454,11 +830,13 @@ def save_verification_document(
     doc_type: str,
     user_type: str = 'residents'
 ) -> str:
-    """Save user verification document."""
+    """Save user verification document (shared blob when dedup is enabled)."""
     allowed_doc_types = {'valid_id_front', 'valid_id_back', 'selfie_with_id'}
     if doc_type not in allowed_doc_types:
         raise StorageError('Unsupported verification document type')
     
+    if current_app.config.get('UPLOAD_DEDUP_ENABLED', True):
+        return save_blob(file, allowed_extensions=ALLOWED_IMAGE_EXTENSIONS, max_size_mb=5)
     return save_file(
         file=file,
         category='verification',
@@ -474,16 +852,17 @@ def save_marketplace_image(
     file: Union[FileStorage, BinaryIO],
     item_id: int,
     municipality_slug: str
-) -> str:
-    """Save marketplace item image."""
-    return save_file(
+) -> SavedImage:
+    """Save marketplace item image with list/detail variants."""
+    return save_image(
         file=file,
         category='marketplace',
         municipality_slug=municipality_slug,
         subcategory=f"item_{item_id}",
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
         max_size_mb=5,
-        user_type='residents'
+        user_type='residents',
+        variants=('thumb', 'medium'),
     )
 
 
@@ -492,8 +871,8 @@ def save_issue_attachment(
     issue_id: int,
     municipality_slug: str
 ) -> str:
-    """Save issue report attachment."""
-    return save_file(
+    """Save issue report attachment (images are recompressed, documents stored as-is)."""
+    return save_image(
         file=file,
         category='issues',
         municipality_slug=municipality_slug,
@@ -501,23 +880,24 @@ def save_issue_attachment(
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS,
         max_size_mb=10,
         user_type='residents'
-    )
+    ).path
 
 
 def save_announcement_image(
     file: Union[FileStorage, BinaryIO],
     announcement_id: int,
     municipality_slug: str
-) -> str:
-    """Save announcement image."""
-    return save_file(
+) -> SavedImage:
+    """Save announcement image with list/detail variants."""
+    return save_image(
         file=file,
         category='announcements',
         municipality_slug=municipality_slug,
         subcategory=f"announcement_{announcement_id}",
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
         max_size_mb=5,
-        user_type='admins'
+        user_type='admins',
+        variants=('thumb', 'medium'),
     )
 
 
@@ -526,7 +906,9 @@ def save_benefit_document(
     application_id: int,
     municipality_slug: str
 ) -> str:
-    """Save benefit application document."""
+    """Save benefit application document (shared blob when dedup is enabled)."""
+    if current_app.config.get('UPLOAD_DEDUP_ENABLED', True):
+        return save_blob(file, allowed_extensions=ALLOWED_DOCUMENT_EXTENSIONS, max_size_mb=10)
     return save_file(
         file=file,
         category='benefits',
@@ -561,7 +943,9 @@ def save_document_request_file(
     request_id: int,
     municipality_slug: str
 ) -> str:
-    """Save document request supporting file."""
+    """Save document request supporting file (shared blob when dedup is enabled)."""
+    if current_app.config.get('UPLOAD_DEDUP_ENABLED', True):
+        return save_blob(file, allowed_extensions=ALLOWED_DOCUMENT_EXTENSIONS, max_size_mb=10)
     return save_file(
         file=file,
         category='document_requests',
@@ -0,0 +1,150 @@
+"""Streaming proxy for stored files.
+
+ID scans, generated PDFs and proof images are stored either as absolute URLs
+(Supabase public/signed URLs), as paths under ``UPLOAD_FOLDER`` or as bare
+Supabase storage paths. The admin, documents, benefits and special-status
+download endpoints used to fetch remote files with ``resp.content`` and wrap
+them in a ``BytesIO``, so every open document sat in worker memory until the
+last byte was sent. ``stream_stored_file`` serves all three kinds without
+buffering:
+
+  - remote files are fetched with ``stream=True`` and relayed in
+    ``CHUNK_SIZE`` pieces; the client's ``Range``/``If-None-Match`` headers
+    are forwarded upstream and ``Content-Length``, ``Content-Range``,
+    ``ETag`` and ``Last-Modified`` are passed back with the upstream status
+    (200, 206, 304 or 416), so PDF viewers can seek and revalidate;
+  - local files go through ``send_file(..., conditional=True)``, which
+    answers ``Range`` and conditional requests from the file itself.
+
+Errors: ``PermissionError`` for URLs outside ``ALLOWED_FILE_DOMAINS`` or paths
+outside ``UPLOAD_FOLDER``, ``FileNotFoundError`` when nothing is stored under
+the reference, ``requests.RequestException`` when a remote URL fails.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import unicodedata
+from typing import Optional
+from urllib.parse import quote, urlparse
+
+import requests
+from flask import Response, current_app, request, send_file
+
+from apps.api.utils import http_client
+from apps.api.utils.storage_handler import _is_supabase_configured
+
+
+CHUNK_SIZE = 64 * 1024
+FORWARD_REQUEST_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since')
+FORWARD_RESPONSE_HEADERS = ('Content-Length', 'Content-Range', 'Accept-Ranges', 'ETag', 'Last-Modified')
+# Upstream answers relayed as-is; anything else >= 400 raises
+PASSTHROUGH_ERRORS = frozenset({416})
+
+
+def remote_content_allowed(url: str) -> bool:
+    allowed = current_app.config.get('ALLOWED_FILE_DOMAINS') or []
+    if not allowed:
+        return True
+    return urlparse(url).netloc in allowed
+
+
+def normalize_file_ref(file_ref: str) -> str:
+    return str(file_ref).replace('\\', '/').lstrip('/')
+
+
+def local_upload_path(normalized: str) -> str:
+    """Absolute path of ``normalized`` under UPLOAD_FOLDER (may not exist)."""
+    upload_root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER') or 'uploads')
+    full_path = os.path.abspath(os.path.join(upload_root, normalized))
+    if not full_path.startswith(upload_root + os.sep):
+        raise PermissionError("Invalid file path")
+    return full_path
+
+
+def _guess_type(download_name: str) -> str:
+    return mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+
+def _set_disposition(response: Response, download_name: str, as_attachment: bool) -> None:
+    """Same Content-Disposition ``send_file`` would produce."""
+    disposition = 'attachment' if as_attachment else 'inline'
+    simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+    if simple == download_name:
+        response.headers.set('Content-Disposition', disposition, filename=download_name)
+    else:
+        quoted = quote(download_name, safe="!#$&+-.^_`|~")
+        response.headers.set(
+            'Content-Disposition', disposition, filename=simple, **{'filename*': f"UTF-8''{quoted}"}
+        )
+
+
+def _proxy(url: str, download_name: str, as_attachment: bool, upstream: Optional[str] = None) -> Response:
+    headers = {name: request.headers[name] for name in FORWARD_REQUEST_HEADERS if name in request.headers}
+    # Compressed bodies would be decoded by iter_content and break Content-Length
+    headers['Accept-Encoding'] = 'identity'
+    resp = http_client.get(url, upstream=upstream, headers=headers, stream=True)
+    if resp.status_code >= 400 and resp.status_code not in PASSTHROUGH_ERRORS:
+        try:
+            resp.raise_for_status()
+        finally:
+            resp.close()
+
+    def body():
+        try:
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    yield chunk
+        finally:
+            resp.close()
+
+    content_type = resp.headers.get('Content-Type') or ''
+    if not content_type or content_type.startswith('application/octet-stream'):
+        content_type = _guess_type(download_name)
+    response = Response(body(), status=resp.status_code, content_type=content_type, direct_passthrough=True)
+    for name in FORWARD_RESPONSE_HEADERS:
+        if name in resp.headers:
+            response.headers[name] = resp.headers[name]
+    _set_disposition(response, download_name, as_attachment)
+    response.cache_control.no_cache = True
+    # The generator may never run if the client goes away first
+    response.call_on_close(resp.close)
+    return response
+
+
+def stream_stored_file(file_ref: str, download_name: str = 'document', as_attachment: bool = False) -> Response:
+    """Serve a stored file by URL, local upload path or storage path without buffering it."""
+    if not file_ref:
+        raise FileNotFoundError("Missing file reference")
+
+    normalized = normalize_file_ref(file_ref)
+    if normalized.startswith(('http://', 'https://')):
+        if not remote_content_allowed(normalized):
+            raise PermissionError("Untrusted file domain")
+        return _proxy(normalized, download_name, as_attachment)
+
+    full_path = local_upload_path(normalized)
+    if os.path.exists(full_path):
+        return send_file(
+            full_path,
+            mimetype=mimetypes.guess_type(full_path)[0] or _guess_type(download_name),
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+        )
+
+    # Support DB values that store storage paths instead of absolute URLs.
+    if _is_supabase_configured():
+        from apps.api.utils.supabase_storage import get_signed_url
+
+        try:
+            signed = get_signed_url(normalized, expires_in=300)
+        except Exception:
+            signed = None
+        if signed and remote_content_allowed(signed):
+            try:
+                return _proxy(signed, download_name, as_attachment, upstream='supabase')
+            except requests.RequestException as exc:
+                current_app.logger.warning("Signed storage fetch failed for %s: %s", normalized, exc)
+
+    raise FileNotFoundError("File not found")
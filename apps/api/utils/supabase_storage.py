@@ -5,8 +5,11 @@ This module provides a centralized interface for all file storage operations
 using Supabase Storage REST API directly (no supabase package needed).
 
 Features:
-- Upload files directly to Supabase Storage via REST API
+- Upload files directly to Supabase Storage via REST API, streamed from the
+  file object (resumable TUS uploads above SUPABASE_RESUMABLE_THRESHOLD_MB)
 - Generate public URLs for files
+- Signed URLs for private objects, cached per (bucket, path) and signed in
+  batches for list views
 - Municipality-scoped storage paths
 - MIME type validation
 - File size limits
@@ -14,8 +17,11 @@ Features:
 Usage:
     from apps.api.utils.supabase_storage import (
         upload_file,
+        upload_stream,
         upload_bytes,
         get_public_url,
+        get_signed_url,
+        get_signed_urls,
         delete_file,
         is_supabase_url,
         is_legacy_path,
@@ -24,19 +30,26 @@ Usage:
 from __future__ import annotations
 
 from apps.api.utils.time import utc_now
+import base64
+import hashlib
 import os
 import uuid
 import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime
-from urllib.parse import urlparse, unquote
+from urllib.parse import urljoin, urlparse, unquote
 from io import BytesIO
-from typing import Optional, Tuple, Union, BinaryIO
+from typing import Dict, Iterable, List, Optional, Tuple, Union, BinaryIO
 from pathlib import Path
 
 import requests
 from flask import current_app
 from werkzeug.utils import secure_filename
 
+from apps.api.utils import http_client
+from apps.api.utils.table_cache import BoundedCache
+
 logger = logging.getLogger(__name__)
 
 # Storage bucket name - configurable via env
@@ -58,6 +71,24 @@ ALLOWED_DOCUMENT_MIMES = {
     'image/png',
 }
 
+# Paths per multi-object sign request
+SIGN_BATCH_SIZE = 100
+
+# Supabase only accepts 6 MiB TUS chunks (the last one may be shorter)
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+TUS_MAX_RETRIES = 3
+
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
 
 class SupabaseStorageError(Exception):
     """Custom exception for Supabase Storage operations."""
@@ -188,6 +219,186 @@ def build_storage_path(
     return '/'.join(parts)
 
 
+@dataclass(frozen=True)
+class UploadResult:
+    """Where a streamed upload landed, with the size and SHA-256 of what was sent."""
+
+    storage_path: str
+    size: int
+    sha256: str
+
+
+class _UploadDigest:
+    """Size and SHA-256 of an upload, fed as the body is read.
+
+    Resumed TUS chunks re-read bytes the server lost; those are only counted once.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def update(self, offset: int, data: bytes) -> None:
+        end = offset + len(data)
+        if end <= self.size:
+            return
+        self._hash.update(data[self.size - offset:])
+        self.size = end
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class _BodyReader:
+    """``length`` bytes of ``file`` from ``offset``, handed to requests as a streamed body."""
+
+    def __init__(self, file: BinaryIO, offset: int, length: int, digest: _UploadDigest):
+        self._file = file
+        self._position = offset
+        self._remaining = length
+        self._digest = digest
+        file.seek(offset)
+
+    def __len__(self) -> int:
+        return self._remaining
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._digest.update(self._position, data)
+        self._position += len(data)
+        self._remaining -= len(data)
+        return data
+
+
+def _guess_content_type(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    return CONTENT_TYPES.get(ext, 'application/octet-stream')
+
+
+def _resumable_threshold() -> int:
+    return int(float(current_app.config.get('SUPABASE_RESUMABLE_THRESHOLD_MB', 6)) * 1024 * 1024)
+
+
+def _upload_simple(
+    supabase_url: str, service_key: str, bucket: str, storage_path: str,
+    file: BinaryIO, size: int, content_type: str, upsert: bool, digest: _UploadDigest,
+) -> None:
+    headers = _get_headers(service_key, content_type)
+    if upsert:
+        headers['x-upsert'] = 'true'
+    # A streamed body cannot be replayed, so the client must not retry it
+    response = http_client.post(
+        f"{supabase_url}/storage/v1/object/{bucket}/{storage_path}",
+        upstream='supabase',
+        retries=0,
+        headers=headers,
+        data=_BodyReader(file, 0, size, digest),
+    )
+    if response.status_code not in (200, 201):
+        raise SupabaseStorageError(f"Upload failed: {response.status_code} - {response.text}")
+
+
+def _upload_resumable(
+    supabase_url: str, service_key: str, bucket: str, storage_path: str,
+    file: BinaryIO, size: int, content_type: str, upsert: bool, digest: _UploadDigest,
+) -> None:
+    """Upload through Supabase's TUS endpoint in TUS_CHUNK_SIZE PATCHes, resuming after failures."""
+    endpoint = f"{supabase_url}/storage/v1/upload/resumable"
+    metadata = ','.join(
+        f"{key} {base64.b64encode(value.encode()).decode()}"
+        for key, value in (('bucketName', bucket), ('objectName', storage_path), ('contentType', content_type))
+    )
+    headers = _get_headers(service_key)
+    headers.update({'Tus-Resumable': '1.0.0', 'Upload-Length': str(size), 'Upload-Metadata': metadata})
+    if upsert:
+        headers['x-upsert'] = 'true'
+    response = http_client.post(endpoint, upstream='supabase', headers=headers)
+    if response.status_code != 201 or not response.headers.get('Location'):
+        raise SupabaseStorageError(f"Upload failed: {response.status_code} - {response.text}")
+    location = urljoin(endpoint, response.headers['Location'])
+
+    tus_headers = _get_headers(service_key)
+    tus_headers['Tus-Resumable'] = '1.0.0'
+    offset = 0
+    failures = 0
+    while offset < size:
+        length = min(TUS_CHUNK_SIZE, size - offset)
+        headers = dict(tus_headers, **{
+            'Upload-Offset': str(offset),
+            'Content-Type': 'application/offset+octet-stream',
+        })
+        try:
+            response = http_client.request(
+                'PATCH', location, upstream='supabase', retries=0, headers=headers,
+                data=_BodyReader(file, offset, length, digest),
+            )
+            if response.status_code == 204:
+                offset = int(response.headers.get('Upload-Offset') or offset + length)
+                failures = 0
+                continue
+            error = f"{response.status_code} - {response.text}"
+        except requests.RequestException as exc:
+            error = str(exc)
+
+        failures += 1
+        if failures > TUS_MAX_RETRIES:
+            raise SupabaseStorageError(f"Upload failed at byte {offset} of {size}: {error}")
+        time.sleep(min(0.5 * 2 ** (failures - 1), 5.0))
+        # Resume from whatever the server kept
+        head = http_client.request('HEAD', location, upstream='supabase', headers=tus_headers)
+        if head.status_code in (404, 410):
+            raise SupabaseStorageError(f"Upload expired at byte {offset} of {size}: {error}")
+        offset = int(head.headers.get('Upload-Offset') or offset)
+
+
+def upload_stream(
+    file: BinaryIO,
+    storage_path: str,
+    content_type: Optional[str] = None,
+    max_size_mb: int = 10,
+    bucket: Optional[str] = None,
+    upsert: bool = False,
+) -> UploadResult:
+    """
+    Upload a seekable file object to ``storage_path`` without reading it into memory.
+
+    The body is streamed straight from ``file``; files larger than
+    SUPABASE_RESUMABLE_THRESHOLD_MB use Supabase's resumable (TUS) endpoint so
+    a dropped connection only re-sends the current chunk.
+
+    Returns:
+        UploadResult with the storage path, byte size and SHA-256 of the content
+
+    Raises:
+        SupabaseStorageError: If the file is too large or the upload fails
+    """
+    if not storage_path:
+        raise SupabaseStorageError("Storage path is required")
+
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    if size > max_size_mb * 1024 * 1024:
+        raise SupabaseStorageError(f"File size exceeds {max_size_mb}MB limit")
+
+    supabase_url, service_key = _get_supabase_config()
+    bucket = _get_storage_bucket(bucket)
+    content_type = content_type or _guess_content_type(storage_path)
+    digest = _UploadDigest()
+    upload = _upload_resumable if size > _resumable_threshold() else _upload_simple
+    try:
+        upload(supabase_url, service_key, bucket, storage_path, file, size, content_type, upsert, digest)
+    finally:
+        file.seek(0)
+    if digest.size != size:
+        raise SupabaseStorageError(f"Upload sent {digest.size} of {size} bytes")
+    return UploadResult(storage_path=storage_path, size=size, sha256=digest.hexdigest())
+
+
 def upload_file(
     file: BinaryIO,
     category: str,
@@ -220,22 +431,6 @@ def upload_file(
         SupabaseStorageError: If upload fails
     """
     try:
-        # Ensure file pointer is at start
-        file.seek(0)
-        
-        # Check file size
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)
-        
-        max_size_bytes = max_size_mb * 1024 * 1024
-        if file_size > max_size_bytes:
-            raise SupabaseStorageError(f"File size exceeds {max_size_mb}MB limit")
-        
-        # Read file content
-        content = file.read()
-        file.seek(0)
-        
         # Generate unique filename
         safe_filename = secure_filename(original_filename)
         unique_filename = generate_unique_filename(safe_filename)
@@ -249,45 +444,21 @@ def upload_file(
             user_type=user_type
         )
         
-        # Get Supabase config
-        supabase_url, service_key = _get_supabase_config()
-        bucket = _get_storage_bucket(bucket)
-        
-        # Determine content type
-        if not content_type:
-            # Try to guess from extension
-            ext = os.path.splitext(original_filename)[1].lower()
-            content_type_map = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.webp': 'image/webp',
-                '.pdf': 'application/pdf',
-                '.doc': 'application/msword',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            }
-            content_type = content_type_map.get(ext, 'application/octet-stream')
-        
-        # Upload via REST API
-        upload_url = f"{supabase_url}/storage/v1/object/{bucket}/{storage_path}"
-        headers = {
-            'Authorization': f'Bearer {service_key}',
-            'apikey': service_key,
-            'Content-Type': content_type,
-        }
-        
-        response = requests.post(upload_url, headers=headers, data=content)
-        
-        if response.status_code not in (200, 201):
-            raise SupabaseStorageError(f"Upload failed: {response.status_code} - {response.text}")
+        result = upload_stream(
+            file,
+            storage_path,
+            content_type=content_type or _guess_content_type(original_filename),
+            max_size_mb=max_size_mb,
+            bucket=bucket,
+        )
         
         # Build public URL (optional; private buckets should use signed URLs)
         public_url = None
         if public:
-            public_url = f"{supabase_url}/storage/v1/object/public/{bucket}/{storage_path}"
+            supabase_url, _ = _get_supabase_config()
+            public_url = f"{supabase_url}/storage/v1/object/public/{_get_storage_bucket(bucket)}/{storage_path}"
         
-        logger.info(f"File uploaded to Supabase Storage: {storage_path}")
+        logger.info(f"File uploaded to Supabase Storage: {storage_path} ({result.size} bytes, sha256 {result.sha256})")
         
         return storage_path, public_url
     
@@ -312,59 +483,8 @@ def upload_file_to_path(
         storage_path
     """
     try:
-        if not storage_path:
-            raise SupabaseStorageError("Storage path is required")
-
-        # Ensure file pointer is at start
-        file.seek(0)
-
-        # Check file size
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)
-
-        max_size_bytes = max_size_mb * 1024 * 1024
-        if file_size > max_size_bytes:
-            raise SupabaseStorageError(f"File size exceeds {max_size_mb}MB limit")
-
-        # Read file content
-        content = file.read()
-        file.seek(0)
-
-        # Determine content type
-        if not content_type:
-            # Try to guess from extension
-            ext = os.path.splitext(storage_path)[1].lower()
-            content_type_map = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.webp': 'image/webp',
-                '.pdf': 'application/pdf',
-                '.doc': 'application/msword',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            }
-            content_type = content_type_map.get(ext, 'application/octet-stream')
-
-        # Get Supabase config
-        supabase_url, service_key = _get_supabase_config()
-        bucket = _get_storage_bucket(bucket)
-
-        # Upload via REST API
-        upload_url = f"{supabase_url}/storage/v1/object/{bucket}/{storage_path}"
-        headers = {
-            'Authorization': f'Bearer {service_key}',
-            'apikey': service_key,
-            'Content-Type': content_type,
-        }
-
-        response = requests.post(upload_url, headers=headers, data=content)
-
-        if response.status_code not in (200, 201):
-            raise SupabaseStorageError(f"Upload failed: {response.status_code} - {response.text}")
-
-        logger.info(f"File uploaded to Supabase Storage: {storage_path}")
+        result = upload_stream(file, storage_path, content_type=content_type, max_size_mb=max_size_mb, bucket=bucket)
+        logger.info(f"File uploaded to Supabase Storage: {storage_path} ({result.size} bytes, sha256 {result.sha256})")
         return storage_path
 
     except SupabaseStorageError:
@@ -384,6 +504,7 @@ def upload_bytes(
     content_type: str = 'application/octet-stream',
     bucket: Optional[str] = None,
     public: bool = True,
+    max_size_mb: int = 10,
 ) -> Tuple[str, Optional[str]]:
     """
     Upload raw bytes to Supabase Storage.
@@ -409,6 +530,7 @@ def upload_bytes(
         subcategory=subcategory,
         user_type=user_type,
         content_type=content_type,
+        max_size_mb=max_size_mb,
         bucket=bucket,
         public=public,
     )
@@ -434,13 +556,76 @@ def get_public_url(storage_path: str, bucket: Optional[str] = None) -> str:
         raise SupabaseStorageError(f"Failed to get public URL: {e}")
 
 
+class SignedUrlCache(BoundedCache):
+    """
+    Signed URLs per (bucket, path), kept until they get close to expiring.
+
+    A URL is signed for the caller's ``expires_in`` plus ``extra_seconds`` and
+    handed out again while it still has at least the requested lifetime left,
+    so repeated views of the same object within ``extra_seconds`` cost no
+    upstream call and every caller still gets the validity it asked for.
+    """
+
+    def __init__(self, extra_seconds: float = 900, max_entries: int = 4096):
+        super().__init__(ttl_seconds=extra_seconds, max_entries=max_entries)
+
+    @property
+    def extra_seconds(self) -> float:
+        return self.ttl_seconds
+
+    def get(self, bucket: str, path: str, min_remaining: float) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return super().get(bucket, path, None, min_remaining=min_remaining)
+
+    def put(self, bucket: str, path: str, url: str, expires_at: float) -> None:
+        if self.enabled:
+            super().put(bucket, path, url, expires_at=expires_at)
+
+    def invalidate(self, bucket: Optional[str] = None, path: Optional[str] = None) -> None:
+        if bucket is None:
+            super().invalidate()
+        elif path is None:
+            super().invalidate(bucket)
+        else:
+            self.discard(bucket, path)
+
+
+def get_signed_url_cache() -> SignedUrlCache:
+    """Return the signed URL cache bound to the current app."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('signed_url_cache')
+    if cache is None:
+        cache = SignedUrlCache(
+            extra_seconds=app.config.get('SUPABASE_SIGNED_URL_CACHE_SECONDS', 900),
+            max_entries=app.config.get('SUPABASE_SIGNED_URL_CACHE_SIZE', 4096),
+        )
+        app.extensions['signed_url_cache'] = cache
+    return cache
+
+
+def _absolute_signed_url(supabase_url: str, signed_url: str) -> str:
+    """Supabase sometimes returns /object/sign/...; normalize to a full /storage/v1/object/sign/... URL."""
+    if signed_url.startswith('http://') or signed_url.startswith('https://'):
+        return signed_url
+    if signed_url.startswith('/storage/'):
+        return f"{supabase_url}{signed_url}"
+    if signed_url.startswith('/object/'):
+        return f"{supabase_url}/storage/v1{signed_url}"
+    if signed_url.startswith('storage/'):
+        return f"{supabase_url}/{signed_url}"
+    if signed_url.startswith('object/'):
+        return f"{supabase_url}/storage/v1/{signed_url}"
+    return f"{supabase_url}/{signed_url.lstrip('/')}"
+
+
 def get_signed_url(storage_path: str, expires_in: int = 3600, bucket: Optional[str] = None) -> str:
     """
     Get a signed (temporary) URL for a file in Supabase Storage.
     
     Args:
         storage_path: Path to file in storage bucket
-        expires_in: URL expiration time in seconds (default: 1 hour)
+        expires_in: Minimum remaining validity of the URL in seconds (default: 1 hour)
     
     Returns:
         Signed URL string
@@ -449,29 +634,27 @@ def get_signed_url(storage_path: str, expires_in: int = 3600, bucket: Optional[s
         supabase_url, service_key = _get_supabase_config()
         bucket = _get_storage_bucket(bucket)
         storage_path = _normalize_storage_path(storage_path, bucket)
+
+        cache = get_signed_url_cache()
+        cached = cache.get(bucket, storage_path, expires_in)
+        if cached:
+            return cached
+        lifetime = int(expires_in + cache.extra_seconds)
         
         url = f"{supabase_url}/storage/v1/object/sign/{bucket}/{storage_path}"
         headers = _get_headers(service_key, 'application/json')
-        payload = {'expiresIn': expires_in}
+        payload = {'expiresIn': lifetime}
         
-        response = requests.post(url, headers=headers, json=payload)
+        started = time.monotonic()
+        response = http_client.post(url, upstream='supabase', idempotent=True, headers=headers, json=payload)
         
         if response.status_code == 200:
             data = response.json()
             signed_url = data.get('signedURL') or data.get('signedUrl', '')
             if signed_url:
-                if signed_url.startswith('http://') or signed_url.startswith('https://'):
-                    return signed_url
-                # Supabase sometimes returns /object/sign/...; normalize to /storage/v1/object/sign/...
-                if signed_url.startswith('/storage/'):
-                    return f"{supabase_url}{signed_url}"
-                if signed_url.startswith('/object/'):
-                    return f"{supabase_url}/storage/v1{signed_url}"
-                if signed_url.startswith('storage/'):
-                    return f"{supabase_url}/{signed_url}"
-                if signed_url.startswith('object/'):
-                    return f"{supabase_url}/storage/v1/{signed_url}"
-                return f"{supabase_url}/{signed_url.lstrip('/')}"
+                signed_url = _absolute_signed_url(supabase_url, signed_url)
+                cache.put(bucket, storage_path, signed_url, started + lifetime)
+                return signed_url
         
         raise SupabaseStorageError(f"Failed to create signed URL: {response.text}")
     except SupabaseStorageError:
@@ -481,12 +664,75 @@ def get_signed_url(storage_path: str, expires_in: int = 3600, bucket: Optional[s
         raise SupabaseStorageError(f"Failed to get signed URL: {e}")
 
 
+def get_signed_urls(
+    storage_paths: Iterable[str],
+    expires_in: int = 3600,
+    bucket: Optional[str] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Get signed URLs for several files with one request per SIGN_BATCH_SIZE paths.
+
+    Cached URLs are reused; only the rest go to ``POST /object/sign/{bucket}``.
+
+    Args:
+        storage_paths: Paths (or storage URLs) of files in the bucket
+        expires_in: Minimum remaining validity of each URL in seconds
+
+    Returns:
+        Mapping of each given path to its signed URL (None if Supabase could not sign it)
+    """
+    try:
+        supabase_url, service_key = _get_supabase_config()
+        bucket = _get_storage_bucket(bucket)
+        cache = get_signed_url_cache()
+
+        results: Dict[str, Optional[str]] = {}
+        missing: Dict[str, List[str]] = {}
+        for original in storage_paths:
+            if not original or original in results:
+                continue
+            path = _normalize_storage_path(original, bucket)
+            results[original] = cache.get(bucket, path, expires_in)
+            if results[original] is None:
+                missing.setdefault(path, []).append(original)
+
+        lifetime = int(expires_in + cache.extra_seconds)
+        paths = list(missing)
+        for start in range(0, len(paths), SIGN_BATCH_SIZE):
+            chunk = paths[start:start + SIGN_BATCH_SIZE]
+            started = time.monotonic()
+            response = http_client.post(
+                f"{supabase_url}/storage/v1/object/sign/{bucket}",
+                upstream='supabase',
+                idempotent=True,
+                headers=_get_headers(service_key, 'application/json'),
+                json={'expiresIn': lifetime, 'paths': chunk},
+            )
+            if response.status_code != 200:
+                raise SupabaseStorageError(f"Failed to create signed URLs: {response.text}")
+            for item in response.json() or []:
+                path = item.get('path')
+                signed_url = item.get('signedURL') or item.get('signedUrl')
+                if item.get('error') or not signed_url or path not in missing:
+                    continue
+                signed_url = _absolute_signed_url(supabase_url, signed_url)
+                cache.put(bucket, path, signed_url, started + lifetime)
+                for original in missing[path]:
+                    results[original] = signed_url
+        return results
+    except SupabaseStorageError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get signed URLs: {e}")
+        raise SupabaseStorageError(f"Failed to get signed URLs: {e}")
+
+
 def delete_file(storage_path: str, bucket: Optional[str] = None) -> bool:
     """
     Delete a file from Supabase Storage.
     
     Args:
-        storage_path: Path to file in storage bucket
+        storage_path: Path to file in storage bucket (public URLs are accepted)
     
     Returns:
         True if deleted successfully
@@ -494,11 +740,13 @@ def delete_file(storage_path: str, bucket: Optional[str] = None) -> bool:
     try:
         supabase_url, service_key = _get_supabase_config()
         bucket = _get_storage_bucket(bucket)
+        storage_path = _normalize_storage_path(storage_path, bucket)
         
         url = f"{supabase_url}/storage/v1/object/{bucket}/{storage_path}"
         headers = _get_headers(service_key)
         
-        response = requests.delete(url, headers=headers)
+        response = http_client.delete(url, upstream='supabase', headers=headers)
+        get_signed_url_cache().invalidate(bucket, storage_path)
         
         if response.status_code in (200, 204):
             logger.info(f"File deleted from Supabase Storage: {storage_path}")
@@ -529,7 +777,7 @@ def file_exists(storage_path: str, bucket: Optional[str] = None) -> bool:
         url = f"{supabase_url}/storage/v1/object/info/public/{bucket}/{storage_path}"
         headers = _get_headers(service_key)
         
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, upstream='supabase', headers=headers)
         return response.status_code == 200
     except Exception:
         return False
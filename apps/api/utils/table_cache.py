@@ -0,0 +1,164 @@
+"""Bounded in-process caches and commit-time table invalidation.
+
+Admin stats, list totals and public reference responses cache query results
+per process and drop them when a commit in this process writes the tables
+they read; signed storage URLs reuse the same cache with per-entry expiry.
+They share:
+
+  - ``BoundedCache``: TTL entries keyed by (namespace, key), evicted least
+    recently used past ``max_entries`` so request-controlled keys (filters,
+    ranges) cannot grow it without limit;
+  - one set of ``Session`` hooks that collects the table names written by
+    each flush or bulk/Core DML statement run through the session and, after
+    the commit, hands them to every callback registered with
+    ``on_tables_committed``. ``after_commit`` queues a one-off action for
+    the current transaction; rollbacks discard both.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Set, Tuple
+
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+
+_MISSING = object()
+
+
+class BoundedCache:
+    """TTL + LRU cache of values keyed by (namespace, key)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, namespace: str, key: Hashable, default: Any = None, min_remaining: float = 0) -> Any:
+        """Cached value, or ``default`` when missing or expiring within ``min_remaining`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return default
+            if entry[0] <= now + min_remaining:
+                self._entries.pop((namespace, key), None)
+                return default
+            self._entries.move_to_end((namespace, key))
+            return entry[1]
+
+    def put(self, namespace: str, key: Hashable, value: Any, expires_at: Optional[float] = None) -> Any:
+        """Store ``value`` for ``ttl_seconds``, or until ``expires_at`` (``time.monotonic()`` scale)."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                for entry_key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                    del self._entries[entry_key]
+            self._entries[(namespace, key)] = (now + self.ttl_seconds if expires_at is None else expires_at, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_or_compute(self, namespace: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return compute()
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = self.put(namespace, key, compute())
+        return value
+
+    def discard(self, namespace: str, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Drop the given namespaces (everything when none given)."""
+        with self._lock:
+            if not namespaces:
+                self._entries.clear()
+                return
+            for entry_key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[entry_key]
+
+
+# ---------------------------------------------------------------------------
+# Commit hooks
+# ---------------------------------------------------------------------------
+
+_table_listeners: List[Callable[[Set[str]], None]] = []
+
+
+def on_tables_committed(callback: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """Register ``callback(tables)`` to run (in an app context) after commits that wrote ``tables``."""
+    if callback not in _table_listeners:
+        _table_listeners.append(callback)
+    return callback
+
+
+def tables_of(models: Iterable[type]) -> Set[str]:
+    return {model.__tablename__ for model in models}
+
+
+def after_commit(session: Session, action: Callable[[], None]) -> None:
+    """Run ``action`` once the session's current transaction commits; dropped on rollback."""
+    session.info.setdefault('after_commit_actions', []).append(action)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_tables(session, flush_context):
+    tables = session.info.setdefault('changed_tables', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(type(obj), '__tablename__', None)
+        if table:
+            tables.add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_statement_table(orm_execute_state):
+    # Bulk update()/delete() and INSERT ... SELECT skip the flush; record their target table
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(getattr(orm_execute_state.statement, 'table', None), 'name', None)
+    if table:
+        orm_execute_state.session.info.setdefault('changed_tables', set()).add(table)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_after_commit(session):
+    tables: Optional[Set[str]] = session.info.pop('changed_tables', None)
+    actions = session.info.pop('after_commit_actions', None)
+    if tables and has_app_context():
+        for listener in list(_table_listeners):
+            try:
+                listener(tables)
+            except Exception:
+                logger.exception("Cache invalidation failed for %s", sorted(tables))
+    for action in actions or ():
+        try:
+            action()
+        except Exception:
+            logger.exception("After-commit action failed")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('changed_tables', None)
+    session.info.pop('after_commit_actions', None)